@@ -0,0 +1,72 @@
+"""add_avancement_dossiers_table
+
+Revision ID: 2f55d169a880
+Revises: 501cbc3402a6
+Create Date: 2026-10-17 10:12:31.518204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2f55d169a880'
+down_revision: Union[str, Sequence[str], None] = '501cbc3402a6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'avancement_dossiers',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('cabinet_id', sa.Integer(), nullable=False),
+        sa.Column('dossier_id', sa.Integer(), nullable=False),
+        sa.Column('date_limite', sa.Date(), nullable=False),
+        sa.Column('annee', sa.Integer(), nullable=False),
+        sa.Column('mois', sa.Integer(), nullable=False),
+        sa.Column('total_echeances', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('echeances_completes', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('total_declarations', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('declarations_completes', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['cabinet_id'], ['cabinets.id'], ),
+        sa.ForeignKeyConstraint(['dossier_id'], ['dossiers.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('dossier_id', 'date_limite', name='uq_avancement_dossier_date')
+    )
+    op.create_index(op.f('ix_avancement_dossiers_id'), 'avancement_dossiers', ['id'], unique=False)
+    op.create_index('ix_avancement_cabinet_date', 'avancement_dossiers', ['cabinet_id', 'date_limite'], unique=False)
+
+    # Remplissage initial (équivalent de scripts/rebuild_avancement.py)
+    op.execute("""
+        INSERT INTO avancement_dossiers (
+            cabinet_id, dossier_id, date_limite, annee, mois,
+            total_echeances, echeances_completes, total_declarations, declarations_completes
+        )
+        SELECT cabinet_id, dossier_id, date_limite,
+               EXTRACT(YEAR FROM date_limite), EXTRACT(MONTH FROM date_limite),
+               SUM(echeance), SUM(echeance_complete), SUM(declaration), SUM(declaration_complete)
+        FROM (
+            SELECT cabinet_id, dossier_id, date_echeance AS date_limite,
+                   1 AS echeance, CASE WHEN statut = 'COMPLETE' THEN 1 ELSE 0 END AS echeance_complete,
+                   0 AS declaration, 0 AS declaration_complete
+            FROM echeances
+            UNION ALL
+            SELECT cabinet_id, dossier_id, date_limite,
+                   0, 0,
+                   1, CASE WHEN statut IN ('TELEDECLAREE', 'VALIDEE') THEN 1 ELSE 0 END
+            FROM declarations_fiscales
+        ) AS lignes
+        GROUP BY cabinet_id, dossier_id, date_limite
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_avancement_cabinet_date', table_name='avancement_dossiers')
+    op.drop_index(op.f('ix_avancement_dossiers_id'), table_name='avancement_dossiers')
+    op.drop_table('avancement_dossiers')
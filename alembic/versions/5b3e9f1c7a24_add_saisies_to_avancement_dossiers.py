@@ -0,0 +1,52 @@
+"""add_saisies_to_avancement_dossiers
+
+Revision ID: 5b3e9f1c7a24
+Revises: 9d4a7c2e5b81
+Create Date: 2026-10-17 18:05:12.402913
+
+Compteurs de saisies comptables dans la table d'avancement matérialisée,
+à la date de l'échéance de chaque saisie (tables vive et d'archive).
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b3e9f1c7a24'
+down_revision: Union[str, Sequence[str], None] = '9d4a7c2e5b81'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('avancement_dossiers', sa.Column('total_saisies', sa.Integer(), nullable=False, server_default='0'))
+    op.add_column('avancement_dossiers', sa.Column('saisies_completes', sa.Integer(), nullable=False, server_default='0'))
+
+    # Lignes existantes : (dossier, date) déjà présents via leurs échéances
+    op.execute("""
+        UPDATE avancement_dossiers AS a
+        SET total_saisies = s.total, saisies_completes = s.completes
+        FROM (
+            SELECT saisies.dossier_id, echeances.date_echeance AS date_limite,
+                   COUNT(*) AS total,
+                   SUM(CASE WHEN saisies.est_complete THEN 1 ELSE 0 END) AS completes
+            FROM (
+                SELECT dossier_id, echeance_id, est_complete FROM saisies_comptables
+                UNION ALL
+                SELECT dossier_id, echeance_id, est_complete FROM saisies_comptables_archive
+            ) AS saisies
+            JOIN echeances ON echeances.id = saisies.echeance_id
+            GROUP BY saisies.dossier_id, echeances.date_echeance
+        ) AS s
+        WHERE a.dossier_id = s.dossier_id AND a.date_limite = s.date_limite
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('avancement_dossiers', 'saisies_completes')
+    op.drop_column('avancement_dossiers', 'total_saisies')
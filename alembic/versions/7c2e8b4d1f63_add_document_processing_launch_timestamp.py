@@ -0,0 +1,32 @@
+"""add_document_processing_launch_timestamp
+
+Revision ID: 7c2e8b4d1f63
+Revises: 5b3e9f1c7a24
+Create Date: 2026-10-17 19:42:37.518204
+
+Horodatage du lancement du traitement d'un document : la reprise périodique
+(app.tasks.documents.requeue_pending_documents) ne relance plus une chaîne
+déjà en file. Les documents existants (NULL) sont traités comme jamais lancés.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c2e8b4d1f63'
+down_revision: Union[str, Sequence[str], None] = '5b3e9f1c7a24'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('documents', sa.Column('traitement_lance_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('documents', 'traitement_lance_at')
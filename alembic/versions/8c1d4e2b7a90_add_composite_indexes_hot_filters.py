@@ -0,0 +1,62 @@
+"""add_composite_indexes_hot_filters
+
+Revision ID: 8c1d4e2b7a90
+Revises: 2f55d169a880
+Create Date: 2026-10-17 12:20:04.183512
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c1d4e2b7a90'
+down_revision: Union[str, Sequence[str], None] = '2f55d169a880'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (nom, table, colonnes, prédicat de l'index partiel)
+INDEXES = [
+    ('ix_dossiers_cabinet_statut_echeance', 'dossiers', ['cabinet_id', 'statut', 'date_echeance'], None),
+    ('ix_dossiers_actifs_cabinet_echeance', 'dossiers', ['cabinet_id', 'date_echeance'],
+     "statut != 'COMPLETE' AND statut != 'ARCHIVE'"),
+    ('ix_echeances_dossier_statut', 'echeances', ['dossier_id', 'statut'], None),
+    ('ix_echeances_date_statut', 'echeances', ['date_echeance', 'statut'], None),
+    ('ix_echeances_a_faire_date', 'echeances', ['date_echeance', 'dossier_id'], "statut != 'COMPLETE'"),
+    ('ix_documents_requis_echeance_type_periode', 'documents_requis',
+     ['echeance_id', 'type_document', 'mois', 'annee'], None),
+    ('ix_notifications_user_is_read_sent_at', 'notifications', ['user_id', 'is_read', 'sent_at'], None),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CREATE INDEX CONCURRENTLY : pas de verrou bloquant les écritures sur les
+    # tables en production, mais interdit dans une transaction
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in INDEXES:
+            op.create_index(
+                name, table, columns, unique=False,
+                postgresql_where=sa.text(where) if where else None,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+        # Préfixe du nouvel index composite : devenu redondant
+        op.drop_index(
+            'ix_documents_requis_echeance_id', table_name='documents_requis',
+            postgresql_concurrently=True, if_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_documents_requis_echeance_id', 'documents_requis', ['echeance_id'], unique=False,
+            postgresql_concurrently=True, if_not_exists=True,
+        )
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
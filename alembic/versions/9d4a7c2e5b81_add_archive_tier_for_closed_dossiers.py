@@ -0,0 +1,110 @@
+"""add_archive_tier_for_closed_dossiers
+
+Revision ID: 9d4a7c2e5b81
+Revises: f6b2d9e47a13
+Create Date: 2026-10-17 18:02:27.551934
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d4a7c2e5b81'
+down_revision: Union[str, Sequence[str], None] = 'f6b2d9e47a13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Tables partitionnées par année : les partitions annuelles sont créées à
+# l'archivage (app.services.archival.ensure_archive_partitions), la partition
+# par défaut reçoit le reste
+ARCHIVE_TABLES = ['saisies_comptables_archive', 'documents_requis_archive']
+
+# Colonnes communes avec les tables vives (retour des lignes au downgrade)
+LIVE_COLUMNS = {
+    'saisies_comptables': (
+        'id, annee, cabinet_id, dossier_id, echeance_id, type_journal, est_complete, '
+        'date_completion, mois, created_at, updated_at, completed_by_id'
+    ),
+    'documents_requis': (
+        'id, annee, cabinet_id, dossier_id, echeance_id, type_document, mois, est_applicable, est_fourni'
+    ),
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('dossiers', sa.Column('archived_at', sa.DateTime(timezone=True), nullable=True))
+
+    op.create_table('saisies_comptables_archive',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('annee', sa.Integer(), nullable=False),
+        sa.Column('cabinet_id', sa.Integer(), nullable=False),
+        sa.Column('dossier_id', sa.Integer(), nullable=False),
+        sa.Column('echeance_id', sa.Integer(), nullable=False),
+        sa.Column('type_journal', sa.String(), nullable=False),
+        sa.Column('est_complete', sa.Boolean(), nullable=True),
+        sa.Column('date_completion', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('mois', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('completed_by_id', sa.Integer(), nullable=True),
+        sa.Column('archived_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['cabinet_id'], ['cabinets.id'], ),
+        sa.ForeignKeyConstraint(['dossier_id'], ['dossiers.id'], ),
+        sa.ForeignKeyConstraint(['echeance_id'], ['echeances.id'], ),
+        sa.ForeignKeyConstraint(['completed_by_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id', 'annee'),
+        postgresql_partition_by='RANGE (annee)'
+    )
+    op.create_table('documents_requis_archive',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('annee', sa.Integer(), nullable=False),
+        sa.Column('cabinet_id', sa.Integer(), nullable=False),
+        sa.Column('dossier_id', sa.Integer(), nullable=False),
+        sa.Column('echeance_id', sa.Integer(), nullable=False),
+        sa.Column('type_document', postgresql.ENUM(name='typedocument', create_type=False), nullable=False),
+        sa.Column('mois', sa.Integer(), nullable=False),
+        sa.Column('est_applicable', sa.Boolean(), nullable=True),
+        sa.Column('est_fourni', sa.Boolean(), nullable=True),
+        sa.Column('archived_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['cabinet_id'], ['cabinets.id'], ),
+        sa.ForeignKeyConstraint(['dossier_id'], ['dossiers.id'], ),
+        sa.ForeignKeyConstraint(['echeance_id'], ['echeances.id'], ),
+        sa.PrimaryKeyConstraint('id', 'annee'),
+        postgresql_partition_by='RANGE (annee)'
+    )
+    for table in ARCHIVE_TABLES:
+        op.execute(f"CREATE TABLE IF NOT EXISTS {table}_default PARTITION OF {table} DEFAULT")
+        # Index partitionnés : créés sur chaque partition, tables vides
+        op.create_index(f'ix_{table}_dossier_id', table, ['dossier_id'], unique=False)
+        op.create_index(f'ix_{table}_echeance_id', table, ['echeance_id'], unique=False)
+
+    # Liste paginée des dossiers non archivés (pagination par ID décroissant)
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_dossiers_vivants_cabinet_id', 'dossiers', ['cabinet_id', 'id'], unique=False,
+            postgresql_where=sa.text('archived_at IS NULL'),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_dossiers_vivants_cabinet_id', table_name='dossiers', postgresql_concurrently=True, if_exists=True
+        )
+    # Les lignes archivées reviennent dans les tables vives
+    for table, columns in LIVE_COLUMNS.items():
+        op.execute(f"INSERT INTO {table} ({columns}) SELECT {columns} FROM {table}_archive")
+
+    # Les partitions sont supprimées avec leur table
+    for table in reversed(ARCHIVE_TABLES):
+        op.drop_table(table)
+    op.drop_column('dossiers', 'archived_at')
@@ -0,0 +1,100 @@
+"""add_full_text_search_vectors
+
+Revision ID: a4f09b3c6e18
+Revises: e5a1c7d39b62
+Create Date: 2026-10-17 14:32:45.610927
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4f09b3c6e18'
+down_revision: Union[str, Sequence[str], None] = 'e5a1c7d39b62'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Colonne tsvector ordinaire, tenue à jour par un trigger BEFORE INSERT OR
+# UPDATE (seulement si une colonne indexée change) : l'ajout de la colonne ne
+# réécrit pas la table, contrairement à une colonne GENERATED ... STORED qui
+# bloquerait dossiers et documents (jusqu'à 200k caractères de texte extrait
+# par ligne) en ACCESS EXCLUSIVE pendant toute la réécriture. Les lignes
+# existantes sont remplies par lots, chacun dans sa propre transaction ; une
+# ligne pas encore remplie n'est simplement pas trouvée par la recherche.
+# Noms propres et références en configuration 'simple' (sans racinisation),
+# texte libre en 'french'. Voir app/services/search.py
+SEARCH_VECTORS = {
+    'dossiers': (
+        ('reference', 'nom_client', 'description', 'notes'),
+        """
+        setweight(to_tsvector('simple', coalesce({row}reference, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce({row}nom_client, '')), 'A') ||
+        setweight(to_tsvector('french', coalesce({row}description, '') || ' ' || coalesce({row}notes, '')), 'C')
+        """,
+    ),
+    'documents': (
+        ('nom', 'texte_extrait'),
+        """
+        setweight(to_tsvector('simple', coalesce({row}nom, '')), 'A') ||
+        setweight(to_tsvector('french', coalesce({row}texte_extrait, '')), 'B')
+        """,
+    ),
+}
+BACKFILL_BATCH_SIZE = 1000
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table, (columns, expression) in SEARCH_VECTORS.items():
+        # Nullable, sans défaut : modification du seul catalogue
+        op.add_column(table, sa.Column('search_vector', postgresql.TSVECTOR(), nullable=True))
+        op.execute(f"""
+            CREATE OR REPLACE FUNCTION {table}_search_vector_update() RETURNS trigger AS $$
+            BEGIN
+                NEW.search_vector := {expression.format(row='NEW.')};
+                RETURN NEW;
+            END
+            $$ LANGUAGE plpgsql
+        """)
+        op.execute(
+            f"CREATE TRIGGER {table}_search_vector BEFORE INSERT OR UPDATE OF {', '.join(columns)} "
+            f"ON {table} FOR EACH ROW EXECUTE FUNCTION {table}_search_vector_update()"
+        )
+
+    # Remplissage par lots puis CREATE INDEX CONCURRENTLY : hors de la
+    # transaction de migration, pour ne pas verrouiller les tables
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        for table, (_, expression) in SEARCH_VECTORS.items():
+            lot = sa.text(
+                f"UPDATE {table} SET search_vector = {expression.format(row='')} "
+                f"WHERE id IN (SELECT id FROM {table} WHERE search_vector IS NULL LIMIT {BACKFILL_BATCH_SIZE})"
+            )
+            while bind.execute(lot).rowcount:
+                continue
+
+        for table in SEARCH_VECTORS:
+            op.create_index(
+                f'ix_{table}_search_vector', table, ['search_vector'], unique=False,
+                postgresql_using='gin',
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for table in SEARCH_VECTORS:
+            op.drop_index(
+                f'ix_{table}_search_vector', table_name=table, postgresql_concurrently=True, if_exists=True
+            )
+    for table in SEARCH_VECTORS:
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_search_vector ON {table}")
+        op.execute(f"DROP FUNCTION IF EXISTS {table}_search_vector_update()")
+        op.drop_column(table, 'search_vector')
@@ -0,0 +1,49 @@
+"""add_blobs_table
+
+Revision ID: b7e3f1a9c2d4
+Revises: 8c1d4e2b7a90
+Create Date: 2026-10-17 12:41:52.906114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e3f1a9c2d4'
+down_revision: Union[str, Sequence[str], None] = '8c1d4e2b7a90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'blobs',
+        sa.Column('sha256', sa.String(length=64), nullable=False),
+        sa.Column('taille', sa.Integer(), nullable=True),
+        sa.Column('mime_type', sa.String(), nullable=True),
+        sa.Column('ref_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('orphaned_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('sha256')
+    )
+    op.create_index(op.f('ix_blobs_orphaned_at'), 'blobs', ['orphaned_at'], unique=False)
+
+    # Compteurs initiaux depuis les documents existants ; leurs fichiers restent
+    # à l'ancien emplacement jusqu'à scripts/migrate_documents_to_blobs.py
+    op.execute("""
+        INSERT INTO blobs (sha256, taille, mime_type, ref_count)
+        SELECT hash_fichier, MAX(taille), MAX(mime_type), COUNT(*)
+        FROM documents
+        WHERE hash_fichier IS NOT NULL
+        GROUP BY hash_fichier
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_blobs_orphaned_at'), table_name='blobs')
+    op.drop_table('blobs')
@@ -0,0 +1,63 @@
+"""add_trigram_autocomplete_indexes
+
+Revision ID: c81d4e6a0f27
+Revises: a4f09b3c6e18
+Create Date: 2026-10-17 16:05:12.384051
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c81d4e6a0f27'
+down_revision: Union[str, Sequence[str], None] = 'a4f09b3c6e18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# unaccent() n'est que STABLE (dictionnaire modifiable) : un index ne peut
+# l'utiliser directement. f_unaccent fige le dictionnaire et se déclare
+# IMMUTABLE. Voir app/services/autocomplete.py
+F_UNACCENT = """
+CREATE OR REPLACE FUNCTION f_unaccent(text) RETURNS text
+LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+AS $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$
+"""
+
+TRIGRAM_INDEXES = {
+    'ix_clients_nom_trgm': ('clients', 'nom'),
+    'ix_dossiers_reference_trgm': ('dossiers', 'reference'),
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute("CREATE EXTENSION IF NOT EXISTS unaccent")
+    op.execute(F_UNACCENT)
+
+    # CREATE INDEX CONCURRENTLY : interdit dans une transaction
+    with op.get_context().autocommit_block():
+        for name, (table, column) in TRIGRAM_INDEXES.items():
+            op.execute(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} "
+                f"USING gin (f_unaccent(lower({column})) gin_trgm_ops)"
+            )
+        # Résolution exacte du client à la création d'un dossier
+        op.create_index(
+            'ix_clients_cabinet_nom', 'clients', ['cabinet_id', 'nom'], unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_clients_cabinet_nom', table_name='clients', postgresql_concurrently=True, if_exists=True)
+        for name in TRIGRAM_INDEXES:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+    op.execute("DROP FUNCTION IF EXISTS f_unaccent(text)")
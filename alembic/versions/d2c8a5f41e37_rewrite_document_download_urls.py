@@ -0,0 +1,38 @@
+"""rewrite_document_download_urls
+
+Revision ID: d2c8a5f41e37
+Revises: b7e3f1a9c2d4
+Create Date: 2026-10-17 13:05:27.418306
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2c8a5f41e37'
+down_revision: Union[str, Sequence[str], None] = 'b7e3f1a9c2d4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Les anciennes URLs (/api/v1/documents/{dossier_id}/{nom_fichier_stockage})
+    # ne sont servies par aucune route : pointer vers l'endpoint de téléchargement
+    op.execute("""
+        UPDATE documents
+        SET url = '/api/v1/dossiers/' || dossier_id || '/documents/' || id || '/download'
+        WHERE url IS NULL OR url LIKE '/api/v1/documents/%'
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("""
+        UPDATE documents
+        SET url = '/api/v1/documents/' || dossier_id || '/' || nom_fichier_stockage
+        WHERE url LIKE '/api/v1/dossiers/%/download'
+    """)
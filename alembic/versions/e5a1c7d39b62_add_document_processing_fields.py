@@ -0,0 +1,44 @@
+"""add_document_processing_fields
+
+Revision ID: e5a1c7d39b62
+Revises: d2c8a5f41e37
+Create Date: 2026-10-17 13:48:10.275341
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5a1c7d39b62'
+down_revision: Union[str, Sequence[str], None] = 'd2c8a5f41e37'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+statut_traitement = sa.Enum('EN_ATTENTE', 'EN_COURS', 'TRAITE', 'REJETE', 'ERREUR', name='statuttraitement')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    statut_traitement.create(op.get_bind(), checkfirst=True)
+    # Les documents existants sont EN_ATTENTE : repris par lots par
+    # app.tasks.documents.requeue_pending_documents
+    op.add_column('documents', sa.Column('statut_traitement', statut_traitement, nullable=False, server_default='EN_ATTENTE'))
+    op.add_column('documents', sa.Column('erreur_traitement', sa.String(), nullable=True))
+    op.add_column('documents', sa.Column('cle_apercu', sa.String(), nullable=True))
+    op.add_column('documents', sa.Column('texte_extrait', sa.Text(), nullable=True))
+    op.add_column('documents', sa.Column('traite_at', sa.DateTime(timezone=True), nullable=True))
+    op.create_index('ix_documents_statut_traitement_created', 'documents', ['statut_traitement', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_documents_statut_traitement_created', table_name='documents')
+    op.drop_column('documents', 'traite_at')
+    op.drop_column('documents', 'texte_extrait')
+    op.drop_column('documents', 'cle_apercu')
+    op.drop_column('documents', 'erreur_traitement')
+    op.drop_column('documents', 'statut_traitement')
+    statut_traitement.drop(op.get_bind(), checkfirst=True)
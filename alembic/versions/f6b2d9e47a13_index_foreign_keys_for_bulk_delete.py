@@ -0,0 +1,53 @@
+"""index_foreign_keys_for_bulk_delete
+
+Revision ID: f6b2d9e47a13
+Revises: c81d4e6a0f27
+Create Date: 2026-10-17 17:12:40.905318
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f6b2d9e47a13'
+down_revision: Union[str, Sequence[str], None] = 'c81d4e6a0f27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Clés étrangères sans index : chaque ligne supprimée dans la table référencée
+# obligeait PostgreSQL à parcourir la table qui la référence (vérification de
+# la contrainte), en plus des DELETE ... WHERE dossier_id IN (...) de
+# app.services.dossier_deletion
+INDEXES = [
+    ('ix_documents_dossier_id', 'documents', ['dossier_id']),
+    ('ix_documents_echeance_id', 'documents', ['echeance_id']),
+    ('ix_alertes_dossier_id', 'alertes', ['dossier_id']),
+    ('ix_notifications_alerte_id', 'notifications', ['alerte_id']),
+    ('ix_historique_dossiers_dossier_id', 'historique_dossiers', ['dossier_id']),
+    ('ix_declarations_fiscales_dossier_id', 'declarations_fiscales', ['dossier_id']),
+    ('ix_declarations_fiscales_declaration_origine_id', 'declarations_fiscales', ['declaration_origine_id']),
+    ('ix_saisies_comptables_echeance_id', 'saisies_comptables', ['echeance_id']),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CREATE INDEX CONCURRENTLY : interdit dans une transaction
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(
+                name, table, columns, unique=False,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
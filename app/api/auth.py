@@ -19,6 +19,7 @@ from app.core.validators import get_country_info, COUNTRY_CONFIGS
 from app.core.config import settings
 from app.models.user import User
 from app.models.cabinet import Cabinet
+from app.services.principal_cache import load_principal
 from app.schemas.user import UserCreate, User as UserSchema, Token, TokenRefresh
 from sqlalchemy import func
 import re
@@ -41,7 +42,7 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
     except JWTError:
         raise credentials_exception
     
-    user = db.query(User).filter(User.username == username).first()
+    user = load_principal(db, username)
     if user is None:
         raise credentials_exception
     return user
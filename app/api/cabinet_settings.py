@@ -6,6 +6,7 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from typing import List, Dict
 
+from app.core.cache import get_two_tier, invalidate_local, cache_manager, local_cache
 from app.core.deps import get_db, get_current_user, get_current_cabinet_id
 from app.models import User, Cabinet
 from app.core.validators import get_supported_countries, get_country_info, COUNTRY_CONFIGS
@@ -13,12 +14,14 @@ from app.schemas.cabinet import CabinetUpdate, CabinetResponse
 
 router = APIRouter()
 
+# Paramètres de cabinet : LRU local (TTL court) devant Redis, invalidés à la modification
+CABINET_SETTINGS_PREFIX = "cabinet_settings"
+CABINET_SETTINGS_TTL = 3600
+cabinet_settings_cache = local_cache(CABINET_SETTINGS_PREFIX, max_entries=512, ttl=60)
+reference_cache = local_cache("reference_data", max_entries=64)
 
-@router.get("/supported-countries", response_model=List[Dict])
-async def get_all_supported_countries():
-    """
-    Retourne la liste de tous les pays supportés avec leurs configurations
-    """
+
+def _build_supported_countries() -> List[Dict]:
     countries = []
     for code, config in COUNTRY_CONFIGS.items():
         countries.append({
@@ -38,6 +41,22 @@ async def get_all_supported_countries():
     return countries
 
 
+def _load_cabinet_settings(db: Session, cabinet_id: int):
+    cabinet = db.query(Cabinet).filter(Cabinet.id == cabinet_id).first()
+    if not cabinet:
+        return None
+    return CabinetResponse.model_validate(cabinet).model_dump()
+
+
+@router.get("/supported-countries", response_model=List[Dict])
+async def get_all_supported_countries():
+    """
+    Retourne la liste de tous les pays supportés avec leurs configurations
+    """
+    # Référentiel statique : construit une fois par processus
+    return reference_cache.get_or_load("supported_countries", _build_supported_countries)
+
+
 @router.get("/country/{country_code}")
 async def get_country_details(country_code: str):
     """
@@ -62,7 +81,13 @@ async def get_cabinet_settings(
     """
     Récupère les paramètres du cabinet incluant la localisation
     """
-    cabinet = db.query(Cabinet).filter(Cabinet.id == cabinet_id).first()
+    cabinet = get_two_tier(
+        cabinet_settings_cache,
+        cabinet_id,
+        f"{CABINET_SETTINGS_PREFIX}:{cabinet_id}",
+        lambda: _load_cabinet_settings(db, cabinet_id),
+        CABINET_SETTINGS_TTL
+    )
     if not cabinet:
         raise HTTPException(status_code=404, detail="Cabinet non trouvé")
     
@@ -112,6 +137,8 @@ async def update_cabinet_settings(
     
     db.commit()
     db.refresh(cabinet)
+    cache_manager.delete(f"{CABINET_SETTINGS_PREFIX}:{cabinet_id}")
+    invalidate_local(CABINET_SETTINGS_PREFIX, cabinet_id)
     
     return cabinet
 
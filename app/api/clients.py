@@ -8,6 +8,7 @@ from app.api.auth import get_current_user
 from app.core.deps import get_current_cabinet_id
 from app.models.user import User
 from app.models.client import Client
+from app.services.access_scope import invalidate_access_scope
 
 
 class ClientCreate(BaseModel):
@@ -142,6 +143,7 @@ async def create_client(
     db.add(client)
     db.commit()
     db.refresh(client)
+    invalidate_access_scope(client.user_id)
     
     return {
         "id": client.id,
@@ -171,11 +173,14 @@ async def update_client(
     if not client:
         raise HTTPException(status_code=404, detail="Client non trouvé")
     
+    ancien_user_id = client.user_id
     for field, value in client_data.dict(exclude_unset=True).items():
         setattr(client, field, value)
     
     db.commit()
     db.refresh(client)
+    # L'assignation ou le nom du client a pu changer : périmètres à recalculer
+    invalidate_access_scope(ancien_user_id, client.user_id)
     
     return {
         "id": client.id,
@@ -208,7 +213,9 @@ async def delete_client(
             detail=f"Impossible de supprimer ce client car il a {dossiers_count} dossier(s) associé(s)"
         )
     
+    user_id = client.user_id
     db.delete(client)
     db.commit()
+    invalidate_access_scope(user_id)
     
     return {"message": "Client supprimé avec succès"}
\ No newline at end of file
@@ -1,9 +1,9 @@
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, extract
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, and_, extract, select
 from datetime import datetime, date, timedelta
 
-from app.core.database import get_db
+from app.core.database import get_async_read_db
 from app.core.deps import get_current_user, get_current_cabinet_id
 from app.core.cache import cache_dashboard, invalidate_cache
 from app.models.user import User
@@ -18,10 +18,14 @@ router = APIRouter()
 async def get_dashboard_stats(
     current_user: User = Depends(get_current_user),
     cabinet_id: int = Depends(get_current_cabinet_id),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     period: str = None
 ):
-    """Récupérer les statistiques pour le tableau de bord"""
+    """
+    Récupérer les statistiques pour le tableau de bord (cabinet de l'utilisateur).
+    Mises en cache par cabinet : un seul recalcul par cabinet, quel que soit le
+    nombre d'utilisateurs connectés en même temps.
+    """
     today = date.today()
     
     # Déterminer la date de début selon la période
@@ -39,7 +43,8 @@ async def get_dashboard_stats(
         start_date = None
     
     # Compter les dossiers en retard (date_echeance dépassée et statut non complété)
-    query_retard = db.query(func.count(Dossier.id)).filter(
+    query_retard = select(func.count(Dossier.id)).where(
+        Dossier.cabinet_id == cabinet_id,
         and_(
             Dossier.date_echeance < today,
             Dossier.statut != StatusDossier.COMPLETE,
@@ -47,11 +52,12 @@ async def get_dashboard_stats(
         )
     )
     if start_date:
-        query_retard = query_retard.filter(Dossier.created_at >= start_date)
-    dossiers_en_retard = query_retard.scalar() or 0
+        query_retard = query_retard.where(Dossier.created_at >= start_date)
+    dossiers_en_retard = await db.scalar(query_retard) or 0
     
     # Compter les dossiers avec échéance aujourd'hui
-    query_aujourdhui = db.query(func.count(Dossier.id)).filter(
+    query_aujourdhui = select(func.count(Dossier.id)).where(
+        Dossier.cabinet_id == cabinet_id,
         and_(
             Dossier.date_echeance == today,
             Dossier.statut != StatusDossier.COMPLETE,
@@ -59,11 +65,12 @@ async def get_dashboard_stats(
         )
     )
     if start_date:
-        query_aujourdhui = query_aujourdhui.filter(Dossier.created_at >= start_date)
-    dossiers_aujourdhui = query_aujourdhui.scalar() or 0
+        query_aujourdhui = query_aujourdhui.where(Dossier.created_at >= start_date)
+    dossiers_aujourdhui = await db.scalar(query_aujourdhui) or 0
     
     # Compter les dossiers urgents (priorité URGENTE)
-    query_urgents = db.query(func.count(Dossier.id)).filter(
+    query_urgents = select(func.count(Dossier.id)).where(
+        Dossier.cabinet_id == cabinet_id,
         and_(
             Dossier.priorite == PrioriteDossier.URGENTE,
             Dossier.statut != StatusDossier.COMPLETE,
@@ -71,8 +78,8 @@ async def get_dashboard_stats(
         )
     )
     if start_date:
-        query_urgents = query_urgents.filter(Dossier.created_at >= start_date)
-    dossiers_urgents = query_urgents.scalar() or 0
+        query_urgents = query_urgents.where(Dossier.created_at >= start_date)
+    dossiers_urgents = await db.scalar(query_urgents) or 0
     
     # Compter les dossiers complétés dans la période
     if period == 'today':
@@ -88,12 +95,13 @@ async def get_dashboard_stats(
     else:
         periode_complete = date(today.year, today.month, 1)
         
-    dossiers_completes = db.query(func.count(Dossier.id)).filter(
+    dossiers_completes = await db.scalar(select(func.count(Dossier.id)).where(
+        Dossier.cabinet_id == cabinet_id,
         and_(
             Dossier.statut == StatusDossier.COMPLETE,
             Dossier.completed_at >= periode_complete
         )
-    ).scalar() or 0
+    )) or 0
     
     return {
         "en_retard": dossiers_en_retard,
@@ -106,16 +114,16 @@ async def get_dashboard_stats(
 @router.get("/dossiers-retard")
 async def get_dossiers_en_retard(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     period: str = None
 ):
     """Récupérer les dossiers avec échéances en retard"""
     today = date.today()
     
     # Récupérer les échéances en retard avec les infos du dossier
-    query = db.query(Echeance, Dossier).join(
+    query = select(Echeance, Dossier).join(
         Dossier, Echeance.dossier_id == Dossier.id
-    ).filter(
+    ).where(
         and_(
             Echeance.date_echeance < today,
             Echeance.statut != 'COMPLETE',
@@ -124,7 +132,7 @@ async def get_dossiers_en_retard(
     )
     
     # Grouper par dossier et prendre l'échéance la plus ancienne en retard
-    echeances_retard = query.order_by(Echeance.date_echeance).all()
+    echeances_retard = (await db.execute(query.order_by(Echeance.date_echeance))).all()
     
     # Regrouper par dossier (prendre la première échéance en retard de chaque dossier)
     dossiers_vus = set()
@@ -149,7 +157,7 @@ async def get_dossiers_en_retard(
 @router.get("/alertes-urgentes")
 async def get_alertes_urgentes(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     period: str = None
 ):
     """Récupérer les alertes urgentes basées sur les échéances"""
@@ -159,15 +167,15 @@ async def get_alertes_urgentes(
     alertes = []
     
     # Échéances en retard de plus de 3 jours
-    query_retard = db.query(Echeance, Dossier).join(
+    query_retard = (await db.execute(select(Echeance, Dossier).join(
         Dossier, Echeance.dossier_id == Dossier.id
-    ).filter(
+    ).where(
         and_(
             Echeance.date_echeance < today - timedelta(days=3),
             Echeance.statut != 'COMPLETE',
             Dossier.statut != StatusDossier.ARCHIVE
         )
-    ).order_by(Echeance.date_echeance).limit(3).all()
+    ).order_by(Echeance.date_echeance).limit(3))).all()
     
     for echeance, dossier in query_retard:
         jours_retard = (today - echeance.date_echeance).days
@@ -180,16 +188,16 @@ async def get_alertes_urgentes(
         })
     
     # Échéances dans les 3 prochains jours
-    query_proche = db.query(Echeance, Dossier).join(
+    query_proche = (await db.execute(select(Echeance, Dossier).join(
         Dossier, Echeance.dossier_id == Dossier.id
-    ).filter(
+    ).where(
         and_(
             Echeance.date_echeance >= today,
             Echeance.date_echeance <= prochains_jours,
             Echeance.statut != 'COMPLETE',
             Dossier.statut != StatusDossier.ARCHIVE
         )
-    ).order_by(Echeance.date_echeance).limit(3).all()
+    ).order_by(Echeance.date_echeance).limit(3))).all()
     
     for echeance, dossier in query_proche:
         jours_restants = (echeance.date_echeance - today).days
@@ -207,7 +215,7 @@ async def get_alertes_urgentes(
 @router.get("/trends")
 async def get_trends_data(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     period: str = "month"  # month, week, year
 ):
     """Récupérer les données de tendances pour les graphiques"""
@@ -239,26 +247,26 @@ async def get_trends_data(
             current_date = start_date + timedelta(days=i)
             
             # Échéances créées ce jour
-            created = db.query(func.count(Echeance.id)).filter(
+            created = await db.scalar(select(func.count(Echeance.id)).where(
                 func.date(Echeance.created_at) == current_date
-            ).scalar() or 0
+            )) or 0
             
             # Échéances complétées ce jour
-            completed = db.query(func.count(Echeance.id)).filter(
+            completed = await db.scalar(select(func.count(Echeance.id)).where(
                 and_(
                     func.date(Echeance.updated_at) == current_date,
                     Echeance.statut == 'COMPLETE'
                 )
-            ).scalar() or 0
+            )) or 0
             
             # Échéances en retard à la fin de ce jour
-            overdue = db.query(func.count(Echeance.id)).filter(
+            overdue = await db.scalar(select(func.count(Echeance.id)).where(
                 and_(
                     Echeance.date_echeance <= current_date,
                     Echeance.statut != 'COMPLETE',
                     Echeance.created_at <= current_date + timedelta(days=1)
                 )
-            ).scalar() or 0
+            )) or 0
             
             data.append({
                 "date": current_date.strftime("%d/%m"),
@@ -274,34 +282,34 @@ async def get_trends_data(
             year = month_date.year
             
             # Dossiers créés ce mois
-            created = db.query(func.count(Dossier.id)).filter(
+            created = await db.scalar(select(func.count(Dossier.id)).where(
                 and_(
                     extract('month', Dossier.created_at) == month,
                     extract('year', Dossier.created_at) == year
                 )
-            ).scalar() or 0
+            )) or 0
             
             # Dossiers complétés ce mois
-            completed = db.query(func.count(Dossier.id)).filter(
+            completed = await db.scalar(select(func.count(Dossier.id)).where(
                 and_(
                     extract('month', Dossier.completed_at) == month,
                     extract('year', Dossier.completed_at) == year,
                     Dossier.statut == StatusDossier.COMPLETE
                 )
-            ).scalar() or 0
+            )) or 0
             
             # Dossiers en retard à la fin du mois
             last_day_of_month = date(year, month, 1) + timedelta(days=32)
             last_day_of_month = last_day_of_month.replace(day=1) - timedelta(days=1)
             
-            overdue = db.query(func.count(Dossier.id)).filter(
+            overdue = await db.scalar(select(func.count(Dossier.id)).where(
                 and_(
                     Dossier.date_echeance < last_day_of_month,
                     Dossier.statut != StatusDossier.COMPLETE,
                     Dossier.statut != StatusDossier.ARCHIVE,
                     Dossier.created_at <= last_day_of_month
                 )
-            ).scalar() or 0
+            )) or 0
             
             data.append({
                 "date": month_date.strftime("%b %Y"),
@@ -316,32 +324,32 @@ async def get_trends_data(
         from app.models.declaration_fiscale import DeclarationFiscale
         
         # Compter toutes les tâches (échéances + déclarations)
-        total_echeances = db.query(func.count(Echeance.id)).scalar() or 0
-        total_declarations = db.query(func.count(DeclarationFiscale.id)).scalar() or 0
+        total_echeances = await db.scalar(select(func.count(Echeance.id))) or 0
+        total_declarations = await db.scalar(select(func.count(DeclarationFiscale.id))) or 0
         total_taches = total_echeances + total_declarations
         
         # Compter les complétées
-        echeances_completes = db.query(func.count(Echeance.id)).filter(
+        echeances_completes = await db.scalar(select(func.count(Echeance.id)).where(
             Echeance.statut == 'COMPLETE'
-        ).scalar() or 0
-        declarations_completes = db.query(func.count(DeclarationFiscale.id)).filter(
+        )) or 0
+        declarations_completes = await db.scalar(select(func.count(DeclarationFiscale.id)).where(
             DeclarationFiscale.statut.in_(['TELEDECLAREE', 'VALIDEE'])
-        ).scalar() or 0
+        )) or 0
         total_completes = echeances_completes + declarations_completes
         
         # Compter les en retard
-        echeances_en_retard = db.query(func.count(Echeance.id)).filter(
+        echeances_en_retard = await db.scalar(select(func.count(Echeance.id)).where(
             and_(
                 Echeance.date_echeance < today,
                 Echeance.statut != 'COMPLETE'
             )
-        ).scalar() or 0
-        declarations_en_retard = db.query(func.count(DeclarationFiscale.id)).filter(
+        )) or 0
+        declarations_en_retard = await db.scalar(select(func.count(DeclarationFiscale.id)).where(
             and_(
                 DeclarationFiscale.date_limite < today,
                 ~DeclarationFiscale.statut.in_(['TELEDECLAREE', 'VALIDEE'])
             )
-        ).scalar() or 0
+        )) or 0
         total_retard = echeances_en_retard + declarations_en_retard
         
         logger.info(f"Pas de données historiques, retour des compteurs actuels: total={total_taches}, completes={total_completes}, retard={total_retard}")
@@ -361,7 +369,7 @@ async def get_trends_data(
 @router.get("/services-distribution")
 async def get_services_distribution(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     period: str = None
 ):
     """Récupérer la distribution des dossiers par type de service"""
@@ -381,15 +389,15 @@ async def get_services_distribution(
         start_date = None
         
     # Compter les dossiers par type principal
-    query = db.query(
+    query = select(
         Dossier.type_dossier,
         func.count(Dossier.id).label('count')
-    ).filter(
+    ).where(
         Dossier.statut != StatusDossier.ARCHIVE
     )
     if start_date:
-        query = query.filter(Dossier.created_at >= start_date)
-    distribution = query.group_by(Dossier.type_dossier).all()
+        query = query.where(Dossier.created_at >= start_date)
+    distribution = (await db.execute(query.group_by(Dossier.type_dossier))).all()
     
     # Formatter les données pour le graphique
     data = []
@@ -1,21 +1,40 @@
-from fastapi import APIRouter, Depends, File, UploadFile, HTTPException, Query, Form
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
+from fastapi import APIRouter, BackgroundTasks, Depends, File, UploadFile, HTTPException, Query, Form, Request, Response
+from fastapi.responses import RedirectResponse
+from jose import JWTError, jwt
+from sqlalchemy.orm import Session, defer
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, or_, select
 from typing import List, Optional
 from datetime import date, datetime, timedelta
+import asyncio
 import logging
 
-from app.core.database import get_db
+from app.core.config import settings
+from app.core.database import get_db, get_async_db, get_async_read_db
 from app.core.deps import get_current_user, get_current_cabinet_id
+from app.core.cache import cabinet_tag, dossier_tag, invalidate_tags
+from app.core.blob_store import blob_store
+from app.core.downloads import etag_matches, make_etag, not_modified, serve_stored_file
+from app.core.storage import storage, storage_key
 from app.models.user import User
 from app.models.dossier import Dossier as DossierModel, StatusDossier, TypeDossier
 from app.models.alerte import Alerte
 from app.models.historique import HistoriqueDossier
 from app.schemas.dossier import (
     DossierCreate, Dossier, DossierUpdate, DossierStatusUpdate,
-    DossierWithDetails, DailyPoint
+    DossierWithDetails, DailyPoint, DossierBatchDelete
 )
 from app.services.alerte_service import AlerteService
+from app.services.dossier_scaffolding import DossierScaffoldingService, calculate_service_echeance
+from app.services.access_scope import get_access_scope
+from app.services.archival import (
+    archive_dossiers, archived_dossier, document_requis_model, restore_dossiers, saisie_model
+)
+from app.services.autocomplete import invalidate_autocomplete
+from app.services import blob_references  # noqa: F401  (comptage des références aux blobs)
+from app.services.dossier_deletion import delete_dossiers
+from app.services.dossier_listing import fetch_dossiers_page
+from app.services.echeance_stats import STATS_VIDES, compute_echeances_stats
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -51,63 +70,66 @@ def generate_dossier_reference(db: Session, type_dossier: str, cabinet_id: int)
     return f"{prefix}-{current_year}-{str(next_number).zfill(4)}"
 
 
-def calculate_service_echeance(service_type: str, periode_comptable: str) -> str:
-    """Calcule la date d'échéance spécifique pour un service donné"""
-    if not periode_comptable:
-        return ''
+def document_download_path(dossier_id: int, document_id: int) -> str:
+    """URL (relative) de téléchargement d'un document"""
+    return f"/api/v1/dossiers/{dossier_id}/documents/{document_id}/download"
+
+
+def create_download_token(document) -> str:
+    """
+    Lien signé de téléchargement, pour les backends sans URL présignée :
+    valable STORAGE_URL_EXPIRES secondes, sans en-tête d'authentification
+    (balise <a>, visionneuse PDF). Le document est relu à chaque
+    téléchargement (download_signed_document).
+    """
+    payload = {
+        "type": "document_download",
+        "doc": document.id,
+        "sha": document.hash_fichier,
+        "exp": datetime.utcnow() + timedelta(seconds=settings.STORAGE_URL_EXPIRES),
+    }
+    return jwt.encode(payload, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+
+
+def check_downloadable(document) -> None:
+    """Un document rejeté par la validation approfondie n'est plus servi"""
+    from app.models.document import StatutTraitement
     
-    try:
-        # Format attendu: "Janvier 2025", "Février 2025", etc.
-        mois = {
-            'janvier': 0, 'février': 1, 'mars': 2, 'avril': 3,
-            'mai': 4, 'juin': 5, 'juillet': 6, 'août': 7,
-            'septembre': 8, 'octobre': 9, 'novembre': 10, 'décembre': 11
-        }
-        
-        parts = periode_comptable.lower().split(' ')
-        if len(parts) != 2:
-            return ''
-        
-        mois_nom = parts[0]
-        annee = int(parts[1])
-        
-        if mois_nom not in mois or not annee:
-            return ''
-        
-        mois_index = mois[mois_nom]
-        
-        # Dates spécifiques par service
-        service_jours = {
-            'COMPTABILITE': 10,
-            'FISCALITE': 15,
-            'PAIE': 5,
-            'JURIDIQUE': 20,
-            'AUDIT': 30,
-            'CONSEIL': 15,
-            'AUTRE': 15
-        }
-        
-        jour_echeance = service_jours.get(service_type, 15)
-        mois_echeance = mois_index + 1
-        annee_echeance = annee
-        
-        # Gérer le passage à l'année suivante
-        if mois_echeance > 11:
-            mois_echeance = 0
-            annee_echeance += 1
-        
-        from datetime import date
-        date_echeance = date(annee_echeance, mois_echeance + 1, jour_echeance)
-        
-        # Si la date tombe un weekend, reporter au lundi suivant
-        if date_echeance.weekday() == 6:  # Dimanche
-            date_echeance = date_echeance.replace(day=date_echeance.day + 1)
-        elif date_echeance.weekday() == 5:  # Samedi
-            date_echeance = date_echeance.replace(day=date_echeance.day + 2)
-        
-        return date_echeance.isoformat()
-    except:
-        return ''
+    if document.statut_traitement == StatutTraitement.REJETE:
+        raise HTTPException(
+            status_code=403, detail=f"Document rejeté : {document.erreur_traitement or 'contenu refusé'}"
+        )
+
+
+ARCHIVED_DETAIL = "Dossier archivé : le restaurer avant de le modifier"
+
+
+def check_not_archived(db: Session, current_user: User, model, row_id: int) -> None:
+    """Ligne introuvable dans la table vive : 409 si elle appartient à un dossier archivé (lecture seule)"""
+    dossier = archived_dossier(db, model, row_id)
+    if dossier:
+        get_access_scope(db, current_user).check(dossier)
+        raise HTTPException(status_code=409, detail=ARCHIVED_DETAIL)
+
+
+async def serve_document(request: Request, document) -> Response:
+    """
+    Réponse de téléchargement d'un document : 304 si le client a déjà ce
+    contenu (ETag = SHA-256), redirection vers l'URL présignée du stockage
+    objet, sinon fichier servi par app.core.downloads (Range, X-Accel-Redirect)
+    """
+    check_downloadable(document)
+    etag = make_etag(document.hash_fichier)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    key = storage_key(document.chemin_fichier)
+    url = await asyncio.to_thread(storage.presigned_url, key, settings.STORAGE_URL_EXPIRES, document.nom)
+    if url:
+        return RedirectResponse(url, status_code=307)
+    return await asyncio.to_thread(
+        serve_stored_file, request, key, document.nom, document.mime_type, document.hash_fichier
+    )
 
 
 @router.post("/", response_model=dict)
@@ -127,24 +149,39 @@ async def create_dossier(
         if service != dossier_data.type_dossier.value and service not in services_to_create:
             services_to_create.append(service)
     
-    # Trouver le responsable du client automatiquement
+    # Trouver le responsable du client automatiquement (nom choisi par
+    # autocomplétion, index ix_clients_cabinet_nom)
     from app.models.client import Client
-    client = db.query(Client).filter(Client.nom == dossier_data.nom_client).first()
+    client = db.query(Client).filter(
+        Client.cabinet_id == current_user.cabinet_id,
+        Client.nom == dossier_data.nom_client
+    ).first()
     responsable_id_auto = None
     if client and client.user_id:
         responsable_id_auto = client.user_id
     
+    # Déterminer l'année de départ / l'année fiscale
+    annee_depart = datetime.now().year
+    if dossier_data.exercice_fiscal:
+        try:
+            annee_depart = int(dossier_data.exercice_fiscal)
+        except:
+            pass
+    
+    # L'arborescence (échéances, saisies, documents requis, déclarations) est
+    # construite en mémoire puis insérée en lot après la boucle
+    scaffolding = DossierScaffoldingService(db, cabinet_id=current_user.cabinet_id, user_id=current_user.id)
+    
     # Créer un dossier pour chaque service
     for service_type in services_to_create:
         # Calculer la date d'échéance spécifique pour ce service
         date_echeance_str = calculate_service_echeance(service_type, dossier_data.periode_comptable)
         date_echeance_obj = None
         if date_echeance_str:
-            from datetime import datetime as dt2
-            date_echeance_obj = dt2.fromisoformat(date_echeance_str).date()
+            date_echeance_obj = date.fromisoformat(date_echeance_str)
         
         # Générer une référence spécifique pour ce service
-        reference = generate_dossier_reference(db, service_type)
+        reference = generate_dossier_reference(db, service_type, current_user.cabinet_id)
         
         # Préparer les données du dossier
         dossier_dict = dossier_data.dict()
@@ -158,6 +195,7 @@ async def create_dossier(
         # Créer le dossier
         dossier = DossierModel(
             **dossier_dict,
+            cabinet_id=current_user.cabinet_id,
             user_id=current_user.id,
             statut=StatusDossier.NOUVEAU
         )
@@ -166,146 +204,21 @@ async def create_dossier(
         if dossier.date_echeance:
             dossier.priorite = dossier.priorite_automatique
         
-        db.add(dossier)
-        db.flush()  # Pour obtenir l'ID
-        
-        # Ajouter à l'historique
-        historique = HistoriqueDossier(
-            dossier_id=dossier.id,
-            user_id=current_user.id,
-            action="creation",
-            new_value=dossier.statut.value,
-            commentaire=f"Dossier {service_type} créé automatiquement"
-        )
-        db.add(historique)
-        
-        # Traitement spécial pour les dossiers FISCALITE
         if service_type == 'FISCALITE':
             logger.info(f"Création de dossier FISCALITE pour {dossier_data.nom_client}")
-            from app.services.fiscal_service import create_declarations_fiscales, create_echeances_from_declarations
-            from datetime import datetime as dt
-            
-            # Déterminer l'année fiscale
-            annee_fiscale = dt.now().year
-            if dossier_data.exercice_fiscal:
-                try:
-                    annee_fiscale = int(dossier_data.exercice_fiscal)
-                except:
-                    pass
-            
-            # Utiliser le service fiscal pour créer toutes les déclarations selon le statut juridique
-            type_entreprise = dossier_data.type_entreprise or 'SARL'  # Valeur par défaut
-            
-            # Créer toutes les déclarations fiscales selon le statut juridique
-            count_declarations = create_declarations_fiscales(
-                db=db,
-                dossier_id=dossier.id,
-                type_entreprise=type_entreprise,
-                annee_fiscale=annee_fiscale
-            )
-            logger.info(f"{count_declarations} déclarations fiscales créées pour {type_entreprise}")
-            
-            # Créer les échéances basées sur les déclarations
-            count_echeances = create_echeances_from_declarations(
-                db=db,
-                dossier_id=dossier.id,
-                type_entreprise=type_entreprise,
-                annee_fiscale=annee_fiscale
-            )
-            logger.info(f"{count_echeances} échéances fiscales créées")
-        
-        # Créer les échéances pour les 12 mois (si c'est un dossier comptabilité ou paie)
-        elif service_type in ['COMPTABILITE', 'PAIE']:
-            from app.models.echeance import Echeance
-            from app.models.saisie import SaisieComptable
-            
-            # Déterminer l'année de départ
-            from datetime import datetime as dt
-            annee_depart = dt.now().year
-            if dossier_data.exercice_fiscal:
-                try:
-                    annee_depart = int(dossier_data.exercice_fiscal)
-                except:
-                    pass
-            
-            # Mois en français
-            mois_noms = [
-                'Janvier', 'Février', 'Mars', 'Avril', 'Mai', 'Juin',
-                'Juillet', 'Août', 'Septembre', 'Octobre', 'Novembre', 'Décembre'
-            ]
-            
-            # Types de journaux selon le service
-            if service_type == 'COMPTABILITE':
-                types_journaux = ['BANQUE', 'CAISSE', 'OD', 'ACHATS', 'VENTES', 'PAIE']
-            elif service_type == 'PAIE':
-                types_journaux = ['DSN', 'BULLETINS', 'DUCS', 'DECLARATION_SOCIALE', 'CHARGES_SOCIALES']
-            else:
-                types_journaux = ['GENERAL']
-            
-            # Créer une échéance pour chaque mois
-            for mois_idx in range(12):
-                mois_num = mois_idx + 1
-                periode_label = f"{mois_noms[mois_idx]} {annee_depart}"
-                
-                # Calculer la date d'échéance pour ce mois
-                date_echeance_str = calculate_service_echeance(service_type, periode_label)
-                if date_echeance_str:
-                    date_echeance_obj = dt.fromisoformat(date_echeance_str).date()
-                    
-                    echeance = Echeance(
-                        dossier_id=dossier.id,
-                        mois=mois_num,
-                        annee=annee_depart,
-                        periode_label=periode_label,
-                        date_echeance=date_echeance_obj,
-                        statut='A_FAIRE'
-                    )
-                    db.add(echeance)
-                    db.flush()  # Pour obtenir l'ID de l'échéance
-                    
-                    # Créer les saisies comptables pour chaque type de journal
-                    for type_journal in types_journaux:
-                        saisie = SaisieComptable(
-                            dossier_id=dossier.id,
-                            echeance_id=echeance.id,
-                            type_journal=type_journal,
-                            mois=mois_num,
-                            annee=annee_depart,
-                            est_complete=False
-                        )
-                        db.add(saisie)
-                    
-                    # Créer les documents requis pour cette échéance
-                    from app.models.document_requis import DocumentRequis
-                    from app.models.document import TypeDocument
-                    
-                    # Types de documents requis par service
-                    documents_par_service = {
-                        'COMPTABILITE': [TypeDocument.RELEVE_BANCAIRE, TypeDocument.FACTURE_ACHAT, TypeDocument.FACTURE_VENTE],
-                        'FISCALITE': [TypeDocument.DECLARATION_TVA, TypeDocument.DECLARATION_IMPOT],
-                        'PAIE': [TypeDocument.ETAT_PAIE, TypeDocument.DECLARATION_SOCIALE],
-                        'JURIDIQUE': [TypeDocument.CONTRAT, TypeDocument.COURRIER],
-                        'AUDIT': [TypeDocument.RELEVE_BANCAIRE, TypeDocument.FACTURE_ACHAT, TypeDocument.FACTURE_VENTE],
-                        'CONSEIL': [TypeDocument.CONTRAT, TypeDocument.COURRIER],
-                        'AUTRE': [TypeDocument.AUTRE]
-                    }
-                    
-                    docs_requis = documents_par_service.get(service_type, [TypeDocument.AUTRE])
-                    for type_doc in docs_requis:
-                        doc_requis = DocumentRequis(
-                            dossier_id=dossier.id,
-                            echeance_id=echeance.id,
-                            type_document=type_doc,
-                            mois=mois_num,
-                            annee=annee_depart,
-                            est_applicable=True,
-                            est_fourni=False
-                        )
-                        db.add(doc_requis)
         
+        scaffolding.add_dossier(
+            dossier,
+            service_type,
+            annee=annee_depart,
+            type_entreprise=dossier_data.type_entreprise or 'SARL',  # Valeur par défaut
+            commentaire=f"Dossier {service_type} créé automatiquement"
+        )
         created_dossiers.append(dossier)
     
+    scaffolding.persist()
     db.commit()
+    invalidate_tags(cabinet_tag(current_user.cabinet_id))
     
     # Rafraîchir tous les dossiers créés
     for dossier in created_dossiers:
@@ -332,87 +245,93 @@ async def create_dossier(
 @router.get("", response_model=List[DossierWithDetails])
 @router.get("/", response_model=List[DossierWithDetails])
 async def list_dossiers(
+    response: Response,
     status: Optional[StatusDossier] = Query(None, description="Filtrer par statut"),
     responsable_id: Optional[int] = Query(None, description="Filtrer par responsable"),
     urgent: Optional[bool] = Query(None, description="Dossiers urgents uniquement"),
     limit: int = Query(100, ge=1, le=500, description="Nombre maximum de résultats"),
-    offset: int = Query(0, ge=0, description="Décalage pour la pagination"),
+    cursor: Optional[str] = Query(None, description="Curseur de pagination (en-tête X-Next-Cursor de la page précédente)"),
+    include_echeances: bool = Query(True, description="Inclure la liste des échéances de chaque dossier"),
+    include_archives: bool = Query(False, description="Inclure les dossiers archivés (exercices clos)"),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    from sqlalchemy.orm import joinedload, selectinload
-    
-    # Utiliser joinedload pour éviter les requêtes N+1
-    query = db.query(DossierModel).filter(
-        DossierModel.cabinet_id == current_user.cabinet_id
-    ).options(
-        selectinload(DossierModel.echeances),
-        selectinload(DossierModel.alertes),
-        selectinload(DossierModel.documents),
-        joinedload(DossierModel.responsable)
-    )
+    from app.models.echeance import Echeance
     
-    # RESTRICTION D'ACCÈS SELON LE RÔLE
-    if current_user.role == "collaborateur":
-        # Les collaborateurs voient les dossiers des clients qui leur sont assignés
-        from app.models.client import Client
-        # Récupérer les noms des clients assignés à cet utilisateur
-        clients_assignes = db.query(Client).filter(Client.user_id == current_user.id).all()
-        noms_clients = [client.nom for client in clients_assignes]
+    def charger_page(sync_db: Session):
+        query = sync_db.query(DossierModel).filter(
+            DossierModel.cabinet_id == current_user.cabinet_id
+        )
+        if not include_archives:
+            query = query.filter(DossierModel.archived_at.is_(None))
         
-        if noms_clients:
-            query = query.filter(DossierModel.nom_client.in_(noms_clients))
-        else:
-            # Si aucun client assigné, ne montrer aucun dossier
-            query = query.filter(False)  # Condition impossible
-    elif current_user.role == "manager":
-        # Les managers voient tous les dossiers
-        pass  # Voir tous les dossiers
-    elif current_user.role == "admin":
-        # Les admins voient tous les dossiers
-        pass  # Voir tous les dossiers
-    
-    # Appliquer les filtres supplémentaires
-    if status:
-        query = query.filter(DossierModel.statut == status)
-    if responsable_id:
-        query = query.filter(DossierModel.responsable_id == responsable_id)
-    if urgent:
-        today = date.today()
-        query = query.filter(
-            or_(
-                DossierModel.date_echeance < today,  # En retard
-                DossierModel.date_echeance <= today + timedelta(days=3)  # Proche
+        # RESTRICTION D'ACCÈS SELON LE RÔLE
+        if current_user.role == "collaborateur":
+            # Les collaborateurs voient les dossiers des clients qui leur sont assignés
+            # (aucun dossier si aucun client assigné)
+            query = get_access_scope(sync_db, current_user).filter_dossiers(query, DossierModel)
+        elif current_user.role == "manager":
+            # Les managers voient tous les dossiers
+            pass  # Voir tous les dossiers
+        elif current_user.role == "admin":
+            # Les admins voient tous les dossiers
+            pass  # Voir tous les dossiers
+        
+        # Appliquer les filtres supplémentaires
+        if status:
+            query = query.filter(DossierModel.statut == status)
+        if responsable_id:
+            query = query.filter(DossierModel.responsable_id == responsable_id)
+        if urgent:
+            today = date.today()
+            query = query.filter(
+                or_(
+                    DossierModel.date_echeance < today,  # En retard
+                    DossierModel.date_echeance <= today + timedelta(days=3)  # Proche
+                )
             )
-        )
-    
-    # Ajouter la pagination
-    total = query.count()
-    dossiers = query.offset(offset).limit(limit).all()
-    
-    # Ajouter les infos de pagination dans les headers de réponse
-    # (sera fait dans la réponse)
+        
+        # Page et compteurs en une seule requête, pagination par curseur
+        return fetch_dossiers_page(sync_db, query, limit, cursor)
+    
+    page, next_cursor = await db.run_sync(charger_page)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    
+    # Échéances de toute la page en une requête
+    echeances_par_dossier = {}
+    if include_echeances and page:
+        echeances = (await db.scalars(select(Echeance).where(
+            Echeance.dossier_id.in_([dossier.id for dossier, _ in page])
+        ).order_by(Echeance.date_echeance))).all()
+        for echeance in echeances:
+            echeances_par_dossier.setdefault(echeance.dossier_id, []).append(echeance)
     
     # Mettre à jour automatiquement les priorités et statuts, puis enrichir avec les détails
     result = []
-    for dossier in dossiers:
-        statut_change = False
-        
+    modifications = False
+    for dossier, compteurs in page:
         # Mettre à jour la priorité automatiquement si le dossier a une date d'échéance
         if dossier.date_echeance and dossier.statut != StatusDossier.COMPLETE:
-            nouvelle_priorite = dossier.priorite_automatique
+            nouvelle_priorite = DossierModel.calculer_priorite(
+                dossier.statut,
+                compteurs['has_overdue'],
+                compteurs['prochaine_echeance_date'],
+                dossier.date_echeance
+            )
             if dossier.priorite != nouvelle_priorite:
                 dossier.priorite = nouvelle_priorite
-                statut_change = True
+                modifications = True
         
         # Auto-transition: EN_COURS -> EN_ATTENTE si pas d'activité depuis 7 jours
-        if dossier.peut_passer_en_attente():
+        if dossier.peut_passer_en_attente(compteurs['derniere_activite']):
             old_status = dossier.statut
             dossier.statut = StatusDossier.EN_ATTENTE
             dossier.updated_at = datetime.utcnow()
             
             # Ajouter à l'historique
             historique = HistoriqueDossier(
+                cabinet_id=dossier.cabinet_id,
                 dossier_id=dossier.id,
                 user_id=current_user.id,
                 action="auto_status_change",
@@ -421,32 +340,32 @@ async def list_dossiers(
                 commentaire="Passage automatique en attente (pas d'activité depuis 7 jours)"
             )
             db.add(historique)
-            statut_change = True
+            modifications = True
         
-        if statut_change:
-            db.commit()
-        
-        dossier_dict = dossier.__dict__.copy()
-        dossier_dict['responsable_name'] = dossier.responsable.full_name if dossier.responsable else None
-        dossier_dict['alerts_count'] = len([a for a in dossier.alertes if a.active])
+        dossier_dict = {
+            column.key: getattr(dossier, column.key)
+            for column in DossierModel.__table__.columns
+        }
+        dossier_dict['responsable_name'] = compteurs['responsable_name']
+        dossier_dict['alerts_count'] = compteurs['alerts_count']
         # Retirer temporairement le compte des documents car la table a une structure différente
         dossier_dict['documents_count'] = 0
         
         # Ajouter les informations sur les échéances
-        if hasattr(dossier, 'echeances') and dossier.echeances:
-            dossier_dict['echeances'] = dossier.echeances
-            dossier_dict['echeances_totales'] = len(dossier.echeances)
-            dossier_dict['echeances_completees'] = len([e for e in dossier.echeances if e.statut == 'COMPLETE'])
-            prochaine = dossier.prochaine_echeance
-            dossier_dict['prochaine_echeance_date'] = prochaine.date_echeance if prochaine else None
+        dossier_dict['echeances'] = echeances_par_dossier.get(dossier.id, [])
+        dossier_dict['echeances_totales'] = compteurs['echeances_totales']
+        dossier_dict['echeances_completees'] = compteurs['echeances_completees']
+        if compteurs['echeances_totales']:
+            dossier_dict['prochaine_echeance_date'] = compteurs['prochaine_echeance_date']
         else:
-            dossier_dict['echeances'] = []
-            dossier_dict['echeances_totales'] = 0
-            dossier_dict['echeances_completees'] = 0
             dossier_dict['prochaine_echeance_date'] = dossier.date_echeance
         
         result.append(DossierWithDetails(**dossier_dict))
     
+    # Un seul commit pour toutes les transitions automatiques de la page
+    if modifications:
+        await db.commit()
+    
     return result
 
 
@@ -454,15 +373,27 @@ async def list_dossiers(
 async def get_daily_point(
     date_point: Optional[date] = Query(None, description="Date du point (par défaut aujourd'hui)"),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     target_date = date_point or date.today()
-    
+    # Les relations (responsable, alertes, échéances) sont chargées à la demande :
+    # le calcul s'exécute dans run_sync, sans bloquer la boucle
+    return await db.run_sync(_build_daily_point, target_date)
+
+
+def _build_daily_point(db: Session, target_date: date) -> DailyPoint:
+    """Calcule le point quotidien (session synchrone, via run_sync)"""
+    # Dossiers restant à traiter : ni complétés, ni archivés
+    a_traiter = and_(
+        DossierModel.statut.notin_([StatusDossier.COMPLETE, StatusDossier.ARCHIVE]),
+        DossierModel.archived_at.is_(None)
+    )
+
     # Dossiers en retard
     dossiers_retard = db.query(DossierModel).filter(
         and_(
             DossierModel.date_echeance < target_date,
-            DossierModel.statut != StatusDossier.COMPLETE
+            a_traiter
         )
     ).all()
     
@@ -470,7 +401,7 @@ async def get_daily_point(
     dossiers_aujourdhui = db.query(DossierModel).filter(
         and_(
             DossierModel.date_echeance == target_date,
-            DossierModel.statut != StatusDossier.COMPLETE
+            a_traiter
         )
     ).all()
     
@@ -479,7 +410,7 @@ async def get_daily_point(
         and_(
             DossierModel.date_echeance <= target_date + timedelta(days=3),
             DossierModel.date_echeance > target_date,
-            DossierModel.statut != StatusDossier.COMPLETE
+            a_traiter
         )
     ).all()
     
@@ -493,7 +424,8 @@ async def get_daily_point(
     
     # Statistiques
     total_actifs = db.query(DossierModel).filter(
-        DossierModel.statut.in_([StatusDossier.NOUVEAU, StatusDossier.EN_COURS, StatusDossier.EN_ATTENTE])
+        DossierModel.statut.in_([StatusDossier.NOUVEAU, StatusDossier.EN_COURS, StatusDossier.EN_ATTENTE]),
+        DossierModel.archived_at.is_(None)
     ).count()
     
     def enrich_dossiers(dossiers):
@@ -540,126 +472,25 @@ async def get_daily_point(
 @router.get("/stats/echeances")
 async def get_echeances_stats(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Obtenir les statistiques des échéances"""
-    from app.models.echeance import Echeance
-    from app.models.client import Client
-    
-    # Obtenir les dossiers accessibles selon le rôle
-    query = db.query(DossierModel)
-    
-    if current_user.role == "collaborateur":
-        clients_assignes = db.query(Client).filter(Client.user_id == current_user.id).all()
-        noms_clients = [client.nom for client in clients_assignes]
-        if noms_clients:
-            query = query.filter(DossierModel.nom_client.in_(noms_clients))
-        else:
-            return {"en_retard": 0, "urgentes": 0, "a_faire": 0, "completes": 0, "total": 0}
-    
-    # Obtenir les IDs des dossiers accessibles
-    dossiers = query.all()
-    dossier_ids = [d.id for d in dossiers]
-    
-    logger.info(f"Stats échéances - Dossiers trouvés: {len(dossiers)}")
-    for d in dossiers:
-        logger.info(f"  - Dossier {d.id}: {d.reference} ({d.type_dossier}) - {d.nom_client}")
-    
-    if not dossier_ids:
-        return {"en_retard": 0, "urgentes": 0, "a_faire": 0, "completes": 0, "total": 0}
-    
-    # Requête sur les échéances
-    today = date.today()
-    echeances_query = db.query(Echeance).filter(Echeance.dossier_id.in_(dossier_ids))
-    
-    # Debug : lister toutes les échéances
-    all_echeances = echeances_query.all()
-    logger.info(f"Stats échéances - Total échéances trouvées: {len(all_echeances)}")
-    for e in all_echeances:
-        logger.info(f"  - Échéance {e.id}: dossier {e.dossier_id}, statut '{e.statut}', période {e.periode_label}")
-    
-    # Compter les échéances classiques (COMPTABILITE)
-    total_echeances = len(all_echeances)
-    completes_echeances = echeances_query.filter(Echeance.statut == 'COMPLETE').count()
-    
-    # Ajouter les déclarations fiscales complètes (FISCALITE)
-    from app.models.declaration_fiscale import DeclarationFiscale
-    declarations_fiscales = db.query(DeclarationFiscale).filter(DeclarationFiscale.dossier_id.in_(dossier_ids)).all()
-    completes_fiscales = sum(1 for d in declarations_fiscales if d.statut in ['TELEDECLAREE', 'VALIDEE'])
-    
-    # Note: Les dossiers PAIE utilisent aussi des échéances mensuelles (comme COMPTABILITE)
-    # avec des saisies pour DSN, bulletins, etc. Donc ils sont déjà comptés dans total_echeances
-    
-    logger.info(f"Stats échéances - Échéances (COMPTA + PAIE): {completes_echeances}/{total_echeances}")
-    logger.info(f"Stats échéances - Déclarations fiscales: {completes_fiscales}/{len(declarations_fiscales)}")
-    
-    # Total global (échéances + déclarations fiscales)
-    total = total_echeances + len(declarations_fiscales)
-    completes = completes_echeances + completes_fiscales
-    logger.info(f"Stats échéances - TOTAL GLOBAL: {completes}/{total}")
-    # Compter les retards (échéances COMPTA/PAIE + déclarations FISCALITE)
-    en_retard_echeances = echeances_query.filter(
-        and_(
-            Echeance.date_echeance < today,
-            Echeance.statut != 'COMPLETE'
-        )
-    ).count()
-    
-    en_retard_fiscales = sum(1 for d in declarations_fiscales 
-                            if d.date_limite < today and d.statut not in ['TELEDECLAREE', 'VALIDEE'])
-    
-    en_retard = en_retard_echeances + en_retard_fiscales
-    
-    # Échéances critiques (en retard + dans les 3 prochains jours)
-    date_limite_critique = today + timedelta(days=3)
-    critiques_echeances = echeances_query.filter(
-        and_(
-            Echeance.date_echeance <= date_limite_critique,
-            Echeance.statut != 'COMPLETE'
-        )
-    ).count()
-    
-    critiques_fiscales = sum(1 for d in declarations_fiscales 
-                            if d.date_limite <= date_limite_critique and d.statut not in ['TELEDECLAREE', 'VALIDEE'])
-    
-    critiques = critiques_echeances + critiques_fiscales
-    
-    # Échéances urgentes (dans les 7 prochains jours, non en retard)
-    date_limite_urgente = today + timedelta(days=7)
-    urgentes_echeances = echeances_query.filter(
-        and_(
-            Echeance.date_echeance >= today,
-            Echeance.date_echeance <= date_limite_urgente,
-            Echeance.statut != 'COMPLETE'
-        )
-    ).count()
-    
-    urgentes_fiscales = sum(1 for d in declarations_fiscales 
-                           if today <= d.date_limite <= date_limite_urgente and d.statut not in ['TELEDECLAREE', 'VALIDEE'])
-    
-    urgentes = urgentes_echeances + urgentes_fiscales
-    
-    # À faire = non complètes et non en retard
-    a_faire_echeances = echeances_query.filter(
-        and_(
-            Echeance.date_echeance >= today,
-            Echeance.statut != 'COMPLETE'
-        )
-    ).count()
-    
-    a_faire_fiscales = sum(1 for d in declarations_fiscales 
-                          if d.date_limite >= today and d.statut not in ['TELEDECLAREE', 'VALIDEE'])
+    def calculer(sync_db: Session):
+        # Obtenir les dossiers accessibles selon le rôle
+        query = sync_db.query(DossierModel).filter(DossierModel.cabinet_id == current_user.cabinet_id)
+        
+        scope = get_access_scope(sync_db, current_user)
+        if scope.restricted and not scope.client_names:
+            return dict(STATS_VIDES)
+        query = scope.filter_dossiers(query, DossierModel)
+        
+        # Échéances (COMPTA + PAIE) et déclarations fiscales (FISCALITE) agrégées en une requête
+        return compute_echeances_stats(sync_db, query)
     
-    a_faire = a_faire_echeances + a_faire_fiscales
+    stats = await db.run_sync(calculer)
+    logger.info(f"Stats échéances - TOTAL GLOBAL: {stats['completes']}/{stats['total']}")
     
-    return {
-        "en_retard": en_retard,
-        "critiques": critiques,
-        "urgentes": urgentes,
-        "a_faire": a_faire,
-        "completes": completes,
-        "total": total
-    }
+    return stats
 
 
 @router.get("/{dossier_id}", response_model=Dossier)
@@ -667,24 +498,18 @@ async def get_dossier(
     dossier_id: int,
     current_user: User = Depends(get_current_user),
     cabinet_id: int = Depends(get_current_cabinet_id),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    dossier = db.query(DossierModel).filter(
+    dossier = (await db.scalars(select(DossierModel).where(
         DossierModel.id == dossier_id,
         DossierModel.cabinet_id == cabinet_id
-    ).first()
+    ))).first()
     if not dossier:
         raise HTTPException(status_code=404, detail="Dossier non trouvé")
     
     # VÉRIFICATION DES PERMISSIONS
-    if current_user.role == "collaborateur":
-        # Les collaborateurs ne peuvent voir que les dossiers des clients qui leur sont assignés
-        from app.models.client import Client
-        clients_assignes = db.query(Client).filter(Client.user_id == current_user.id).all()
-        noms_clients = [client.nom for client in clients_assignes]
-        
-        if dossier.nom_client not in noms_clients:
-            raise HTTPException(status_code=403, detail="Accès refusé : ce client ne vous est pas assigné")
+    scope = await db.run_sync(get_access_scope, current_user)
+    scope.check(dossier, detail="Accès refusé : ce client ne vous est pas assigné")
     
     # Auto-transition: NOUVEAU -> EN_COURS quand on consulte le dossier
     if dossier.peut_passer_en_cours():
@@ -694,6 +519,7 @@ async def get_dossier(
         
         # Ajouter à l'historique
         historique = HistoriqueDossier(
+            cabinet_id=dossier.cabinet_id,
             dossier_id=dossier_id,
             user_id=current_user.id,
             action="auto_status_change",
@@ -702,8 +528,8 @@ async def get_dossier(
             commentaire="Passage automatique en cours lors de la consultation"
         )
         db.add(historique)
-        db.commit()
-        db.refresh(dossier)
+        await db.commit()
+        await db.refresh(dossier)
     
     return dossier
 
@@ -725,13 +551,7 @@ async def update_dossier(
         raise HTTPException(status_code=404, detail="Dossier non trouvé")
     
     # VÉRIFICATION DES PERMISSIONS
-    if current_user.role == "collaborateur":
-        from app.models.client import Client
-        clients_assignes = db.query(Client).filter(Client.user_id == current_user.id).all()
-        noms_clients = [client.nom for client in clients_assignes]
-        
-        if dossier.nom_client not in noms_clients:
-            raise HTTPException(status_code=403, detail="Accès refusé : ce client ne vous est pas assigné")
+    get_access_scope(db, current_user).check(dossier, detail="Accès refusé : ce client ne vous est pas assigné")
     
     # Mettre à jour les champs fournis
     update_data = dossier_update.dict(exclude_unset=True)
@@ -820,6 +640,7 @@ async def update_dossier(
     db.add(historique)
     
     db.commit()
+    invalidate_tags(cabinet_tag(cabinet_id), dossier_tag(dossier_id))
     db.refresh(dossier)
     
     return dossier
@@ -841,13 +662,7 @@ async def update_dossier_status(
         raise HTTPException(status_code=404, detail="Dossier non trouvé")
     
     # VÉRIFICATION DES PERMISSIONS
-    if current_user.role == "collaborateur":
-        from app.models.client import Client
-        clients_assignes = db.query(Client).filter(Client.user_id == current_user.id).all()
-        noms_clients = [client.nom for client in clients_assignes]
-        
-        if dossier.nom_client not in noms_clients:
-            raise HTTPException(status_code=403, detail="Accès refusé : ce client ne vous est pas assigné")
+    get_access_scope(db, current_user).check(dossier, detail="Accès refusé : ce client ne vous est pas assigné")
     
     old_status = dossier.statut
     dossier.statut = status_update.statut
@@ -868,6 +683,7 @@ async def update_dossier_status(
     db.add(historique)
     
     db.commit()
+    invalidate_tags(cabinet_tag(cabinet_id), dossier_tag(dossier_id))
     db.refresh(dossier)
     
     return dossier
@@ -889,13 +705,7 @@ async def complete_dossier(
         raise HTTPException(status_code=404, detail="Dossier non trouvé")
     
     # VÉRIFICATION DES PERMISSIONS
-    if current_user.role == "collaborateur":
-        from app.models.client import Client
-        clients_assignes = db.query(Client).filter(Client.user_id == current_user.id).all()
-        noms_clients = [client.nom for client in clients_assignes]
-        
-        if dossier.nom_client not in noms_clients:
-            raise HTTPException(status_code=403, detail="Accès refusé : ce client ne vous est pas assigné")
+    get_access_scope(db, current_user).check(dossier, detail="Accès refusé : ce client ne vous est pas assigné")
     
     if not dossier.peut_passer_complete():
         raise HTTPException(status_code=400, detail="Ce dossier ne peut pas être marqué comme complété")
@@ -917,6 +727,7 @@ async def complete_dossier(
     db.add(historique)
     
     db.commit()
+    invalidate_tags(cabinet_tag(cabinet_id), dossier_tag(dossier_id))
     db.refresh(dossier)
     
     return dossier
@@ -939,19 +750,13 @@ async def get_documents_requis(
         raise HTTPException(status_code=404, detail="Dossier non trouvé")
     
     # Vérifier les permissions pour les collaborateurs
-    if current_user.role == "collaborateur":
-        from app.models.client import Client
-        clients_assignes = db.query(Client).filter(Client.user_id == current_user.id).all()
-        noms_clients = [client.nom for client in clients_assignes]
-        
-        if dossier.nom_client not in noms_clients:
-            raise HTTPException(status_code=403, detail="Accès refusé")
+    get_access_scope(db, current_user).check(dossier)
     
     # Importer les modèles nécessaires
-    from app.models.document_requis import DocumentRequis
     from app.models.document import Document
     
-    # Construire la requête de base
+    # Construire la requête de base (tier d'archive si le dossier est archivé)
+    DocumentRequis = document_requis_model(dossier)
     query = db.query(DocumentRequis).filter(DocumentRequis.dossier_id == dossier_id)
     
     # Filtrer par échéance si spécifié
@@ -990,7 +795,8 @@ async def get_documents_requis(
             doc_data["document"] = {
                 "id": document_fourni.id,
                 "nom": document_fourni.nom,
-                "url": document_fourni.url or f"/api/v1/documents/{document_fourni.id}/download",
+                "url": document_fourni.url or document_download_path(dossier_id, document_fourni.id),
+                "statut_traitement": document_fourni.statut_traitement.value,
                 "created_at": document_fourni.created_at.isoformat()
             }
         
@@ -1005,32 +811,35 @@ async def get_dossier_echeances(
     dossier_id: int,
     current_user: User = Depends(get_current_user),
     cabinet_id: int = Depends(get_current_cabinet_id),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Récupérer toutes les échéances d'un dossier avec leurs saisies"""
     # Vérifier que le dossier existe et que l'utilisateur y a accès
-    dossier = db.query(DossierModel).filter(
+    dossier = (await db.scalars(select(DossierModel).where(
         DossierModel.id == dossier_id,
         DossierModel.cabinet_id == cabinet_id
-    ).first()
+    ))).first()
     if not dossier:
         raise HTTPException(status_code=404, detail="Dossier non trouvé")
     
     # Vérifier les permissions
-    if current_user.role == "collaborateur":
-        from app.models.client import Client
-        clients_assignes = db.query(Client).filter(Client.user_id == current_user.id).all()
-        noms_clients = [client.nom for client in clients_assignes]
-        
-        if dossier.nom_client not in noms_clients:
-            raise HTTPException(status_code=403, detail="Accès refusé")
+    (await db.run_sync(get_access_scope, current_user)).check(dossier)
     
-    # Récupérer les échéances avec leurs saisies
+    # Récupérer les échéances avec leurs saisies (tier d'archive si le dossier est archivé)
     from app.models.echeance import Echeance
-    from app.models.saisie import SaisieComptable
-    echeances = db.query(Echeance).filter(
+    SaisieComptable = saisie_model(dossier)
+    echeances = (await db.scalars(select(Echeance).where(
         Echeance.dossier_id == dossier_id
-    ).order_by(Echeance.mois).all()
+    ).order_by(Echeance.mois))).all()
+    
+    # Saisies de toutes les échéances en une requête
+    saisies_par_echeance = {}
+    if echeances:
+        saisies = (await db.scalars(select(SaisieComptable).where(
+            SaisieComptable.echeance_id.in_([echeance.id for echeance in echeances])
+        ).order_by(SaisieComptable.id))).all()
+        for saisie in saisies:
+            saisies_par_echeance.setdefault(saisie.echeance_id, []).append(saisie)
     
     # Enrichir avec les saisies
     result = []
@@ -1048,12 +857,7 @@ async def get_dossier_echeances(
             "saisies": []
         }
         
-        # Récupérer les saisies pour cette échéance
-        saisies = db.query(SaisieComptable).filter(
-            SaisieComptable.echeance_id == echeance.id
-        ).all()
-        
-        for saisie in saisies:
+        for saisie in saisies_par_echeance.get(echeance.id, []):
             echeance_dict["saisies"].append({
                 "id": saisie.id,
                 "type_journal": saisie.type_journal,
@@ -1079,17 +883,12 @@ async def update_saisie(
     
     saisie = db.query(SaisieComptable).filter(SaisieComptable.id == saisie_id).first()
     if not saisie:
+        check_not_archived(db, current_user, SaisieComptable, saisie_id)
         raise HTTPException(status_code=404, detail="Saisie non trouvée")
     
     # Vérifier l'accès via le dossier
     dossier = saisie.dossier
-    if current_user.role == "collaborateur":
-        from app.models.client import Client
-        clients_assignes = db.query(Client).filter(Client.user_id == current_user.id).all()
-        noms_clients = [client.nom for client in clients_assignes]
-        
-        if dossier.nom_client not in noms_clients:
-            raise HTTPException(status_code=403, detail="Accès refusé")
+    get_access_scope(db, current_user).check(dossier)
     
     # Mettre à jour la saisie
     saisie.est_complete = est_complete
@@ -1177,6 +976,7 @@ async def update_saisie(
 @router.post("/{dossier_id}/documents/upload")
 async def upload_documents(
     dossier_id: int,
+    background_tasks: BackgroundTasks,
     files: List[UploadFile] = File(...),
     type: Optional[str] = Form(None),
     echeance_id: Optional[int] = Form(None),
@@ -1186,7 +986,14 @@ async def upload_documents(
     cabinet_id: int = Depends(get_current_cabinet_id),
     db: Session = Depends(get_db)
 ):
-    """Uploader plusieurs documents pour un dossier avec validation sécurisée"""
+    """
+    Uploader plusieurs documents pour un dossier avec validation sécurisée
+    
+    La réponse part dès que les fichiers sont stockés et enregistrés ; la
+    validation approfondie, l'aperçu, l'extraction du texte et le
+    rapprochement avec les documents requis suivent en tâche de fond
+    (statut_traitement du document).
+    """
     # Vérifier l'accès au dossier
     dossier = db.query(DossierModel).filter(
         DossierModel.id == dossier_id,
@@ -1195,36 +1002,26 @@ async def upload_documents(
     if not dossier:
         raise HTTPException(status_code=404, detail="Dossier non trouvé")
     
-    if current_user.role == "collaborateur":
-        from app.models.client import Client
-        clients_assignes = db.query(Client).filter(Client.user_id == current_user.id).all()
-        noms_clients = [client.nom for client in clients_assignes]
-        
-        if dossier.nom_client not in noms_clients:
-            raise HTTPException(status_code=403, detail="Accès refusé")
+    get_access_scope(db, current_user).check(dossier)
+    if dossier.archived_at:
+        raise HTTPException(status_code=409, detail=ARCHIVED_DETAIL)
     
     from app.models.document import Document, TypeDocument
     from app.models.document_requis import DocumentRequis
     from app.core.file_validator import file_validator
-    import os
-    import aiofiles
-    import uuid
     
-    # Créer le répertoire de stockage s'il n'existe pas
-    upload_dir = f"uploads/dossiers/{dossier_id}"
-    os.makedirs(upload_dir, exist_ok=True)
-    
-    uploaded_docs = []
     security_logger = logging.getLogger('security')
     
     try:
-        for file in files:
-            # Valider le fichier avec notre validateur sécurisé
-            safe_filename, mime_type, file_size = await file_validator.validate_file(
-                file, 
-                check_content=True
-            )
-            
+        # Validation, hash et écriture des fichiers en parallèle (bornée) :
+        # le lot dure à peu près le temps du fichier le plus long. Stockage
+        # par contenu : un fichier déjà connu n'est pas réécrit
+        stored_files = await file_validator.store_files(
+            files, check_content=True, concurrency=settings.UPLOAD_CONCURRENCY, blob_store=blob_store
+        )
+        
+        documents = []
+        for file, stored in zip(files, stored_files):
             # Log de sécurité
             security_logger.info(
                 f"File upload validated",
@@ -1232,65 +1029,64 @@ async def upload_documents(
                     'user_id': current_user.id,
                     'dossier_id': dossier_id,
                     'original_filename': file.filename,
-                    'safe_filename': safe_filename,
-                    'mime_type': mime_type,
-                    'size': file_size
+                    'safe_filename': stored.safe_filename,
+                    'mime_type': stored.mime_type,
+                    'size': stored.size,
+                    'deduplicated': stored.deduplicated
                 }
             )
             
-            # Chemin de stockage sécurisé
-            file_path = os.path.join(upload_dir, safe_filename)
-            
-            # Sauvegarder le fichier de manière asynchrone
-            async with aiofiles.open(file_path, 'wb') as buffer:
-                content = await file.read()
-                await buffer.write(content)
-            
-            # Calculer le hash du fichier pour l'intégrité
-            file_hash = file_validator.calculate_file_hash(file_path)
-            
             # Créer l'enregistrement en base de données
-            document = Document(
+            documents.append(Document(
                 nom=file.filename,  # Nom original pour l'affichage
-                nom_fichier_stockage=safe_filename,  # Nom sécurisé pour le stockage
+                nom_fichier_stockage=stored.safe_filename,  # Nom sécurisé pour le stockage
                 type=TypeDocument[type] if type else TypeDocument.AUTRE,
-                chemin_fichier=file_path,
-                url=f"/api/v1/documents/{dossier_id}/{safe_filename}",
-                taille=file_size,
-                mime_type=mime_type,
-                hash_fichier=file_hash,
+                chemin_fichier=stored.path,
+                taille=stored.size,
+                mime_type=stored.mime_type,
+                hash_fichier=stored.sha256,
+                cabinet_id=cabinet_id,
                 dossier_id=dossier_id,
                 echeance_id=echeance_id,
                 user_id=current_user.id,
                 mois=mois,
                 annee=annee
-            )
-            db.add(document)
-            db.flush()
-            
-            uploaded_docs.append({
+            ))
+        
+        db.add_all(documents)
+        
+        # Marquer les documents requis correspondants comme fournis (une requête)
+        if echeance_id and type and documents:
+            db.query(DocumentRequis).filter(
+                DocumentRequis.dossier_id == dossier_id,
+                DocumentRequis.echeance_id == echeance_id,
+                DocumentRequis.type_document == type,
+                DocumentRequis.mois == mois,
+                DocumentRequis.annee == annee
+            ).update({DocumentRequis.est_fourni: True}, synchronize_session=False)
+        
+        db.flush()
+        for document in documents:
+            document.url = document_download_path(dossier_id, document.id)
+        uploaded_docs = [
+            {
                 "id": document.id,
                 "nom": document.nom,
                 "type": document.type.value,
                 "url": document.url,
                 "taille": document.taille,
-                "mime_type": document.mime_type
-            })
-            
-            # Marquer le document requis comme fourni si applicable
-            if echeance_id and type:
-                doc_requis = db.query(DocumentRequis).filter(
-                    DocumentRequis.echeance_id == echeance_id,
-                    DocumentRequis.type_document == type,
-                    DocumentRequis.mois == mois,
-                    DocumentRequis.annee == annee
-                ).first()
-                
-                if doc_requis:
-                    doc_requis.est_fourni = True
+                "mime_type": document.mime_type,
+                "statut_traitement": document.statut_traitement.value
+            }
+            for document in documents
+        ]
         
         db.commit()
         
+        # Traitement lancé après l'envoi de la réponse (voir app.tasks.documents)
+        from app.tasks.documents import launch_pipelines
+        background_tasks.add_task(launch_pipelines, [doc["id"] for doc in uploaded_docs])
+        
         # Log de succès
         security_logger.info(
             f"Files uploaded successfully",
@@ -1304,13 +1100,8 @@ async def upload_documents(
         return uploaded_docs
         
     except Exception as e:
-        # En cas d'erreur, supprimer les fichiers déjà uploadés
-        for doc in uploaded_docs:
-            try:
-                if os.path.exists(doc.get('file_path', '')):
-                    os.remove(doc['file_path'])
-            except:
-                pass
+        # Les blobs déjà écrits sans document sont supprimés par le GC
+        # (app.services.blob_references.collect_garbage)
         
         # Log de l'erreur
         security_logger.error(
@@ -1325,33 +1116,202 @@ async def upload_documents(
         raise
 
 
+def _get_document(db: Session, dossier_id: int, document_id: int, cabinet_id: int, current_user: User):
+    """Document d'un dossier accessible à l'utilisateur (404 / 403 sinon)"""
+    from app.models.document import Document
+
+    document = db.query(Document).filter(
+        Document.id == document_id,
+        Document.dossier_id == dossier_id,
+        Document.cabinet_id == cabinet_id
+    ).first()
+    if not document:
+        raise HTTPException(status_code=404, detail="Document non trouvé")
+
+    get_access_scope(db, current_user).check(document.dossier)
+    return document
+
+
+@router.get("/documents/signed/{token}")
+async def download_signed_document(token: str, request: Request, db: Session = Depends(get_db)):
+    """
+    Télécharger un document via un lien signé (voir /download-url). Le
+    document est relu : un lien émis avant sa suppression, son rejet ou le
+    remplacement de son contenu ne le sert plus.
+    """
+    from app.models.document import Document
+    
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError:
+        raise HTTPException(status_code=403, detail="Lien de téléchargement invalide ou expiré")
+    if payload.get("type") != "document_download":
+        raise HTTPException(status_code=403, detail="Lien de téléchargement invalide ou expiré")
+
+    document = db.get(Document, payload.get("doc"))
+    if not document:
+        raise HTTPException(status_code=404, detail="Document non trouvé")
+    if document.hash_fichier != payload.get("sha"):
+        raise HTTPException(status_code=403, detail="Lien de téléchargement invalide ou expiré")
+    check_downloadable(document)
+
+    return await asyncio.to_thread(
+        serve_stored_file, request, storage_key(document.chemin_fichier), document.nom,
+        document.mime_type, document.hash_fichier
+    )
+
+
+@router.get("/{dossier_id}/documents/{document_id}/download")
+async def download_document(
+    dossier_id: int,
+    document_id: int,
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    cabinet_id: int = Depends(get_current_cabinet_id),
+    db: Session = Depends(get_db)
+):
+    """
+    Télécharger un document (requêtes Range, ETag / If-None-Match,
+    délégation à nginx ou au stockage objet, voir serve_document)
+    """
+    document = _get_document(db, dossier_id, document_id, cabinet_id, current_user)
+    return await serve_document(request, document)
+
+
+@router.get("/{dossier_id}/documents/{document_id}/preview")
+async def get_document_preview(
+    dossier_id: int,
+    document_id: int,
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    cabinet_id: int = Depends(get_current_cabinet_id),
+    db: Session = Depends(get_db)
+):
+    """Miniature PNG de la première page (produite par le traitement asynchrone)"""
+    document = _get_document(db, dossier_id, document_id, cabinet_id, current_user)
+    if not document.cle_apercu:
+        raise HTTPException(status_code=404, detail="Aperçu non disponible")
+
+    return await asyncio.to_thread(
+        serve_stored_file, request, document.cle_apercu, f"apercu-{document.id}.png", "image/png",
+        f"{document.hash_fichier}-apercu"
+    )
+
+
+@router.get("/{dossier_id}/documents/{document_id}/download-url")
+async def get_document_download_url(
+    dossier_id: int,
+    document_id: int,
+    current_user: User = Depends(get_current_user),
+    cabinet_id: int = Depends(get_current_cabinet_id),
+    db: Session = Depends(get_db)
+):
+    """
+    URL de téléchargement temporaire, utilisable sans jeton d'accès :
+    présignée par le stockage objet, ou lien signé servi par l'API
+    """
+    document = _get_document(db, dossier_id, document_id, cabinet_id, current_user)
+    check_downloadable(document)
+
+    url = await asyncio.to_thread(
+        storage.presigned_url, storage_key(document.chemin_fichier), settings.STORAGE_URL_EXPIRES, document.nom
+    )
+    if not url:
+        url = f"/api/v1/dossiers/documents/signed/{create_download_token(document)}"
+    return {"url": url, "expires_in": settings.STORAGE_URL_EXPIRES}
+
+
+@router.delete("/{dossier_id}/documents/{document_id}")
+async def delete_document(
+    dossier_id: int,
+    document_id: int,
+    current_user: User = Depends(get_current_user),
+    cabinet_id: int = Depends(get_current_cabinet_id),
+    db: Session = Depends(get_db)
+):
+    """
+    Supprimer un document. Le fichier est partagé par contenu : il est
+    supprimé par le GC quand plus aucun document n'y fait référence
+    """
+    from app.models.document import Document
+    from app.models.document_requis import DocumentRequis
+
+    document = _get_document(db, dossier_id, document_id, cabinet_id, current_user)
+    db.delete(document)
+    db.flush()
+
+    # Le document requis n'est plus fourni si c'était le dernier de sa période
+    if document.echeance_id and document.type:
+        restant = db.query(Document.id).filter(
+            Document.dossier_id == dossier_id,
+            Document.echeance_id == document.echeance_id,
+            Document.type == document.type,
+            Document.mois == document.mois,
+            Document.annee == document.annee
+        ).first()
+        if restant is None:
+            db.query(DocumentRequis).filter(
+                DocumentRequis.dossier_id == dossier_id,
+                DocumentRequis.echeance_id == document.echeance_id,
+                DocumentRequis.type_document == document.type,
+                DocumentRequis.mois == document.mois,
+                DocumentRequis.annee == document.annee
+            ).update({DocumentRequis.est_fourni: False}, synchronize_session=False)
+
+    db.commit()
+    invalidate_tags(dossier_tag(dossier_id))
+
+    return {"message": f"Document {document.nom} supprimé avec succès"}
+
+
 @router.get("/{dossier_id}/documents")
 async def get_dossier_documents(
     dossier_id: int,
     current_user: User = Depends(get_current_user),
     cabinet_id: int = Depends(get_current_cabinet_id),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Récupérer tous les documents d'un dossier"""
     # Vérifier l'accès au dossier
-    dossier = db.query(DossierModel).filter(
+    dossier = (await db.scalars(select(DossierModel).where(
         DossierModel.id == dossier_id,
         DossierModel.cabinet_id == cabinet_id
-    ).first()
+    ))).first()
     if not dossier:
         raise HTTPException(status_code=404, detail="Dossier non trouvé")
     
-    if current_user.role == "collaborateur":
-        from app.models.client import Client
-        clients_assignes = db.query(Client).filter(Client.user_id == current_user.id).all()
-        noms_clients = [client.nom for client in clients_assignes]
-        
-        if dossier.nom_client not in noms_clients:
-            raise HTTPException(status_code=403, detail="Accès refusé")
+    (await db.run_sync(get_access_scope, current_user)).check(dossier)
+    
+    from app.models.document import Document
     
-    # TODO: Récupérer les vrais documents depuis la base de données
-    # Pour l'instant, on retourne une liste vide
-    return []
+    # Sans le texte extrait, inutile ici et volumineux
+    documents = (await db.scalars(
+        select(Document)
+        .options(defer(Document.texte_extrait))
+        .where(Document.dossier_id == dossier_id, Document.cabinet_id == cabinet_id)
+        .order_by(Document.created_at.desc(), Document.id.desc())
+    )).all()
+    
+    return [
+        {
+            "id": document.id,
+            "nom": document.nom,
+            "type": document.type.value,
+            "url": document.url or document_download_path(dossier_id, document.id),
+            "apercu_url": (
+                f"/api/v1/dossiers/{dossier_id}/documents/{document.id}/preview" if document.cle_apercu else None
+            ),
+            "taille": document.taille,
+            "mime_type": document.mime_type,
+            "echeance_id": document.echeance_id,
+            "mois": document.mois,
+            "annee": document.annee,
+            "statut_traitement": document.statut_traitement.value,
+            "erreur_traitement": document.erreur_traitement,
+            "created_at": document.created_at.isoformat() if document.created_at else None
+        }
+        for document in documents
+    ]
 
 
 @router.get("/{dossier_id}/timeline")
@@ -1367,76 +1327,113 @@ async def get_dossier_timeline(
     }
 
 
-@router.delete("/{dossier_id}")
-async def delete_dossier(
+@router.post("/{dossier_id}/archive")
+async def archive_dossier(
     dossier_id: int,
     current_user: User = Depends(get_current_user),
     cabinet_id: int = Depends(get_current_cabinet_id),
     db: Session = Depends(get_db)
 ):
-    """Supprimer un dossier"""
+    """Archiver un dossier clos : ses saisies et documents requis passent dans le tier d'archive"""
     dossier = db.query(DossierModel).filter(
         DossierModel.id == dossier_id,
         DossierModel.cabinet_id == cabinet_id
     ).first()
     if not dossier:
         raise HTTPException(status_code=404, detail="Dossier non trouvé")
+    get_access_scope(db, current_user).check(dossier, detail="Accès refusé : ce client ne vous est pas assigné")
+    if dossier.archived_at:
+        raise HTTPException(status_code=409, detail="Dossier déjà archivé")
+    if dossier.statut not in (StatusDossier.COMPLETE, StatusDossier.ARCHIVE):
+        raise HTTPException(status_code=409, detail="Seuls les dossiers complétés peuvent être archivés")
     
-    # VÉRIFICATION DES PERMISSIONS
-    if current_user.role == "collaborateur":
-        # Les collaborateurs ne peuvent supprimer que les dossiers de leurs clients
-        from app.models.client import Client
-        clients_assignes = db.query(Client).filter(Client.user_id == current_user.id).all()
-        noms_clients = [client.nom for client in clients_assignes]
-        
-        if dossier.nom_client not in noms_clients:
-            raise HTTPException(status_code=403, detail="Accès refusé : ce client ne vous est pas assigné")
+    archive_dossiers(db, cabinet_id, [dossier_id])
+    db.commit()
+    invalidate_tags(cabinet_tag(cabinet_id), dossier_tag(dossier_id))
     
-    # Suppression en cascade complète - ordre important pour respecter les contraintes FK
+    return {"message": f"Dossier {dossier.reference} archivé", "archived_at": dossier.archived_at}
+
+
+@router.post("/{dossier_id}/restore")
+async def restore_dossier(
+    dossier_id: int,
+    current_user: User = Depends(get_current_user),
+    cabinet_id: int = Depends(get_current_cabinet_id),
+    db: Session = Depends(get_db)
+):
+    """Restaurer un dossier archivé dans les tables vives (statut COMPLETE)"""
+    dossier = db.query(DossierModel).filter(
+        DossierModel.id == dossier_id,
+        DossierModel.cabinet_id == cabinet_id
+    ).first()
+    if not dossier:
+        raise HTTPException(status_code=404, detail="Dossier non trouvé")
+    get_access_scope(db, current_user).check(dossier, detail="Accès refusé : ce client ne vous est pas assigné")
+    if not dossier.archived_at:
+        raise HTTPException(status_code=409, detail="Dossier non archivé")
     
-    # 1. Supprimer les saisies comptables (dépendent d'échéances et de dossier)
-    from app.models.saisie import SaisieComptable
-    saisies = db.query(SaisieComptable).filter(SaisieComptable.dossier_id == dossier_id).all()
-    for saisie in saisies:
-        db.delete(saisie)
+    restore_dossiers(db, cabinet_id, [dossier_id])
+    db.commit()
+    invalidate_tags(cabinet_tag(cabinet_id), dossier_tag(dossier_id))
     
-    # 2. Supprimer les documents requis (dépendent d'échéances et de dossier)
-    from app.models.document_requis import DocumentRequis
-    docs_requis = db.query(DocumentRequis).filter(DocumentRequis.dossier_id == dossier_id).all()
-    for doc in docs_requis:
-        db.delete(doc)
+    return {"message": f"Dossier {dossier.reference} restauré", "statut": dossier.statut.value}
+
+
+@router.post("/batch-delete")
+async def batch_delete_dossiers(
+    data: DossierBatchDelete,
+    current_user: User = Depends(get_current_user),
+    cabinet_id: int = Depends(get_current_cabinet_id),
+    db: Session = Depends(get_db)
+):
+    """
+    Supprimer plusieurs dossiers. Les dossiers introuvables ou hors du
+    périmètre du collaborateur sont ignorés et listés dans la réponse
+    """
+    stmt = select(DossierModel.id).where(
+        DossierModel.cabinet_id == cabinet_id,
+        DossierModel.id.in_(sorted(set(data.ids)))
+    )
+    stmt = get_access_scope(db, current_user).filter_dossiers(stmt, DossierModel)
+    autorises = db.execute(stmt).scalars().all()
+
+    resultat = delete_dossiers(db, cabinet_id, autorises)
+    db.commit()
+    supprimes = resultat["deleted"]
+    if supprimes:
+        invalidate_tags(cabinet_tag(cabinet_id), *(dossier_tag(dossier_id) for dossier_id in supprimes))
+        invalidate_autocomplete(cabinet_id)
+
+    return {
+        "deleted": supprimes,
+        "ignored": sorted(set(data.ids) - set(supprimes)),
+        "message": f"{len(supprimes)} dossier(s) supprimé(s)"
+    }
+
+
+@router.delete("/{dossier_id}")
+async def delete_dossier(
+    dossier_id: int,
+    current_user: User = Depends(get_current_user),
+    cabinet_id: int = Depends(get_current_cabinet_id),
+    db: Session = Depends(get_db)
+):
+    """Supprimer un dossier"""
+    dossier = db.query(DossierModel).filter(
+        DossierModel.id == dossier_id,
+        DossierModel.cabinet_id == cabinet_id
+    ).first()
+    if not dossier:
+        raise HTTPException(status_code=404, detail="Dossier non trouvé")
     
-    # 3. Supprimer les documents (dépendent d'échéances et de dossier)
-    from app.models.document import Document
-    documents = db.query(Document).filter(Document.dossier_id == dossier_id).all()
-    for document in documents:
-        db.delete(document)
-    
-    # 4. Supprimer les notifications liées aux alertes du dossier
-    from app.models.notification import Notification
-    from app.models.alerte import Alerte
-    alertes = db.query(Alerte).filter(Alerte.dossier_id == dossier_id).all()
-    for alerte in alertes:
-        notifications = db.query(Notification).filter(Notification.alerte_id == alerte.id).all()
-        for notification in notifications:
-            db.delete(notification)
-        db.delete(alerte)
-    
-    # 5. Supprimer l'historique du dossier
-    from app.models.historique import HistoriqueDossier
-    historiques = db.query(HistoriqueDossier).filter(HistoriqueDossier.dossier_id == dossier_id).all()
-    for historique in historiques:
-        db.delete(historique)
-    
-    # 6. Supprimer les déclarations fiscales
-    from app.models.declaration_fiscale import DeclarationFiscale
-    declarations = db.query(DeclarationFiscale).filter(DeclarationFiscale.dossier_id == dossier_id).all()
-    for declaration in declarations:
-        db.delete(declaration)
+    # VÉRIFICATION DES PERMISSIONS
+    get_access_scope(db, current_user).check(dossier, detail="Accès refusé : ce client ne vous est pas assigné")
     
-    # 7. Supprimer le dossier (les échéances seront supprimées automatiquement grâce à cascade)
-    db.delete(dossier)
+    # Suppression ensembliste de toute l'arborescence (app.services.dossier_deletion)
+    delete_dossiers(db, cabinet_id, [dossier_id])
     db.commit()
+    invalidate_tags(cabinet_tag(cabinet_id), dossier_tag(dossier_id))
+    invalidate_autocomplete(cabinet_id)
     
     return {"message": f"Dossier {dossier.reference} supprimé avec succès"}
 
@@ -1454,17 +1451,12 @@ async def update_document_requis_applicable(
     
     doc_requis = db.query(DocumentRequis).filter(DocumentRequis.id == doc_requis_id).first()
     if not doc_requis:
+        check_not_archived(db, current_user, DocumentRequis, doc_requis_id)
         raise HTTPException(status_code=404, detail="Document requis non trouvé")
     
     # Vérifier l'accès via le dossier
     dossier = doc_requis.dossier
-    if current_user.role == "collaborateur":
-        from app.models.client import Client
-        clients_assignes = db.query(Client).filter(Client.user_id == current_user.id).all()
-        noms_clients = [client.nom for client in clients_assignes]
-        
-        if dossier.nom_client not in noms_clients:
-            raise HTTPException(status_code=403, detail="Accès refusé")
+    get_access_scope(db, current_user).check(dossier)
     
     # Mettre à jour le statut
     doc_requis.est_applicable = est_applicable
@@ -1487,32 +1479,26 @@ async def get_declarations_fiscales(
     dossier_id: int,
     current_user: User = Depends(get_current_user),
     cabinet_id: int = Depends(get_current_cabinet_id),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Récupérer les déclarations fiscales d'un dossier"""
     from app.models.declaration_fiscale import DeclarationFiscale
-    from app.models.client import Client
     
     # Vérifier l'accès au dossier
-    dossier = db.query(DossierModel).filter(
+    dossier = (await db.scalars(select(DossierModel).where(
         DossierModel.id == dossier_id,
         DossierModel.cabinet_id == cabinet_id
-    ).first()
+    ))).first()
     if not dossier:
         raise HTTPException(status_code=404, detail="Dossier non trouvé")
     
     # Contrôle d'accès selon le rôle
-    if current_user.role == "collaborateur":
-        clients_assignes = db.query(Client).filter(Client.user_id == current_user.id).all()
-        noms_clients = [client.nom for client in clients_assignes]
-        
-        if dossier.nom_client not in noms_clients:
-            raise HTTPException(status_code=403, detail="Accès refusé")
+    (await db.run_sync(get_access_scope, current_user)).check(dossier)
     
     # Récupérer les déclarations fiscales
-    declarations = db.query(DeclarationFiscale).filter(
+    declarations = (await db.scalars(select(DeclarationFiscale).where(
         DeclarationFiscale.dossier_id == dossier_id
-    ).order_by(DeclarationFiscale.date_limite).all()
+    ).order_by(DeclarationFiscale.date_limite))).all()
     
     # Enrichir avec les propriétés calculées
     result = []
@@ -1551,7 +1537,6 @@ async def complete_declaration_fiscale(
 ):
     """Marquer une déclaration fiscale comme télédéclarée"""
     from app.models.declaration_fiscale import DeclarationFiscale
-    from app.models.client import Client
     from datetime import datetime
     
     # Récupérer la déclaration
@@ -1568,12 +1553,7 @@ async def complete_declaration_fiscale(
         raise HTTPException(status_code=404, detail="Dossier non trouvé")
     
     # Contrôle d'accès selon le rôle
-    if current_user.role == "collaborateur":
-        clients_assignes = db.query(Client).filter(Client.user_id == current_user.id).all()
-        noms_clients = [client.nom for client in clients_assignes]
-        
-        if dossier.nom_client not in noms_clients:
-            raise HTTPException(status_code=403, detail="Accès refusé")
+    get_access_scope(db, current_user).check(dossier)
     
     # Basculer entre les statuts
     if declaration.statut in ['TELEDECLAREE', 'VALIDEE']:
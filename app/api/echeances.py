@@ -8,6 +8,7 @@ from app.models.user import User
 from app.models.echeance import Echeance
 from app.models.dossier import Dossier
 from app.schemas.echeance import Echeance as EcheanceSchema, EcheanceUpdate
+from app.services.access_scope import get_access_scope
 
 router = APIRouter()
 
@@ -25,13 +26,7 @@ async def get_dossier_echeances(
         raise HTTPException(status_code=404, detail="Dossier non trouvé")
     
     # Vérifier les permissions
-    if current_user.role == "collaborateur":
-        from app.models.client import Client
-        clients_assignes = db.query(Client).filter(Client.user_id == current_user.id).all()
-        noms_clients = [client.nom for client in clients_assignes]
-        
-        if dossier.nom_client not in noms_clients:
-            raise HTTPException(status_code=403, detail="Accès refusé")
+    get_access_scope(db, current_user).check(dossier)
     
     # Récupérer les échéances
     echeances = db.query(Echeance).filter(
@@ -55,13 +50,7 @@ async def update_echeance(
     
     # Vérifier l'accès via le dossier
     dossier = echeance.dossier
-    if current_user.role == "collaborateur":
-        from app.models.client import Client
-        clients_assignes = db.query(Client).filter(Client.user_id == current_user.id).all()
-        noms_clients = [client.nom for client in clients_assignes]
-        
-        if dossier.nom_client not in noms_clients:
-            raise HTTPException(status_code=403, detail="Accès refusé")
+    get_access_scope(db, current_user).check(dossier)
     
     # Mettre à jour les champs
     update_data = echeance_update.dict(exclude_unset=True)
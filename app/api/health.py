@@ -2,7 +2,8 @@ from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 from datetime import datetime
 
-from app.core.database import get_db
+from app.core.cache import local_cache_stats
+from app.core.database import get_db, pool_metrics
 
 router = APIRouter()
 
@@ -16,6 +17,24 @@ async def health_check():
     }
 
 
+@router.get("/cache")
+async def cache_check():
+    """Compteurs des caches locaux de ce processus"""
+    return {
+        "local_caches": local_cache_stats(),
+        "timestamp": datetime.utcnow().isoformat(),
+    }
+
+
+@router.get("/db-pool")
+async def database_pool_check():
+    """Télémétrie des pools de connexions de ce processus"""
+    return {
+        **pool_metrics(),
+        "timestamp": datetime.utcnow().isoformat(),
+    }
+
+
 @router.get("/db")
 async def database_check(db: Session = Depends(get_db)):
     try:
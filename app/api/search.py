@@ -0,0 +1,57 @@
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import get_async_read_db
+from app.core.deps import get_current_user, get_current_cabinet_id
+from app.models.user import User
+from app.services.access_scope import get_access_scope
+from app.services.autocomplete import MAX_LIMIT, autocomplete
+from app.services.search import MAX_OFFSET, search
+
+router = APIRouter()
+
+
+@router.get("")
+@router.get("/")
+async def search_cabinet(
+    q: str = Query(..., min_length=2, max_length=200, description="Texte recherché (guillemets, -exclusion, OR)"),
+    type: Optional[Literal["dossiers", "documents"]] = Query(None, description="Limiter à un type de résultat"),
+    limit: int = Query(20, ge=1, le=100, description="Nombre de résultats par type"),
+    offset: int = Query(0, ge=0, le=MAX_OFFSET, description="Décalage (pagination)"),
+    current_user: User = Depends(get_current_user),
+    cabinet_id: int = Depends(get_current_cabinet_id),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """
+    Recherche plein texte dans les dossiers (référence, client, notes) et les
+    documents (nom, texte extrait) du cabinet, limitée au périmètre du
+    collaborateur ; résultats classés par pertinence
+    """
+    def rechercher(sync_db):
+        scope = get_access_scope(sync_db, current_user)
+        return search(sync_db, cabinet_id, scope, q, type, limit, offset)
+
+    return await db.run_sync(rechercher)
+
+
+@router.get("/autocomplete")
+async def autocomplete_cabinet(
+    q: str = Query(..., min_length=1, max_length=100, description="Début ou partie du nom / de la référence"),
+    type: Literal["clients", "dossiers"] = Query("clients", description="Clients ou références de dossiers"),
+    limit: int = Query(10, ge=1, le=MAX_LIMIT, description="Nombre de suggestions"),
+    current_user: User = Depends(get_current_user),
+    cabinet_id: int = Depends(get_current_cabinet_id),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """
+    Suggestions pour la saisie au clavier : clients actifs ou références de
+    dossiers du cabinet, sans tenir compte des accents, tolérant les fautes
+    de frappe ; limitées au périmètre du collaborateur
+    """
+    def suggerer(sync_db):
+        scope = get_access_scope(sync_db, current_user)
+        return autocomplete(sync_db, cabinet_id, scope, q, type, limit)
+
+    return {"query": q, "type": type, "items": await db.run_sync(suggerer)}
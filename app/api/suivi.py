@@ -1,15 +1,15 @@
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, case, extract
+from sqlalchemy import func, and_, case
 from datetime import datetime, date, timedelta
 from typing import List, Optional
 
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db
 from app.api.auth import get_current_user
 from app.models.user import User
 from app.models.dossier import Dossier
-from app.models.echeance import Echeance
-from app.models.declaration_fiscale import DeclarationFiscale
+from app.models.avancement import AvancementDossier
+from app.services.access_scope import get_access_scope
 
 router = APIRouter()
 
@@ -17,7 +17,7 @@ router = APIRouter()
 @router.get("/avancement")
 async def get_avancement_global(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     periode: str = Query("current_year", description="Période: current_year, current_quarter, current_month, all"),
     statut: str = Query("all", description="Statut: all, completed, in_progress, overdue")
 ):
@@ -48,131 +48,105 @@ async def get_avancement_global(
         start_date = date(today.year, 1, 1)
         end_date = date(today.year, 12, 31)
     
-    # Récupérer tous les dossiers avec leurs échéances
-    dossiers = db.query(Dossier).all()
+    # Une seule lecture de la table d'avancement matérialisée, groupée par dossier et par mois
+    A = AvancementDossier
+    en_retard = case((A.date_limite < today, A.total_echeances - A.echeances_completes), else_=0)
+    declarations_en_retard = case((A.date_limite < today, A.total_declarations - A.declarations_completes), else_=0)
     
-    results = []
-    
-    for dossier in dossiers:
-        # Statistiques des échéances
-        echeances_query = db.query(Echeance).filter(
-            Echeance.dossier_id == dossier.id
-        )
-        
-        # Appliquer le filtre de période si nécessaire
+    def sur_periode(colonne):
+        """Somme restreinte à la période demandée"""
         if start_date and end_date:
-            echeances_query = echeances_query.filter(
-                and_(
-                    Echeance.date_echeance >= start_date,
-                    Echeance.date_echeance <= end_date
-                )
-            )
-        
-        # Compter les échéances
-        total_echeances = echeances_query.count()
-        echeances_completes = echeances_query.filter(
-            Echeance.statut == 'COMPLETE'
-        ).count()
-        echeances_en_retard = echeances_query.filter(
-            and_(
-                Echeance.date_echeance < today,
-                Echeance.statut != 'COMPLETE'
-            )
-        ).count()
+            return func.sum(colonne).filter(and_(A.date_limite >= start_date, A.date_limite <= end_date))
+        return func.sum(colonne)
+    
+    query = db.query(
+        Dossier.id,
+        Dossier.nom_client,
+        Dossier.type_dossier,
+        A.annee,
+        A.mois,
+        # Détails par mois : toutes périodes confondues, échéances seulement
+        func.sum(A.total_echeances),
+        func.sum(A.echeances_completes),
+        func.sum(en_retard),
+        func.sum(A.total_saisies),
+        func.sum(A.saisies_completes),
+        # Totaux sur la période
+        sur_periode(A.total_echeances),
+        sur_periode(A.echeances_completes),
+        sur_periode(en_retard),
+        sur_periode(A.total_saisies),
+        sur_periode(A.saisies_completes),
+        sur_periode(A.total_declarations),
+        sur_periode(A.declarations_completes),
+        sur_periode(declarations_en_retard)
+    ).outerjoin(
+        A, A.dossier_id == Dossier.id
+    ).filter(
+        Dossier.cabinet_id == current_user.cabinet_id
+    )
+    query = get_access_scope(db, current_user).filter_dossiers(query, Dossier)
+    rows = query.group_by(
+        Dossier.id, Dossier.nom_client, Dossier.type_dossier, A.annee, A.mois
+    ).order_by(Dossier.id, A.annee, A.mois).all()
+    
+    mois_noms = {
+        1: 'Janvier', 2: 'Février', 3: 'Mars', 4: 'Avril',
+        5: 'Mai', 6: 'Juin', 7: 'Juillet', 8: 'Août',
+        9: 'Septembre', 10: 'Octobre', 11: 'Novembre', 12: 'Décembre'
+    }
+    
+    par_dossier = {}
+    for (dossier_id, nom_client, type_dossier, annee, mois,
+         ech_total, ech_completes, ech_retard, saisies_total, saisies_completes,
+         ech_total_p, ech_completes_p, ech_retard_p, saisies_total_p, saisies_completes_p,
+         decl_total_p, decl_completes_p, decl_retard_p) in rows:
+        dossier = par_dossier.setdefault(dossier_id, {
+            'client_id': dossier_id,  # Utiliser dossier.id car pas de client_id
+            'nom_client': nom_client,
+            'total_echeances': 0,
+            'echeances_completes': 0,
+            'echeances_en_retard': 0,
+            'total_saisies': 0,
+            'saisies_completes': 0,
+            'details_par_mois': []
+        })
+        if annee is None:
+            continue  # Dossier sans échéance
         
         # Si c'est un dossier fiscal, compter aussi les déclarations
-        total_declarations = 0
-        declarations_completes = 0
-        declarations_en_retard = 0
-        
-        if dossier.type_dossier in ['FISCALITE', 'TVA']:
-            declarations_query = db.query(DeclarationFiscale).filter(
-                DeclarationFiscale.dossier_id == dossier.id
-            )
-            
-            if start_date and end_date:
-                declarations_query = declarations_query.filter(
-                    and_(
-                        DeclarationFiscale.date_limite >= start_date,
-                        DeclarationFiscale.date_limite <= end_date
-                    )
-                )
-            
-            total_declarations = declarations_query.count()
-            declarations_completes = declarations_query.filter(
-                DeclarationFiscale.statut.in_(['TELEDECLAREE', 'VALIDEE'])
-            ).count()
-            declarations_en_retard = declarations_query.filter(
-                and_(
-                    DeclarationFiscale.date_limite < today,
-                    ~DeclarationFiscale.statut.in_(['TELEDECLAREE', 'VALIDEE'])
-                )
-            ).count()
-        
-        # Totaux
-        total_taches = total_echeances + total_declarations
-        taches_completes = echeances_completes + declarations_completes
-        taches_en_retard = echeances_en_retard + declarations_en_retard
+        compter_declarations = type_dossier in ['FISCALITE', 'TVA']
+        dossier['total_echeances'] += (ech_total_p or 0) + ((decl_total_p or 0) if compter_declarations else 0)
+        dossier['echeances_completes'] += (ech_completes_p or 0) + ((decl_completes_p or 0) if compter_declarations else 0)
+        dossier['echeances_en_retard'] += (ech_retard_p or 0) + ((decl_retard_p or 0) if compter_declarations else 0)
+        dossier['total_saisies'] += saisies_total_p or 0
+        dossier['saisies_completes'] += saisies_completes_p or 0
+        
+        if ech_total:
+            dossier['details_par_mois'].append({
+                'mois': mois_noms[int(mois)],
+                'annee': int(annee),
+                'total': ech_total,
+                'completes': ech_completes or 0,
+                'en_retard': ech_retard or 0,
+                'saisies': saisies_total or 0,
+                'saisies_completes': saisies_completes or 0
+            })
+    
+    results = []
+    for result in par_dossier.values():
+        total_taches = result['total_echeances']
+        taches_completes = result['echeances_completes']
         
         # Appliquer le filtre de statut
         if statut == "completed" and taches_completes == 0:
             continue
         elif statut == "in_progress" and (taches_completes == total_taches or total_taches == 0):
             continue
-        elif statut == "overdue" and taches_en_retard == 0:
+        elif statut == "overdue" and result['echeances_en_retard'] == 0:
             continue
         
-        # Calculer le pourcentage
-        pourcentage = 0
-        if total_taches > 0:
-            pourcentage = round((taches_completes / total_taches) * 100)
-        
-        # Détails par mois pour les échéances
-        details_par_mois = []
-        
-        # Récupérer les mois uniques
-        mois_data = db.query(
-            extract('month', Echeance.date_echeance).label('mois'),
-            extract('year', Echeance.date_echeance).label('annee'),
-            func.count(Echeance.id).label('total'),
-            func.sum(case([(Echeance.statut == 'COMPLETE', 1)], else_=0)).label('completes'),
-            func.sum(case([
-                (and_(Echeance.date_echeance < today, Echeance.statut != 'COMPLETE'), 1)
-            ], else_=0)).label('en_retard')
-        ).filter(
-            Echeance.dossier_id == dossier.id
-        ).group_by(
-            extract('year', Echeance.date_echeance),
-            extract('month', Echeance.date_echeance)
-        ).order_by(
-            extract('year', Echeance.date_echeance),
-            extract('month', Echeance.date_echeance)
-        ).all()
-        
-        mois_noms = {
-            1: 'Janvier', 2: 'Février', 3: 'Mars', 4: 'Avril',
-            5: 'Mai', 6: 'Juin', 7: 'Juillet', 8: 'Août',
-            9: 'Septembre', 10: 'Octobre', 11: 'Novembre', 12: 'Décembre'
-        }
-        
-        for mois, annee, total, completes, en_retard in mois_data:
-            details_par_mois.append({
-                'mois': mois_noms[int(mois)],
-                'annee': int(annee),
-                'total': total or 0,
-                'completes': completes or 0,
-                'en_retard': en_retard or 0
-            })
-        
-        results.append({
-            'client_id': dossier.id,  # Utiliser dossier.id car pas de client_id
-            'nom_client': dossier.nom_client,
-            'total_echeances': total_taches,
-            'echeances_completes': taches_completes,
-            'echeances_en_retard': taches_en_retard,
-            'pourcentage_complete': pourcentage,
-            'details_par_mois': details_par_mois
-        })
+        results.append(result)
     
     # Grouper par nom_client (car plusieurs dossiers peuvent avoir le même client)
     grouped_results = {}
@@ -185,12 +159,16 @@ async def get_avancement_global(
                 'total_echeances': 0,
                 'echeances_completes': 0,
                 'echeances_en_retard': 0,
+                'total_saisies': 0,
+                'saisies_completes': 0,
                 'details_par_mois': []
             }
         
         grouped_results[nom]['total_echeances'] += result['total_echeances']
         grouped_results[nom]['echeances_completes'] += result['echeances_completes']
         grouped_results[nom]['echeances_en_retard'] += result['echeances_en_retard']
+        grouped_results[nom]['total_saisies'] += result['total_saisies']
+        grouped_results[nom]['saisies_completes'] += result['saisies_completes']
         
         # Fusionner les détails par mois
         for detail in result['details_par_mois']:
@@ -201,6 +179,8 @@ async def get_avancement_global(
                     existing['total'] += detail['total']
                     existing['completes'] += detail['completes']
                     existing['en_retard'] += detail['en_retard']
+                    existing['saisies'] += detail['saisies']
+                    existing['saisies_completes'] += detail['saisies_completes']
                     found = True
                     break
             if not found:
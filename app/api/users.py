@@ -168,7 +168,7 @@ async def update_user(
     
     user = db.query(UserModel).filter(
         UserModel.id == user_id,
-        UserModel.cabinet_id == cabinet_id
+        UserModel.cabinet_id == current_user.cabinet_id
     ).first()
     if not user:
         raise HTTPException(status_code=404, detail="Utilisateur non trouvé")
@@ -209,7 +209,7 @@ async def toggle_user_active(
     
     user = db.query(UserModel).filter(
         UserModel.id == user_id,
-        UserModel.cabinet_id == cabinet_id
+        UserModel.cabinet_id == current_user.cabinet_id
     ).first()
     if not user:
         raise HTTPException(status_code=404, detail="Utilisateur non trouvé")
@@ -222,7 +222,7 @@ async def toggle_user_active(
         )
     
     user.is_active = not user.is_active
-    db.commit()
+    db.commit()  # Invalide aussi le principal en cache (voir principal_cache)
     
     return {"message": f"Utilisateur {'activé' if user.is_active else 'désactivé'} avec succès"}
 
@@ -242,7 +242,7 @@ async def delete_user(
     
     user = db.query(UserModel).filter(
         UserModel.id == user_id,
-        UserModel.cabinet_id == cabinet_id
+        UserModel.cabinet_id == current_user.cabinet_id
     ).first()
     if not user:
         raise HTTPException(status_code=404, detail="Utilisateur non trouvé")
@@ -3,7 +3,7 @@ from sqlalchemy.orm import Session
 import json
 
 from app.core.database import get_db
-from app.core.websocket import manager
+from app.core.websocket import manager, parse_topics
 from app.api.auth import get_current_user_websocket
 
 router = APIRouter()
@@ -25,34 +25,57 @@ async def websocket_endpoint(websocket: WebSocket, token: str):
         # Connecter l'utilisateur
         connection_id = await manager.connect(websocket, user.id)
         
-        # Envoyer un message de bienvenue
-        await websocket.send_text(json.dumps({
-            "type": "connection",
-            "message": f"Bienvenue {user.full_name}! Vous êtes maintenant connecté aux notifications.",
-            "user_id": user.id
-        }))
-        
         try:
+            # Envoyer un message de bienvenue (via la file de la connexion)
+            manager.send_to_connection(connection_id, json.dumps({
+                "type": "connection",
+                "message": f"Bienvenue {user.full_name}! Vous êtes maintenant connecté aux notifications.",
+                "user_id": user.id
+            }))
+            
             while True:
                 # Attendre les messages du client
                 data = await websocket.receive_text()
                 message = json.loads(data)
+                if not isinstance(message, dict):
+                    manager.send_to_connection(connection_id, json.dumps({
+                        "type": "error",
+                        "message": "Objet JSON attendu"
+                    }))
+                    continue
                 
                 # Traiter différents types de messages
                 if message.get("type") == "ping":
-                    await websocket.send_text(json.dumps({
+                    manager.send_to_connection(connection_id, json.dumps({
                         "type": "pong",
                         "timestamp": message.get("timestamp")
                     }))
-                elif message.get("type") == "subscribe":
-                    # Permettre de s'abonner à des types spécifiques de notifications
-                    await websocket.send_text(json.dumps({
+                elif message.get("type") in ("subscribe", "unsubscribe"):
+                    # S'abonner (ou se désabonner) à des types spécifiques de notifications
+                    # {"type": "subscribe", "channel": "new_alert"} ou "channels": [...]
+                    try:
+                        channels = parse_topics(message)
+                        if message["type"] == "subscribe":
+                            abonnements = manager.subscribe(connection_id, channels)
+                        else:
+                            abonnements = manager.unsubscribe(connection_id, channels)
+                    except ValueError as e:
+                        manager.send_to_connection(connection_id, json.dumps({
+                            "type": "error",
+                            "request": message["type"],
+                            "message": str(e)
+                        }))
+                        continue
+                    manager.send_to_connection(connection_id, json.dumps({
                         "type": "subscribed",
-                        "channel": message.get("channel", "all")
+                        "channel": channels[0],
+                        "channels": sorted(abonnements)
                     }))
                     
         except WebSocketDisconnect:
+            pass
+        finally:
             manager.disconnect(connection_id)
             
     except Exception as e:
-        await websocket.close(code=4002, reason=str(e))
\ No newline at end of file
+        await websocket.close(code=4002, reason=str(e))
@@ -0,0 +1,101 @@
+"""
+Stockage des fichiers adressé par contenu (SHA-256)
+
+Chaque contenu n'est écrit qu'une fois, sous la clé blobs/ab/cd/abcd...
+(préfixes répartis sur les 4 premiers caractères du hash) du backend de
+stockage (app.core.storage). Un contenu déjà présent n'est pas réécrit : un
+même relevé déposé dans plusieurs dossiers ne coûte qu'une ligne Document de
+plus.
+
+Les références (Document.hash_fichier) sont comptées dans la table blobs, voir
+app.services.blob_references.
+"""
+import re
+import time
+import uuid
+from typing import Iterator, Optional, Tuple
+
+from app.core.storage import StorageBackend, storage
+
+SHA256_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+
+class BlobStore:
+    """Objets immuables indexés par SHA-256 dans un backend de stockage"""
+
+    TEMP_PREFIX = "tmp"
+
+    def __init__(self, backend: StorageBackend, prefix: str = "blobs"):
+        self.backend = backend
+        self.prefix = prefix
+
+    def key_for(self, sha256: str) -> str:
+        """Clé du blob d'un hash (sans vérifier son existence)"""
+        if not SHA256_PATTERN.match(sha256):
+            raise ValueError(f"Hash SHA-256 invalide: {sha256!r}")
+        return f"{self.prefix}/{sha256[:2]}/{sha256[2:4]}/{sha256}"
+
+    def preview_key_for(self, sha256: str) -> str:
+        """Clé de la miniature d'un contenu (partagée par ses doublons)"""
+        self.key_for(sha256)  # Valide le hash
+        return f"{self.prefix}/previews/{sha256[:2]}/{sha256[2:4]}/{sha256}.png"
+
+    def new_temp_key(self) -> str:
+        """Clé d'un objet en cours d'écriture (hash encore inconnu)"""
+        return f"{self.prefix}/{self.TEMP_PREFIX}/{uuid.uuid4().hex}.part"
+
+    def exists(self, sha256: str) -> bool:
+        return self.backend.exists(self.key_for(sha256))
+
+    def ingest(self, temp_key: str, sha256: str) -> Tuple[str, bool]:
+        """
+        Range un objet temporaire sous son hash
+
+        Returns:
+            Tuple (clé du blob, créé) ; créé est False si le contenu était
+            déjà stocké (l'objet temporaire est alors supprimé)
+        """
+        key = self.key_for(sha256)
+        if self.backend.exists(key):
+            self.backend.delete(temp_key)
+            # Rafraîchir la date : le GC épargne les blobs touchés récemment
+            self.backend.touch(key)
+            return key, False
+
+        # Deux dépôts simultanés du même contenu remplacent un objet identique
+        self.backend.move(temp_key, key)
+        return key, True
+
+    def remove(self, sha256: str, untouched_for: Optional[float] = None) -> bool:
+        """
+        Supprime un blob. Avec untouched_for (secondes), ne supprime que si
+        l'objet n'a pas été écrit ou réutilisé depuis.
+        """
+        key = self.key_for(sha256)
+        stat = self.backend.stat(key)
+        if stat is None:
+            return False
+        if untouched_for is not None and time.time() - stat.modified < untouched_for:
+            return False
+        self.backend.delete(self.preview_key_for(sha256))
+        return self.backend.delete(key)
+
+    def iter_blobs(self) -> Iterator[Tuple[str, float]]:
+        """Parcourt les blobs stockés : (hash, date de modification)"""
+        for obj in self.backend.iter_objects(self.prefix):
+            sha256 = obj.key.rsplit("/", 1)[-1]
+            if SHA256_PATTERN.match(sha256) and obj.key == self.key_for(sha256):
+                yield sha256, obj.modified
+
+    def purge_temp(self, older_than: float) -> int:
+        """Supprime les objets temporaires abandonnés (upload interrompu)"""
+        limite = time.time() - older_than
+        abandonnes = [
+            obj.key for obj in self.backend.iter_objects(f"{self.prefix}/{self.TEMP_PREFIX}")
+            if obj.modified < limite
+        ]
+        return sum(self.backend.delete(key) for key in abandonnes)
+
+
+# Instance globale
+blob_store = BlobStore(storage)
@@ -1,10 +1,31 @@
 """
 Module de gestion du cache Redis pour améliorer les performances
+
+Les valeurs sont sérialisées en msgpack (jamais de pickle : une valeur lue dans
+Redis n'exécute pas de code). Chaque entrée peut porter des tags
+(cabinet:<id>, dossier:<id>, ...) : un set Redis par tag référence ses clés, ce
+qui permet d'invalider en masse sans parcourir l'espace de clés.
+
+Les fonctions décorées par cache_key_wrapper ont des clés propres à chaque
+cabinet, ne sont recalculées que par un seul appelant à la fois (verrou Redis)
+et sont servies périmées pendant qu'un autre appelant les recalcule.
+
+Les données très lues (référentiels, paramètres de cabinet, périmètres d'accès)
+ont en plus un niveau local au processus (LocalCache, LRU avec TTL) devant
+Redis. Son invalidation est diffusée sur un canal pub/sub pour que tous les
+processus oublient l'entrée.
 """
+import asyncio
 import json
-import pickle
-from typing import Optional, Any, Union, Callable
-from datetime import timedelta
+import msgpack
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Optional, Any, Dict, Hashable, Iterable, Union, Callable
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from enum import Enum
 import redis
 from functools import wraps
 import hashlib
@@ -17,9 +38,81 @@ logger = logging.getLogger(__name__)
 # Connexion Redis
 redis_client = redis.from_url(
     settings.REDIS_URL,
-    decode_responses=False  # Pour supporter pickle
+    decode_responses=False  # Valeurs binaires (msgpack)
 )
 
+FORMAT_VERSION = b"\x01"  # Préfixe des valeurs : les anciennes (pickle) sont ignorées
+TAG_PREFIX = "tag:"
+TAG_TTL = 86400  # Durée de vie d'un set de tags, prolongée à chaque ajout
+INVALIDATION_BATCH = 500  # Clés retirées par aller-retour lors d'une invalidation
+LOCK_PREFIX = "lock:"
+LOCK_TIMEOUT = 10  # Secondes max de recalcul avant libération automatique du verrou
+LOCK_POLL_INTERVAL = 0.05  # Secondes entre deux lectures en attendant le recalcul
+
+LOCAL_INVALIDATION_CHANNEL = "cache:local-invalidation"
+LISTENER_RETRY_DELAY = 2  # Secondes avant réabonnement après une erreur Redis
+
+# Libère un verrou seulement s'il appartient encore à l'appelant
+_RELEASE_LOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+# Types étendus msgpack
+_EXT_DATETIME = 1
+_EXT_DATE = 2
+_EXT_DECIMAL = 3
+
+
+def _encode_ext(obj: Any):
+    if isinstance(obj, datetime):
+        return msgpack.ExtType(_EXT_DATETIME, obj.isoformat().encode())
+    if isinstance(obj, date):
+        return msgpack.ExtType(_EXT_DATE, obj.isoformat().encode())
+    if isinstance(obj, Decimal):
+        return msgpack.ExtType(_EXT_DECIMAL, str(obj).encode())
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if isinstance(obj, Enum):
+        return obj.value
+    raise TypeError(f"Type non sérialisable en cache: {type(obj).__name__}")
+
+
+def _decode_ext(code: int, data: bytes):
+    if code == _EXT_DATETIME:
+        return datetime.fromisoformat(data.decode())
+    if code == _EXT_DATE:
+        return date.fromisoformat(data.decode())
+    if code == _EXT_DECIMAL:
+        return Decimal(data.decode())
+    return msgpack.ExtType(code, data)
+
+
+def serialize(value: Any) -> bytes:
+    """Sérialise une valeur (types JSON + datetime, date, Decimal, set, Enum)"""
+    return FORMAT_VERSION + msgpack.packb(value, default=_encode_ext, use_bin_type=True, datetime=False)
+
+
+def deserialize(payload: bytes) -> Any:
+    """Désérialise une valeur produite par serialize ; lève ValueError sinon"""
+    if not payload or payload[:1] != FORMAT_VERSION:
+        raise ValueError("Format de cache inconnu")
+    return msgpack.unpackb(payload[1:], ext_hook=_decode_ext, raw=False, strict_map_key=False)
+
+
+def tag_key(tag: str) -> str:
+    return f"{TAG_PREFIX}{tag}"
+
+
+def cabinet_tag(cabinet_id: int) -> str:
+    return f"cabinet:{cabinet_id}"
+
+
+def dossier_tag(dossier_id: int) -> str:
+    return f"dossier:{dossier_id}"
+
 
 class CacheManager:
     """Gestionnaire de cache centralisé"""
@@ -54,17 +147,12 @@ class CacheManager:
         """Récupère une valeur du cache"""
         try:
             value = self.redis.get(key)
-            if value:
-                # Essayer de dépickler d'abord (pour les objets complexes)
-                try:
-                    return pickle.loads(value)
-                except:
-                    # Si ça échoue, essayer JSON
-                    try:
-                        return json.loads(value)
-                    except:
-                        # Sinon retourner comme string
-                        return value.decode('utf-8')
+            if value is None:
+                return None
+            return deserialize(value)
+        except ValueError:
+            # Valeur d'un ancien format : considérée comme absente
+            return None
         except Exception as e:
             logger.warning(f"Erreur lors de la lecture du cache: {e}")
             return None
@@ -73,9 +161,10 @@ class CacheManager:
         self, 
         key: str, 
         value: Any, 
-        ttl: Optional[Union[int, timedelta]] = None
+        ttl: Optional[Union[int, timedelta]] = None,
+        tags: Iterable[str] = ()
     ) -> bool:
-        """Stocke une valeur dans le cache"""
+        """Stocke une valeur dans le cache, rattachée aux tags donnés"""
         try:
             # Convertir timedelta en secondes
             if isinstance(ttl, timedelta):
@@ -83,14 +172,14 @@ class CacheManager:
             elif ttl is None:
                 ttl = self.default_ttl
             
-            # Sérialiser la valeur
-            if isinstance(value, (str, int, float, bool)):
-                serialized = json.dumps(value)
-            else:
-                # Pour les objets complexes, utiliser pickle
-                serialized = pickle.dumps(value)
+            serialized = serialize(value)
             
-            return self.redis.setex(key, ttl, serialized)
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.setex(key, ttl, serialized)
+            for tag in tags:
+                pipe.sadd(tag_key(tag), key)
+                pipe.expire(tag_key(tag), max(ttl, TAG_TTL))
+            return bool(pipe.execute()[0])
         except Exception as e:
             logger.warning(f"Erreur lors de l'écriture dans le cache: {e}")
             return False
@@ -103,16 +192,66 @@ class CacheManager:
             logger.warning(f"Erreur lors de la suppression du cache: {e}")
             return False
     
+    def invalidate_tags(self, *tags: str) -> int:
+        """
+        Supprime toutes les clés rattachées aux tags. Les clés sont retirées du
+        set par SPOP (atomique) et par lots : une clé ajoutée pendant
+        l'invalidation n'est jamais perdue, et Redis n'est jamais bloqué.
+        """
+        deleted = 0
+        try:
+            for tag in tags:
+                while True:
+                    keys = self.redis.spop(tag_key(tag), INVALIDATION_BATCH)
+                    if not keys:
+                        break
+                    deleted += self.redis.unlink(*keys)
+        except Exception as e:
+            logger.warning(f"Erreur lors de l'invalidation des tags {tags}: {e}")
+        return deleted
+    
     def delete_pattern(self, pattern: str) -> int:
-        """Supprime toutes les clés correspondant au pattern"""
+        """
+        Supprime toutes les clés correspondant au pattern (SCAN incrémental).
+        Parcourt l'espace de clés : à réserver à la maintenance, préférer
+        invalidate_tags dans le code applicatif.
+        """
+        deleted = 0
         try:
-            keys = self.redis.keys(pattern)
-            if keys:
-                return self.redis.delete(*keys)
-            return 0
+            batch = []
+            for key in self.redis.scan_iter(match=pattern, count=INVALIDATION_BATCH):
+                batch.append(key)
+                if len(batch) >= INVALIDATION_BATCH:
+                    deleted += self.redis.unlink(*batch)
+                    batch = []
+            if batch:
+                deleted += self.redis.unlink(*batch)
+            return deleted
         except Exception as e:
             logger.warning(f"Erreur lors de la suppression par pattern: {e}")
-            return 0
+            return deleted
+    
+    def acquire_lock(self, key: str, timeout: int = LOCK_TIMEOUT) -> Optional[str]:
+        """
+        Prend le verrou de recalcul d'une clé. Retourne un jeton, ou None si un
+        autre appelant le détient. Si Redis est indisponible, le verrou est
+        considéré comme acquis (chacun recalcule, comme sans cache).
+        """
+        token = uuid.uuid4().hex
+        try:
+            if self.redis.set(f"{LOCK_PREFIX}{key}", token, nx=True, ex=timeout):
+                return token
+            return None
+        except Exception as e:
+            logger.warning(f"Erreur lors de la prise du verrou de cache: {e}")
+            return token
+    
+    def release_lock(self, key: str, token: str) -> None:
+        """Libère le verrou de recalcul s'il appartient encore au jeton"""
+        try:
+            self.redis.eval(_RELEASE_LOCK_SCRIPT, 1, f"{LOCK_PREFIX}{key}", token)
+        except Exception as e:
+            logger.warning(f"Erreur lors de la libération du verrou de cache: {e}")
     
     def exists(self, key: str) -> bool:
         """Vérifie si une clé existe"""
@@ -123,87 +262,345 @@ class CacheManager:
 cache_manager = CacheManager(redis_client)
 
 
+_MISSING = object()
+
+
+class LocalCache:
+    """
+    LRU en mémoire du processus, avec TTL optionnel et compteurs.
+    Thread-safe : partagé par les requêtes et les threads du worker.
+    """
+    
+    def __init__(self, name: str, max_entries: int = 1024, ttl: Optional[float] = None):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at is None or expires_at >= time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return default
+    
+    def set(self, key: Hashable, value: Any) -> None:
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """Retourne l'entrée, ou la calcule avec loader et la conserve"""
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = loader()
+            self.set(key, value)
+        return value
+    
+    def discard(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self) -> dict:
+        with self._lock:
+            size = len(self._entries)
+        total = self.hits + self.misses
+        return {
+            "size": size,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / total, 3) if total else None
+        }
+
+
+_local_caches: Dict[str, LocalCache] = {}
+
+
+def local_cache(name: str, max_entries: int = 1024, ttl: Optional[float] = None) -> LocalCache:
+    """Retourne le cache local nommé, créé au premier appel"""
+    cache = _local_caches.get(name)
+    if cache is None:
+        cache = _local_caches.setdefault(name, LocalCache(name, max_entries, ttl))
+    return cache
+
+
+def local_cache_stats() -> Dict[str, dict]:
+    """Compteurs de tous les caches locaux du processus"""
+    return {name: cache.stats() for name, cache in _local_caches.items()}
+
+
+def get_two_tier(
+    local: LocalCache,
+    key: Hashable,
+    redis_key: str,
+    loader: Callable[[], Any],
+    ttl: Union[int, timedelta] = 300
+) -> Any:
+    """
+    Lecture à deux niveaux : cache local, puis Redis, puis loader (base de
+    données). Le résultat du loader doit être sérialisable (voir serialize).
+    """
+    value = local.get(key, _MISSING)
+    if value is not _MISSING:
+        return value
+    value = cache_manager.get(redis_key)
+    if value is None:
+        value = loader()
+        if value is None:
+            return None
+        cache_manager.set(redis_key, value, ttl)
+    local.set(key, value)
+    return value
+
+
+def invalidate_local(name: str, *keys: Hashable) -> None:
+    """
+    Oublie des entrées d'un cache local dans ce processus et dans tous les
+    autres (diffusion pub/sub). Sans clé, le cache est vidé entièrement.
+    """
+    _apply_local_invalidation(name, keys)
+    try:
+        redis_client.publish(
+            LOCAL_INVALIDATION_CHANNEL,
+            json.dumps({"cache": name, "keys": list(keys)}, default=str)
+        )
+    except Exception as e:
+        logger.warning(f"Diffusion de l'invalidation du cache local {name} impossible: {e}")
+
+
+def _apply_local_invalidation(name: str, keys: Iterable[Hashable]) -> None:
+    cache = _local_caches.get(name)
+    if cache is None:
+        return
+    keys = list(keys)
+    if not keys:
+        cache.clear()
+    for key in keys:
+        cache.discard(key)
+
+
+class _LocalInvalidationListener:
+    """Thread d'écoute du canal d'invalidation des caches locaux"""
+    
+    def __init__(self):
+        self._thread = None
+    
+    def _handle(self, message: dict) -> None:
+        try:
+            payload = json.loads(message["data"])
+            _apply_local_invalidation(payload["cache"], payload.get("keys", []))
+        except Exception as e:
+            logger.warning(f"Message d'invalidation de cache illisible: {e}")
+    
+    @staticmethod
+    def _on_error(error, pubsub, thread) -> None:
+        # La connexion est rétablie (et l'abonnement renouvelé) au prochain tour
+        logger.warning(f"Écoute des invalidations de cache interrompue: {error}")
+        time.sleep(LISTENER_RETRY_DELAY)
+    
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        try:
+            pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(**{LOCAL_INVALIDATION_CHANNEL: self._handle})
+            self._thread = pubsub.run_in_thread(sleep_time=1, daemon=True, exception_handler=self._on_error)
+        except Exception as e:
+            # Sans écoute, les TTL des caches locaux bornent la durée d'incohérence
+            logger.warning(f"Écoute des invalidations de cache impossible: {e}")
+    
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._thread.stop()
+            self._thread = None
+
+
+local_invalidation_listener = _LocalInvalidationListener()
+
+
+def _key_and_tags(prefix: str, include_user: bool, kwargs: dict):
+    """Construit la clé de cache (propre au cabinet) et les tags d'un appel décoré"""
+    cache_args = []
+    tags = [prefix]
+    current_user = kwargs.get('current_user')
+    
+    # Toujours isoler les cabinets entre eux
+    cabinet_id = kwargs.get('cabinet_id', getattr(current_user, 'cabinet_id', None))
+    if cabinet_id is not None:
+        cache_args.append(f"cabinet:{cabinet_id}")
+        tags.append(cabinet_tag(cabinet_id))
+    
+    # Extraire l'ID utilisateur si nécessaire
+    if include_user and current_user is not None and hasattr(current_user, 'id'):
+        cache_args.append(f"user:{current_user.id}")
+    
+    if kwargs.get('dossier_id') is not None:
+        tags.append(dossier_tag(kwargs['dossier_id']))
+    
+    # Ajouter les autres arguments pertinents
+    # (exclure db, current_user, etc.)
+    skip_args = {'db', 'current_user', 'cabinet_id'}
+    for k, v in sorted(kwargs.items()):
+        if k not in skip_args and v is not None:
+            cache_args.append(f"{k}:{v}")
+    
+    return cache_manager._make_key(prefix, *cache_args), tags
+
+
+class _CachedCall:
+    """
+    Lecture/écriture d'une entrée de cache_key_wrapper. L'entrée est stockée
+    avec sa date de fraîcheur : après ttl elle est périmée mais reste servie
+    pendant stale_ttl, le temps qu'un seul appelant la recalcule.
+    """
+    
+    def __init__(self, prefix: str, include_user: bool, ttl: int, stale_ttl: int, kwargs: dict):
+        self.key, self.tags = _key_and_tags(prefix, include_user, kwargs)
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.entry = None
+        self.token = None
+    
+    def read(self) -> bool:
+        """Lit l'entrée ; retourne True si elle est fraîche"""
+        entry = cache_manager.get(self.key)
+        if isinstance(entry, dict) and "v" in entry:
+            self.entry = entry
+        return self.entry is not None and entry["t"] > time.time()
+    
+    @property
+    def value(self):
+        return self.entry["v"]
+    
+    def lock(self) -> bool:
+        self.token = cache_manager.acquire_lock(self.key)
+        return self.token is not None
+    
+    def store(self, result: Any) -> None:
+        if result is None:
+            return
+        cache_manager.set(
+            self.key,
+            {"v": result, "t": time.time() + self.ttl},
+            self.ttl + self.stale_ttl,
+            tags=self.tags
+        )
+    
+    def unlock(self) -> None:
+        if self.token is not None:
+            cache_manager.release_lock(self.key, self.token)
+            self.token = None
+
+
 def cache_key_wrapper(
     prefix: str,
     ttl: Union[int, timedelta] = 300,
-    include_user: bool = True
+    include_user: bool = True,
+    stale_ttl: Optional[Union[int, timedelta]] = None
 ):
     """
     Décorateur pour mettre en cache les résultats de fonctions
     
+    La clé inclut toujours le cabinet (argument cabinet_id ou current_user).
+    Les entrées sont rattachées aux tags du préfixe, du cabinet et du dossier.
+    
     Args:
         prefix: Préfixe pour la clé de cache
-        ttl: Durée de vie du cache (secondes ou timedelta)
+        ttl: Durée de fraîcheur du cache (secondes ou timedelta)
         include_user: Inclure l'ID utilisateur dans la clé
+        stale_ttl: Durée pendant laquelle une entrée périmée est encore servie
+            pendant son recalcul (par défaut égale à ttl)
     """
+    if isinstance(ttl, timedelta):
+        ttl = int(ttl.total_seconds())
+    if stale_ttl is None:
+        stale_ttl = ttl
+    elif isinstance(stale_ttl, timedelta):
+        stale_ttl = int(stale_ttl.total_seconds())
+    max_waits = int(LOCK_TIMEOUT / LOCK_POLL_INTERVAL)
+    
     def decorator(func: Callable) -> Callable:
         @wraps(func)
         async def async_wrapper(*args, **kwargs):
-            # Construire la clé de cache
-            cache_args = []
-            
-            # Extraire l'ID utilisateur si nécessaire
-            if include_user:
-                # Chercher current_user dans les kwargs
-                current_user = kwargs.get('current_user')
-                if current_user and hasattr(current_user, 'id'):
-                    cache_args.append(f"user:{current_user.id}")
+            call = _CachedCall(prefix, include_user, ttl, stale_ttl, kwargs)
+            if call.read():
+                logger.debug(f"Cache hit pour {call.key}")
+                return call.value
             
-            # Ajouter les autres arguments pertinents
-            # (exclure db, current_user, etc.)
-            skip_args = {'db', 'current_user', 'cabinet_id'}
-            for k, v in kwargs.items():
-                if k not in skip_args and v is not None:
-                    cache_args.append(f"{k}:{v}")
+            if not call.lock():
+                if call.entry is not None:
+                    # Un autre appelant recalcule : servir la valeur périmée
+                    return call.value
+                # Attendre le résultat du recalcul en cours
+                for _ in range(max_waits):
+                    await asyncio.sleep(LOCK_POLL_INTERVAL)
+                    if call.read():
+                        return call.value
+                logger.warning(f"Recalcul de {call.key} trop long, calcul sans verrou")
+            elif call.read():
+                # Recalculé entre la lecture et la prise du verrou
+                call.unlock()
+                return call.value
             
-            cache_key = cache_manager._make_key(prefix, *cache_args)
-            
-            # Vérifier le cache
-            cached_value = cache_manager.get(cache_key)
-            if cached_value is not None:
-                logger.debug(f"Cache hit pour {cache_key}")
-                return cached_value
-            
-            # Exécuter la fonction
-            result = await func(*args, **kwargs)
-            
-            # Mettre en cache le résultat
-            cache_manager.set(cache_key, result, ttl)
-            logger.debug(f"Cache miss pour {cache_key}, résultat mis en cache")
+            try:
+                result = await func(*args, **kwargs)
+                call.store(result)
+                logger.debug(f"Cache miss pour {call.key}, résultat mis en cache")
+            finally:
+                call.unlock()
             
             return result
         
         @wraps(func)
         def sync_wrapper(*args, **kwargs):
             # Version synchrone du wrapper
-            cache_args = []
-            
-            if include_user:
-                current_user = kwargs.get('current_user')
-                if current_user and hasattr(current_user, 'id'):
-                    cache_args.append(f"user:{current_user.id}")
-            
-            skip_args = {'db', 'current_user', 'cabinet_id'}
-            for k, v in kwargs.items():
-                if k not in skip_args and v is not None:
-                    cache_args.append(f"{k}:{v}")
-            
-            cache_key = cache_manager._make_key(prefix, *cache_args)
-            
-            cached_value = cache_manager.get(cache_key)
-            if cached_value is not None:
-                logger.debug(f"Cache hit pour {cache_key}")
-                return cached_value
+            call = _CachedCall(prefix, include_user, ttl, stale_ttl, kwargs)
+            if call.read():
+                logger.debug(f"Cache hit pour {call.key}")
+                return call.value
             
-            result = func(*args, **kwargs)
+            if not call.lock():
+                if call.entry is not None:
+                    return call.value
+                for _ in range(max_waits):
+                    time.sleep(LOCK_POLL_INTERVAL)
+                    if call.read():
+                        return call.value
+                logger.warning(f"Recalcul de {call.key} trop long, calcul sans verrou")
+            elif call.read():
+                call.unlock()
+                return call.value
             
-            cache_manager.set(cache_key, result, ttl)
-            logger.debug(f"Cache miss pour {cache_key}, résultat mis en cache")
+            try:
+                result = func(*args, **kwargs)
+                call.store(result)
+                logger.debug(f"Cache miss pour {call.key}, résultat mis en cache")
+            finally:
+                call.unlock()
             
             return result
         
         # Retourner le bon wrapper selon le type de fonction
-        import asyncio
         if asyncio.iscoroutinefunction(func):
             return async_wrapper
         else:
@@ -212,9 +609,23 @@ def cache_key_wrapper(
     return decorator
 
 
+def invalidate_tags(*tags: str) -> int:
+    """
+    Invalide le cache de tous les tags donnés (cabinet_tag, dossier_tag, préfixe)
+    
+    Args:
+        tags: Tags dont les clés doivent être supprimées
+    """
+    deleted = cache_manager.invalidate_tags(*tags)
+    if deleted:
+        logger.info(f"Cache invalidé: {deleted} clés pour les tags {tags}")
+    return deleted
+
+
 def invalidate_cache(patterns: Union[str, list]):
     """
-    Invalide le cache pour un ou plusieurs patterns
+    Invalide le cache pour un ou plusieurs patterns (SCAN : réservé à la
+    maintenance, préférer invalidate_tags)
     
     Args:
         patterns: Pattern(s) de clés à invalider
@@ -233,7 +644,7 @@ def invalidate_cache(patterns: Union[str, list]):
 
 
 # Décorateurs spécifiques pour différents types de données
-cache_dashboard = cache_key_wrapper("dashboard", ttl=timedelta(minutes=5))
+cache_dashboard = cache_key_wrapper("dashboard", ttl=timedelta(minutes=5), include_user=False)
 cache_dossiers = cache_key_wrapper("dossiers", ttl=timedelta(minutes=10))
 cache_stats = cache_key_wrapper("stats", ttl=timedelta(minutes=15))
-cache_documents = cache_key_wrapper("documents", ttl=timedelta(minutes=30))
\ No newline at end of file
+cache_documents = cache_key_wrapper("documents", ttl=timedelta(minutes=30))
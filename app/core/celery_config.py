@@ -1,12 +1,13 @@
 from celery import Celery
 from celery.schedules import crontab
+from celery.signals import worker_process_init
 from app.core.config import settings
 
 celery_app = Celery(
     "normx_docs",
     broker=settings.REDIS_URL or "redis://localhost:6379/0",
     backend=settings.REDIS_URL or "redis://localhost:6379/0",
-    include=["app.tasks.notifications", "app.tasks.reminders"]
+    include=["app.tasks.notifications", "app.tasks.reminders", "app.tasks.storage", "app.tasks.documents", "app.tasks.archival", "app.workers.tasks"]
 )
 
 # Configuration
@@ -18,6 +19,14 @@ celery_app.conf.update(
     enable_utc=True,
 )
 
+
+@worker_process_init.connect
+def _configurer_pool_worker(**kwargs):
+    """Chaque processus enfant du worker a son propre pool, dimensionné pour Celery"""
+    from app.core.database import configure_database
+    configure_database("worker")
+
+
 # Tâches planifiées
 celery_app.conf.beat_schedule = {
     # Vérifier les échéances tous les matins à 8h
@@ -40,4 +49,28 @@ celery_app.conf.beat_schedule = {
         "task": "app.tasks.reminders.check_overdue_dossiers",
         "schedule": crontab(minute="*/30"),
     },
+    # Supprimer les blobs orphelins du stockage de documents à 3h
+    "collect-orphan-blobs": {
+        "task": "app.tasks.storage.collect_orphan_blobs",
+        "schedule": crontab(hour=3, minute=0),
+    },
+    # Reprendre les documents dont le traitement n'a pas été lancé
+    "requeue-pending-documents": {
+        "task": "app.tasks.documents.requeue_pending_documents",
+        "schedule": crontab(minute="*/15"),
+    },
+    # Archiver les dossiers des exercices clos le 1er de chaque mois à 2h
+    "archive-closed-fiscal-years": {
+        "task": "app.tasks.archival.archive_closed_fiscal_years",
+        "schedule": crontab(day_of_month=1, hour=2, minute=0),
+    },
+}
+
+# Une file par étape du traitement des documents (workers dédiés possibles,
+# voir docker-compose.production.yml) ; le reste va sur la file par défaut
+celery_app.conf.task_routes = {
+    "app.tasks.documents.validate_document": {"queue": "documents.validation"},
+    "app.tasks.documents.build_preview": {"queue": "documents.preview"},
+    "app.tasks.documents.extract_text": {"queue": "documents.extraction"},
+    "app.tasks.documents.match_document_requis": {"queue": "documents.matching"},
 }
\ No newline at end of file
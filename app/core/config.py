@@ -34,6 +34,20 @@ class Settings(BaseSettings):
     UPLOAD_MAX_SIZE_MB: int = 10
     UPLOAD_ALLOWED_EXTENSIONS: list = [".pdf", ".doc", ".docx", ".xls", ".xlsx", ".png", ".jpg", ".jpeg"]
     UPLOAD_PATH: str = "./uploads"
+    # Fichiers traités en parallèle par requête d'upload multiple
+    UPLOAD_CONCURRENCY: int = 8
+    # Stockage des documents : local (UPLOAD_PATH), s3 ou memory (tests)
+    STORAGE_BACKEND: str = "local"
+    # Durée de validité des liens de téléchargement (secondes)
+    STORAGE_URL_EXPIRES: int = 300
+    S3_BUCKET: Optional[str] = None
+    S3_ENDPOINT_URL: Optional[str] = None  # MinIO, OVH, Scaleway ; vide pour AWS
+    S3_REGION: Optional[str] = None
+    S3_ACCESS_KEY_ID: Optional[str] = None
+    S3_SECRET_ACCESS_KEY: Optional[str] = None
+    # Préfixe de la location nginx "internal" servant UPLOAD_PATH : les
+    # téléchargements (stockage local) sont délégués à nginx par X-Accel-Redirect
+    STORAGE_ACCEL_REDIRECT_PREFIX: Optional[str] = None
     
     # Rate limiting
     RATE_LIMIT_PER_MINUTE: int = 60
@@ -50,8 +64,24 @@ class Settings(BaseSettings):
     SENTRY_DSN: Optional[str] = None
     
     # Database config
+    # Profil de pool : api, worker (Celery) ou script (voir app/core/database.py)
+    DATABASE_POOL_PROFILE: str = "api"
+    # Dimensionnement du profil api
     DATABASE_POOL_SIZE: int = 20
     DATABASE_MAX_OVERFLOW: int = 40
+    DATABASE_POOL_TIMEOUT: int = 10
+    DATABASE_POOL_RECYCLE: int = 1800
+    DATABASE_POOL_PRE_PING: bool = True
+    DATABASE_STATEMENT_TIMEOUT_MS: int = 30000
+    DATABASE_SLOW_CHECKOUT_MS: int = 100
+    # Derrière PgBouncer (mode transaction) : pas de paramètres de démarrage ni
+    # de cache de requêtes préparées
+    DATABASE_PGBOUNCER: bool = False
+    # Réplique en lecture pour les endpoints de reporting (désactivée si absente)
+    DATABASE_REPLICA_URL: Optional[str] = None
+    # Au-delà de ce retard de réplication, les lectures repassent sur le primaire
+    DATABASE_REPLICA_MAX_LAG_SECONDS: float = 30
+    DATABASE_REPLICA_LAG_CHECK_INTERVAL: float = 5
     
     def get_secret_key(self): 
         return self.SECRET_KEY
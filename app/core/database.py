@@ -1,25 +1,446 @@
-from sqlalchemy import create_engine
+"""
+Moteurs et sessions de base de données
+
+Le pool de connexions est dimensionné par profil (DATABASE_POOL_PROFILE) :
+  - api : workers uvicorn, nombreuses requêtes concurrentes
+  - worker : processus Celery (une tâche à la fois par processus enfant)
+  - script : scripts de maintenance, une seule connexion
+
+Chaque pool est instrumenté (pool_metrics) : prises de connexion et échecs
+(délai dépassé), attente avant obtention (histogramme), connexions
+ouvertes/invalidées, débordement.
+Les attentes supérieures à DATABASE_SLOW_CHECKOUT_MS sont journalisées.
+
+Les endpoints de reporting lisent sur une réplique (DATABASE_REPLICA_URL) en
+déclarant la dépendance get_read_db / get_async_read_db. Le retard de
+réplication est mesuré périodiquement : au-delà de
+DATABASE_REPLICA_MAX_LAG_SECONDS, ou si la réplique ne répond pas, la lecture
+se fait sur le primaire.
+"""
+import logging
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, Optional
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import NullPool
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
 
 from app.core.config import settings
 
-engine = create_engine(
-    settings.DATABASE_URL,
-    pool_size=settings.DATABASE_POOL_SIZE,
-    max_overflow=settings.DATABASE_MAX_OVERFLOW,
-    poolclass=NullPool if settings.ENV == "test" else None,
-)
+logger = logging.getLogger(__name__)
+
+# Dimensionnement par profil ; le profil api suit DATABASE_POOL_SIZE / MAX_OVERFLOW
+POOL_PROFILES = {
+    "api": {
+        "pool_size": settings.DATABASE_POOL_SIZE,
+        "max_overflow": settings.DATABASE_MAX_OVERFLOW,
+        "pool_timeout": settings.DATABASE_POOL_TIMEOUT,
+    },
+    "worker": {"pool_size": 2, "max_overflow": 2, "pool_timeout": 30},
+    "script": {"pool_size": 1, "max_overflow": 0, "pool_timeout": 60},
+}
+
+# Bornes (ms) de l'histogramme des attentes de connexion
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+# Pilotes asynchrones équivalents aux pilotes synchrones
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+class PoolMetrics:
+    """Compteurs d'un pool de connexions (thread-safe)"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.checkouts = 0
+            self.failed_checkouts = 0
+            self.slow_checkouts = 0
+            self.connects = 0
+            self.invalidations = 0
+            self.max_wait_ms = 0.0
+            self.total_wait_ms = 0.0
+            self.wait_histogram = [0] * (len(WAIT_BUCKETS_MS) + 1)
+
+    def observe_checkout(self, wait_ms: float, failed: bool = False) -> None:
+        with self._lock:
+            if failed:
+                self.failed_checkouts += 1
+            else:
+                self.checkouts += 1
+            self.total_wait_ms += wait_ms
+            self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+            self.wait_histogram[bisect_left(WAIT_BUCKETS_MS, wait_ms)] += 1
+            slow = wait_ms >= settings.DATABASE_SLOW_CHECKOUT_MS
+            if slow:
+                self.slow_checkouts += 1
+        if slow:
+            logger.warning(
+                f"Attente de {wait_ms:.0f} ms pour une connexion du pool {self.name}"
+                f"{' (échec)' if failed else ''}"
+            )
+
+    def snapshot(self, pool=None) -> dict:
+        with self._lock:
+            total = self.checkouts + self.failed_checkouts
+            data = {
+                "checkouts": self.checkouts,
+                "failed_checkouts": self.failed_checkouts,
+                "slow_checkouts": self.slow_checkouts,
+                "connects": self.connects,
+                "invalidations": self.invalidations,
+                "avg_wait_ms": round(self.total_wait_ms / total, 2) if total else 0.0,
+                "max_wait_ms": round(self.max_wait_ms, 2),
+                "wait_histogram_ms": {
+                    **{f"le_{borne}": n for borne, n in zip(WAIT_BUCKETS_MS, self.wait_histogram)},
+                    "inf": self.wait_histogram[-1],
+                },
+            }
+        if isinstance(pool, QueuePool):
+            data.update({
+                "size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": pool.overflow(),
+            })
+        return data
+
+
+class _InstrumentedPoolMixin:
+    """Mesure le temps d'obtention de chaque connexion"""
+
+    metrics: Optional[PoolMetrics] = None
+
+    def _do_get(self):
+        debut = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except Exception:
+            if self.metrics is not None:
+                self.metrics.observe_checkout((time.perf_counter() - debut) * 1000, failed=True)
+            raise
+        if self.metrics is not None:
+            self.metrics.observe_checkout((time.perf_counter() - debut) * 1000)
+        return connection
+
+    def recreate(self):
+        # engine.dispose() recrée le pool : conserver les compteurs
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def async_database_url(url: str) -> str:
+    """Convertit une URL de base synchrone (psycopg2, sqlite) vers son pilote asyncio"""
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"Pas de pilote asynchrone connu pour {backend}")
+    return url.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
+
+def engine_options(profile: str, asynchronous: bool = False, url: Optional[str] = None) -> dict:
+    """Arguments de create_engine / create_async_engine pour un profil de pool"""
+    if profile not in POOL_PROFILES:
+        raise ValueError(f"Profil de pool inconnu: {profile}")
+    options = {}
+    connect_args = {}
+
+    if settings.ENV == "test":
+        options["poolclass"] = NullPool
+    else:
+        options.update(
+            poolclass=InstrumentedAsyncQueuePool if asynchronous else InstrumentedQueuePool,
+            pool_pre_ping=settings.DATABASE_POOL_PRE_PING,
+            pool_recycle=settings.DATABASE_POOL_RECYCLE,
+            **POOL_PROFILES[profile],
+        )
+
+    if make_url(url or settings.DATABASE_URL).get_backend_name() == "postgresql":
+        if settings.DATABASE_PGBOUNCER:
+            # PgBouncer (mode transaction) refuse les paramètres de démarrage et ne
+            # conserve pas les requêtes préparées d'une transaction à l'autre :
+            # statement_timeout est alors à régler sur le rôle PostgreSQL
+            if asynchronous:
+                connect_args.update(statement_cache_size=0, prepared_statement_cache_size=0)
+        elif settings.DATABASE_STATEMENT_TIMEOUT_MS:
+            timeout = str(settings.DATABASE_STATEMENT_TIMEOUT_MS)
+            if asynchronous:
+                connect_args["server_settings"] = {"statement_timeout": timeout}
+            else:
+                connect_args["options"] = f"-c statement_timeout={timeout}"
+
+    if connect_args:
+        options["connect_args"] = connect_args
+    return options
+
+
+_metrics: Dict[str, PoolMetrics] = {
+    name: PoolMetrics(name) for name in ("sync", "async", "replica_sync", "replica_async")
+}
+
+
+def _instrument(sync_engine, metrics: PoolMetrics) -> None:
+    if isinstance(sync_engine.pool, _InstrumentedPoolMixin):
+        sync_engine.pool.metrics = metrics
+
+    @event.listens_for(sync_engine, "connect")
+    def _connexion_ouverte(dbapi_connection, connection_record):
+        with metrics._lock:
+            metrics.connects += 1
+
+    @event.listens_for(sync_engine, "invalidate")
+    def _connexion_invalidee(dbapi_connection, connection_record, exception):
+        with metrics._lock:
+            metrics.invalidations += 1
+
+
+def _build_engines(profile: str, url: str, prefix: str = ""):
+    sync_engine = create_engine(url, **engine_options(profile, url=url))
+    _instrument(sync_engine, _metrics[f"{prefix}sync"])
+    # Moteur asyncio (asyncpg) pour les endpoints async def : les requêtes ne
+    # bloquent plus la boucle d'événements du worker
+    asynchronous_engine = create_async_engine(
+        async_database_url(url), **engine_options(profile, asynchronous=True, url=url)
+    )
+    _instrument(asynchronous_engine.sync_engine, _metrics[f"{prefix}async"])
+    return sync_engine, asynchronous_engine
+
+
+def _build_replica_engines(profile: str):
+    if not settings.DATABASE_REPLICA_URL:
+        return None, None
+    return _build_engines(profile, settings.DATABASE_REPLICA_URL, prefix="replica_")
+
+
+pool_profile = settings.DATABASE_POOL_PROFILE
+engine, async_engine = _build_engines(pool_profile, settings.DATABASE_URL)
+replica_engine, async_replica_engine = _build_replica_engines(pool_profile)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# expire_on_commit=False : les objets restent lisibles après commit sans
+# rechargement implicite (impossible hors contexte await)
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
+# Sessions de lecture sur la réplique (liées au primaire sans réplique)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=replica_engine or engine)
+AsyncReadSessionLocal = async_sessionmaker(
+    async_replica_engine or async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
 Base = declarative_base()
 
 
+# Retard de réplication en secondes (0 si la réplique est à jour ou si l'URL
+# désigne un primaire)
+REPLICA_LAG_QUERY = text(
+    "SELECT CASE"
+    " WHEN NOT pg_is_in_recovery() THEN 0"
+    " WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0"
+    " ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)"
+    " END"
+)
+
+
+class ReplicaRouter:
+    """
+    Choisit entre réplique et primaire pour les sessions de lecture.
+    Le retard mesuré est conservé DATABASE_REPLICA_LAG_CHECK_INTERVAL secondes :
+    une seule requête de contrôle par intervalle et par processus.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.checked_at: Optional[float] = None
+            self.lag_seconds: Optional[float] = None
+            self.healthy = False
+            self.replica_reads = 0
+            self.primary_fallbacks = 0
+            self.lag_check_errors = 0
+
+    def _needs_check(self) -> bool:
+        return (
+            self.checked_at is None
+            or time.monotonic() - self.checked_at >= settings.DATABASE_REPLICA_LAG_CHECK_INTERVAL
+        )
+
+    def record_lag(self, lag_seconds: Optional[float], error: Optional[Exception] = None) -> None:
+        """Enregistre le résultat d'un contrôle de retard"""
+        with self._lock:
+            self.checked_at = time.monotonic()
+            self.lag_seconds = lag_seconds
+            if error is not None:
+                self.lag_check_errors += 1
+                self.healthy = False
+            else:
+                self.healthy = lag_seconds <= settings.DATABASE_REPLICA_MAX_LAG_SECONDS
+        if error is not None:
+            logger.warning(f"Réplique injoignable, lectures sur le primaire: {error}")
+        elif not self.healthy:
+            logger.warning(f"Retard de réplication de {lag_seconds:.1f} s, lectures sur le primaire")
+
+    def _decide(self) -> bool:
+        with self._lock:
+            if self.healthy:
+                self.replica_reads += 1
+            else:
+                self.primary_fallbacks += 1
+            return self.healthy
+
+    def use_replica(self) -> bool:
+        """Décision pour une session synchrone"""
+        if replica_engine is None:
+            return False
+        if self._needs_check():
+            try:
+                with replica_engine.connect() as conn:
+                    lag = float(conn.scalar(REPLICA_LAG_QUERY) or 0)
+            except Exception as e:
+                self.record_lag(None, error=e)
+            else:
+                self.record_lag(lag)
+        return self._decide()
+
+    async def use_replica_async(self) -> bool:
+        """Décision pour une session asynchrone (contrôle sans bloquer la boucle)"""
+        if async_replica_engine is None:
+            return False
+        if self._needs_check():
+            try:
+                async with async_replica_engine.connect() as conn:
+                    lag = float(await conn.scalar(REPLICA_LAG_QUERY) or 0)
+            except Exception as e:
+                self.record_lag(None, error=e)
+            else:
+                self.record_lag(lag)
+        return self._decide()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "configured": replica_engine is not None,
+                "healthy": self.healthy,
+                "lag_seconds": self.lag_seconds,
+                "max_lag_seconds": settings.DATABASE_REPLICA_MAX_LAG_SECONDS,
+                "replica_reads": self.replica_reads,
+                "primary_fallbacks": self.primary_fallbacks,
+                "lag_check_errors": self.lag_check_errors,
+            }
+
+
+replica_router = ReplicaRouter()
+
+
+def is_replica_session(db) -> bool:
+    """Indique si la session (ou la session synchrone d'un run_sync) lit sur la réplique"""
+    replicas = [replica_engine]
+    if async_replica_engine is not None:
+        replicas.append(async_replica_engine.sync_engine)
+    bind = db.get_bind()
+    return any(bind is replica for replica in replicas if replica is not None)
+
+
+def configure_database(profile: str) -> None:
+    """
+    Recrée les moteurs avec un autre profil de pool (processus Celery, scripts).
+    À appeler avant toute utilisation de la base dans le processus ; les
+    connexions héritées d'un fork ne sont pas fermées (elles appartiennent au
+    parent).
+    """
+    global engine, async_engine, replica_engine, async_replica_engine, pool_profile
+    engine.dispose(close=False)
+    if replica_engine is not None:
+        replica_engine.dispose(close=False)
+    if profile == pool_profile:
+        return
+    engine, async_engine = _build_engines(profile, settings.DATABASE_URL)
+    replica_engine, async_replica_engine = _build_replica_engines(profile)
+    pool_profile = profile
+    SessionLocal.configure(bind=engine)
+    AsyncSessionLocal.configure(bind=async_engine)
+    ReadSessionLocal.configure(bind=replica_engine or engine)
+    AsyncReadSessionLocal.configure(bind=async_replica_engine or async_engine)
+    replica_router.reset()
+    logger.info(f"Pool de connexions configuré avec le profil {profile}")
+
+
+def pool_metrics() -> dict:
+    """Télémétrie des pools de connexions de ce processus"""
+    data = {
+        "profile": pool_profile,
+        "sync": _metrics["sync"].snapshot(engine.pool),
+        "async": _metrics["async"].snapshot(async_engine.sync_engine.pool),
+        "replica": replica_router.snapshot(),
+    }
+    if replica_engine is not None:
+        data["replica_sync"] = _metrics["replica_sync"].snapshot(replica_engine.pool)
+        data["replica_async"] = _metrics["replica_async"].snapshot(
+            async_replica_engine.sync_engine.pool
+        )
+    return data
+
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+async def get_async_db():
+    """
+    Session asynchrone pour les endpoints migrés. Le code de service encore
+    synchrone s'exécute via `await db.run_sync(fonction, ...)`, sans bloquer
+    la boucle (mêmes connexion et transaction).
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def get_read_db():
+    """
+    Session de lecture seule pour les endpoints de reporting : réplique si
+    elle est à jour, primaire sinon. Ne pas écrire avec cette session.
+    """
+    db = ReadSessionLocal() if replica_router.use_replica() else SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_read_db():
+    """Équivalent asynchrone de get_read_db"""
+    session_factory = (
+        AsyncReadSessionLocal if await replica_router.use_replica_async() else AsyncSessionLocal
+    )
+    async with session_factory() as db:
+        yield db
@@ -10,6 +10,7 @@ from jose import JWTError, jwt
 from app.core.database import get_db
 from app.core.security import verify_token
 from app.models.user import User
+from app.services.principal_cache import load_principal
 from app.api.auth import oauth2_scheme
 
 
@@ -26,7 +27,8 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
     except JWTError:
         raise credentials_exception
     
-    user = db.query(User).filter(User.username == username).first()
+    # Servi par le cache du principal : aucune requête SQL sur le chemin chaud
+    user = load_principal(db, username)
     if user is None:
         raise credentials_exception
     return user
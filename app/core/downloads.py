@@ -0,0 +1,133 @@
+"""
+Envoi des fichiers stockés au client
+
+Les fichiers sont adressés par contenu : le SHA-256 (Document.hash_fichier)
+sert d'ETag fort, un client qui a déjà le fichier reçoit un 304 sans corps.
+
+Selon le backend :
+  - disque local avec STORAGE_ACCEL_REDIRECT_PREFIX : en-tête
+    X-Accel-Redirect, nginx envoie le fichier lui-même (sendfile, plages) ;
+    aucun octet ne passe par Python
+  - disque local sinon : FileResponse (lecture par blocs, plages HTTP)
+  - autres backends : lecture en flux de la plage demandée
+"""
+import re
+from typing import Optional, Tuple
+from urllib.parse import quote
+
+from fastapi import HTTPException, Request, Response
+from fastapi.responses import FileResponse, StreamingResponse
+
+from app.core.config import settings
+from app.core.storage import StorageBackend, storage
+
+# Les documents ne changent jamais de contenu, mais un document supprimé ne
+# doit plus être servi depuis un cache : revalidation systématique (304)
+CACHE_CONTROL = "private, no-cache"
+
+RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def content_disposition(filename: str) -> str:
+    return f"attachment; filename*=UTF-8''{quote(filename)}"
+
+
+def make_etag(sha256: Optional[str]) -> Optional[str]:
+    return f'"{sha256}"' if sha256 else None
+
+
+def etag_matches(request: Request, etag: Optional[str]) -> bool:
+    """If-None-Match correspond à l'ETag (comparaison faible, RFC 9110)"""
+    if etag is None:
+        return False
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidats = [tag.strip() for tag in header.split(",")]
+    return "*" in candidats or any(tag.removeprefix("W/") == etag for tag in candidats)
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Plage demandée (début, longueur). None pour tout le fichier ; les
+    requêtes multi-plages sont servies en entier, ce que la RFC autorise.
+
+    Raises:
+        HTTPException 416: plage hors du fichier
+    """
+    if not header:
+        return None
+    match = RANGE_PATTERN.match(header.strip())
+    if not match or match.groups() == ("", ""):
+        return None
+
+    debut, fin = match.groups()
+    if debut == "":
+        # bytes=-N : les N derniers octets
+        start = max(size - int(fin), 0)
+        end = size - 1
+    else:
+        start = int(debut)
+        end = min(int(fin), size - 1) if fin else size - 1
+    if start >= size or start > end:
+        raise HTTPException(
+            status_code=416, detail="Plage demandée hors du fichier",
+            headers={"Content-Range": f"bytes */{size}"}
+        )
+    return start, end - start + 1
+
+
+def serve_stored_file(
+    request: Request,
+    key: str,
+    filename: str,
+    mime_type: Optional[str] = None,
+    sha256: Optional[str] = None,
+    backend: StorageBackend = storage
+) -> Response:
+    """
+    Réponse HTTP pour un objet stocké : 304, X-Accel-Redirect, fichier
+    local ou flux, avec prise en charge des requêtes Range.
+
+    Appel bloquant (stat du stockage) : à exécuter via asyncio.to_thread.
+    """
+    etag = make_etag(sha256)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    stat = backend.stat(key)
+    if stat is None:
+        raise HTTPException(status_code=404, detail="Fichier introuvable dans le stockage")
+
+    media_type = mime_type or "application/octet-stream"
+    headers = {"Cache-Control": CACHE_CONTROL, "Accept-Ranges": "bytes"}
+    if etag:
+        headers["ETag"] = etag
+
+    path = backend.local_path(key)
+    if path is not None and settings.STORAGE_ACCEL_REDIRECT_PREFIX:
+        # nginx sert le fichier (location internal) et gère lui-même Range
+        headers["X-Accel-Redirect"] = settings.STORAGE_ACCEL_REDIRECT_PREFIX.rstrip("/") + "/" + quote(key)
+        headers["Content-Disposition"] = content_disposition(filename)
+        return Response(media_type=media_type, headers=headers)
+
+    if path is not None:
+        return FileResponse(path, media_type=media_type, filename=filename, headers=headers)
+
+    plage = parse_range(request.headers.get("range"), stat.size)
+    headers["Content-Disposition"] = content_disposition(filename)
+    if plage is None:
+        headers["Content-Length"] = str(stat.size)
+        return StreamingResponse(backend.iter_chunks(key), media_type=media_type, headers=headers)
+
+    start, length = plage
+    headers["Content-Length"] = str(length)
+    headers["Content-Range"] = f"bytes {start}-{start + length - 1}/{stat.size}"
+    return StreamingResponse(
+        backend.iter_chunks(key, start=start, length=length),
+        status_code=206, media_type=media_type, headers=headers
+    )
@@ -2,19 +2,37 @@
 Module de validation sécurisée des fichiers uploadés
 """
 import os
+import asyncio
 import hashlib
 import mimetypes
 import magic
 from pathlib import Path
-from typing import Optional, Set, Tuple
+from typing import List, NamedTuple, Optional, Sequence, Set, Tuple
 from fastapi import UploadFile, HTTPException
-import aiofiles
 import uuid
 
+from app.core.blob_store import BlobStore
+from app.core.storage import LocalFileWriter, StorageWriter
+
+
+class StoredFile(NamedTuple):
+    """Fichier validé et enregistré sur disque"""
+    safe_filename: str
+    path: str
+    mime_type: str
+    size: int
+    sha256: str
+    deduplicated: bool = False  # Contenu déjà présent dans le blob store
+
 
 class FileValidator:
     """Validateur de fichiers avec vérifications de sécurité"""
     
+    # Taille des blocs lus dans le flux d'upload
+    CHUNK_SIZE = 1024 * 1024  # 1MB
+    # Octets analysés pour le type réel (libmagic) et les signatures
+    SNIFF_SIZE = 64 * 1024
+    
     # Extensions autorisées par type de document
     ALLOWED_EXTENSIONS: Set[str] = {
         # Documents
@@ -95,92 +113,246 @@ class FileValidator:
             HTTPException: Si le fichier ne passe pas la validation
         """
         
-        # 1. Vérifier que le fichier existe
+        # 1-2. Vérifier la présence du fichier et l'extension
+        self._check_filename(file)
+        
+        # 3. Taille, type réel et signatures en un seul passage (fichier temporaire)
+        temp_path = f"/tmp/{uuid.uuid4()}"
+        
+        try:
+            detected_mime, file_size, _ = await self._stream_to(
+                file, LocalFileWriter(temp_path), check_content
+            )
+            
+            # 4. Générer un nom de fichier sécurisé
+            safe_filename = self._generate_safe_filename(file.filename)
+            
+            # 5. Réinitialiser le curseur du fichier
+            await file.seek(0)
+            
+            return safe_filename, detected_mime, file_size
+        finally:
+            # Nettoyer le fichier temporaire
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+    
+    async def store_file(
+        self,
+        file: UploadFile,
+        directory: str,
+        check_content: bool = True
+    ) -> StoredFile:
+        """
+        Valide et enregistre un fichier uploadé en un seul passage
+        
+        Le flux est lu une seule fois par blocs de CHUNK_SIZE : chaque bloc
+        alimente le contrôle de taille, la détection du type (premiers
+        SNIFF_SIZE octets), le SHA-256 et l'écriture disque. Le fichier est
+        écrit sous un nom temporaire du même répertoire puis renommé
+        (atomique) : jamais de fichier partiel sous le nom final.
+        
+        Args:
+            file: Fichier uploadé
+            directory: Répertoire de destination
+            check_content: Vérifier le contenu du fichier
+            
+        Returns:
+            StoredFile (nom sécurisé, chemin, type MIME, taille, SHA-256)
+            
+        Raises:
+            HTTPException: Si le fichier ne passe pas la validation
+        """
+        self._check_filename(file)
+        safe_filename = self._generate_safe_filename(file.filename)
+        file_path = os.path.join(directory, safe_filename)
+        temp_path = os.path.join(directory, f".{safe_filename}.part")
+        
+        try:
+            mime_type, file_size, sha256 = await self._stream_to(
+                file, LocalFileWriter(temp_path), check_content
+            )
+            os.replace(temp_path, file_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+        
+        return StoredFile(safe_filename, file_path, mime_type, file_size, sha256)
+    
+    async def store_blob(
+        self,
+        file: UploadFile,
+        store: BlobStore,
+        check_content: bool = True
+    ) -> StoredFile:
+        """
+        Valide un fichier uploadé et le range dans le blob store sous son
+        SHA-256 (même pipeline en un seul passage que store_file, écrit en
+        flux vers le backend de stockage : multipart pour S3)
+        
+        Si le contenu est déjà stocké, rien n'est conservé du nouvel envoi :
+        le StoredFile renvoyé désigne le blob existant (deduplicated=True).
+        Son champ path contient la clé de stockage du blob.
+        """
+        self._check_filename(file)
+        safe_filename = self._generate_safe_filename(file.filename)
+        temp_key = store.new_temp_key()
+        writer = await asyncio.to_thread(store.backend.open_writer, temp_key)
+        
+        mime_type, file_size, sha256 = await self._stream_to(file, writer, check_content)
+        key, created = await asyncio.to_thread(store.ingest, temp_key, sha256)
+        
+        return StoredFile(safe_filename, key, mime_type, file_size, sha256, deduplicated=not created)
+    
+    async def store_files(
+        self,
+        files: Sequence[UploadFile],
+        directory: Optional[str] = None,
+        check_content: bool = True,
+        concurrency: int = 8,
+        blob_store: Optional[BlobStore] = None
+    ) -> List[StoredFile]:
+        """
+        Valide et enregistre plusieurs fichiers en parallèle, dans directory
+        ou dans blob_store
+        
+        Au plus `concurrency` fichiers sont traités simultanément. Si un
+        fichier est refusé, les fichiers déjà enregistrés sont supprimés et
+        la première erreur est relevée : le lot est accepté ou refusé en bloc.
+        Les blobs, éventuellement partagés, sont laissés au ramasse-miettes.
+        
+        Returns:
+            Liste de StoredFile, dans l'ordre de `files`
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def store(file: UploadFile) -> StoredFile:
+            async with semaphore:
+                if blob_store is not None:
+                    return await self.store_blob(file, blob_store, check_content)
+                return await self.store_file(file, directory, check_content)
+        
+        results = await asyncio.gather(*(store(file) for file in files), return_exceptions=True)
+        
+        errors = [result for result in results if isinstance(result, BaseException)]
+        if errors:
+            if blob_store is None:
+                for result in results:
+                    if isinstance(result, StoredFile) and os.path.exists(result.path):
+                        os.unlink(result.path)
+            raise errors[0]
+        
+        return list(results)
+    
+    def _check_filename(self, file: UploadFile) -> None:
+        """Vérifie la présence du fichier et son extension"""
         if not file or not file.filename:
             raise HTTPException(
                 status_code=400,
                 detail="Aucun fichier fourni"
             )
         
-        # 2. Vérifier l'extension
         file_ext = Path(file.filename).suffix.lower()
         if file_ext not in self.allowed_extensions:
             raise HTTPException(
                 status_code=400,
                 detail=f"Extension de fichier non autorisée: {file_ext}"
             )
+    
+    def _check_header(self, header: bytes) -> str:
+        """
+        Vérifie le type MIME réel et les signatures dangereuses à partir des
+        premiers octets du fichier
         
-        # 3. Vérifier la taille (lecture par chunks pour éviter OOM)
-        file_size = 0
-        chunk_size = 1024 * 1024  # 1MB chunks
+        Returns:
+            Type MIME détecté
+        """
+        for signature in self.DANGEROUS_SIGNATURES:
+            if header.startswith(signature):
+                raise HTTPException(
+                    status_code=400,
+                    detail="Fichier potentiellement dangereux détecté"
+                )
         
-        # Sauvegarder temporairement pour analyse
-        temp_path = f"/tmp/{uuid.uuid4()}"
+        detected_mime = self.mime_detector.from_buffer(header)
+        
+        if detected_mime not in self.allowed_mimetypes:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Type de fichier non autorisé: {detected_mime}"
+            )
+        
+        return detected_mime
+    
+    async def _stream_to(
+        self,
+        file: UploadFile,
+        writer: StorageWriter,
+        check_content: bool
+    ) -> Tuple[str, int, str]:
+        """
+        Copie le flux vers writer en contrôlant taille et contenu au passage ;
+        en cas d'erreur l'écriture est annulée (writer.abort)
+        
+        La mémoire utilisée est bornée à un bloc plus l'en-tête analysé,
+        quelle que soit la taille du fichier.
+        
+        Returns:
+            Tuple (type_mime, taille, sha256)
+        """
+        file_size = 0
+        hash_func = hashlib.sha256()
+        header = b""
+        detected_mime = ""
+        sniffed = not check_content
         
         try:
-            async with aiofiles.open(temp_path, 'wb') as temp_file:
-                while True:
-                    chunk = await file.read(chunk_size)
-                    if not chunk:
-                        break
-                    
-                    file_size += len(chunk)
-                    
-                    # Vérifier la taille au fur et à mesure
-                    if file_size > self.max_size_bytes:
-                        raise HTTPException(
-                            status_code=413,
-                            detail=f"Fichier trop volumineux. Maximum: {self.max_size_bytes / 1024 / 1024}MB"
-                        )
-                    
-                    await temp_file.write(chunk)
-            
-            # 4. Vérifier le type MIME réel (pas juste l'extension)
-            if check_content:
-                detected_mime = self.mime_detector.from_file(temp_path)
+            while True:
+                chunk = await file.read(self.CHUNK_SIZE)
+                if not chunk:
+                    break
+                
+                file_size += len(chunk)
                 
-                if detected_mime not in self.allowed_mimetypes:
+                # Vérifier la taille au fur et à mesure
+                if file_size > self.max_size_bytes:
                     raise HTTPException(
-                        status_code=400,
-                        detail=f"Type de fichier non autorisé: {detected_mime}"
+                        status_code=413,
+                        detail=f"Fichier trop volumineux. Maximum: {self.max_size_bytes / 1024 / 1024}MB"
                     )
                 
-                # 5. Vérifier les signatures dangereuses
-                with open(temp_path, 'rb') as f:
-                    file_header = f.read(1024)  # Lire les premiers 1KB
-                    
-                    for signature in self.DANGEROUS_SIGNATURES:
-                        if file_header.startswith(signature):
-                            raise HTTPException(
-                                status_code=400,
-                                detail="Fichier potentiellement dangereux détecté"
-                            )
-            
-            # 6. Générer un nom de fichier sécurisé
-            safe_filename = self._generate_safe_filename(file.filename)
-            
-            # 7. Réinitialiser le curseur du fichier
-            await file.seek(0)
+                # Analyser l'en-tête dès qu'il est complet, avant d'écrire la suite
+                if not sniffed:
+                    header += chunk[:self.SNIFF_SIZE - len(header)]
+                    if len(header) >= self.SNIFF_SIZE:
+                        detected_mime = await asyncio.to_thread(self._check_header, header)
+                        sniffed = True
+                
+                # Hash (hashlib libère le GIL) et écriture hors de la boucle d'événements
+                await asyncio.to_thread(self._absorb, chunk, hash_func, writer)
             
-            # Nettoyer le fichier temporaire
-            os.unlink(temp_path)
+            # Fichier plus petit que l'en-tête analysé
+            if not sniffed:
+                detected_mime = await asyncio.to_thread(self._check_header, header)
             
-            return safe_filename, detected_mime if check_content else "", file_size
+            await asyncio.to_thread(writer.commit)
+            return detected_mime, file_size, hash_func.hexdigest()
             
         except HTTPException:
-            # Nettoyer et relancer l'exception
-            if os.path.exists(temp_path):
-                os.unlink(temp_path)
+            await asyncio.to_thread(writer.abort)
             raise
         except Exception as e:
-            # Nettoyer et transformer en HTTPException
-            if os.path.exists(temp_path):
-                os.unlink(temp_path)
+            # Annuler l'écriture et transformer en HTTPException
+            await asyncio.to_thread(writer.abort)
             raise HTTPException(
                 status_code=500,
                 detail=f"Erreur lors de la validation du fichier: {str(e)}"
             )
     
+    @staticmethod
+    def _absorb(chunk: bytes, hash_func, writer: StorageWriter) -> None:
+        hash_func.update(chunk)
+        writer.write(chunk)
+    
     def _generate_safe_filename(self, original_filename: str) -> str:
         """
         Génère un nom de fichier sécurisé
@@ -0,0 +1,438 @@
+"""
+Stockage des fichiers de documents, indépendant du support
+
+Les fichiers sont désignés par une clé ("blobs/ab/cd/<sha256>"), jamais par
+un chemin local : les nœuds API n'ont plus besoin d'un disque partagé dès que
+le backend est un stockage objet.
+
+Backends (STORAGE_BACKEND) :
+  - local : arborescence sous UPLOAD_PATH
+  - s3 : stockage objet compatible S3 (AWS, MinIO, OVH, Scaleway), écriture
+    en multipart et URLs de téléchargement présignées
+  - memory : en mémoire, pour les tests
+
+Les méthodes sont synchrones (utilisables depuis Celery et les scripts) ; les
+endpoints les appellent via asyncio.to_thread.
+"""
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, NamedTuple, Optional, Tuple
+from urllib.parse import quote
+
+from app.core.config import settings
+
+# Taille des blocs lus en téléchargement
+READ_CHUNK_SIZE = 256 * 1024
+# Taille d'une partie d'upload multipart S3 (minimum S3 : 5 Mo, sauf la dernière)
+S3_PART_SIZE = 8 * 1024 * 1024
+
+
+class StoredObject(NamedTuple):
+    """Métadonnées d'un objet stocké"""
+    key: str
+    size: int
+    modified: float  # Timestamp POSIX
+
+
+class StorageWriter:
+    """Écriture en flux d'un objet : write() par blocs, puis commit() ou abort()"""
+
+    def write(self, chunk: bytes) -> None:
+        raise NotImplementedError
+
+    def commit(self) -> None:
+        raise NotImplementedError
+
+    def abort(self) -> None:
+        raise NotImplementedError
+
+
+class StorageBackend:
+    """Interface commune des backends de stockage"""
+
+    name = "abstract"
+
+    def open_writer(self, key: str) -> StorageWriter:
+        raise NotImplementedError
+
+    def stat(self, key: str) -> Optional[StoredObject]:
+        """Métadonnées de l'objet, None s'il n'existe pas"""
+        raise NotImplementedError
+
+    def exists(self, key: str) -> bool:
+        return self.stat(key) is not None
+
+    def touch(self, key: str) -> None:
+        """Met à jour la date de modification (objet réutilisé)"""
+        raise NotImplementedError
+
+    def move(self, source: str, destination: str) -> None:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> bool:
+        raise NotImplementedError
+
+    def iter_objects(self, prefix: str) -> Iterator[StoredObject]:
+        raise NotImplementedError
+
+    def iter_chunks(self, key: str, start: int = 0, length: Optional[int] = None) -> Iterator[bytes]:
+        """Lit l'objet (ou la plage [start, start + length[) par blocs"""
+        raise NotImplementedError
+
+    def presigned_url(self, key: str, expires_in: int, filename: Optional[str] = None) -> Optional[str]:
+        """URL de téléchargement direct, None si le backend n'en fournit pas"""
+        return None
+
+    def local_path(self, key: str) -> Optional[str]:
+        """Chemin sur disque local, None si l'objet n'est pas sur ce nœud"""
+        return None
+
+
+# --- Système de fichiers local -------------------------------------------------
+
+class LocalFileWriter(StorageWriter):
+    """Écriture dans un fichier local ; abort() supprime le fichier partiel"""
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self._file = open(path, "wb")
+
+    def write(self, chunk: bytes) -> None:
+        self._file.write(chunk)
+
+    def commit(self) -> None:
+        self._file.close()
+
+    def abort(self) -> None:
+        self._file.close()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+
+class LocalStorage(StorageBackend):
+    """Arborescence de fichiers sous un répertoire racine"""
+
+    name = "local"
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+
+    def _path(self, key: str) -> str:
+        path = os.path.abspath(os.path.join(self.root, key))
+        if not path.startswith(self.root + os.sep):
+            raise ValueError(f"Clé de stockage invalide: {key!r}")
+        return path
+
+    def open_writer(self, key: str) -> StorageWriter:
+        return LocalFileWriter(self._path(key))
+
+    def stat(self, key: str) -> Optional[StoredObject]:
+        try:
+            st = os.stat(self._path(key))
+        except FileNotFoundError:
+            return None
+        return StoredObject(key, st.st_size, st.st_mtime)
+
+    def touch(self, key: str) -> None:
+        os.utime(self._path(key))
+
+    def move(self, source: str, destination: str) -> None:
+        path = self._path(destination)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(self._path(source), path)
+
+    def delete(self, key: str) -> bool:
+        try:
+            os.unlink(self._path(key))
+        except FileNotFoundError:
+            return False
+        return True
+
+    def iter_objects(self, prefix: str) -> Iterator[StoredObject]:
+        base = self._path(prefix)
+        for dirpath, _, filenames in os.walk(base):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                key = os.path.relpath(path, self.root).replace(os.sep, "/")
+                yield StoredObject(key, st.st_size, st.st_mtime)
+
+    def iter_chunks(self, key: str, start: int = 0, length: Optional[int] = None) -> Iterator[bytes]:
+        with open(self._path(key), "rb") as f:
+            f.seek(start)
+            remaining = length
+            while remaining is None or remaining > 0:
+                chunk = f.read(READ_CHUNK_SIZE if remaining is None else min(READ_CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+
+    def local_path(self, key: str) -> Optional[str]:
+        return self._path(key)
+
+
+# --- Mémoire (tests) -----------------------------------------------------------
+
+class _MemoryWriter(StorageWriter):
+    def __init__(self, storage: "MemoryStorage", key: str):
+        self.storage = storage
+        self.key = key
+        self.buffer = bytearray()
+
+    def write(self, chunk: bytes) -> None:
+        self.buffer += chunk
+
+    def commit(self) -> None:
+        with self.storage._lock:
+            self.storage.objects[self.key] = (bytes(self.buffer), time.time())
+
+    def abort(self) -> None:
+        self.buffer = bytearray()
+
+
+class MemoryStorage(StorageBackend):
+    """Objets en mémoire du processus, pour les tests"""
+
+    name = "memory"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.objects: Dict[str, Tuple[bytes, float]] = {}
+
+    def open_writer(self, key: str) -> StorageWriter:
+        return _MemoryWriter(self, key)
+
+    def stat(self, key: str) -> Optional[StoredObject]:
+        with self._lock:
+            if key not in self.objects:
+                return None
+            data, modified = self.objects[key]
+        return StoredObject(key, len(data), modified)
+
+    def touch(self, key: str) -> None:
+        with self._lock:
+            data, _ = self.objects[key]
+            self.objects[key] = (data, time.time())
+
+    def move(self, source: str, destination: str) -> None:
+        with self._lock:
+            self.objects[destination] = self.objects.pop(source)
+
+    def delete(self, key: str) -> bool:
+        with self._lock:
+            return self.objects.pop(key, None) is not None
+
+    def iter_objects(self, prefix: str) -> Iterator[StoredObject]:
+        with self._lock:
+            items = [(key, len(data), modified) for key, (data, modified) in self.objects.items()]
+        for key, size, modified in items:
+            if key.startswith(prefix.rstrip("/") + "/"):
+                yield StoredObject(key, size, modified)
+
+    def iter_chunks(self, key: str, start: int = 0, length: Optional[int] = None) -> Iterator[bytes]:
+        with self._lock:
+            data = self.objects[key][0]
+        end = len(data) if length is None else start + length
+        for offset in range(start, end, READ_CHUNK_SIZE):
+            yield data[offset:min(offset + READ_CHUNK_SIZE, end)]
+
+
+# --- Stockage objet compatible S3 ----------------------------------------------
+
+class _S3MultipartWriter(StorageWriter):
+    """
+    Upload multipart : les blocs sont regroupés en parties de S3_PART_SIZE
+    (mémoire bornée à une partie). Un objet plus petit qu'une partie est
+    envoyé en un seul PUT.
+    """
+
+    def __init__(self, client, bucket: str, key: str):
+        self.client = client
+        self.bucket = bucket
+        self.key = key
+        self.buffer = bytearray()
+        self.upload_id = None
+        self.parts = []
+
+    def _upload_part(self) -> None:
+        if self.upload_id is None:
+            self.upload_id = self.client.create_multipart_upload(Bucket=self.bucket, Key=self.key)["UploadId"]
+        number = len(self.parts) + 1
+        response = self.client.upload_part(
+            Bucket=self.bucket, Key=self.key, UploadId=self.upload_id,
+            PartNumber=number, Body=bytes(self.buffer)
+        )
+        self.parts.append({"ETag": response["ETag"], "PartNumber": number})
+        self.buffer = bytearray()
+
+    def write(self, chunk: bytes) -> None:
+        self.buffer += chunk
+        if len(self.buffer) >= S3_PART_SIZE:
+            self._upload_part()
+
+    def commit(self) -> None:
+        if self.upload_id is None:
+            self.client.put_object(Bucket=self.bucket, Key=self.key, Body=bytes(self.buffer))
+            return
+        if self.buffer:
+            self._upload_part()
+        self.client.complete_multipart_upload(
+            Bucket=self.bucket, Key=self.key, UploadId=self.upload_id,
+            MultipartUpload={"Parts": self.parts}
+        )
+
+    def abort(self) -> None:
+        self.buffer = bytearray()
+        if self.upload_id is not None:
+            self.client.abort_multipart_upload(Bucket=self.bucket, Key=self.key, UploadId=self.upload_id)
+
+
+class S3Storage(StorageBackend):
+    """Bucket S3 (ou compatible : MinIO, OVH Object Storage, Scaleway)"""
+
+    name = "s3"
+
+    def __init__(
+        self,
+        bucket: str,
+        endpoint_url: Optional[str] = None,
+        region: Optional[str] = None,
+        access_key_id: Optional[str] = None,
+        secret_access_key: Optional[str] = None,
+        client=None
+    ):
+        if client is None:
+            import boto3  # Dépendance du seul backend s3
+
+            client = boto3.client(
+                "s3",
+                endpoint_url=endpoint_url,
+                region_name=region,
+                aws_access_key_id=access_key_id,
+                aws_secret_access_key=secret_access_key,
+            )
+        self.client = client
+        self.bucket = bucket
+
+    def _not_found(self, error) -> bool:
+        return error.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound")
+
+    def open_writer(self, key: str) -> StorageWriter:
+        return _S3MultipartWriter(self.client, self.bucket, key)
+
+    def stat(self, key: str) -> Optional[StoredObject]:
+        from botocore.exceptions import ClientError
+
+        try:
+            head = self.client.head_object(Bucket=self.bucket, Key=key)
+        except ClientError as e:
+            if self._not_found(e):
+                return None
+            raise
+        return StoredObject(key, head["ContentLength"], head["LastModified"].timestamp())
+
+    def touch(self, key: str) -> None:
+        # Copie sur lui-même : seule façon de rafraîchir LastModified
+        self.client.copy_object(
+            Bucket=self.bucket, Key=key, CopySource={"Bucket": self.bucket, "Key": key},
+            MetadataDirective="REPLACE"
+        )
+
+    def move(self, source: str, destination: str) -> None:
+        # Copie côté serveur, sans retransférer le contenu
+        self.client.copy_object(
+            Bucket=self.bucket, Key=destination, CopySource={"Bucket": self.bucket, "Key": source}
+        )
+        self.client.delete_object(Bucket=self.bucket, Key=source)
+
+    def delete(self, key: str) -> bool:
+        self.client.delete_object(Bucket=self.bucket, Key=key)
+        return True
+
+    def iter_objects(self, prefix: str) -> Iterator[StoredObject]:
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix.rstrip("/") + "/"):
+            for item in page.get("Contents", []):
+                yield StoredObject(item["Key"], item["Size"], item["LastModified"].timestamp())
+
+    def iter_chunks(self, key: str, start: int = 0, length: Optional[int] = None) -> Iterator[bytes]:
+        params = {"Bucket": self.bucket, "Key": key}
+        if start or length is not None:
+            end = "" if length is None else str(start + length - 1)
+            params["Range"] = f"bytes={start}-{end}"
+        body = self.client.get_object(**params)["Body"]
+        try:
+            yield from body.iter_chunks(READ_CHUNK_SIZE)
+        finally:
+            body.close()
+
+    def presigned_url(self, key: str, expires_in: int, filename: Optional[str] = None) -> Optional[str]:
+        params = {"Bucket": self.bucket, "Key": key}
+        if filename:
+            params["ResponseContentDisposition"] = f"attachment; filename*=UTF-8''{quote(filename)}"
+        return self.client.generate_presigned_url("get_object", Params=params, ExpiresIn=expires_in)
+
+
+def create_storage() -> StorageBackend:
+    """Backend configuré par STORAGE_BACKEND"""
+    backend = settings.STORAGE_BACKEND
+    if backend == "local":
+        return LocalStorage(settings.UPLOAD_PATH)
+    if backend == "s3":
+        return S3Storage(
+            settings.S3_BUCKET,
+            endpoint_url=settings.S3_ENDPOINT_URL,
+            region=settings.S3_REGION,
+            access_key_id=settings.S3_ACCESS_KEY_ID,
+            secret_access_key=settings.S3_SECRET_ACCESS_KEY,
+        )
+    if backend == "memory":
+        return MemoryStorage()
+    raise ValueError(f"Backend de stockage inconnu: {backend}")
+
+
+@contextmanager
+def local_copy(backend: StorageBackend, key: str) -> Iterator[str]:
+    """
+    Chemin local lisible de l'objet, pour les bibliothèques qui lisent un
+    fichier (zipfile, Pillow, PDF) : le fichier lui-même sur disque local,
+    sinon une copie temporaire supprimée en sortie
+    """
+    path = backend.local_path(key)
+    if path is not None:
+        yield path
+        return
+
+    fd, path = tempfile.mkstemp(suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for chunk in backend.iter_chunks(key):
+                f.write(chunk)
+        yield path
+    finally:
+        os.unlink(path)
+
+
+def storage_key(chemin_fichier: str) -> str:
+    """
+    Clé de stockage d'un document. Les documents antérieurs au stockage par
+    clé enregistraient un chemin local sous UPLOAD_PATH.
+    """
+    racine = os.path.normpath(settings.UPLOAD_PATH)
+    chemin = os.path.normpath(chemin_fichier)
+    if chemin.startswith(racine + os.sep):
+        return os.path.relpath(chemin, racine).replace(os.sep, "/")
+    return chemin_fichier
+
+
+# Instance globale
+storage = create_storage()
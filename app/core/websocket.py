@@ -1,92 +1,342 @@
+"""
+Gestion des connexions WebSocket et diffusion des notifications
+
+Les notifications passent par un canal Redis pub/sub : n'importe quel processus
+(worker uvicorn, tâche Celery) peut publier, et chaque processus API relaie les
+messages reçus à ses propres sockets. Chaque connexion a sa file d'envoi bornée
+et sa tâche d'envoi : une diffusion ne fait que déposer le message dans les
+files, un client lent ne bloque personne (ses plus anciens messages sont
+abandonnés quand sa file est pleine, et il est déconnecté si un envoi dépasse
+SEND_TIMEOUT).
+
+Un client peut s'abonner à des sujets (types de notification : new_alert,
+deadline_reminder, ...) ; par défaut il reçoit tout. Les sujets demandés sont
+validés (parse_topics) et leur nombre par connexion est borné.
+"""
 import json
-from typing import Dict, Set
+import logging
+import uuid
+from typing import Dict, Iterable, List, Optional, Set
 from fastapi import WebSocket, WebSocketDisconnect
 from datetime import datetime
 import asyncio
 
+import redis
+import redis.asyncio as aioredis
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+WS_CHANNEL = "ws:notifications"
+ALL_TOPICS = "all"
+QUEUE_MAXSIZE = 100  # Messages en attente par connexion avant abandon des plus anciens
+SEND_BATCH_SIZE = 20  # Messages envoyés d'affilée par la tâche d'envoi
+SEND_TIMEOUT = 5  # Secondes avant de considérer un client comme bloqué
+MAX_CONCURRENT_SENDS = 256  # Envois simultanés par processus
+LISTENER_RETRY_DELAY = 2  # Secondes avant réabonnement après une erreur Redis
+MAX_TOPICS_PER_CONNECTION = 32  # Abonnements simultanés par connexion
+MAX_TOPIC_LENGTH = 64
+
+_sync_redis: Optional[redis.Redis] = None
+
+
+def build_notification(notification_type: str, data: dict) -> str:
+    """Sérialise une notification au format attendu par le frontend"""
+    return json.dumps({
+        "type": notification_type,
+        "data": data,
+        "timestamp": datetime.now().isoformat()
+    }, default=str)
+
+
+def parse_topics(message: dict) -> List[str]:
+    """
+    Sujets d'un message subscribe/unsubscribe : "channels" (liste de chaînes)
+    ou "channel" (une chaîne), "all" par défaut. ValueError si invalides.
+    """
+    if "channels" in message:
+        topics = message["channels"]
+        if not isinstance(topics, list):
+            raise ValueError("channels doit être une liste de chaînes")
+    else:
+        topics = [message.get("channel", ALL_TOPICS)]
+    if not topics:
+        raise ValueError("Aucun sujet demandé")
+    if len(topics) > MAX_TOPICS_PER_CONNECTION:
+        raise ValueError(f"{MAX_TOPICS_PER_CONNECTION} sujets au maximum")
+    for topic in topics:
+        if not isinstance(topic, str) or not topic or len(topic) > MAX_TOPIC_LENGTH:
+            raise ValueError(f"Sujet invalide : chaîne de 1 à {MAX_TOPIC_LENGTH} caractères attendue")
+    return topics
+
+
+def _envelope(message: str, user_id: Optional[int], topic: Optional[str]) -> str:
+    return json.dumps({"user_id": user_id, "topic": topic, "message": message})
+
+
+def publish_notification(message: str, user_id: Optional[int] = None, topic: Optional[str] = None) -> bool:
+    """
+    Publie un message vers tous les processus API (version synchrone,
+    utilisable depuis Celery). user_id=None diffuse à tout le monde.
+    """
+    global _sync_redis
+    try:
+        if _sync_redis is None:
+            _sync_redis = redis.from_url(settings.REDIS_URL)
+        _sync_redis.publish(WS_CHANNEL, _envelope(message, user_id, topic))
+        return True
+    except Exception as e:
+        logger.warning(f"Publication WebSocket impossible: {e}")
+        return False
+
+
+def publish_user_notification(user_id: int, notification_type: str, data: dict) -> bool:
+    """Publie une notification destinée à un utilisateur (version synchrone)"""
+    return publish_notification(build_notification(notification_type, data), user_id, notification_type)
+
+
+class _Connection:
+    """Socket locale avec sa file d'envoi bornée et ses abonnements"""
+
+    __slots__ = ("websocket", "user_id", "topics", "queue", "sender", "dropped")
+
+    def __init__(self, websocket: WebSocket, user_id: int):
+        self.websocket = websocket
+        self.user_id = user_id
+        self.topics: Set[str] = {ALL_TOPICS}
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=QUEUE_MAXSIZE)
+        self.sender: Optional[asyncio.Task] = None
+        self.dropped = 0
+
+    def accepts(self, topic: Optional[str]) -> bool:
+        return topic is None or ALL_TOPICS in self.topics or topic in self.topics
+
+
 class ConnectionManager:
     def __init__(self):
-        self.active_connections: Dict[str, WebSocket] = {}
+        self.active_connections: Dict[str, _Connection] = {}
+        # Index secondaires : utilisateur -> connexions, sujet -> connexions
         self.user_connections: Dict[int, Set[str]] = {}
+        self.topic_connections: Dict[str, Set[str]] = {}
+        self._send_slots: Optional[asyncio.Semaphore] = None
+        self._redis: Optional[aioredis.Redis] = None
+        self._listener: Optional[asyncio.Task] = None
+
+    # --- Cycle de vie du relais pub/sub ---
+
+    async def start(self):
+        """Démarre l'écoute du canal Redis (au démarrage de l'application)"""
+        if self._listener is None:
+            self._redis = aioredis.from_url(settings.REDIS_URL)
+            self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        """Arrête l'écoute et ferme les tâches d'envoi"""
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+        senders = [c.sender for c in self.active_connections.values() if c.sender is not None]
+        for connection_id in list(self.active_connections):
+            self.disconnect(connection_id)
+        await asyncio.gather(*senders, return_exceptions=True)
+
+    async def _listen(self):
+        """Relaie aux sockets locales les messages publiés par tous les processus"""
+        while True:
+            try:
+                async with self._redis.pubsub() as pubsub:
+                    await pubsub.subscribe(WS_CHANNEL)
+                    async for item in pubsub.listen():
+                        if item.get("type") != "message":
+                            continue
+                        envelope = json.loads(item["data"])
+                        self.deliver_local(envelope["message"], envelope.get("user_id"), envelope.get("topic"))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Écoute du canal WebSocket interrompue: {e}")
+                await asyncio.sleep(LISTENER_RETRY_DELAY)
+
+    @property
+    def relayed(self) -> bool:
+        """Vrai si ce processus reçoit les messages publiés sur le canal"""
+        return self._listener is not None and not self._listener.done()
+
+    # --- Connexions locales ---
 
     async def connect(self, websocket: WebSocket, user_id: int):
         await websocket.accept()
-        connection_id = f"{user_id}_{datetime.now().timestamp()}"
-        self.active_connections[connection_id] = websocket
-        
-        if user_id not in self.user_connections:
-            self.user_connections[user_id] = set()
-        self.user_connections[user_id].add(connection_id)
-        
+        connection_id = f"{user_id}_{uuid.uuid4().hex}"
+        connection = _Connection(websocket, user_id)
+        connection.sender = asyncio.create_task(self._send_loop(connection_id, connection))
+        self.active_connections[connection_id] = connection
+
+        self.user_connections.setdefault(user_id, set()).add(connection_id)
+        self.topic_connections.setdefault(ALL_TOPICS, set()).add(connection_id)
+
         return connection_id
 
     def disconnect(self, connection_id: str):
-        if connection_id in self.active_connections:
-            websocket = self.active_connections[connection_id]
-            del self.active_connections[connection_id]
-            
-            # Retirer de user_connections
-            for user_id, connections in self.user_connections.items():
-                if connection_id in connections:
-                    connections.remove(connection_id)
-                    if not connections:
-                        del self.user_connections[user_id]
-                    break
-
-    async def send_personal_message(self, message: str, user_id: int):
-        """Envoyer un message à un utilisateur spécifique"""
-        if user_id in self.user_connections:
-            disconnected = []
-            for connection_id in self.user_connections[user_id]:
-                try:
-                    websocket = self.active_connections[connection_id]
-                    await websocket.send_text(message)
-                except:
-                    disconnected.append(connection_id)
-            
-            # Nettoyer les connexions fermées
-            for conn_id in disconnected:
-                self.disconnect(conn_id)
-
-    async def broadcast(self, message: str):
-        """Diffuser un message à tous les utilisateurs connectés"""
-        disconnected = []
-        for connection_id, websocket in self.active_connections.items():
+        connection = self._forget(connection_id)
+        if connection is not None and connection.sender is not None:
+            connection.sender.cancel()
+
+    def _forget(self, connection_id: str) -> Optional[_Connection]:
+        """Retire une connexion des index sans toucher à sa tâche d'envoi (O(abonnements))"""
+        connection = self.active_connections.pop(connection_id, None)
+        if connection is not None:
+            self._discard(self.user_connections, connection.user_id, connection_id)
+            for topic in connection.topics:
+                self._discard(self.topic_connections, topic, connection_id)
+        return connection
+
+    @staticmethod
+    def _discard(index: dict, key, connection_id: str):
+        connections = index.get(key)
+        if connections is not None:
+            connections.discard(connection_id)
+            if not connections:
+                del index[key]
+
+    def subscribe(self, connection_id: str, topics: Iterable[str]) -> Set[str]:
+        """
+        Abonne une connexion à des sujets ; "all" rétablit la réception de tout.
+        Retourne les abonnements courants ; ValueError au-delà de
+        MAX_TOPICS_PER_CONNECTION abonnements.
+        """
+        connection = self.active_connections.get(connection_id)
+        if connection is None:
+            return set()
+        topics = set(topics)
+        if ALL_TOPICS in topics:
+            nouveaux = {ALL_TOPICS}
+        elif ALL_TOPICS in connection.topics:
+            # Un premier abonnement explicite remplace la réception de tout
+            nouveaux = topics
+        else:
+            nouveaux = connection.topics | topics
+        if len(nouveaux) > MAX_TOPICS_PER_CONNECTION:
+            raise ValueError(f"{MAX_TOPICS_PER_CONNECTION} abonnements au maximum par connexion")
+        return self._set_topics(connection_id, connection, nouveaux)
+
+    def unsubscribe(self, connection_id: str, topics: Iterable[str]) -> Set[str]:
+        """Désabonne une connexion de sujets ; sans abonnement restant, elle reçoit tout"""
+        connection = self.active_connections.get(connection_id)
+        if connection is None:
+            return set()
+        return self._set_topics(connection_id, connection, (connection.topics - set(topics)) or {ALL_TOPICS})
+
+    def _set_topics(self, connection_id: str, connection: _Connection, topics: Set[str]) -> Set[str]:
+        for topic in connection.topics - topics:
+            self._discard(self.topic_connections, topic, connection_id)
+        for topic in topics - connection.topics:
+            self.topic_connections.setdefault(topic, set()).add(connection_id)
+        connection.topics = topics
+        return set(topics)
+
+    def send_to_connection(self, connection_id: str, message: str):
+        """Dépose un message dans la file d'une connexion, sans attendre"""
+        connection = self.active_connections.get(connection_id)
+        if connection is None:
+            return
+        if connection.queue.full():
+            # Client trop lent : abandonner le plus ancien message
+            connection.queue.get_nowait()
+            connection.dropped += 1
+            if connection.dropped % QUEUE_MAXSIZE == 1:
+                logger.warning(f"Connexion {connection_id} saturée, {connection.dropped} message(s) abandonné(s)")
+        connection.queue.put_nowait(message)
+
+    async def _send_loop(self, connection_id: str, connection: _Connection):
+        """Vide la file d'une connexion par lots, chaque envoi borné dans le temps"""
+        if self._send_slots is None:
+            self._send_slots = asyncio.Semaphore(MAX_CONCURRENT_SENDS)
+        try:
+            while True:
+                batch = [await connection.queue.get()]
+                while len(batch) < SEND_BATCH_SIZE and not connection.queue.empty():
+                    batch.append(connection.queue.get_nowait())
+                async with self._send_slots:
+                    for message in batch:
+                        # asyncio.timeout plutôt que wait_for : une annulation (disconnect) n'est jamais perdue
+                        async with asyncio.timeout(SEND_TIMEOUT):
+                            await connection.websocket.send_text(message)
+        except asyncio.CancelledError:
+            raise
+        except asyncio.TimeoutError:
+            logger.warning(f"Connexion {connection_id} bloquée, fermeture")
+            self._forget(connection_id)
             try:
-                await websocket.send_text(message)
-            except:
-                disconnected.append(connection_id)
-        
-        # Nettoyer les connexions fermées
-        for conn_id in disconnected:
-            self.disconnect(conn_id)
+                async with asyncio.timeout(SEND_TIMEOUT):
+                    await connection.websocket.close(code=1013)
+            except Exception:
+                pass
+        except Exception:
+            # Connexion fermée côté client
+            self._forget(connection_id)
+
+    def deliver_local(self, message: str, user_id: Optional[int] = None, topic: Optional[str] = None):
+        """
+        Distribue un message aux sockets de ce processus : celles d'un utilisateur,
+        ou toutes celles abonnées au sujet
+        """
+        if user_id is not None:
+            connection_ids = [
+                connection_id for connection_id in self.user_connections.get(user_id, ())
+                if self.active_connections[connection_id].accepts(topic)
+            ]
+        elif topic is None:
+            connection_ids = list(self.active_connections)
+        else:
+            connection_ids = list(self.topic_connections.get(ALL_TOPICS, set()) | self.topic_connections.get(topic, set()))
+        for connection_id in connection_ids:
+            self.send_to_connection(connection_id, message)
+
+    # --- Envoi (tous processus) ---
+
+    async def _publish(self, message: str, user_id: Optional[int], topic: Optional[str]) -> bool:
+        if self._redis is None:
+            return await asyncio.to_thread(publish_notification, message, user_id, topic)
+        try:
+            await self._redis.publish(WS_CHANNEL, _envelope(message, user_id, topic))
+            return True
+        except Exception as e:
+            logger.warning(f"Publication WebSocket impossible: {e}")
+            return False
+
+    async def _dispatch(self, message: str, user_id: Optional[int], topic: Optional[str] = None):
+        published = await self._publish(message, user_id, topic)
+        # Sans relais actif (ou si Redis est indisponible), livrer directement aux sockets locales
+        if not (published and self.relayed):
+            self.deliver_local(message, user_id, topic)
+
+    async def send_personal_message(self, message: str, user_id: int, topic: Optional[str] = None):
+        """Envoyer un message à un utilisateur spécifique"""
+        await self._dispatch(message, user_id, topic)
+
+    async def broadcast(self, message: str, topic: Optional[str] = None):
+        """Diffuser un message à tous les utilisateurs connectés (abonnés au sujet)"""
+        await self._dispatch(message, None, topic)
 
     async def notify_dossier_update(self, user_id: int, dossier_data: dict):
         """Notifier un utilisateur d'une mise à jour de dossier"""
-        notification = {
-            "type": "dossier_update",
-            "data": dossier_data,
-            "timestamp": datetime.now().isoformat()
-        }
-        await self.send_personal_message(json.dumps(notification), user_id)
+        await self.send_personal_message(build_notification("dossier_update", dossier_data), user_id, "dossier_update")
 
     async def notify_new_alert(self, user_id: int, alert_data: dict):
         """Notifier un utilisateur d'une nouvelle alerte"""
-        notification = {
-            "type": "new_alert",
-            "data": alert_data,
-            "timestamp": datetime.now().isoformat()
-        }
-        await self.send_personal_message(json.dumps(notification), user_id)
+        await self.send_personal_message(build_notification("new_alert", alert_data), user_id, "new_alert")
 
     async def notify_deadline_reminder(self, user_id: int, reminder_data: dict):
         """Notifier un utilisateur d'un rappel d'échéance"""
-        notification = {
-            "type": "deadline_reminder",
-            "data": reminder_data,
-            "timestamp": datetime.now().isoformat()
-        }
-        await self.send_personal_message(json.dumps(notification), user_id)
+        await self.send_personal_message(build_notification("deadline_reminder", reminder_data), user_id, "deadline_reminder")
 
 
-manager = ConnectionManager()
\ No newline at end of file
+manager = ConnectionManager()
@@ -15,7 +15,9 @@ from typing import Optional
 from app.core.config import settings
 from app.core.security import limiter, rate_limit_handler
 from app.core.logging_config import setup_logging, get_logger
-from app.api import health, auth, users, dossiers, alertes, dashboard, websocket, clients, echeances, suivi, notifications, cabinet_settings, two_factor
+from app.core.websocket import manager as ws_manager
+from app.core.cache import local_invalidation_listener
+from app.api import health, auth, users, dossiers, alertes, dashboard, websocket, clients, echeances, suivi, notifications, cabinet_settings, two_factor, search
 from slowapi.errors import RateLimitExceeded
 
 # Configure logging avec notre système
@@ -36,12 +38,17 @@ async def lifespan(app: FastAPI):
     try:
         # Ici vous pouvez initialiser des connexions DB, cache, etc.
         # await initialize_database()
-        # await connect_redis()
+        # Relais des notifications WebSocket publiées par les autres processus
+        await ws_manager.start()
+        # Invalidations des caches locaux diffusées par les autres processus
+        local_invalidation_listener.start()
         logger.info("NormX Docs API started successfully")
         yield
     finally:
         # Shutdown
         logger.info("Shutting down NormX Docs API...")
+        await ws_manager.stop()
+        local_invalidation_listener.stop()
         # Fermer les connexions proprement
         # await close_database()
         # await disconnect_redis()
@@ -309,6 +316,7 @@ app.include_router(suivi.router, prefix=f"{API_V1_PREFIX}/suivi", tags=["suivi"]
 app.include_router(notifications.router, prefix=f"{API_V1_PREFIX}/notifications", tags=["notifications"])
 app.include_router(cabinet_settings.router, prefix=f"{API_V1_PREFIX}/cabinet-settings", tags=["cabinet"])
 app.include_router(two_factor.router, prefix=f"{API_V1_PREFIX}/2fa", tags=["2fa"])
+app.include_router(search.router, prefix=f"{API_V1_PREFIX}/search", tags=["search"])
 app.include_router(websocket.router, prefix=API_V1_PREFIX, tags=["websocket"])
 
 # Route racine
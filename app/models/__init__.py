@@ -2,7 +2,7 @@ from app.models.cabinet import Cabinet
 from app.models.user import User
 from app.models.dossier import Dossier, StatusDossier, TypeDossier, PrioriteDossier
 from app.models.alerte import Alerte, TypeAlerte, NiveauAlerte
-from app.models.document import Document
+from app.models.document import Document, StatutTraitement
 from app.models.historique import HistoriqueDossier
 from app.models.notification import Notification
 from app.models.client import Client
@@ -11,13 +11,16 @@ from app.models.echeance import Echeance
 from app.models.saisie import SaisieComptable
 from app.models.document_requis import DocumentRequis
 from app.models.declaration_fiscale import DeclarationFiscale
+from app.models.avancement import AvancementDossier
+from app.models.blob import Blob
+from app.models.archive import SaisieComptableArchive, DocumentRequisArchive
 
 __all__ = [
     "Cabinet",
     "User",
     "Dossier", "StatusDossier", "TypeDossier", "PrioriteDossier",
     "Alerte", "TypeAlerte", "NiveauAlerte",
-    "Document",
+    "Document", "StatutTraitement",
     "HistoriqueDossier",
     "Notification",
     "Client",
@@ -25,5 +28,8 @@ __all__ = [
     "Echeance",
     "SaisieComptable",
     "DocumentRequis",
-    "DeclarationFiscale"
+    "DeclarationFiscale",
+    "AvancementDossier",
+    "Blob",
+    "SaisieComptableArchive", "DocumentRequisArchive"
 ]
\ No newline at end of file
@@ -25,7 +25,7 @@ class Alerte(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     cabinet_id = Column(Integer, ForeignKey("cabinets.id"), nullable=False)
-    dossier_id = Column(Integer, ForeignKey("dossiers.id"))
+    dossier_id = Column(Integer, ForeignKey("dossiers.id"), index=True)
     type_alerte = Column(Enum(TypeAlerte), nullable=False)
     niveau = Column(Enum(NiveauAlerte), default=NiveauAlerte.INFO)
     message = Column(Text, nullable=False)
@@ -0,0 +1,56 @@
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Enum, Index
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+from app.models.document import TypeDocument
+
+
+# Tier d'archive des lignes par période des dossiers archivés (voir
+# app.services.archival). Mêmes colonnes et mêmes IDs que les tables vives ;
+# sous PostgreSQL, tables partitionnées par année (une partition par exercice,
+# créée à l'archivage), d'où la clé primaire (id, annee).
+
+
+class SaisieComptableArchive(Base):
+    __tablename__ = "saisies_comptables_archive"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    annee = Column(Integer, primary_key=True)
+    cabinet_id = Column(Integer, ForeignKey("cabinets.id"), nullable=False)
+    dossier_id = Column(Integer, ForeignKey("dossiers.id"), nullable=False)
+    echeance_id = Column(Integer, ForeignKey("echeances.id"), nullable=False)
+    type_journal = Column(String, nullable=False)
+    est_complete = Column(Boolean, default=False)
+    date_completion = Column(DateTime(timezone=True), nullable=True)
+    mois = Column(Integer, nullable=False)
+    created_at = Column(DateTime(timezone=True))
+    updated_at = Column(DateTime(timezone=True))
+    completed_by_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    archived_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        Index('ix_saisies_comptables_archive_dossier_id', 'dossier_id'),
+        Index('ix_saisies_comptables_archive_echeance_id', 'echeance_id'),
+        {'postgresql_partition_by': 'RANGE (annee)'},
+    )
+
+
+class DocumentRequisArchive(Base):
+    __tablename__ = "documents_requis_archive"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    annee = Column(Integer, primary_key=True)
+    cabinet_id = Column(Integer, ForeignKey("cabinets.id"), nullable=False)
+    dossier_id = Column(Integer, ForeignKey("dossiers.id"), nullable=False)
+    echeance_id = Column(Integer, ForeignKey("echeances.id"), nullable=False)
+    type_document = Column(Enum(TypeDocument), nullable=False)
+    mois = Column(Integer, nullable=False)
+    est_applicable = Column(Boolean, default=True)
+    est_fourni = Column(Boolean, default=False)
+    archived_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        Index('ix_documents_requis_archive_dossier_id', 'dossier_id'),
+        Index('ix_documents_requis_archive_echeance_id', 'echeance_id'),
+        {'postgresql_partition_by': 'RANGE (annee)'},
+    )
@@ -0,0 +1,40 @@
+from sqlalchemy import Column, Integer, Date, DateTime, ForeignKey, UniqueConstraint, Index
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+
+
+class AvancementDossier(Base):
+    """
+    Avancement matérialisé d'un dossier, une ligne par date limite
+
+    Compte les échéances, les saisies comptables (à la date de leur échéance)
+    et les déclarations fiscales du dossier tombant à cette date. Table
+    maintenue par app.services.avancement_service à chaque commit modifiant
+    des échéances, saisies ou déclarations ; ne pas écrire directement.
+    """
+    __tablename__ = "avancement_dossiers"
+
+    id = Column(Integer, primary_key=True, index=True)
+    cabinet_id = Column(Integer, ForeignKey("cabinets.id"), nullable=False)
+    dossier_id = Column(Integer, ForeignKey("dossiers.id", ondelete="CASCADE"), nullable=False)
+
+    # Période
+    date_limite = Column(Date, nullable=False)
+    annee = Column(Integer, nullable=False)
+    mois = Column(Integer, nullable=False)  # 1-12
+
+    # Compteurs
+    total_echeances = Column(Integer, nullable=False, default=0)
+    echeances_completes = Column(Integer, nullable=False, default=0)
+    total_saisies = Column(Integer, nullable=False, default=0)
+    saisies_completes = Column(Integer, nullable=False, default=0)
+    total_declarations = Column(Integer, nullable=False, default=0)
+    declarations_completes = Column(Integer, nullable=False, default=0)
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        UniqueConstraint('dossier_id', 'date_limite', name='uq_avancement_dossier_date'),
+        Index('ix_avancement_cabinet_date', 'cabinet_id', 'date_limite'),
+    )
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+
+
+class Blob(Base):
+    """
+    Contenu stocké dans le blob store (app.core.blob_store), clé SHA-256
+
+    ref_count compte les documents dont hash_fichier désigne ce contenu ; il
+    est maintenu par app.services.blob_references à chaque commit. orphaned_at
+    date le passage à zéro référence (le GC attend un délai de grâce).
+    """
+    __tablename__ = "blobs"
+
+    sha256 = Column(String(64), primary_key=True)
+    taille = Column(Integer)
+    mime_type = Column(String)
+    ref_count = Column(Integer, nullable=False, default=0)
+    orphaned_at = Column(DateTime(timezone=True), nullable=True, index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, UniqueConstraint
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -34,7 +34,10 @@ class Client(Base):
     # Relations
     cabinet = relationship("Cabinet", back_populates="clients")
     
-    # Contrainte unique pour numero_client par cabinet
+    # Contrainte unique pour numero_client par cabinet ; résolution du client
+    # par son nom à la création d'un dossier. Les index trigrammes de
+    # l'autocomplétion (PostgreSQL) sont créés par la migration c81d4e6a0f27
     __table_args__ = (
         UniqueConstraint('cabinet_id', 'numero_client', name='uq_client_cabinet_numero'),
+        Index('ix_clients_cabinet_nom', 'cabinet_id', 'nom'),
     )
\ No newline at end of file
@@ -45,7 +45,7 @@ class DeclarationFiscale(Base):
     cabinet_id = Column(Integer, ForeignKey("cabinets.id"), nullable=False)
     
     # Relation avec le dossier
-    dossier_id = Column(Integer, ForeignKey("dossiers.id"), nullable=False)
+    dossier_id = Column(Integer, ForeignKey("dossiers.id"), nullable=False, index=True)
     
     # Informations sur la déclaration
     type_declaration = Column(String(50), nullable=False)
@@ -73,7 +73,7 @@ class DeclarationFiscale(Base):
     observations = Column(Text, nullable=True)                # Observations particulières
     
     # Gestion des rectifications
-    declaration_origine_id = Column(Integer, ForeignKey("declarations_fiscales.id"), nullable=True)
+    declaration_origine_id = Column(Integer, ForeignKey("declarations_fiscales.id"), nullable=True, index=True)
     est_rectificative = Column(Boolean, default=False)
     
     # Métadonnées
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Enum
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Enum, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -19,6 +19,15 @@ class TypeDocument(str, enum.Enum):
     AUTRE = "AUTRE"
 
 
+class StatutTraitement(str, enum.Enum):
+    """Avancement du traitement asynchrone (app.tasks.documents)"""
+    EN_ATTENTE = "EN_ATTENTE"
+    EN_COURS = "EN_COURS"
+    TRAITE = "TRAITE"
+    REJETE = "REJETE"  # Contenu refusé par la validation approfondie
+    ERREUR = "ERREUR"  # Échec après épuisement des relances
+
+
 class Document(Base):
     __tablename__ = "documents"
 
@@ -33,9 +42,20 @@ class Document(Base):
     mime_type = Column(String)  # Type MIME vérifié
     hash_fichier = Column(String)  # Hash SHA256 pour l'intégrité
     
+    # Traitement asynchrone après l'upload
+    statut_traitement = Column(
+        Enum(StatutTraitement), nullable=False,
+        default=StatutTraitement.EN_ATTENTE, server_default=StatutTraitement.EN_ATTENTE.value
+    )
+    erreur_traitement = Column(String)  # Motif du rejet ou de l'échec
+    cle_apercu = Column(String)  # Clé de stockage de la miniature (première page)
+    texte_extrait = Column(Text)
+    traite_at = Column(DateTime(timezone=True))
+    traitement_lance_at = Column(DateTime(timezone=True))  # Dernier envoi de la chaîne au broker
+    
     # Relations
-    dossier_id = Column(Integer, ForeignKey("dossiers.id"), nullable=False)
-    echeance_id = Column(Integer, ForeignKey("echeances.id"), nullable=True)
+    dossier_id = Column(Integer, ForeignKey("dossiers.id"), nullable=False, index=True)
+    echeance_id = Column(Integer, ForeignKey("echeances.id"), nullable=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)  # Qui a uploadé
     
     # Informations temporelles
@@ -48,4 +68,9 @@ class Document(Base):
     cabinet = relationship("Cabinet", backref="documents")
     dossier = relationship("Dossier", backref="documents")
     echeance = relationship("Echeance", backref="documents")
-    user = relationship("User", backref="documents_uploaded")
\ No newline at end of file
+    user = relationship("User", backref="documents_uploaded")
+
+    # Reprise des documents dont le traitement n'a pas été lancé
+    __table_args__ = (
+        Index('ix_documents_statut_traitement_created', 'statut_traitement', 'created_at'),
+    )
\ No newline at end of file
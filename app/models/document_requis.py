@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, Enum, Index
 from sqlalchemy.orm import relationship
 import enum
 
@@ -22,4 +22,9 @@ class DocumentRequis(Base):
     # Relations
     cabinet = relationship("Cabinet", backref="documents_requis")
     dossier = relationship("Dossier", backref="documents_requis")
-    echeance = relationship("Echeance", backref="documents_requis")
\ No newline at end of file
+    echeance = relationship("Echeance", backref="documents_requis")
+
+    # Recherche d'un document requis par échéance, type et période
+    __table_args__ = (
+        Index('ix_documents_requis_echeance_type_periode', 'echeance_id', 'type_document', 'mois', 'annee'),
+    )
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Date, DateTime, ForeignKey, Text, Enum, Table, JSON, UniqueConstraint
+from sqlalchemy import Column, Integer, String, Date, DateTime, ForeignKey, Text, Enum, Table, JSON, UniqueConstraint, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -69,6 +69,9 @@ class Dossier(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     completed_at = Column(DateTime(timezone=True))
+    # Dossier archivé : ses saisies et documents requis sont dans le tier
+    # d'archive (app.services.archival)
+    archived_at = Column(DateTime(timezone=True), nullable=True)
     
     # Relations
     cabinet = relationship("Cabinet", back_populates="dossiers")
@@ -81,9 +84,22 @@ class Dossier(Base):
     echeances = relationship("Echeance", back_populates="dossier", cascade="all, delete-orphan")
     # declarations_fiscales = relationship("DeclarationFiscale", back_populates="dossier", cascade="all, delete-orphan")
     
-    # Contrainte unique pour reference par cabinet
+    # Contrainte unique pour reference par cabinet ; index des filtres du
+    # tableau de bord et des relances (cabinet, statut, échéance), le partiel
+    # ne couvre que les dossiers actifs ; liste paginée des dossiers non archivés
     __table_args__ = (
         UniqueConstraint('cabinet_id', 'reference', name='uq_dossier_cabinet_reference'),
+        Index('ix_dossiers_cabinet_statut_echeance', 'cabinet_id', 'statut', 'date_echeance'),
+        Index(
+            'ix_dossiers_actifs_cabinet_echeance', 'cabinet_id', 'date_echeance',
+            postgresql_where=text("statut != 'COMPLETE' AND statut != 'ARCHIVE'"),
+            sqlite_where=text("statut != 'COMPLETE' AND statut != 'ARCHIVE'"),
+        ),
+        Index(
+            'ix_dossiers_vivants_cabinet_id', 'cabinet_id', 'id',
+            postgresql_where=text("archived_at IS NULL"),
+            sqlite_where=text("archived_at IS NULL"),
+        ),
     )
     
     @property
@@ -135,20 +151,36 @@ class Dossier(Base):
         #             has_overdue = True
         #             break
         
+        prochaine = self.prochaine_echeance
+        return self.calculer_priorite(
+            self.statut,
+            has_overdue,
+            prochaine.date_echeance if prochaine else None,
+            self.date_echeance
+        )
+    
+    @staticmethod
+    def calculer_priorite(statut, has_overdue: bool, prochaine_date, date_echeance) -> PrioriteDossier:
+        """
+        Règle de priorité à partir de valeurs déjà calculées (échéance en retard,
+        date de la prochaine échéance), utilisable sans charger les échéances
+        """
+        if statut == StatusDossier.COMPLETE:
+            return PrioriteDossier.NORMALE
+        
         # Si des tâches sont en retard, priorité URGENTE
         if has_overdue:
             return PrioriteDossier.URGENTE
         
         # Sinon, utiliser la prochaine échéance pour calculer la priorité
-        prochaine = self.prochaine_echeance
-        if prochaine:
-            date_reference = prochaine.date_echeance
-        elif self.date_echeance:
-            date_reference = self.date_echeance
+        if prochaine_date:
+            date_reference = prochaine_date
+        elif date_echeance:
+            date_reference = date_echeance
         else:
             return PrioriteDossier.NORMALE
             
-        jours_restants = (date_reference - today).days
+        jours_restants = (date_reference - date.today()).days
         
         if jours_restants < 0:  # En retard
             return PrioriteDossier.URGENTE
@@ -170,14 +202,19 @@ class Dossier(Base):
         """Vérifie si le dossier peut passer automatiquement en cours"""
         return self.statut == StatusDossier.NOUVEAU
     
-    def peut_passer_en_attente(self) -> bool:
-        """Vérifie si le dossier peut passer en attente (pas d'activité depuis 7 jours)"""
+    def peut_passer_en_attente(self, derniere_activite=None) -> bool:
+        """
+        Vérifie si le dossier peut passer en attente (pas d'activité depuis 7 jours)
+        
+        derniere_activite peut être fournie (déjà agrégée en SQL) pour éviter de
+        charger l'historique
+        """
         if self.statut != StatusDossier.EN_COURS:
             return False
         from datetime import datetime, timedelta, timezone
         seuil = datetime.now(timezone.utc) - timedelta(days=7)
         # S'assurer que derniere_activite est timezone-aware
-        derniere = self.derniere_activite
+        derniere = derniere_activite or self.derniere_activite
         if derniere.tzinfo is None:
             derniere = derniere.replace(tzinfo=timezone.utc)
         return derniere < seuil
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Date, DateTime, ForeignKey, Boolean, Text
+from sqlalchemy import Column, Integer, String, Date, DateTime, ForeignKey, Boolean, Text, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -36,4 +36,16 @@ class Echeance(Base):
     
     # Relations
     cabinet = relationship("Cabinet", backref="echeances")
-    dossier = relationship("Dossier", back_populates="echeances")
\ No newline at end of file
+    dossier = relationship("Dossier", back_populates="echeances")
+
+    # Échéances d'un dossier par statut, échéances à venir / en retard par date ;
+    # le partiel ne couvre que les échéances non complétées
+    __table_args__ = (
+        Index('ix_echeances_dossier_statut', 'dossier_id', 'statut'),
+        Index('ix_echeances_date_statut', 'date_echeance', 'statut'),
+        Index(
+            'ix_echeances_a_faire_date', 'date_echeance', 'dossier_id',
+            postgresql_where=text("statut != 'COMPLETE'"),
+            sqlite_where=text("statut != 'COMPLETE'"),
+        ),
+    )
\ No newline at end of file
@@ -10,7 +10,7 @@ class HistoriqueDossier(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     cabinet_id = Column(Integer, ForeignKey("cabinets.id"), nullable=False)
-    dossier_id = Column(Integer, ForeignKey("dossiers.id"))
+    dossier_id = Column(Integer, ForeignKey("dossiers.id"), index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
     action = Column(String, nullable=False)  # creation, status_change, document_added, etc.
     old_value = Column(Text)
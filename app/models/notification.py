@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, Text
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, Text, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -11,7 +11,7 @@ class Notification(Base):
     id = Column(Integer, primary_key=True, index=True)
     cabinet_id = Column(Integer, ForeignKey("cabinets.id"), nullable=False)
     user_id = Column(Integer, ForeignKey("users.id"))
-    alerte_id = Column(Integer, ForeignKey("alertes.id"), nullable=True)
+    alerte_id = Column(Integer, ForeignKey("alertes.id"), nullable=True, index=True)
     title = Column(String, nullable=False)
     message = Column(Text, nullable=False)
     type_notification = Column(String)  # email, in_app, sms
@@ -22,4 +22,9 @@ class Notification(Base):
     # Relations
     cabinet = relationship("Cabinet", backref="notifications")
     user = relationship("User")
-    alerte = relationship("Alerte", backref="notifications")
\ No newline at end of file
+    alerte = relationship("Alerte", backref="notifications")
+
+    # Notifications (non lues) d'un utilisateur, les plus récentes d'abord
+    __table_args__ = (
+        Index('ix_notifications_user_is_read_sent_at', 'user_id', 'is_read', 'sent_at'),
+    )
\ No newline at end of file
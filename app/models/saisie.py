@@ -13,7 +13,7 @@ class SaisieComptable(Base):
     
     # Relations
     dossier_id = Column(Integer, ForeignKey("dossiers.id"), nullable=False)
-    echeance_id = Column(Integer, ForeignKey("echeances.id"), nullable=False)
+    echeance_id = Column(Integer, ForeignKey("echeances.id"), nullable=False, index=True)
     
     # Type de journal
     type_journal = Column(String, nullable=False)  # BANQUE, CAISSE, OD, ACHATS, VENTES, PAIE
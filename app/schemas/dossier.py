@@ -1,5 +1,5 @@
 from typing import Optional, List
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import date, datetime
 from app.models.dossier import StatusDossier, TypeDossier, PrioriteDossier
 from app.schemas.echeance import Echeance
@@ -53,6 +53,10 @@ class DossierStatusUpdate(BaseModel):
     commentaire: Optional[str] = None
 
 
+class DossierBatchDelete(BaseModel):
+    ids: List[int] = Field(..., min_length=1, max_length=500)
+
+
 class Dossier(DossierBase):
     id: int
     reference: str
@@ -61,6 +65,7 @@ class Dossier(DossierBase):
     created_at: datetime
     updated_at: Optional[datetime] = None
     completed_at: Optional[datetime] = None
+    archived_at: Optional[datetime] = None
     notes: Optional[str] = None
     
     class Config:
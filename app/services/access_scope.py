@@ -0,0 +1,139 @@
+"""
+Service de périmètre d'accès des collaborateurs
+
+Un collaborateur ne voit que les dossiers des clients qui lui sont assignés.
+Le périmètre (IDs et noms des clients assignés) est calculé une fois puis mis
+en cache à deux niveaux : un LRU en mémoire du processus (TTL court) devant
+Redis. Il doit être invalidé dès qu'une assignation de client change
+(voir invalidate_access_scope) ; l'invalidation est diffusée à tous les
+processus.
+"""
+import logging
+from typing import FrozenSet, Iterable, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import false
+from sqlalchemy.orm import Session
+
+from app.core import database
+from app.core.cache import cache_manager, invalidate_local, local_cache
+from app.models.client import Client
+from app.models.dossier import Dossier
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+CACHE_PREFIX = "access_scope:user"
+REDIS_TTL = 3600  # 1 heure, invalidation explicite à chaque changement d'assignation
+LOCAL_TTL = 30  # Borne la staleness entre workers si la diffusion échoue
+LOCAL_MAX_ENTRIES = 1024
+
+
+class AccessScope:
+    """Périmètre d'accès d'un utilisateur aux dossiers"""
+
+    def __init__(
+        self,
+        user_id: int,
+        restricted: bool,
+        client_ids: Iterable[int] = (),
+        client_names: Iterable[str] = ()
+    ):
+        self.user_id = user_id
+        self.restricted = restricted
+        self.client_ids: FrozenSet[int] = frozenset(client_ids)
+        self.client_names: FrozenSet[str] = frozenset(client_names)
+
+    def can_access(self, dossier: Dossier) -> bool:
+        """Test d'appartenance en O(1)"""
+        return not self.restricted or dossier.nom_client in self.client_names
+
+    def check(self, dossier: Dossier, detail: str = "Accès refusé") -> None:
+        """Lève une 403 si le dossier est hors du périmètre"""
+        if not self.can_access(dossier):
+            raise HTTPException(status_code=403, detail=detail)
+
+    def filter_dossiers(self, query, model=Dossier):
+        """Pousse le périmètre dans la requête SQL (filtre IN sur nom_client)"""
+        if not self.restricted:
+            return query
+        if not self.client_names:
+            return query.filter(false())
+        return query.filter(model.nom_client.in_(sorted(self.client_names)))
+
+    def to_dict(self) -> dict:
+        return {
+            "client_ids": sorted(self.client_ids),
+            "client_names": sorted(self.client_names)
+        }
+
+
+local_scope_cache = local_cache(CACHE_PREFIX, max_entries=LOCAL_MAX_ENTRIES, ttl=LOCAL_TTL)
+
+
+def _cache_key(user_id: int) -> str:
+    return f"{CACHE_PREFIX}:{user_id}"
+
+
+def _load_scope(db: Session, user_id: int) -> AccessScope:
+    """Charge le périmètre depuis la base (deux colonnes seulement)"""
+    rows = db.query(Client.id, Client.nom).filter(Client.user_id == user_id).all()
+    return AccessScope(
+        user_id=user_id,
+        restricted=True,
+        client_ids=[row.id for row in rows],
+        client_names=[row.nom for row in rows]
+    )
+
+
+def _load_scope_from_primary(db: Session, user_id: int) -> AccessScope:
+    """
+    Charge le périmètre à mettre en cache. Une réplique en retard remettrait en
+    cache une assignation déjà invalidée : sur une session de lecture, on
+    relit depuis le primaire.
+    """
+    if not database.is_replica_session(db):
+        return _load_scope(db, user_id)
+    with database.SessionLocal() as primary:
+        return _load_scope(primary, user_id)
+
+
+def get_access_scope(db: Session, user: User) -> AccessScope:
+    """
+    Retourne le périmètre d'accès de l'utilisateur
+
+    Les managers et admins ne sont pas restreints. Pour les collaborateurs :
+    LRU local, puis Redis, puis base de données.
+    """
+    if user.role != "collaborateur":
+        return AccessScope(user_id=user.id, restricted=False)
+
+    scope = local_scope_cache.get(user.id)
+    if scope is not None:
+        return scope
+
+    cached = cache_manager.get(_cache_key(user.id))
+    if isinstance(cached, dict):
+        scope = AccessScope(
+            user_id=user.id,
+            restricted=True,
+            client_ids=cached.get("client_ids", []),
+            client_names=cached.get("client_names", [])
+        )
+    else:
+        scope = _load_scope_from_primary(db, user.id)
+        cache_manager.set(_cache_key(user.id), scope.to_dict(), REDIS_TTL)
+
+    local_scope_cache.set(user.id, scope)
+    return scope
+
+
+def invalidate_access_scope(*user_ids: Optional[int]) -> None:
+    """Invalide le périmètre des utilisateurs dont les assignations ont changé"""
+    user_ids = {uid for uid in user_ids if uid is not None}
+    if not user_ids:
+        return
+    for user_id in user_ids:
+        cache_manager.delete(_cache_key(user_id))
+    invalidate_local(CACHE_PREFIX, *user_ids)
+    logger.debug(f"Périmètre d'accès invalidé pour les utilisateurs {sorted(user_ids)}")
@@ -0,0 +1,227 @@
+"""
+Service d'archivage des dossiers clos
+
+Un dossier COMPLETE (ou ARCHIVE) dont le dernier exercice est clos depuis
+ARCHIVE_AFTER_YEARS an(s) est archivé : ses lignes par période (saisies
+comptables, documents requis) sont déplacées dans les tables d'archive
+(app.models.archive), partitionnées par année sous PostgreSQL, et le dossier
+est marqué archived_at. Les tables vives ne contiennent plus que les dossiers
+en cours : les requêtes courantes (tableau de bord, relances, listes) ne
+parcourent ni les lignes ni les entrées d'index des exercices clos.
+
+L'archivage est réversible (restore_dossiers) et le déplacement se fait en
+requêtes ensemblistes INSERT ... SELECT / DELETE, avec les mêmes IDs.
+
+Lecture : un dossier archivé reste consultable ; ses saisies et documents
+requis sont lus dans le tier d'archive (saisie_model, document_requis_model).
+Les listes de dossiers ne l'incluent que sur demande (include_archives).
+Écriture : un dossier archivé est en lecture seule, il faut le restaurer
+pour modifier ses saisies ou documents requis (archived_dossier).
+"""
+import logging
+from datetime import date, datetime, timezone
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import Table, delete, distinct, func, insert, inspect, select, text, union, update
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+
+from app.models.archive import DocumentRequisArchive, SaisieComptableArchive
+from app.models.document_requis import DocumentRequis
+from app.models.dossier import Dossier, StatusDossier
+from app.models.echeance import Echeance
+from app.models.saisie import SaisieComptable
+
+logger = logging.getLogger(__name__)
+
+# Exercices clos depuis au moins ce nombre d'années (déclarations de
+# l'exercice déposées l'année suivante)
+ARCHIVE_AFTER_YEARS = 1
+ARCHIVE_BATCH_SIZE = 200
+STATUTS_CLOS = (StatusDossier.COMPLETE, StatusDossier.ARCHIVE)
+
+# Modèle vif -> modèle d'archive
+ARCHIVE_MODELS = {
+    SaisieComptable: SaisieComptableArchive,
+    DocumentRequis: DocumentRequisArchive,
+}
+# (table vive, table d'archive)
+TIERS = [(live.__table__, archive.__table__) for live, archive in ARCHIVE_MODELS.items()]
+
+
+def saisie_model(dossier: Dossier):
+    """Table des saisies du dossier (vive ou archive)"""
+    return SaisieComptableArchive if dossier.archived_at else SaisieComptable
+
+
+def document_requis_model(dossier: Dossier):
+    """Table des documents requis du dossier (vive ou archive)"""
+    return DocumentRequisArchive if dossier.archived_at else DocumentRequis
+
+
+def archived_dossier(db: Session, model, row_id: int) -> Optional[Dossier]:
+    """Dossier archivé de la ligne row_id du modèle vif model, déplacée dans le tier d'archive"""
+    archive = ARCHIVE_MODELS[model]
+    return db.execute(
+        select(Dossier).join(archive, archive.dossier_id == Dossier.id).where(archive.id == row_id)
+    ).scalars().first()
+
+
+def _is_postgresql(db: Session) -> bool:
+    return db.get_bind().dialect.name == "postgresql"
+
+
+def _colonnes(source: Table, destination: Table) -> List[str]:
+    return [column.name for column in destination.columns if column.name in source.c]
+
+
+def _deplacer(db: Session, source: Table, destination: Table, dossier_ids: List[int]) -> int:
+    """Copie les lignes des dossiers dans destination puis les supprime de source"""
+    colonnes = _colonnes(source, destination)
+    db.execute(
+        insert(destination).from_select(
+            colonnes,
+            select(*(source.c[nom] for nom in colonnes)).where(source.c.dossier_id.in_(dossier_ids))
+        )
+    )
+    result = db.execute(
+        delete(source).where(source.c.dossier_id.in_(dossier_ids)),
+        execution_options={"synchronize_session": False}
+    )
+    return result.rowcount
+
+
+def ensure_archive_partitions(db: Session, annees: Iterable[int]) -> None:
+    """
+    Crée les partitions annuelles manquantes des tables d'archive
+    (PostgreSQL). En cas d'échec, les lignes vont dans la partition par défaut.
+    """
+    if not _is_postgresql(db):
+        return
+    for _, archive in TIERS:
+        for annee in sorted({int(annee) for annee in annees}):
+            savepoint = db.begin_nested()
+            try:
+                db.execute(text(
+                    f"CREATE TABLE IF NOT EXISTS {archive.name}_{annee} PARTITION OF {archive.name} "
+                    f"FOR VALUES FROM ({annee}) TO ({annee + 1})"
+                ))
+                savepoint.commit()
+            except DBAPIError as e:
+                savepoint.rollback()
+                logger.warning(f"Partition {archive.name}_{annee} non créée (partition par défaut) : {e}")
+
+
+def _annees(db: Session, dossier_ids: List[int]) -> List[int]:
+    requetes = [
+        select(distinct(live.c.annee)).where(live.c.dossier_id.in_(dossier_ids)) for live, _ in TIERS
+    ]
+    return list(db.execute(union(*requetes)).scalars())
+
+
+def _synchroniser(db: Session, dossier_ids: List[int]) -> None:
+    """Les dossiers déjà chargés dans la session seront relus"""
+    ids = set(dossier_ids)
+    for obj in list(db.identity_map.values()):
+        # Identité lue sans recharger l'objet (il peut être expiré)
+        if isinstance(obj, Dossier) and inspect(obj).identity[0] in ids:
+            db.expire(obj)
+
+
+def archive_dossiers(db: Session, cabinet_id: int, dossier_ids: Iterable[int]) -> dict:
+    """
+    Archive les dossiers clos du cabinet (sans commit). Les dossiers non
+    clos, déjà archivés ou d'un autre cabinet sont ignorés.
+    """
+    ids = db.execute(
+        select(Dossier.id).where(
+            Dossier.cabinet_id == cabinet_id,
+            Dossier.id.in_(sorted(set(dossier_ids))),
+            Dossier.archived_at.is_(None),
+            Dossier.statut.in_(STATUTS_CLOS)
+        )
+    ).scalars().all()
+    if not ids:
+        return {"archived": [], "rows": {}}
+
+    ensure_archive_partitions(db, _annees(db, ids))
+    counts = {live.name: _deplacer(db, live, archive, ids) for live, archive in TIERS}
+    db.execute(
+        update(Dossier)
+        .where(Dossier.id.in_(ids))
+        .values(statut=StatusDossier.ARCHIVE, archived_at=datetime.now(timezone.utc)),
+        execution_options={"synchronize_session": False}
+    )
+    _synchroniser(db, ids)
+
+    logger.info(f"{len(ids)} dossier(s) archivé(s) pour le cabinet {cabinet_id} ({sum(counts.values())} ligne(s))")
+    return {"archived": ids, "rows": counts}
+
+
+def restore_dossiers(db: Session, cabinet_id: int, dossier_ids: Iterable[int]) -> dict:
+    """
+    Ramène les dossiers archivés du cabinet dans les tables vives (sans
+    commit). Ils repassent COMPLETE : les rouvrir les exclut de l'archivage
+    automatique.
+    """
+    ids = db.execute(
+        select(Dossier.id).where(
+            Dossier.cabinet_id == cabinet_id,
+            Dossier.id.in_(sorted(set(dossier_ids))),
+            Dossier.archived_at.is_not(None)
+        )
+    ).scalars().all()
+    if not ids:
+        return {"restored": [], "rows": {}}
+
+    counts = {live.name: _deplacer(db, archive, live, ids) for live, archive in TIERS}
+    db.execute(
+        update(Dossier)
+        .where(Dossier.id.in_(ids))
+        .values(statut=StatusDossier.COMPLETE, archived_at=None),
+        execution_options={"synchronize_session": False}
+    )
+    _synchroniser(db, ids)
+
+    logger.info(f"{len(ids)} dossier(s) restauré(s) pour le cabinet {cabinet_id} ({sum(counts.values())} ligne(s))")
+    return {"restored": ids, "rows": counts}
+
+
+def archivable_dossiers(annee_limite: Optional[int] = None, limit: int = ARCHIVE_BATCH_SIZE):
+    """Dossiers clos, non archivés, dont la dernière échéance est antérieure à annee_limite"""
+    if annee_limite is None:
+        annee_limite = date.today().year - ARCHIVE_AFTER_YEARS
+    derniere_annee = (
+        select(func.max(Echeance.annee)).where(Echeance.dossier_id == Dossier.id).scalar_subquery()
+    )
+    return (
+        select(Dossier.id, Dossier.cabinet_id)
+        .where(
+            Dossier.archived_at.is_(None),
+            Dossier.statut.in_(STATUTS_CLOS),
+            derniere_annee < annee_limite
+        )
+        .order_by(Dossier.id)
+        .limit(limit)
+    )
+
+
+def archive_closed_dossiers(db: Session, annee_limite: Optional[int] = None) -> dict:
+    """Archive tous les dossiers éligibles, un commit par lot"""
+    archives = 0
+    while True:
+        par_cabinet: Dict[int, List[int]] = {}
+        for dossier_id, cabinet_id in db.execute(archivable_dossiers(annee_limite)).all():
+            par_cabinet.setdefault(cabinet_id, []).append(dossier_id)
+        if not par_cabinet:
+            break
+        lot = sum(
+            len(archive_dossiers(db, cabinet_id, ids)["archived"]) for cabinet_id, ids in par_cabinet.items()
+        )
+        db.commit()
+        if not lot:
+            break
+        archives += lot
+
+    logger.info(f"Archivage des exercices clos : {archives} dossier(s)")
+    return {"archived": archives}
@@ -0,0 +1,173 @@
+"""
+Service d'autocomplétion des clients et des références de dossiers
+
+Sous PostgreSQL, la saisie est comparée sans accents ni casse
+(f_unaccent(lower(...)), voir la migration c81d4e6a0f27) :
+  - sous-chaîne (LIKE '%...%'), les débuts de nom d'abord
+  - ou proche d'un mot du nom (word_similarity, opérateur <%) pour les
+    fautes de frappe
+Les deux conditions utilisent l'index GIN trigrammes de la colonne.
+
+Chaque cabinet a un petit cache de préfixes dans le processus : les mêmes
+premières lettres sont tapées par tous les collaborateurs, et les préfixes
+de moins de trois caractères (sans trigramme exploitable) ne parcourent la
+table qu'une fois. Toute écriture d'un client ou d'une référence de dossier
+vide le cache du cabinet à la validation de la transaction, dans tous les
+processus ; le TTL borne la durée d'incohérence si la diffusion échoue.
+
+Les autres bases (SQLite des tests) comparent en minuscules, accents compris.
+"""
+import logging
+import unicodedata
+from itertools import chain
+from typing import List, Optional
+
+from sqlalchemy import case, event, false, func, inspect, literal, or_, select
+from sqlalchemy.orm import Session
+
+from app.core.cache import LocalCache, invalidate_local, local_cache
+from app.models.client import Client
+from app.models.dossier import Dossier
+from app.services.access_scope import AccessScope
+from app.services.search import escape_like
+
+logger = logging.getLogger(__name__)
+
+CACHE_PREFIX = "autocomplete:cabinet"
+LOCAL_TTL = 60
+LOCAL_MAX_CABINETS = 256
+PREFIXES_PER_CABINET = 512
+# Résultats conservés par préfixe : toute limite jusqu'à MAX_LIMIT est servie par le cache
+MAX_LIMIT = 20
+SESSION_INFO_KEY = "autocomplete_invalidations"
+
+# Colonnes affichées ou comparées : leur modification invalide le cache
+WATCHED_COLUMNS = {
+    Client: ("nom", "numero_client", "is_active", "user_id", "cabinet_id"),
+    Dossier: ("reference", "nom_client", "type_dossier", "cabinet_id"),
+}
+
+local_prefix_caches = local_cache(CACHE_PREFIX, max_entries=LOCAL_MAX_CABINETS, ttl=LOCAL_TTL)
+
+
+def normalize(q: str) -> str:
+    """Minuscules, sans accents ni espaces superflus (comme f_unaccent(lower(...)))"""
+    decomposed = unicodedata.normalize("NFKD", q.lower())
+    return " ".join("".join(c for c in decomposed if not unicodedata.combining(c)).split())
+
+
+def _prefix_cache(cabinet_id: int) -> LocalCache:
+    """Cache des préfixes du cabinet, créé à la première saisie"""
+    return local_prefix_caches.get_or_load(
+        cabinet_id, lambda: LocalCache(f"{CACHE_PREFIX}:{cabinet_id}", max_entries=PREFIXES_PER_CABINET)
+    )
+
+
+def _is_postgresql(db: Session) -> bool:
+    return db.get_bind().dialect.name == "postgresql"
+
+
+def _match(column, q: str, postgresql: bool):
+    """Condition et ordre de pertinence de la saisie q (normalisée) sur column"""
+    motif = f"%{escape_like(q)}%"
+    if postgresql:
+        valeur = func.f_unaccent(func.lower(column))
+        condition = or_(valeur.like(motif, escape="\\"), literal(q).op("<%")(valeur))
+        debut = valeur.like(f"{escape_like(q)}%", escape="\\")
+        return condition, [case((debut, 0), else_=1), func.word_similarity(q, valeur).desc(), column]
+    valeur = func.lower(column)
+    debut = valeur.like(f"{escape_like(q)}%", escape="\\")
+    return valeur.like(motif, escape="\\"), [case((debut, 0), else_=1), column]
+
+
+def _load_clients(db: Session, cabinet_id: int, scope: AccessScope, q: str) -> List[dict]:
+    condition, ordre = _match(Client.nom, q, _is_postgresql(db))
+    stmt = select(Client.id, Client.nom, Client.numero_client).where(
+        Client.cabinet_id == cabinet_id, Client.is_active == True, condition  # noqa: E712
+    )
+    if scope.restricted:
+        stmt = stmt.where(Client.id.in_(sorted(scope.client_ids)) if scope.client_ids else false())
+    rows = db.execute(stmt.order_by(*ordre).limit(MAX_LIMIT)).all()
+    return [{"id": row.id, "nom": row.nom, "numero_client": row.numero_client} for row in rows]
+
+
+def _load_dossiers(db: Session, cabinet_id: int, scope: AccessScope, q: str) -> List[dict]:
+    condition, ordre = _match(Dossier.reference, q, _is_postgresql(db))
+    stmt = select(Dossier.id, Dossier.reference, Dossier.nom_client, Dossier.type_dossier).where(
+        Dossier.cabinet_id == cabinet_id, condition
+    )
+    stmt = scope.filter_dossiers(stmt, Dossier)
+    rows = db.execute(stmt.order_by(*ordre).limit(MAX_LIMIT)).all()
+    return [
+        {
+            "id": row.id,
+            "reference": row.reference,
+            "nom_client": row.nom_client,
+            "type_dossier": row.type_dossier.value,
+        }
+        for row in rows
+    ]
+
+
+LOADERS = {"clients": _load_clients, "dossiers": _load_dossiers}
+
+
+def autocomplete(
+    db: Session,
+    cabinet_id: int,
+    scope: AccessScope,
+    q: str,
+    kind: str = "clients",
+    limit: int = 10
+) -> List[dict]:
+    """Suggestions pour la saisie q (kind : "clients" ou "dossiers"), les plus proches d'abord"""
+    q = normalize(q)
+    if not q:
+        return []
+    # Les collaborateurs ont leurs propres entrées (périmètre restreint)
+    key = (kind, scope.user_id if scope.restricted else None, q)
+    suggestions = _prefix_cache(cabinet_id).get_or_load(
+        key, lambda: LOADERS[kind](db, cabinet_id, scope, q)
+    )
+    return suggestions[:min(limit, MAX_LIMIT)]
+
+
+def invalidate_autocomplete(*cabinet_ids: Optional[int]) -> None:
+    """Vide le cache des préfixes des cabinets modifiés"""
+    cabinet_ids = {cid for cid in cabinet_ids if cid is not None}
+    if not cabinet_ids:
+        return
+    invalidate_local(CACHE_PREFIX, *cabinet_ids)
+    logger.debug(f"Autocomplétion invalidée pour les cabinets {sorted(cabinet_ids)}")
+
+
+def _modifie(obj) -> bool:
+    state = inspect(obj)
+    return any(state.attrs[key].history.has_changes() for key in WATCHED_COLUMNS[type(obj)])
+
+
+@event.listens_for(Session, "after_flush")
+def _collecter_cabinets_modifies(session: Session, flush_context) -> None:
+    """Collecte les cabinets dont un client ou une référence de dossier a changé"""
+    cabinet_ids = session.info.setdefault(SESSION_INFO_KEY, set())
+    for obj in chain(session.new, session.deleted):
+        if type(obj) in WATCHED_COLUMNS:
+            cabinet_ids.add(obj.cabinet_id)
+    for obj in session.dirty:
+        if type(obj) in WATCHED_COLUMNS and _modifie(obj):
+            cabinet_ids.update(inspect(obj).attrs.cabinet_id.history.deleted or ())
+            cabinet_ids.add(obj.cabinet_id)
+    if not cabinet_ids:
+        session.info.pop(SESSION_INFO_KEY, None)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalider_apres_commit(session: Session) -> None:
+    cabinet_ids = session.info.pop(SESSION_INFO_KEY, None)
+    if cabinet_ids:
+        invalidate_autocomplete(*cabinet_ids)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _oublier_apres_rollback(session: Session, previous_transaction) -> None:
+    session.info.pop(SESSION_INFO_KEY, None)
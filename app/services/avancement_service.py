@@ -0,0 +1,164 @@
+"""
+Service de maintenance de la table d'avancement matérialisée (avancement_dossiers)
+
+Chaque flush qui crée, modifie ou supprime une échéance, une saisie comptable
+ou une déclaration fiscale marque son dossier ; juste avant le commit, les lignes d'avancement
+des seuls dossiers marqués sont recalculées (DELETE puis INSERT ... SELECT
+groupé) dans la même transaction. Les insertions en masse hors ORM doivent
+marquer leurs dossiers avec mark_dossiers_for_refresh.
+
+rebuild_avancement recalcule toute la table par lots (voir
+scripts/rebuild_avancement.py).
+"""
+import logging
+from itertools import chain
+from typing import Iterable, Optional
+
+from sqlalchemy import case, delete, event, extract, func, insert, literal, select, union_all
+from sqlalchemy.orm import Session
+
+from app.models.archive import SaisieComptableArchive
+from app.models.avancement import AvancementDossier
+from app.models.declaration_fiscale import DeclarationFiscale
+from app.models.dossier import Dossier
+from app.models.echeance import Echeance
+from app.models.saisie import SaisieComptable
+
+logger = logging.getLogger(__name__)
+
+SESSION_INFO_KEY = "avancement_dossiers_a_rafraichir"
+STATUTS_DECLARATION_COMPLETE = ('TELEDECLAREE', 'VALIDEE')
+SUIVIS = (Echeance, SaisieComptable, DeclarationFiscale)
+
+
+def mark_dossiers_for_refresh(db: Session, dossier_ids: Iterable[int]) -> None:
+    """Marque des dossiers dont l'avancement sera recalculé au prochain commit"""
+    db.info.setdefault(SESSION_INFO_KEY, set()).update(dossier_ids)
+
+
+def refresh_avancement(db: Session, dossier_ids: Iterable[int]) -> None:
+    """Recalcule les lignes d'avancement des dossiers donnés (sans commit)"""
+    ids = sorted(set(dossier_ids))
+    if not ids:
+        return
+
+    # Verrouiller les dossiers (dans l'ordre) pour sérialiser les recalculs concurrents
+    db.execute(select(Dossier.id).where(Dossier.id.in_(ids)).order_by(Dossier.id).with_for_update())
+
+    db.execute(
+        delete(AvancementDossier).where(AvancementDossier.dossier_id.in_(ids)),
+        execution_options={"synchronize_session": False}
+    )
+
+    # Une ligne par échéance, saisie ou déclaration, puis regroupement par
+    # (dossier, date). Les saisies comptent à la date de leur échéance, qu'elles
+    # soient dans la table vive ou dans le tier d'archive.
+    saisies = [
+        select(
+            model.cabinet_id,
+            model.dossier_id,
+            Echeance.date_echeance,
+            literal(0),
+            literal(0),
+            literal(1),
+            case((model.est_complete == True, 1), else_=0),  # noqa: E712
+            literal(0),
+            literal(0)
+        ).join(Echeance, Echeance.id == model.echeance_id).where(model.dossier_id.in_(ids))
+        for model in (SaisieComptable, SaisieComptableArchive)
+    ]
+    lignes = union_all(
+        select(
+            Echeance.cabinet_id.label("cabinet_id"),
+            Echeance.dossier_id.label("dossier_id"),
+            Echeance.date_echeance.label("date_limite"),
+            literal(1).label("echeance"),
+            case((Echeance.statut == 'COMPLETE', 1), else_=0).label("echeance_complete"),
+            literal(0).label("saisie"),
+            literal(0).label("saisie_complete"),
+            literal(0).label("declaration"),
+            literal(0).label("declaration_complete")
+        ).where(Echeance.dossier_id.in_(ids)),
+        *saisies,
+        select(
+            DeclarationFiscale.cabinet_id,
+            DeclarationFiscale.dossier_id,
+            DeclarationFiscale.date_limite,
+            literal(0),
+            literal(0),
+            literal(0),
+            literal(0),
+            literal(1),
+            case((DeclarationFiscale.statut.in_(STATUTS_DECLARATION_COMPLETE), 1), else_=0)
+        ).where(DeclarationFiscale.dossier_id.in_(ids))
+    ).subquery("lignes")
+
+    agregats = select(
+        lignes.c.cabinet_id,
+        lignes.c.dossier_id,
+        lignes.c.date_limite,
+        extract('year', lignes.c.date_limite),
+        extract('month', lignes.c.date_limite),
+        func.sum(lignes.c.echeance),
+        func.sum(lignes.c.echeance_complete),
+        func.sum(lignes.c.saisie),
+        func.sum(lignes.c.saisie_complete),
+        func.sum(lignes.c.declaration),
+        func.sum(lignes.c.declaration_complete)
+    ).group_by(lignes.c.cabinet_id, lignes.c.dossier_id, lignes.c.date_limite)
+
+    db.execute(insert(AvancementDossier).from_select([
+        'cabinet_id', 'dossier_id', 'date_limite', 'annee', 'mois',
+        'total_echeances', 'echeances_completes', 'total_saisies', 'saisies_completes',
+        'total_declarations', 'declarations_completes'
+    ], agregats))
+
+
+def rebuild_avancement(db: Session, batch_size: int = 500, cabinet_id: Optional[int] = None) -> int:
+    """
+    Recalcule entièrement la table d'avancement, par lots de dossiers
+    (un commit par lot). Retourne le nombre de dossiers traités.
+    """
+    query = select(Dossier.id).order_by(Dossier.id).limit(batch_size)
+    if cabinet_id is not None:
+        query = query.where(Dossier.cabinet_id == cabinet_id)
+
+    traites = 0
+    dernier_id = 0
+    while True:
+        ids = db.execute(query.where(Dossier.id > dernier_id)).scalars().all()
+        if not ids:
+            break
+        refresh_avancement(db, ids)
+        db.commit()
+        traites += len(ids)
+        dernier_id = ids[-1]
+        logger.info(f"Avancement recalculé pour {traites} dossier(s) (jusqu'à l'ID {dernier_id})")
+
+    return traites
+
+
+@event.listens_for(Session, "after_flush")
+def _marquer_dossiers_modifies(session: Session, flush_context) -> None:
+    """Collecte les dossiers dont une échéance, une saisie ou une déclaration a changé"""
+    dossier_ids = {
+        obj.dossier_id
+        for obj in chain(session.new, session.dirty, session.deleted)
+        if isinstance(obj, SUIVIS) and obj.dossier_id is not None
+    }
+    if dossier_ids:
+        mark_dossiers_for_refresh(session, dossier_ids)
+
+
+@event.listens_for(Session, "before_commit")
+def _rafraichir_avant_commit(session: Session) -> None:
+    """Recalcule l'avancement des dossiers marqués dans la transaction en cours"""
+    session.flush()
+    dossier_ids = session.info.pop(SESSION_INFO_KEY, None)
+    if dossier_ids:
+        refresh_avancement(session, dossier_ids)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _oublier_apres_rollback(session: Session, previous_transaction) -> None:
+    session.info.pop(SESSION_INFO_KEY, None)
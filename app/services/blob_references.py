@@ -0,0 +1,166 @@
+"""
+Comptage des références aux blobs et ramasse-miettes du blob store
+
+Chaque flush qui crée, modifie ou supprime un document note la variation de
+références de son hash ; juste avant le commit, les compteurs de la table blobs
+sont mis à jour (un UPSERT ou un UPDATE par hash) dans la même transaction.
+Les suppressions en masse hors ORM doivent appeler
+record_reference_changes.
+
+collect_garbage supprime les blobs sans référence depuis plus de
+GC_GRACE_SECONDS, ainsi que les fichiers du store sans ligne blobs (lot
+d'upload refusé, upload interrompu).
+"""
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import case, delete, event, exists, inspect, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.core.blob_store import BlobStore, blob_store
+from app.models.blob import Blob
+from app.models.document import Document
+
+logger = logging.getLogger(__name__)
+
+SESSION_INFO_KEY = "blob_references"
+GC_GRACE_SECONDS = 3600
+GC_BATCH_SIZE = 500
+
+_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def record_reference_changes(
+    db: Session,
+    sha256: str,
+    delta: int,
+    taille: Optional[int] = None,
+    mime_type: Optional[str] = None
+) -> None:
+    """Note une variation de références, appliquée au prochain commit"""
+    changes = db.info.setdefault(SESSION_INFO_KEY, {})
+    change = changes.setdefault(sha256, {"delta": 0, "taille": None, "mime_type": None})
+    change["delta"] += delta
+    change["taille"] = change["taille"] or taille
+    change["mime_type"] = change["mime_type"] or mime_type
+
+
+def apply_reference_changes(db: Session, changes: Dict[str, dict]) -> None:
+    """Met à jour les compteurs des blobs (sans commit)"""
+    insert = _INSERTS[db.get_bind().dialect.name]
+    now = datetime.now(timezone.utc)
+
+    # Ordre stable des hash : pas d'interblocage entre transactions concurrentes
+    for sha256 in sorted(changes):
+        change = changes[sha256]
+        delta = change["delta"]
+        if delta > 0:
+            statement = insert(Blob).values(
+                sha256=sha256, taille=change["taille"], mime_type=change["mime_type"],
+                ref_count=delta, orphaned_at=None
+            )
+            db.execute(statement.on_conflict_do_update(
+                index_elements=[Blob.sha256],
+                set_={"ref_count": Blob.ref_count + statement.excluded.ref_count, "orphaned_at": None}
+            ))
+        elif delta < 0:
+            restant = Blob.ref_count + delta
+            db.execute(
+                update(Blob)
+                .where(Blob.sha256 == sha256)
+                .values(ref_count=restant, orphaned_at=case((restant <= 0, now), else_=Blob.orphaned_at)),
+                execution_options={"synchronize_session": False}
+            )
+
+
+def collect_garbage(
+    db: Session,
+    store: BlobStore = blob_store,
+    grace_seconds: float = GC_GRACE_SECONDS
+) -> dict:
+    """
+    Supprime les blobs orphelins (lignes et fichiers). Un fichier écrit ou
+    réutilisé pendant le délai de grâce est toujours conservé.
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=grace_seconds)
+    rows_deleted = files_deleted = 0
+
+    # 1. Lignes sans référence depuis plus du délai de grâce
+    orphelins = (
+        select(Blob.sha256)
+        .where(
+            Blob.ref_count <= 0,
+            Blob.orphaned_at < cutoff,
+            ~exists().where(Document.hash_fichier == Blob.sha256),
+        )
+        .limit(GC_BATCH_SIZE)
+        .with_for_update(skip_locked=True)
+    )
+    while True:
+        hashes = db.execute(orphelins).scalars().all()
+        if not hashes:
+            break
+        db.execute(delete(Blob).where(Blob.sha256.in_(hashes)), execution_options={"synchronize_session": False})
+        db.commit()
+        rows_deleted += len(hashes)
+        files_deleted += sum(store.remove(sha256, untouched_for=grace_seconds) for sha256 in hashes)
+
+    # 2. Fichiers sans ligne blobs
+    limite = time.time() - grace_seconds
+    anciens = (sha256 for sha256, mtime in store.iter_blobs() if mtime < limite)
+    while True:
+        lot = list(islice(anciens, GC_BATCH_SIZE))
+        if not lot:
+            break
+        connus = set(db.execute(select(Blob.sha256).where(Blob.sha256.in_(lot))).scalars())
+        files_deleted += sum(
+            store.remove(sha256, untouched_for=grace_seconds) for sha256 in lot if sha256 not in connus
+        )
+
+    temp_deleted = store.purge_temp(grace_seconds)
+
+    logger.info(
+        f"GC blob store : {rows_deleted} ligne(s), {files_deleted} fichier(s), "
+        f"{temp_deleted} fichier(s) temporaire(s) supprimés"
+    )
+    return {"rows_deleted": rows_deleted, "files_deleted": files_deleted, "temp_deleted": temp_deleted}
+
+
+def _changes_from(objects: Iterable, delta: int, session: Session) -> None:
+    for obj in objects:
+        if isinstance(obj, Document) and obj.hash_fichier:
+            record_reference_changes(session, obj.hash_fichier, delta, obj.taille, obj.mime_type)
+
+
+@event.listens_for(Session, "after_flush")
+def _compter_references(session: Session, flush_context) -> None:
+    """Collecte les variations de références des documents écrits"""
+    _changes_from(session.new, 1, session)
+    _changes_from(session.deleted, -1, session)
+    for obj in session.dirty:
+        if isinstance(obj, Document):
+            history = inspect(obj).attrs.hash_fichier.history
+            if history.has_changes():
+                for ancien in history.deleted or ():
+                    if ancien:
+                        record_reference_changes(session, ancien, -1)
+                for nouveau in history.added or ():
+                    if nouveau:
+                        record_reference_changes(session, nouveau, 1, obj.taille, obj.mime_type)
+
+
+@event.listens_for(Session, "before_commit")
+def _appliquer_avant_commit(session: Session) -> None:
+    session.flush()
+    changes = session.info.pop(SESSION_INFO_KEY, None)
+    if changes:
+        apply_reference_changes(session, changes)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _oublier_apres_rollback(session: Session, previous_transaction) -> None:
+    session.info.pop(SESSION_INFO_KEY, None)
@@ -0,0 +1,398 @@
+"""
+Traitement des documents après l'upload
+
+L'upload ne fait que les contrôles rapides (extension, en-tête, taille) et
+rend la main dès que le fichier est stocké. Le reste est fait ensuite par
+étapes, une tâche Celery chacune (app.tasks.documents) :
+
+  1. validate_document : validation approfondie du contenu (intégrité,
+     contenu actif des PDF, macros et bombes des archives, images)
+  2. build_preview : miniature PNG de la première page
+  3. extract_text : texte du document (PDF, bureautique, texte)
+  4. match_document_requis : rapprochement avec les documents requis du
+     dossier, puis fin du traitement
+
+Chaque étape est idempotente : relancée (retry, reprise), elle ne refait que
+ce qui manque. Un document rejeté n'est pas traité plus loin.
+
+Le rendu et le texte des PDF utilisent pypdfium2 s'il est installé ; sans
+lui, ces étapes sont ignorées pour les PDF.
+"""
+import hashlib
+import io
+import logging
+import re
+import unicodedata
+import zipfile
+from datetime import datetime, timezone
+from typing import Iterable, Optional, Tuple
+from xml.etree import ElementTree
+
+from sqlalchemy.orm import Session
+
+from app.core.blob_store import BlobStore, blob_store
+from app.core.storage import local_copy, storage_key
+from app.models.document import Document, StatutTraitement, TypeDocument
+from app.models.document_requis import DocumentRequis
+
+logger = logging.getLogger(__name__)
+
+# Contenu actif refusé dans un PDF (exécution à l'ouverture, pièces jointes)
+PDF_ACTIVE_CONTENT = re.compile(rb"/(JavaScript|JS|Launch|EmbeddedFile|RichMedia)\b")
+# Recouvrement entre deux blocs lus, pour ne pas couper un mot-clé
+PDF_SCAN_OVERLAP = 32
+PDF_TRAILER_SIZE = 1024
+
+ZIP_MIME_TYPES = {
+    "application/zip",
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "application/vnd.oasis.opendocument.text",
+    "application/vnd.oasis.opendocument.spreadsheet",
+}
+ZIP_MAX_UNCOMPRESSED = 512 * 1024 * 1024
+ZIP_MAX_RATIO = 100
+
+PREVIEW_SIZE = (320, 320)
+TEXT_MAX_CHARS = 200_000
+
+# Parties XML contenant le texte des formats bureautiques
+OFFICE_TEXT_PARTS = (
+    "word/document.xml",
+    "xl/sharedStrings.xml",
+    "content.xml",
+)
+
+# Mots-clés (sans accents, minuscules) par type, du plus spécifique au plus général
+TYPE_KEYWORDS = (
+    (TypeDocument.RELEVE_BANCAIRE, ("releve bancaire", "releve de compte", "extrait de compte", "iban", "releve")),
+    (TypeDocument.ETAT_PAIE, ("bulletin de paie", "bulletin de salaire", "livre de paie", "etat de paie")),
+    (TypeDocument.DECLARATION_TVA, ("declaration de tva", "tva collectee", "tva deductible")),
+    (TypeDocument.DECLARATION_SOCIALE, ("declaration sociale", "cnss", "urssaf", "dsn")),
+    (TypeDocument.DECLARATION_IMPOT, ("declaration fiscale", "impot sur", "acompte is")),
+    (TypeDocument.FACTURE_VENTE, ("facture client", "facture de vente")),
+    (TypeDocument.FACTURE_ACHAT, ("facture fournisseur", "facture d'achat", "facture")),
+    (TypeDocument.CONTRAT, ("contrat",)),
+)
+
+MOIS = {
+    "janvier": 1, "fevrier": 2, "mars": 3, "avril": 4, "mai": 5, "juin": 6, "juillet": 7,
+    "aout": 8, "septembre": 9, "octobre": 10, "novembre": 11, "decembre": 12,
+}
+PERIODE_NUMERIQUE = (
+    # 03/2024, 03-2024, 3_2024
+    (re.compile(r"(?<!\d)(0?[1-9]|1[0-2])[/\-_. ](20\d{2})(?!\d)"), (1, 2)),
+    # 2024-03, 2024_03
+    (re.compile(r"(?<!\d)(20\d{2})[\-_. ](0[1-9]|1[0-2])(?!\d)"), (2, 1)),
+)
+PERIODE_TEXTE = re.compile(r"\b(" + "|".join(MOIS) + r")\s+(20\d{2})\b")
+
+
+def _normaliser(texte: str) -> str:
+    """Minuscules sans accents, pour la recherche de mots-clés"""
+    decompose = unicodedata.normalize("NFKD", texte.lower())
+    return "".join(c for c in decompose if not unicodedata.combining(c))
+
+
+def _mots(texte: str) -> str:
+    """Texte normalisé réduit à des mots séparés par une espace"""
+    return " " + re.sub(r"[^a-z0-9]+", " ", _normaliser(texte)) + " "
+
+
+def _charger(db: Session, document_id: int) -> Optional[Document]:
+    """Document à traiter, None s'il a été supprimé ou rejeté entre-temps"""
+    document = db.get(Document, document_id)
+    if document is None or document.statut_traitement == StatutTraitement.REJETE:
+        return None
+    return document
+
+
+# --- 1. Validation approfondie -------------------------------------------------
+
+def _scan_pdf(path: str) -> Optional[str]:
+    with open(path, "rb") as f:
+        fin = b""
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            bloc = fin + chunk
+            match = PDF_ACTIVE_CONTENT.search(bloc)
+            if match:
+                return f"Contenu actif interdit dans le PDF ({match.group(1).decode()})"
+            fin = bloc[-PDF_SCAN_OVERLAP:]
+        f.seek(0, io.SEEK_END)
+        f.seek(max(f.tell() - PDF_TRAILER_SIZE, 0))
+        if b"%%EOF" not in f.read():
+            return "PDF tronqué ou corrompu"
+    return None
+
+
+def _scan_zip(path: str) -> Optional[str]:
+    try:
+        with zipfile.ZipFile(path) as archive:
+            entrees = archive.infolist()
+    except zipfile.BadZipFile:
+        return "Archive corrompue"
+
+    total = sum(entree.file_size for entree in entrees)
+    compresse = sum(entree.compress_size for entree in entrees) or 1
+    if total > ZIP_MAX_UNCOMPRESSED or total / compresse > ZIP_MAX_RATIO:
+        return "Archive suspecte (taux de compression anormal)"
+    for entree in entrees:
+        nom = entree.filename
+        if nom.startswith("/") or ".." in nom.split("/"):
+            return "Archive suspecte (chemin hors de l'archive)"
+        if nom.lower().endswith("vbaproject.bin"):
+            return "Document contenant des macros"
+    return None
+
+
+def _scan_image(path: str) -> Optional[str]:
+    from PIL import Image
+
+    try:
+        with Image.open(path) as image:
+            image.verify()
+    except Exception as e:  # Image.DecompressionBombError compris
+        return f"Image illisible ({type(e).__name__})"
+    return None
+
+
+def check_content(path: str, mime_type: Optional[str]) -> Optional[str]:
+    """Motif de rejet du contenu, None s'il est accepté"""
+    if mime_type == "application/pdf":
+        return _scan_pdf(path)
+    if mime_type in ZIP_MIME_TYPES:
+        return _scan_zip(path)
+    if mime_type and mime_type.startswith("image/"):
+        return _scan_image(path)
+    return None
+
+
+def validate_document(db: Session, document_id: int, store: BlobStore = blob_store) -> dict:
+    """Étape 1 : intégrité (SHA-256) et contrôle du contenu complet"""
+    document = _charger(db, document_id)
+    if document is None or document.statut_traitement == StatutTraitement.TRAITE:
+        return {"document_id": document_id, "skipped": True}
+
+    with local_copy(store.backend, storage_key(document.chemin_fichier)) as path:
+        motif = None
+        if document.hash_fichier:
+            sha256 = hashlib.sha256()
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                    sha256.update(chunk)
+            if sha256.hexdigest() != document.hash_fichier:
+                motif = "Contenu stocké altéré (hash différent)"
+        motif = motif or check_content(path, document.mime_type)
+
+    if motif:
+        document.statut_traitement = StatutTraitement.REJETE
+        document.erreur_traitement = motif
+        logger.warning(f"Document {document_id} rejeté : {motif}")
+    else:
+        document.statut_traitement = StatutTraitement.EN_COURS
+    db.commit()
+    return {"document_id": document_id, "rejected": motif is not None}
+
+
+# --- 2. Aperçu -----------------------------------------------------------------
+
+def _render_first_page(path: str, mime_type: Optional[str]):
+    """Image PIL de la première page, None si le format n'a pas d'aperçu"""
+    if mime_type and mime_type.startswith("image/"):
+        from PIL import Image
+
+        with Image.open(path) as image:
+            image.load()
+            return image.copy()
+
+    if mime_type == "application/pdf":
+        try:
+            import pypdfium2  # Optionnel : rendu des PDF
+        except ImportError:
+            return None
+        pdf = pypdfium2.PdfDocument(path)
+        try:
+            if len(pdf) == 0:
+                return None
+            page = pdf[0]
+            largeur, hauteur = page.get_size()
+            echelle = min(PREVIEW_SIZE[0] / largeur, PREVIEW_SIZE[1] / hauteur) * 2
+            return page.render(scale=echelle).to_pil()
+        finally:
+            pdf.close()
+    return None
+
+
+def build_preview(db: Session, document_id: int, store: BlobStore = blob_store) -> dict:
+    """Étape 2 : miniature de la première page, partagée par les doublons"""
+    document = _charger(db, document_id)
+    if document is None or not document.hash_fichier:
+        return {"document_id": document_id, "skipped": True}
+
+    key = store.preview_key_for(document.hash_fichier)
+    if not store.backend.exists(key):
+        with local_copy(store.backend, storage_key(document.chemin_fichier)) as path:
+            image = _render_first_page(path, document.mime_type)
+        if image is None:
+            return {"document_id": document_id, "preview": None}
+
+        image.thumbnail(PREVIEW_SIZE)
+        buffer = io.BytesIO()
+        image.convert("RGB").save(buffer, format="PNG", optimize=True)
+        writer = store.backend.open_writer(key)
+        try:
+            writer.write(buffer.getvalue())
+            writer.commit()
+        except Exception:
+            writer.abort()
+            raise
+
+    if document.cle_apercu != key:
+        document.cle_apercu = key
+        db.commit()
+    return {"document_id": document_id, "preview": key}
+
+
+# --- 3. Texte ------------------------------------------------------------------
+
+def _texte_pdf(path: str) -> str:
+    try:
+        import pypdfium2  # Optionnel : texte des PDF
+    except ImportError:
+        return ""
+    morceaux, taille = [], 0
+    pdf = pypdfium2.PdfDocument(path)
+    try:
+        for page in pdf:
+            texte = page.get_textpage().get_text_range()
+            morceaux.append(texte)
+            taille += len(texte)
+            if taille >= TEXT_MAX_CHARS:
+                break
+    finally:
+        pdf.close()
+    return "\n".join(morceaux)
+
+
+def _texte_bureautique(path: str) -> str:
+    morceaux = []
+    with zipfile.ZipFile(path) as archive:
+        noms = set(archive.namelist())
+        for partie in OFFICE_TEXT_PARTS:
+            if partie in noms:
+                racine = ElementTree.fromstring(archive.read(partie))
+                morceaux.append(" ".join(t.strip() for t in racine.itertext() if t.strip()))
+    return "\n".join(morceaux)
+
+
+def _texte_brut(path: str) -> str:
+    with open(path, "rb") as f:
+        contenu = f.read(TEXT_MAX_CHARS * 4)
+    try:
+        return contenu.decode("utf-8")
+    except UnicodeDecodeError:
+        return contenu.decode("latin-1")
+
+
+def read_text(path: str, mime_type: Optional[str]) -> str:
+    """Texte du fichier ; chaîne vide si le format n'en fournit pas (images)"""
+    if mime_type == "application/pdf":
+        texte = _texte_pdf(path)
+    elif mime_type in ZIP_MIME_TYPES and mime_type != "application/zip":
+        texte = _texte_bureautique(path)
+    elif mime_type and mime_type.startswith("text/"):
+        texte = _texte_brut(path)
+    else:
+        texte = ""
+    return texte.replace("\x00", "")[:TEXT_MAX_CHARS]
+
+
+def extract_text(db: Session, document_id: int, store: BlobStore = blob_store) -> dict:
+    """Étape 3 : texte du document (chaîne vide quand il n'y en a pas)"""
+    document = _charger(db, document_id)
+    if document is None:
+        return {"document_id": document_id, "skipped": True}
+
+    if document.texte_extrait is None:
+        with local_copy(store.backend, storage_key(document.chemin_fichier)) as path:
+            document.texte_extrait = read_text(path, document.mime_type)
+        db.commit()
+    return {"document_id": document_id, "characters": len(document.texte_extrait)}
+
+
+# --- 4. Rapprochement ----------------------------------------------------------
+
+def guess_type(*sources: str) -> Optional[TypeDocument]:
+    """Type déduit du nom puis du texte (premier type dont un mot-clé apparaît)"""
+    for source in sources:
+        texte = _mots(source or "")
+        for type_document, mots in TYPE_KEYWORDS:
+            if any(_mots(mot) in texte for mot in mots):
+                return type_document
+    return None
+
+
+def guess_period(*sources: str) -> Optional[Tuple[int, int]]:
+    """Période (mois, année) trouvée dans le nom puis dans le texte"""
+    for source in sources:
+        texte = _normaliser(source or "")
+        for pattern, (groupe_mois, groupe_annee) in PERIODE_NUMERIQUE:
+            match = pattern.search(texte)
+            if match:
+                return int(match.group(groupe_mois)), int(match.group(groupe_annee))
+        match = PERIODE_TEXTE.search(texte)
+        if match:
+            return MOIS[match.group(1)], int(match.group(2))
+    return None
+
+
+def match_document_requis(db: Session, document_id: int) -> dict:
+    """
+    Étape 4 : complète type et période s'ils manquent (nom du fichier, puis
+    début du texte), marque les documents requis correspondants comme
+    fournis et termine le traitement
+    """
+    document = _charger(db, document_id)
+    if document is None:
+        return {"document_id": document_id, "skipped": True}
+
+    sources: Iterable[str] = (document.nom, (document.texte_extrait or "")[:5000])
+    if document.type == TypeDocument.AUTRE:
+        document.type = guess_type(*sources) or TypeDocument.AUTRE
+    if document.mois is None or document.annee is None:
+        periode = guess_period(*sources)
+        if periode:
+            document.mois, document.annee = periode
+
+    fournis = 0
+    if document.type != TypeDocument.AUTRE and document.mois and document.annee:
+        requete = db.query(DocumentRequis).filter(
+            DocumentRequis.dossier_id == document.dossier_id,
+            DocumentRequis.type_document == document.type,
+            DocumentRequis.mois == document.mois,
+            DocumentRequis.annee == document.annee,
+            DocumentRequis.est_applicable.is_(True)
+        )
+        if document.echeance_id:
+            requete = requete.filter(DocumentRequis.echeance_id == document.echeance_id)
+        documents_requis = requete.all()
+        for document_requis in documents_requis:
+            document_requis.est_fourni = True
+        if document.echeance_id is None and len(documents_requis) == 1:
+            document.echeance_id = documents_requis[0].echeance_id
+        fournis = len(documents_requis)
+
+    document.statut_traitement = StatutTraitement.TRAITE
+    document.erreur_traitement = None
+    document.traite_at = datetime.now(timezone.utc)
+    db.commit()
+    return {"document_id": document_id, "type": document.type.value, "documents_requis_fournis": fournis}
+
+
+def mark_failed(db: Session, document_id: int, erreur: str) -> None:
+    """Échec définitif d'une étape (relances épuisées)"""
+    document = db.get(Document, document_id)
+    if document is not None and document.statut_traitement != StatutTraitement.REJETE:
+        document.statut_traitement = StatutTraitement.ERREUR
+        document.erreur_traitement = erreur[:500]
+        db.commit()
@@ -0,0 +1,120 @@
+"""
+Service de suppression des dossiers et de leur arborescence
+
+Une requête DELETE ... WHERE dossier_id IN (...) par table, dans l'ordre des
+clés étrangères (enfants d'abord), quel que soit le nombre de lignes : un
+dossier de plusieurs exercices se supprime en une dizaine de requêtes, sans
+charger d'objets. Les colonnes filtrées ou vérifiées par ces suppressions
+sont indexées (migration f6b2d9e47a13).
+
+Les suppressions se font hors ORM : les événements de session ne les voient
+pas. Les références aux blobs des documents sont donc décomptées ici
+(record_reference_changes) ; les fichiers sont supprimés plus tard par le GC
+du blob store (app.services.blob_references.collect_garbage), jamais pendant
+la requête, et seulement si aucun autre document ne partage leur contenu.
+"""
+import logging
+from typing import Dict, Iterable, List
+
+from sqlalchemy import delete, func, inspect, select
+from sqlalchemy.orm import Session
+
+from app.models.alerte import Alerte
+from app.models.archive import DocumentRequisArchive, SaisieComptableArchive
+from app.models.avancement import AvancementDossier
+from app.models.declaration_fiscale import DeclarationFiscale
+from app.models.document import Document
+from app.models.document_requis import DocumentRequis
+from app.models.dossier import Dossier
+from app.models.echeance import Echeance
+from app.models.historique import HistoriqueDossier
+from app.models.notification import Notification
+from app.models.saisie import SaisieComptable
+from app.models.service import dossier_services
+from app.services.blob_references import record_reference_changes
+
+logger = logging.getLogger(__name__)
+
+# Identifiants par requête (taille de la liste IN)
+DELETE_BATCH_SIZE = 500
+
+# Tables rattachées par dossier_id, dans l'ordre de suppression : les
+# saisies, documents requis (vifs ou archivés) et documents référencent
+# aussi les échéances
+CHILD_TABLES = [
+    SaisieComptable.__table__,
+    SaisieComptableArchive.__table__,
+    DocumentRequis.__table__,
+    DocumentRequisArchive.__table__,
+    Document.__table__,
+    Alerte.__table__,
+    HistoriqueDossier.__table__,
+    DeclarationFiscale.__table__,
+    AvancementDossier.__table__,
+    dossier_services,
+    Echeance.__table__,
+]
+
+
+def _release_blobs(db: Session, dossier_ids: List[int]) -> int:
+    """Décompte les références aux blobs des documents supprimés"""
+    rows = db.execute(
+        select(Document.hash_fichier, func.count())
+        .where(Document.dossier_id.in_(dossier_ids), Document.hash_fichier.is_not(None))
+        .group_by(Document.hash_fichier)
+    ).all()
+    for sha256, references in rows:
+        record_reference_changes(db, sha256, -references)
+    return len(rows)
+
+
+def _delete_batch(db: Session, dossier_ids: List[int], counts: Dict[str, int]) -> None:
+    def executer(statement, table_name: str) -> None:
+        result = db.execute(statement, execution_options={"synchronize_session": False})
+        counts[table_name] = counts.get(table_name, 0) + result.rowcount
+
+    alertes = select(Alerte.id).where(Alerte.dossier_id.in_(dossier_ids))
+    executer(delete(Notification).where(Notification.alerte_id.in_(alertes)), Notification.__tablename__)
+
+    for table in CHILD_TABLES:
+        executer(delete(table).where(table.c.dossier_id.in_(dossier_ids)), table.name)
+    executer(delete(Dossier).where(Dossier.id.in_(dossier_ids)), Dossier.__tablename__)
+
+
+def delete_dossiers(db: Session, cabinet_id: int, dossier_ids: Iterable[int]) -> dict:
+    """
+    Supprime les dossiers du cabinet et toutes leurs lignes rattachées (sans
+    commit). Les identifiants d'un autre cabinet ou inexistants sont ignorés.
+    Retourne les identifiants supprimés et le nombre de lignes par table.
+    """
+    demandes = sorted(set(dossier_ids))
+    supprimes: List[int] = []
+    counts: Dict[str, int] = {}
+    blobs = 0
+
+    for start in range(0, len(demandes), DELETE_BATCH_SIZE):
+        lot = db.execute(
+            select(Dossier.id).where(
+                Dossier.cabinet_id == cabinet_id,
+                Dossier.id.in_(demandes[start:start + DELETE_BATCH_SIZE])
+            )
+        ).scalars().all()
+        if not lot:
+            continue
+        blobs += _release_blobs(db, lot)
+        _delete_batch(db, lot, counts)
+        supprimes.extend(lot)
+
+    # Les dossiers déjà chargés dans la session ne doivent être ni réécrits
+    # ni rechargés après le commit
+    ids = set(supprimes)
+    for obj in list(db.identity_map.values()):
+        # Identité lue sans recharger l'objet (il peut être expiré)
+        if isinstance(obj, Dossier) and inspect(obj).identity[0] in ids:
+            db.expunge(obj)
+
+    logger.info(
+        f"{len(supprimes)} dossier(s) supprimé(s) pour le cabinet {cabinet_id} "
+        f"({sum(counts.values())} ligne(s), {blobs} blob(s) libéré(s))"
+    )
+    return {"deleted": supprimes, "rows": counts}
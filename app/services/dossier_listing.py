@@ -0,0 +1,138 @@
+"""
+Service de listing des dossiers par projection agrégée
+
+Une page de dossiers et ses compteurs (alertes actives, échéances totales et
+complétées, prochaine échéance, dernière activité) sont obtenus en une seule
+instruction SQL : la page est sélectionnée dans une CTE puis les sous-requêtes
+groupées ne portent que sur les dossiers de cette page.
+
+La pagination est par curseur (keyset) sur l'ID décroissant : le coût d'une
+page ne dépend pas de sa position.
+"""
+import base64
+import binascii
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import Date, DateTime, and_, case, func, or_, select
+from sqlalchemy.orm import Query, Session
+
+from app.models.alerte import Alerte
+from app.models.dossier import Dossier
+from app.models.echeance import Echeance
+from app.models.historique import HistoriqueDossier
+from app.models.user import User
+
+
+def encode_cursor(dossier_id: int) -> str:
+    """Curseur opaque pointant après le dossier donné"""
+    return base64.urlsafe_b64encode(f"id:{dossier_id}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    """Retourne l'ID encodé dans le curseur, 400 si le curseur est invalide"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        prefix, value = base64.urlsafe_b64decode(padded.encode()).decode().split(":", 1)
+        if prefix != "id":
+            raise ValueError(prefix)
+        return int(value)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=400, detail="Curseur de pagination invalide")
+
+
+def fetch_dossiers_page(
+    db: Session,
+    query: Query,
+    limit: int,
+    cursor: Optional[str] = None
+) -> Tuple[List[Tuple[Dossier, Dict[str, Any]]], Optional[str]]:
+    """
+    Charge une page de dossiers avec leurs compteurs agrégés
+
+    query est la requête filtrée (cabinet, périmètre, filtres) sur Dossier.
+    Retourne la liste de (dossier, compteurs) et le curseur de la page suivante.
+    """
+    today = date.today()
+
+    page_ids = query.with_entities(Dossier.id)
+    if cursor:
+        page_ids = page_ids.filter(Dossier.id < decode_cursor(cursor))
+    # Une ligne de plus pour savoir s'il existe une page suivante
+    page = page_ids.order_by(Dossier.id.desc()).limit(limit + 1).cte("page_dossiers")
+    dans_la_page = select(page.c.id)
+
+    non_complete = Echeance.statut != 'COMPLETE'
+    echeances_agg = (
+        select(
+            Echeance.dossier_id.label("dossier_id"),
+            func.count(Echeance.id).label("totales"),
+            func.count(case((Echeance.statut == 'COMPLETE', 1))).label("completees"),
+            func.count(case((and_(non_complete, Echeance.date_echeance < today), 1))).label("en_retard"),
+            # Même règle que Dossier.prochaine_echeance : première échéance à venir
+            # (ou marquée en retard), sinon la dernière non complétée
+            func.min(case((
+                and_(non_complete, or_(Echeance.date_echeance >= today, Echeance.statut == 'EN_RETARD')),
+                Echeance.date_echeance
+            )), type_=Date).label("prochaine"),
+            func.max(case((non_complete, Echeance.date_echeance)), type_=Date).label("derniere_a_faire"),
+        )
+        .where(Echeance.dossier_id.in_(dans_la_page))
+        .group_by(Echeance.dossier_id)
+        .subquery()
+    )
+    alertes_agg = (
+        select(Alerte.dossier_id.label("dossier_id"), func.count(Alerte.id).label("actives"))
+        .where(Alerte.dossier_id.in_(dans_la_page), Alerte.active.is_(True))
+        .group_by(Alerte.dossier_id)
+        .subquery()
+    )
+    historique_agg = (
+        select(
+            HistoriqueDossier.dossier_id.label("dossier_id"),
+            func.max(HistoriqueDossier.created_at, type_=DateTime(timezone=True)).label("derniere_activite")
+        )
+        .where(HistoriqueDossier.dossier_id.in_(dans_la_page))
+        .group_by(HistoriqueDossier.dossier_id)
+        .subquery()
+    )
+
+    rows = (
+        db.query(
+            Dossier,
+            User.full_name,
+            func.coalesce(alertes_agg.c.actives, 0),
+            func.coalesce(echeances_agg.c.totales, 0),
+            func.coalesce(echeances_agg.c.completees, 0),
+            func.coalesce(echeances_agg.c.en_retard, 0),
+            func.coalesce(echeances_agg.c.prochaine, echeances_agg.c.derniere_a_faire, type_=Date),
+            historique_agg.c.derniere_activite,
+        )
+        .join(page, page.c.id == Dossier.id)
+        .outerjoin(User, User.id == Dossier.responsable_id)
+        .outerjoin(echeances_agg, echeances_agg.c.dossier_id == Dossier.id)
+        .outerjoin(alertes_agg, alertes_agg.c.dossier_id == Dossier.id)
+        .outerjoin(historique_agg, historique_agg.c.dossier_id == Dossier.id)
+        .order_by(Dossier.id.desc())
+        .all()
+    )
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1][0].id)
+
+    page_items = []
+    for dossier, responsable_name, alerts, totales, completees, en_retard, prochaine, derniere in rows:
+        page_items.append((dossier, {
+            'responsable_name': responsable_name,
+            'alerts_count': alerts,
+            'echeances_totales': totales,
+            'echeances_completees': completees,
+            'has_overdue': en_retard > 0,
+            'prochaine_echeance_date': prochaine,
+            'derniere_activite': derniere or dossier.created_at,
+        }))
+
+    return page_items, next_cursor
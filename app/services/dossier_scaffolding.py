@@ -0,0 +1,289 @@
+"""
+Service de création de l'arborescence d'un dossier (échéances, saisies comptables,
+documents requis, déclarations fiscales)
+
+L'arborescence complète est construite en mémoire puis persistée par insertions
+groupées : un INSERT ... RETURNING pour récupérer les IDs des échéances en une
+seule instruction, puis un INSERT multi-lignes par table dépendante.
+"""
+import logging
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.models.dossier import Dossier
+from app.models.echeance import Echeance
+from app.models.saisie import SaisieComptable
+from app.models.document_requis import DocumentRequis
+from app.models.document import TypeDocument
+from app.models.declaration_fiscale import DeclarationFiscale
+from app.models.historique import HistoriqueDossier
+from app.services.fiscal_service import build_declarations_fiscales
+from app.services.avancement_service import mark_dossiers_for_refresh
+
+logger = logging.getLogger(__name__)
+
+
+MOIS_NOMS = [
+    'Janvier', 'Février', 'Mars', 'Avril', 'Mai', 'Juin',
+    'Juillet', 'Août', 'Septembre', 'Octobre', 'Novembre', 'Décembre'
+]
+
+# Types de journaux selon le service
+JOURNAUX_PAR_SERVICE = {
+    'COMPTABILITE': ['BANQUE', 'CAISSE', 'OD', 'ACHATS', 'VENTES', 'PAIE'],
+    'PAIE': ['DSN', 'BULLETINS', 'DUCS', 'DECLARATION_SOCIALE', 'CHARGES_SOCIALES'],
+}
+
+# Types de documents requis par service
+DOCUMENTS_PAR_SERVICE = {
+    'COMPTABILITE': [TypeDocument.RELEVE_BANCAIRE, TypeDocument.FACTURE_ACHAT, TypeDocument.FACTURE_VENTE],
+    'FISCALITE': [TypeDocument.DECLARATION_TVA, TypeDocument.DECLARATION_IMPOT],
+    'PAIE': [TypeDocument.ETAT_PAIE, TypeDocument.DECLARATION_SOCIALE],
+    'JURIDIQUE': [TypeDocument.CONTRAT, TypeDocument.COURRIER],
+    'AUDIT': [TypeDocument.RELEVE_BANCAIRE, TypeDocument.FACTURE_ACHAT, TypeDocument.FACTURE_VENTE],
+    'CONSEIL': [TypeDocument.CONTRAT, TypeDocument.COURRIER],
+    'AUTRE': [TypeDocument.AUTRE]
+}
+
+
+def calculate_service_echeance(service_type: str, periode_comptable: str) -> str:
+    """Calcule la date d'échéance spécifique pour un service donné"""
+    if not periode_comptable:
+        return ''
+
+    try:
+        # Format attendu: "Janvier 2025", "Février 2025", etc.
+        mois = {
+            'janvier': 0, 'février': 1, 'mars': 2, 'avril': 3,
+            'mai': 4, 'juin': 5, 'juillet': 6, 'août': 7,
+            'septembre': 8, 'octobre': 9, 'novembre': 10, 'décembre': 11
+        }
+
+        parts = periode_comptable.lower().split(' ')
+        if len(parts) != 2:
+            return ''
+
+        mois_nom = parts[0]
+        annee = int(parts[1])
+
+        if mois_nom not in mois or not annee:
+            return ''
+
+        mois_index = mois[mois_nom]
+
+        # Dates spécifiques par service
+        service_jours = {
+            'COMPTABILITE': 10,
+            'FISCALITE': 15,
+            'PAIE': 5,
+            'JURIDIQUE': 20,
+            'AUDIT': 30,
+            'CONSEIL': 15,
+            'AUTRE': 15
+        }
+
+        jour_echeance = service_jours.get(service_type, 15)
+        mois_echeance = mois_index + 1
+        annee_echeance = annee
+
+        # Gérer le passage à l'année suivante
+        if mois_echeance > 11:
+            mois_echeance = 0
+            annee_echeance += 1
+
+        date_echeance = date(annee_echeance, mois_echeance + 1, jour_echeance)
+
+        # Si la date tombe un weekend, reporter au lundi suivant
+        if date_echeance.weekday() == 6:  # Dimanche
+            date_echeance = date_echeance.replace(day=date_echeance.day + 1)
+        elif date_echeance.weekday() == 5:  # Samedi
+            date_echeance = date_echeance.replace(day=date_echeance.day + 2)
+
+        return date_echeance.isoformat()
+    except:
+        return ''
+
+
+def build_echeances_mensuelles(service_type: str, annee: int) -> List[Dict[str, Any]]:
+    """
+    Construit en mémoire les 12 échéances mensuelles d'un dossier COMPTABILITE/PAIE,
+    chacune avec ses saisies comptables et ses documents requis
+    """
+    types_journaux = JOURNAUX_PAR_SERVICE.get(service_type, ['GENERAL'])
+    docs_requis = DOCUMENTS_PAR_SERVICE.get(service_type, [TypeDocument.AUTRE])
+
+    echeances = []
+    for mois_idx in range(12):
+        mois_num = mois_idx + 1
+        periode_label = f"{MOIS_NOMS[mois_idx]} {annee}"
+
+        date_echeance_str = calculate_service_echeance(service_type, periode_label)
+        if not date_echeance_str:
+            continue
+
+        echeances.append({
+            'mois': mois_num,
+            'annee': annee,
+            'periode_label': periode_label,
+            'date_echeance': date.fromisoformat(date_echeance_str),
+            'statut': 'A_FAIRE',
+            'notes': None,  # Mêmes colonnes que les échéances fiscales pour un seul INSERT
+            'saisies': [
+                {
+                    'type_journal': type_journal,
+                    'mois': mois_num,
+                    'annee': annee,
+                    'est_complete': False
+                }
+                for type_journal in types_journaux
+            ],
+            'documents_requis': [
+                {
+                    'type_document': type_doc,
+                    'mois': mois_num,
+                    'annee': annee,
+                    'est_applicable': True,
+                    'est_fourni': False
+                }
+                for type_doc in docs_requis
+            ]
+        })
+
+    return echeances
+
+
+class DossierScaffoldingService:
+    """
+    Planifie puis persiste en une passe l'arborescence de plusieurs dossiers
+
+    Usage :
+        scaffolding = DossierScaffoldingService(db, cabinet_id, user_id)
+        scaffolding.add_dossier(dossier, 'COMPTABILITE', annee=2025)
+        counts = scaffolding.persist()
+    """
+
+    def __init__(self, db: Session, cabinet_id: int, user_id: int):
+        self.db = db
+        self.cabinet_id = cabinet_id
+        self.user_id = user_id
+        self._plans: List[Dict[str, Any]] = []
+
+    def add_dossier(
+        self,
+        dossier: Dossier,
+        service_type: str,
+        annee: int,
+        type_entreprise: Optional[str] = None,
+        commentaire: Optional[str] = None
+    ) -> None:
+        """Ajoute au plan un dossier non encore persisté et son arborescence"""
+        plan = {
+            'dossier': dossier,
+            'commentaire': commentaire or f"Dossier {service_type} créé automatiquement",
+            'echeances': [],
+            'declarations': []
+        }
+
+        if service_type == 'FISCALITE':
+            # Déclarations selon le statut juridique : elles tiennent lieu
+            # d'échéances (statistiques, suivi et complétion les lisent directement)
+            plan['declarations'] = build_declarations_fiscales(type_entreprise or 'SARL', annee)
+        elif service_type in JOURNAUX_PAR_SERVICE:
+            plan['echeances'] = build_echeances_mensuelles(service_type, annee)
+
+        self._plans.append(plan)
+
+    def persist(self) -> Dict[str, int]:
+        """
+        Persiste l'ensemble du plan (sans commit) et retourne le nombre de lignes créées par table
+        """
+        counts = {'dossiers': 0, 'echeances': 0, 'saisies': 0, 'documents_requis': 0, 'declarations': 0}
+        if not self._plans:
+            return counts
+
+        # 1. Dossiers : un seul flush, inséré en lot par l'ORM
+        self.db.add_all([plan['dossier'] for plan in self._plans])
+        self.db.flush()
+        counts['dossiers'] = len(self._plans)
+
+        historique_rows = []
+        declaration_rows = []
+        echeance_rows = []
+        children = []  # (saisies, documents_requis) alignés sur echeance_rows
+
+        for plan in self._plans:
+            dossier = plan['dossier']
+            historique_rows.append({
+                'cabinet_id': self.cabinet_id,
+                'dossier_id': dossier.id,
+                'user_id': self.user_id,
+                'action': 'creation',
+                'new_value': dossier.statut.value,
+                'commentaire': plan['commentaire']
+            })
+
+            for declaration in plan['declarations']:
+                declaration_rows.append({'cabinet_id': self.cabinet_id, 'dossier_id': dossier.id, **declaration})
+
+            for echeance in plan['echeances']:
+                echeance_rows.append({
+                    'cabinet_id': self.cabinet_id,
+                    'dossier_id': dossier.id,
+                    **{k: v for k, v in echeance.items() if k not in ('saisies', 'documents_requis')}
+                })
+                children.append((dossier.id, echeance.get('saisies', []), echeance.get('documents_requis', [])))
+
+        # Insertions hors ORM : l'avancement de ces dossiers sera recalculé au commit
+        mark_dossiers_for_refresh(self.db, [plan['dossier'].id for plan in self._plans])
+
+        # 2. Historique et déclarations fiscales : un INSERT multi-lignes chacun
+        self.db.execute(insert(HistoriqueDossier), historique_rows)
+        if declaration_rows:
+            self.db.execute(insert(DeclarationFiscale), declaration_rows)
+            counts['declarations'] = len(declaration_rows)
+
+        if not echeance_rows:
+            return counts
+
+        # 3. Échéances : une instruction, IDs retrouvés via la clé naturelle
+        #    (dossier, période, date) pour ne pas dépendre de l'ordre du RETURNING
+        echeances_table = Echeance.__table__
+        returned = self.db.execute(
+            insert(echeances_table).returning(
+                echeances_table.c.id,
+                echeances_table.c.dossier_id,
+                echeances_table.c.periode_label,
+                echeances_table.c.date_echeance
+            ),
+            echeance_rows
+        ).all()
+        ids_by_key = {
+            (row.dossier_id, row.periode_label, row.date_echeance): row.id
+            for row in returned
+        }
+        echeance_ids = [
+            ids_by_key[(row['dossier_id'], row['periode_label'], row['date_echeance'])]
+            for row in echeance_rows
+        ]
+        counts['echeances'] = len(echeance_ids)
+
+        # 4. Saisies et documents requis rattachés aux échéances créées
+        saisie_rows = []
+        document_requis_rows = []
+        for echeance_id, (dossier_id, saisies, documents_requis) in zip(echeance_ids, children):
+            base = {'cabinet_id': self.cabinet_id, 'dossier_id': dossier_id, 'echeance_id': echeance_id}
+            saisie_rows.extend({**base, **saisie} for saisie in saisies)
+            document_requis_rows.extend({**base, **doc} for doc in documents_requis)
+
+        if saisie_rows:
+            self.db.execute(insert(SaisieComptable), saisie_rows)
+            counts['saisies'] = len(saisie_rows)
+        if document_requis_rows:
+            self.db.execute(insert(DocumentRequis), document_requis_rows)
+            counts['documents_requis'] = len(document_requis_rows)
+
+        logger.info(f"Arborescence créée pour {counts['dossiers']} dossier(s): {counts}")
+        return counts
@@ -0,0 +1,77 @@
+"""
+Service de statistiques des échéances
+
+Les échéances (COMPTABILITE, PAIE) et les déclarations fiscales (FISCALITE) des
+dossiers accessibles sont réunies par un UNION ALL puis comptées par tranche
+avec des agrégats filtrés (COUNT(*) FILTER (WHERE ...)) : une seule requête,
+aucune ligne chargée en mémoire quel que soit l'historique du cabinet.
+"""
+from datetime import date, timedelta
+from typing import Dict, Optional
+
+from sqlalchemy import and_, func, select, union_all
+from sqlalchemy.orm import Query, Session
+
+from app.models.declaration_fiscale import DeclarationFiscale
+from app.models.dossier import Dossier
+from app.models.echeance import Echeance
+
+# Statuts considérés comme terminés pour chaque source
+STATUTS_ECHEANCE_COMPLETE = ('COMPLETE',)
+STATUTS_DECLARATION_COMPLETE = ('TELEDECLAREE', 'VALIDEE')
+
+STATS_VIDES = {"en_retard": 0, "critiques": 0, "urgentes": 0, "a_faire": 0, "completes": 0, "total": 0}
+
+
+def compute_echeances_stats(db: Session, dossiers_query: Query, today: Optional[date] = None) -> Dict[str, int]:
+    """
+    Calcule les tranches de statistiques des échéances des dossiers de la requête
+
+    - en_retard : non complètes dont la date est passée
+    - critiques : non complètes dans les 3 prochains jours (retards inclus)
+    - urgentes : non complètes dans les 7 prochains jours (hors retards)
+    - a_faire : non complètes à venir
+    - completes / total
+    """
+    today = today or date.today()
+    date_limite_critique = today + timedelta(days=3)
+    date_limite_urgente = today + timedelta(days=7)
+
+    dossier_ids = dossiers_query.with_entities(Dossier.id).scalar_subquery()
+
+    # Une ligne par échéance ou déclaration : (date, complète ?)
+    lignes = union_all(
+        select(
+            Echeance.date_echeance.label("date_limite"),
+            Echeance.statut.in_(STATUTS_ECHEANCE_COMPLETE).label("complete")
+        ).where(Echeance.dossier_id.in_(dossier_ids)),
+        select(
+            DeclarationFiscale.date_limite.label("date_limite"),
+            DeclarationFiscale.statut.in_(STATUTS_DECLARATION_COMPLETE).label("complete")
+        ).where(DeclarationFiscale.dossier_id.in_(dossier_ids))
+    ).subquery("lignes_echeances")
+
+    a_faire = lignes.c.complete.is_(False)
+    row = db.execute(
+        select(
+            func.count().label("total"),
+            func.count().filter(lignes.c.complete.is_(True)).label("completes"),
+            func.count().filter(and_(a_faire, lignes.c.date_limite < today)).label("en_retard"),
+            func.count().filter(and_(a_faire, lignes.c.date_limite <= date_limite_critique)).label("critiques"),
+            func.count().filter(and_(
+                a_faire,
+                lignes.c.date_limite >= today,
+                lignes.c.date_limite <= date_limite_urgente
+            )).label("urgentes"),
+            func.count().filter(and_(a_faire, lignes.c.date_limite >= today)).label("a_faire"),
+        ).select_from(lignes)
+    ).one()
+
+    return {
+        "en_retard": row.en_retard,
+        "critiques": row.critiques,
+        "urgentes": row.urgentes,
+        "a_faire": row.a_faire,
+        "completes": row.completes,
+        "total": row.total
+    }
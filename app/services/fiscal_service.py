@@ -2,6 +2,7 @@
 Service pour la gestion des déclarations fiscales selon le statut juridique
 """
 from datetime import date, timedelta
+from typing import Any, Dict, List
 from sqlalchemy.orm import Session
 from app.models.declaration_fiscale import DeclarationFiscale
 from app.models.echeance import Echeance
@@ -95,15 +96,10 @@ def get_declarations_by_statut_juridique(type_entreprise: str) -> list:
     return declarations
 
 
-def create_declarations_fiscales(
-    db: Session,
-    dossier_id: int,
-    type_entreprise: str,
-    annee_fiscale: int
-) -> int:
+def build_declarations_fiscales(type_entreprise: str, annee_fiscale: int) -> List[Dict[str, Any]]:
     """
-    Crée toutes les déclarations fiscales pour un dossier selon le statut juridique
-    Retourne le nombre de déclarations créées
+    Construit en mémoire les lignes de déclarations fiscales pour un statut juridique
+    (sans dossier_id ni cabinet_id, ajoutés au moment de la persistance)
     """
     mois_noms = [
         'Janvier', 'Février', 'Mars', 'Avril', 'Mai', 'Juin',
@@ -111,9 +107,7 @@ def create_declarations_fiscales(
     ]
     
     declarations_config = get_declarations_by_statut_juridique(type_entreprise)
-    count_created = 0
-    
-    logger.info(f"Création de {len(declarations_config)} types de déclarations pour {type_entreprise}")
+    rows = []
     
     for config in declarations_config:
         if config['regime'] == 'MENSUEL':
@@ -127,19 +121,16 @@ def create_declarations_fiscales(
                     fin_mois = date(annee_fiscale, mois + 1, 1) - timedelta(days=1)
                     date_limite = date(annee_fiscale, mois + 1, config['jour_limite'])
                 
-                declaration = DeclarationFiscale(
-                    dossier_id=dossier_id,
-                    type_declaration=config['type'],
-                    statut='A_FAIRE',
-                    regime=config['regime'],
-                    periode_debut=debut_mois,
-                    periode_fin=fin_mois,
-                    date_limite=date_limite,
-                    formulaire_cerfa=config['cerfa'],
-                    observations=f"{config['description']} - {mois_noms[mois-1]} {annee_fiscale}"
-                )
-                db.add(declaration)
-                count_created += 1
+                rows.append({
+                    'type_declaration': config['type'],
+                    'statut': 'A_FAIRE',
+                    'regime': config['regime'],
+                    'periode_debut': debut_mois,
+                    'periode_fin': fin_mois,
+                    'date_limite': date_limite,
+                    'formulaire_cerfa': config['cerfa'],
+                    'observations': f"{config['description']} - {mois_noms[mois-1]} {annee_fiscale}"
+                })
                 
         elif config['regime'] == 'TRIMESTRIEL':
             # Déclarations trimestrielles (Micro-entreprise)
@@ -156,19 +147,16 @@ def create_declarations_fiscales(
                 else:
                     date_limite = date(annee_fiscale, mois_fin + 1, config['jour_limite'])
                 
-                declaration = DeclarationFiscale(
-                    dossier_id=dossier_id,
-                    type_declaration=config['type'],
-                    statut='A_FAIRE',
-                    regime=config['regime'],
-                    periode_debut=debut_trimestre,
-                    periode_fin=fin_trimestre,
-                    date_limite=date_limite,
-                    formulaire_cerfa=config['cerfa'],
-                    observations=f"{config['description']} - T{trimestre} {annee_fiscale}"
-                )
-                db.add(declaration)
-                count_created += 1
+                rows.append({
+                    'type_declaration': config['type'],
+                    'statut': 'A_FAIRE',
+                    'regime': config['regime'],
+                    'periode_debut': debut_trimestre,
+                    'periode_fin': fin_trimestre,
+                    'date_limite': date_limite,
+                    'formulaire_cerfa': config['cerfa'],
+                    'observations': f"{config['description']} - T{trimestre} {annee_fiscale}"
+                })
                 
         elif config['regime'] == 'ANNUEL':
             # Déclarations annuelles
@@ -182,58 +170,100 @@ def create_declarations_fiscales(
                 # Autres : année suivante
                 date_limite = date(annee_fiscale + 1, config['mois_limite'], config['jour_limite'])
             
-            declaration = DeclarationFiscale(
-                dossier_id=dossier_id,
-                type_declaration=config['type'],
-                statut='A_FAIRE',
-                regime=config['regime'],
-                periode_debut=debut_annee,
-                periode_fin=fin_annee,
-                date_limite=date_limite,
-                formulaire_cerfa=config['cerfa'],
-                observations=f"{config['description']} - Exercice {annee_fiscale}"
-            )
-            db.add(declaration)
-            count_created += 1
+            rows.append({
+                'type_declaration': config['type'],
+                'statut': 'A_FAIRE',
+                'regime': config['regime'],
+                'periode_debut': debut_annee,
+                'periode_fin': fin_annee,
+                'date_limite': date_limite,
+                'formulaire_cerfa': config['cerfa'],
+                'observations': f"{config['description']} - Exercice {annee_fiscale}"
+            })
     
     # Ajouter les déclarations de l'année précédente dues dans l'année courante
     if type_entreprise in ['SARL', 'SAS', 'SA', 'EURL']:
-        # IS de l'année précédente (due en avril de l'année courante)
+        # IS et liasse fiscale de l'année précédente (dues le 30 avril de l'année courante)
         debut_annee_prec = date(annee_fiscale - 1, 1, 1)
         fin_annee_prec = date(annee_fiscale - 1, 12, 31)
-        date_limite_is_prec = date(annee_fiscale, 4, 30)  # 30 avril année courante
-        
-        declaration_is_prec = DeclarationFiscale(
-            dossier_id=dossier_id,
-            type_declaration='IS',
-            statut='A_FAIRE',
-            regime='ANNUEL',
-            periode_debut=debut_annee_prec,
-            periode_fin=fin_annee_prec,
-            date_limite=date_limite_is_prec,
-            formulaire_cerfa='2065',
-            observations=f"Impôt sur les Sociétés - Exercice {annee_fiscale - 1}"
-        )
-        db.add(declaration_is_prec)
-        count_created += 1
+        date_limite_is_prec = date(annee_fiscale, 4, 30)
         
-        # Liasse fiscale de l'année précédente (due en avril de l'année courante)
-        declaration_liasse_prec = DeclarationFiscale(
-            dossier_id=dossier_id,
-            type_declaration='LIASSE_FISCALE',
-            statut='A_FAIRE',
-            regime='ANNUEL',
-            periode_debut=debut_annee_prec,
-            periode_fin=fin_annee_prec,
-            date_limite=date_limite_is_prec,
-            formulaire_cerfa='2050',
-            observations=f"Liasse fiscale - Exercice {annee_fiscale - 1}"
-        )
-        db.add(declaration_liasse_prec)
-        count_created += 1
+        rows.append({
+            'type_declaration': 'IS',
+            'statut': 'A_FAIRE',
+            'regime': 'ANNUEL',
+            'periode_debut': debut_annee_prec,
+            'periode_fin': fin_annee_prec,
+            'date_limite': date_limite_is_prec,
+            'formulaire_cerfa': '2065',
+            'observations': f"Impôt sur les Sociétés - Exercice {annee_fiscale - 1}"
+        })
+        rows.append({
+            'type_declaration': 'LIASSE_FISCALE',
+            'statut': 'A_FAIRE',
+            'regime': 'ANNUEL',
+            'periode_debut': debut_annee_prec,
+            'periode_fin': fin_annee_prec,
+            'date_limite': date_limite_is_prec,
+            'formulaire_cerfa': '2050',
+            'observations': f"Liasse fiscale - Exercice {annee_fiscale - 1}"
+        })
     
-    logger.info(f"{count_created} déclarations fiscales créées pour le dossier {dossier_id}")
-    return count_created
+    return rows
+
+
+def build_echeance_from_declaration(declaration: Dict[str, Any], annee_fiscale: int) -> Dict[str, Any]:
+    """
+    Construit en mémoire la ligne d'échéance correspondant à une déclaration fiscale
+    """
+    mois_noms = [
+        'Janvier', 'Février', 'Mars', 'Avril', 'Mai', 'Juin',
+        'Juillet', 'Août', 'Septembre', 'Octobre', 'Novembre', 'Décembre'
+    ]
+    
+    type_declaration = declaration['type_declaration']
+    if declaration['regime'] == 'MENSUEL':
+        # Échéances mensuelles
+        mois = declaration['periode_debut'].month
+        periode_label = f"{type_declaration} {mois_noms[mois-1]} {annee_fiscale}"
+    elif declaration['regime'] == 'TRIMESTRIEL':
+        # Échéances trimestrielles
+        trimestre = (declaration['periode_debut'].month - 1) // 3 + 1
+        periode_label = f"{type_declaration} T{trimestre} {annee_fiscale}"
+    else:
+        # Échéances annuelles
+        periode_label = f"{type_declaration} {annee_fiscale}"
+    
+    date_limite = declaration['date_limite']
+    return {
+        'mois': date_limite.month,
+        'annee': date_limite.year,
+        'periode_label': periode_label,
+        'date_echeance': date_limite,
+        'statut': 'A_FAIRE',
+        'notes': f"Échéance pour {type_declaration} - {declaration['formulaire_cerfa']}"
+    }
+
+
+def create_declarations_fiscales(
+    db: Session,
+    dossier_id: int,
+    type_entreprise: str,
+    annee_fiscale: int
+) -> int:
+    """
+    Crée toutes les déclarations fiscales pour un dossier selon le statut juridique
+    Retourne le nombre de déclarations créées
+    """
+    rows = build_declarations_fiscales(type_entreprise, annee_fiscale)
+    
+    logger.info(f"Création de {len(rows)} déclarations pour {type_entreprise}")
+    
+    for row in rows:
+        db.add(DeclarationFiscale(dossier_id=dossier_id, **row))
+    
+    logger.info(f"{len(rows)} déclarations fiscales créées pour le dossier {dossier_id}")
+    return len(rows)
 
 
 def create_echeances_from_declarations(
@@ -246,11 +276,6 @@ def create_echeances_from_declarations(
     Crée les échéances basées sur les déclarations fiscales
     Retourne le nombre d'échéances créées
     """
-    mois_noms = [
-        'Janvier', 'Février', 'Mars', 'Avril', 'Mai', 'Juin',
-        'Juillet', 'Août', 'Septembre', 'Octobre', 'Novembre', 'Décembre'
-    ]
-    
     declarations = db.query(DeclarationFiscale).filter(
         DeclarationFiscale.dossier_id == dossier_id
     ).all()
@@ -258,29 +283,15 @@ def create_echeances_from_declarations(
     count_created = 0
     
     for declaration in declarations:
-        if declaration.regime == 'MENSUEL':
-            # Échéances mensuelles
-            mois = declaration.periode_debut.month
-            periode_label = f"{declaration.type_declaration} {mois_noms[mois-1]} {annee_fiscale}"
-        elif declaration.regime == 'TRIMESTRIEL':
-            # Échéances trimestrielles
-            trimestre = (declaration.periode_debut.month - 1) // 3 + 1
-            periode_label = f"{declaration.type_declaration} T{trimestre} {annee_fiscale}"
-        else:
-            # Échéances annuelles
-            periode_label = f"{declaration.type_declaration} {annee_fiscale}"
-        
-        echeance = Echeance(
-            dossier_id=dossier_id,
-            mois=declaration.date_limite.month,
-            annee=declaration.date_limite.year,
-            periode_label=periode_label,
-            date_echeance=declaration.date_limite,
-            statut='A_FAIRE',
-            notes=f"Échéance pour {declaration.type_declaration} - {declaration.formulaire_cerfa}"
-        )
-        db.add(echeance)
+        row = build_echeance_from_declaration({
+            'type_declaration': declaration.type_declaration,
+            'regime': declaration.regime,
+            'periode_debut': declaration.periode_debut,
+            'date_limite': declaration.date_limite,
+            'formulaire_cerfa': declaration.formulaire_cerfa
+        }, annee_fiscale)
+        db.add(Echeance(dossier_id=dossier_id, **row))
         count_created += 1
     
     logger.info(f"{count_created} échéances fiscales créées pour le dossier {dossier_id}")
-    return count_created
\ No newline at end of file
+    return count_created
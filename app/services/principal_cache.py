@@ -0,0 +1,105 @@
+"""
+Cache de l'utilisateur authentifié (principal)
+
+get_current_user est appelé par chaque requête API. Les colonnes de
+l'utilisateur sont mises en cache par nom d'utilisateur (le "sub" du token) à
+deux niveaux : LRU local du processus (TTL court) devant Redis. L'utilisateur
+est rattaché à la session sans requête SQL ; seuls les attributs non mis en
+cache (mot de passe, relations) sont chargés à la demande.
+
+Toute modification d'un utilisateur (rôle, activation, suppression, ...)
+invalide son entrée à la validation de la transaction, dans tous les processus.
+"""
+import logging
+from itertools import chain
+from typing import Optional
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from app.core.cache import cache_manager, invalidate_local, local_cache
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+CACHE_PREFIX = "principal:user"
+REDIS_TTL = 300
+LOCAL_TTL = 30  # Borne la staleness entre workers si la diffusion échoue
+LOCAL_MAX_ENTRIES = 4096
+SESSION_INFO_KEY = "principal_invalidations"
+
+# Colonnes jamais mises en cache (rechargées à la demande si besoin)
+EXCLUDED_COLUMNS = {"hashed_password"}
+CACHED_COLUMNS = [
+    attr.key for attr in inspect(User).column_attrs if attr.key not in EXCLUDED_COLUMNS
+]
+
+local_principal_cache = local_cache(CACHE_PREFIX, max_entries=LOCAL_MAX_ENTRIES, ttl=LOCAL_TTL)
+
+
+def _cache_key(username: str) -> str:
+    return f"{CACHE_PREFIX}:{username}"
+
+
+def _load_columns(db: Session, username: str) -> Optional[dict]:
+    user = db.query(User).filter(User.username == username).first()
+    if user is None:
+        return None
+    return {key: getattr(user, key) for key in CACHED_COLUMNS}
+
+
+def load_principal(db: Session, username: str) -> Optional[User]:
+    """
+    Retourne l'utilisateur du token, rattaché à la session db.
+    LRU local, puis Redis, puis base de données.
+    """
+    columns = local_principal_cache.get(username)
+    if columns is None:
+        columns = cache_manager.get(_cache_key(username))
+        if not isinstance(columns, dict):
+            columns = _load_columns(db, username)
+            if columns is None:
+                return None
+            cache_manager.set(_cache_key(username), columns, REDIS_TTL)
+        local_principal_cache.set(username, columns)
+
+    # Instance détachée avec son identité, puis rattachée sans SELECT
+    user = User(**columns)
+    make_transient_to_detached(user)
+    return db.merge(user, load=False)
+
+
+def invalidate_principal(*usernames: Optional[str]) -> None:
+    """Invalide le cache des utilisateurs modifiés"""
+    usernames = {name for name in usernames if name}
+    if not usernames:
+        return
+    for username in usernames:
+        cache_manager.delete(_cache_key(username))
+    invalidate_local(CACHE_PREFIX, *usernames)
+    logger.debug(f"Principal invalidé pour {sorted(usernames)}")
+
+
+@event.listens_for(Session, "after_flush")
+def _collecter_utilisateurs_modifies(session: Session, flush_context) -> None:
+    """Collecte les noms (ancien et nouveau) des utilisateurs modifiés ou supprimés"""
+    usernames = session.info.setdefault(SESSION_INFO_KEY, set())
+    for obj in chain(session.dirty, session.deleted):
+        if isinstance(obj, User):
+            history = inspect(obj).attrs.username.history
+            usernames.update(history.deleted or ())
+            usernames.add(obj.username)
+    if not usernames:
+        session.info.pop(SESSION_INFO_KEY, None)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalider_apres_commit(session: Session) -> None:
+    usernames = session.info.pop(SESSION_INFO_KEY, None)
+    if usernames:
+        invalidate_principal(*usernames)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _oublier_apres_rollback(session: Session, previous_transaction) -> None:
+    session.info.pop(SESSION_INFO_KEY, None)
@@ -0,0 +1,195 @@
+"""
+Service de recherche plein texte sur les dossiers et les documents
+
+Sous PostgreSQL, la recherche utilise les colonnes search_vector (tsvector
+tenu à jour par trigger, index GIN, voir la migration a4f09b3c6e18) :
+  - dossiers : référence et nom du client (poids A), description et notes (C)
+  - documents : nom du fichier (A), texte extrait par le traitement
+    asynchrone (B, app.services.document_processing)
+
+La requête utilisateur est interprétée par websearch_to_tsquery ("mots
+entre guillemets", -exclusion, OR), à la fois sans racinisation (noms
+propres, références) et en français (texte libre). Les résultats sont triés
+par ts_rank_cd, avec un extrait surligné pour les documents.
+
+Les autres bases (SQLite des tests) utilisent un repli par LIKE sur les
+mêmes champs.
+"""
+from typing import List, Optional, Tuple
+
+from sqlalchemy import case, literal_column, or_, select
+from sqlalchemy.dialects.postgresql import TSQUERY, TSVECTOR, ts_headline, websearch_to_tsquery
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
+
+from app.models.document import Document, StatutTraitement
+from app.models.dossier import Dossier
+from app.services.access_scope import AccessScope
+
+HEADLINE_OPTIONS = "MaxFragments=2, MaxWords=18, MinWords=6, StartSel=<mark>, StopSel=</mark>"
+# Au-delà, la pagination par décalage devient coûteuse : affiner la recherche
+MAX_OFFSET = 1000
+
+
+def _is_postgresql(db: Session) -> bool:
+    return db.get_bind().dialect.name == "postgresql"
+
+
+def _tsquery(q: str):
+    """Requête sans racinisation OU racinisée en français"""
+    return websearch_to_tsquery("simple", q).op("||", return_type=TSQUERY)(websearch_to_tsquery("french", q))
+
+
+def escape_like(value: str) -> str:
+    """Échappe les jokers de LIKE (à utiliser avec escape="\\")"""
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _search_vector(table: str):
+    return literal_column(f"{table}.search_vector", type_=TSVECTOR)
+
+
+def _like_rank(q: str, weighted_columns: List[Tuple[object, float]]):
+    """
+    Repli sans plein texte : chaque mot doit apparaître dans l'une des
+    colonnes ; le rang additionne le poids des colonnes qui le contiennent
+    """
+    mots = [mot for mot in q.lower().split() if mot]
+    conditions, rang = [], None
+    for mot in mots:
+        motif = f"%{escape_like(mot)}%"
+        conditions.append(or_(*(
+            func.lower(func.coalesce(col, "")).like(motif, escape="\\") for col, _ in weighted_columns
+        )))
+        for col, poids in weighted_columns:
+            terme = case((func.lower(func.coalesce(col, "")).like(motif, escape="\\"), poids), else_=0.0)
+            rang = terme if rang is None else rang + terme
+    return conditions, rang
+
+
+def search_dossiers(
+    db: Session,
+    cabinet_id: int,
+    scope: AccessScope,
+    q: str,
+    limit: int,
+    offset: int = 0
+) -> Tuple[List[dict], bool]:
+    """Dossiers du cabinet (et du périmètre) correspondant à q, les plus pertinents d'abord"""
+    if _is_postgresql(db):
+        requete = _tsquery(q)
+        rang = func.ts_rank_cd(_search_vector("dossiers"), requete)
+        conditions = [_search_vector("dossiers").op("@@")(requete)]
+    else:
+        conditions, rang = _like_rank(q, [
+            (Dossier.reference, 1.0), (Dossier.nom_client, 1.0), (Dossier.description, 0.2), (Dossier.notes, 0.2)
+        ])
+
+    rang = rang.label("rank")
+    stmt = (
+        select(Dossier.id, Dossier.reference, Dossier.nom_client, Dossier.type_dossier, Dossier.statut, rang)
+        .where(Dossier.cabinet_id == cabinet_id, *conditions)
+        .order_by(rang.desc(), Dossier.id.desc())
+        .offset(offset)
+        .limit(limit + 1)
+    )
+    stmt = scope.filter_dossiers(stmt, Dossier)
+
+    rows = db.execute(stmt).all()
+    return [
+        {
+            "id": row.id,
+            "reference": row.reference,
+            "nom_client": row.nom_client,
+            "type_dossier": row.type_dossier.value,
+            "statut": row.statut.value if row.statut else None,
+            "rank": round(float(row.rank), 4),
+        }
+        for row in rows[:limit]
+    ], len(rows) > limit
+
+
+def search_documents(
+    db: Session,
+    cabinet_id: int,
+    scope: AccessScope,
+    q: str,
+    limit: int,
+    offset: int = 0
+) -> Tuple[List[dict], bool]:
+    """Documents du cabinet (et du périmètre) dont le nom ou le texte correspond à q"""
+    postgresql = _is_postgresql(db)
+    if postgresql:
+        requete = _tsquery(q)
+        rang = func.ts_rank_cd(_search_vector("documents"), requete)
+        conditions = [_search_vector("documents").op("@@")(requete)]
+    else:
+        conditions, rang = _like_rank(q, [(Document.nom, 1.0), (Document.texte_extrait, 0.4)])
+
+    rang = rang.label("rank")
+    page = (
+        select(
+            Document.id, Document.nom, Document.type, Document.dossier_id, Document.url,
+            Dossier.reference, Dossier.nom_client, rang
+        )
+        .join(Dossier, Dossier.id == Document.dossier_id)
+        .where(
+            Document.cabinet_id == cabinet_id,
+            Document.statut_traitement != StatutTraitement.REJETE,
+            *conditions
+        )
+        .order_by(rang.desc(), Document.id.desc())
+        .offset(offset)
+        .limit(limit + 1)
+    )
+    page = scope.filter_dossiers(page, Dossier).subquery("page_documents")
+
+    # Extrait surligné calculé sur la seule page de résultats
+    if postgresql:
+        extrait = ts_headline("french", func.coalesce(Document.texte_extrait, ""), _tsquery(q), HEADLINE_OPTIONS)
+    else:
+        extrait = func.substr(func.coalesce(Document.texte_extrait, ""), 1, 200)
+    rows = db.execute(
+        select(page, extrait.label("extrait"))
+        .join(Document, Document.id == page.c.id)
+        .order_by(page.c.rank.desc(), page.c.id.desc())
+    ).all()
+
+    return [
+        {
+            "id": row.id,
+            "nom": row.nom,
+            "type": row.type.value,
+            "dossier_id": row.dossier_id,
+            "dossier_reference": row.reference,
+            "nom_client": row.nom_client,
+            "url": row.url,
+            "extrait": row.extrait or None,
+            "rank": round(float(row.rank), 4),
+        }
+        for row in rows[:limit]
+    ], len(rows) > limit
+
+
+def search(
+    db: Session,
+    cabinet_id: int,
+    scope: AccessScope,
+    q: str,
+    kind: Optional[str] = None,
+    limit: int = 20,
+    offset: int = 0
+) -> dict:
+    """Recherche dans les dossiers et/ou les documents (kind : "dossiers", "documents" ou None pour les deux)"""
+    q = q.strip()
+    offset = min(offset, MAX_OFFSET)
+    resultat = {"query": q, "offset": offset, "limit": limit}
+    if not q:
+        return resultat
+    if kind in (None, "dossiers"):
+        items, has_more = search_dossiers(db, cabinet_id, scope, q, limit, offset)
+        resultat["dossiers"] = {"items": items, "has_more": has_more}
+    if kind in (None, "documents"):
+        items, has_more = search_documents(db, cabinet_id, scope, q, limit, offset)
+        resultat["documents"] = {"items": items, "has_more": has_more}
+    return resultat
@@ -0,0 +1,17 @@
+from celery import shared_task
+
+from app.core.database import SessionLocal
+from app.services.archival import archive_closed_dossiers
+
+
+@shared_task
+def archive_closed_fiscal_years():
+    """Archiver les dossiers clos des exercices terminés"""
+    db = SessionLocal()
+    try:
+        return archive_closed_dossiers(db)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
@@ -0,0 +1,151 @@
+"""
+Tâches du traitement des documents après l'upload
+
+Une tâche par étape de app.services.document_processing, chacune sur sa
+propre file (voir task_routes dans app.core.celery_config) : l'extraction de
+texte d'un gros PDF ne retarde pas la validation des dépôts suivants.
+
+Les erreurs passagères (base, stockage, réseau) sont relancées avec un délai
+croissant ; une fois les relances épuisées, le document passe en ERREUR.
+"""
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, List
+
+from celery import Task, chain, shared_task
+from sqlalchemy import or_
+from sqlalchemy.exc import OperationalError
+
+from app.core.database import SessionLocal
+from app.models.document import Document, StatutTraitement
+from app.services import blob_references  # noqa: F401  (comptage des références aux blobs)
+from app.services import document_processing
+
+logger = logging.getLogger(__name__)
+
+# Erreurs passagères : la même étape a des chances de réussir plus tard
+RETRYABLE_ERRORS = (OperationalError, OSError, ConnectionError, TimeoutError)
+# Documents restés EN_ATTENTE plus longtemps sont relancés (broker indisponible à
+# l'upload, message perdu), sauf si leur traitement a été lancé entre-temps
+PENDING_GRACE_MINUTES = 30
+REQUEUE_BATCH_SIZE = 500
+
+
+class DocumentStageTask(Task):
+    """Étape du traitement : relances automatiques, ERREUR après la dernière"""
+
+    autoretry_for = RETRYABLE_ERRORS
+    retry_backoff = True
+    retry_backoff_max = 600
+    max_retries = 5
+    acks_late = True
+
+    def on_failure(self, exc, task_id, args, kwargs, einfo):
+        document_id = args[0] if args else kwargs.get("document_id")
+        logger.error(f"Traitement du document {document_id} en échec ({self.name}): {exc}")
+        db = SessionLocal()
+        try:
+            document_processing.mark_failed(db, document_id, f"{self.name}: {exc}")
+        except Exception:
+            db.rollback()
+            logger.exception(f"Impossible de marquer le document {document_id} en erreur")
+        finally:
+            db.close()
+
+
+def _run(stage, document_id: int) -> dict:
+    db = SessionLocal()
+    try:
+        return stage(db, document_id)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+@shared_task(base=DocumentStageTask)
+def validate_document(document_id: int):
+    """Valider le contenu complet du document"""
+    return _run(document_processing.validate_document, document_id)
+
+
+@shared_task(base=DocumentStageTask)
+def build_preview(document_id: int):
+    """Générer la miniature de la première page"""
+    return _run(document_processing.build_preview, document_id)
+
+
+@shared_task(base=DocumentStageTask)
+def extract_text(document_id: int):
+    """Extraire le texte du document"""
+    return _run(document_processing.extract_text, document_id)
+
+
+@shared_task(base=DocumentStageTask)
+def match_document_requis(document_id: int):
+    """Rapprocher le document des documents requis et terminer le traitement"""
+    return _run(document_processing.match_document_requis, document_id)
+
+
+def document_pipeline(document_id: int):
+    """Chaîne des étapes pour un document (signatures immuables : .si)"""
+    return chain(
+        validate_document.si(document_id),
+        build_preview.si(document_id),
+        extract_text.si(document_id),
+        match_document_requis.si(document_id),
+    )
+
+
+def _mark_launched(document_ids: List[int]) -> None:
+    """Horodate le lancement : requeue_pending_documents ne double pas une chaîne déjà en file"""
+    db = SessionLocal()
+    try:
+        db.query(Document).filter(Document.id.in_(document_ids)).update(
+            {Document.traitement_lance_at: datetime.now(timezone.utc)}, synchronize_session=False
+        )
+        db.commit()
+    except Exception:
+        db.rollback()
+        logger.exception(f"Lancement du traitement non horodaté pour les documents {document_ids}")
+    finally:
+        db.close()
+
+
+def launch_pipelines(document_ids: Iterable[int]) -> int:
+    """
+    Lance le traitement des documents, à appeler après le commit de l'upload.
+    Un broker indisponible ne fait pas échouer l'upload : les documents
+    restent EN_ATTENTE et sont repris par requeue_pending_documents.
+    """
+    lances = []
+    for document_id in document_ids:
+        try:
+            document_pipeline(document_id).apply_async()
+            lances.append(document_id)
+        except Exception as e:
+            logger.warning(f"Traitement du document {document_id} non lancé, reprise planifiée : {e}")
+    if lances:
+        _mark_launched(lances)
+    return len(lances)
+
+
+@shared_task
+def requeue_pending_documents():
+    """Relancer le traitement des documents restés EN_ATTENTE (jamais lancé, ou lancé sans suite)"""
+    limite = datetime.now(timezone.utc) - timedelta(minutes=PENDING_GRACE_MINUTES)
+    db = SessionLocal()
+    try:
+        document_ids = db.query(Document.id).filter(
+            Document.statut_traitement == StatutTraitement.EN_ATTENTE,
+            Document.created_at < limite,
+            or_(Document.traitement_lance_at.is_(None), Document.traitement_lance_at < limite)
+        ).order_by(Document.created_at).limit(REQUEUE_BATCH_SIZE).all()
+    finally:
+        db.close()
+
+    lances = launch_pipelines(document_id for document_id, in document_ids)
+    if lances:
+        logger.info(f"{lances} traitement(s) de document relancé(s)")
+    return {"requeued": lances}
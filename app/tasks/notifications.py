@@ -1,6 +1,5 @@
 from celery import shared_task
-import asyncio
-from app.core.websocket import manager
+from app.core.websocket import publish_user_notification
 
 
 @shared_task
@@ -13,9 +12,7 @@ def notify_dossier_created(user_id: int, dossier_data: dict):
         "message": f"Nouveau dossier créé : {dossier_data.get('nom_client')}"
     }
     
-    asyncio.create_task(
-        manager.notify_dossier_update(user_id, notification_data)
-    )
+    publish_user_notification(user_id, "dossier_update", notification_data)
     
     return {"notified": True}
 
@@ -39,9 +36,7 @@ def notify_dossier_updated(user_id: int, dossier_data: dict, changes: dict):
         "changes": ", ".join(change_summary)
     }
     
-    asyncio.create_task(
-        manager.notify_dossier_update(user_id, notification_data)
-    )
+    publish_user_notification(user_id, "dossier_update", notification_data)
     
     return {"notified": True}
 
@@ -56,8 +51,6 @@ def notify_dossier_completed(user_id: int, dossier_data: dict):
         "message": f"Dossier complété : {dossier_data.get('nom_client')} ✓"
     }
     
-    asyncio.create_task(
-        manager.notify_dossier_update(user_id, notification_data)
-    )
+    publish_user_notification(user_id, "dossier_update", notification_data)
     
     return {"notified": True}
\ No newline at end of file
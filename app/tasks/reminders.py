@@ -2,12 +2,11 @@ from celery import shared_task
 from sqlalchemy.orm import Session
 from sqlalchemy import and_
 from datetime import datetime, date, timedelta
-import asyncio
 
 from app.core.database import SessionLocal
 from app.models.dossier import Dossier, StatusDossier, PrioriteDossier
 from app.models.user import User
-from app.core.websocket import manager
+from app.core.websocket import publish_user_notification
 
 
 def get_db():
@@ -48,9 +47,7 @@ def check_deadlines():
             }
             
             # Envoyer via WebSocket
-            asyncio.create_task(
-                manager.notify_deadline_reminder(dossier.user_id, reminder_data)
-            )
+            publish_user_notification(dossier.user_id, "deadline_reminder", reminder_data)
         
         # Dossiers avec échéance dans une semaine
         dossiers_next_week = db.query(Dossier).filter(
@@ -71,9 +68,7 @@ def check_deadlines():
                 "urgence": "moyenne"
             }
             
-            asyncio.create_task(
-                manager.notify_deadline_reminder(dossier.user_id, reminder_data)
-            )
+            publish_user_notification(dossier.user_id, "deadline_reminder", reminder_data)
             
         return {
             "tomorrow": len(dossiers_tomorrow),
@@ -107,9 +102,7 @@ def check_urgent_dossiers():
                 "niveau": "urgent"
             }
             
-            asyncio.create_task(
-                manager.notify_new_alert(dossier.user_id, alert_data)
-            )
+            publish_user_notification(dossier.user_id, "new_alert", alert_data)
             
         return {"urgent_count": len(dossiers_urgents)}
         
@@ -144,9 +137,7 @@ def check_overdue_dossiers():
                 "niveau": "urgent"
             }
             
-            asyncio.create_task(
-                manager.notify_new_alert(dossier.user_id, alert_data)
-            )
+            publish_user_notification(dossier.user_id, "new_alert", alert_data)
             
         # Dossiers en retard depuis plus de 3 jours
         critical_date = today - timedelta(days=3)
@@ -168,9 +159,7 @@ def check_overdue_dossiers():
                 "niveau": "critique"
             }
             
-            asyncio.create_task(
-                manager.notify_new_alert(dossier.user_id, alert_data)
-            )
+            publish_user_notification(dossier.user_id, "new_alert", alert_data)
             
         return {
             "new_overdue": len(new_overdue),
@@ -229,9 +218,7 @@ def send_daily_report():
                 "date": today.isoformat()
             }
             
-            asyncio.create_task(
-                manager.notify_deadline_reminder(user.id, report_data)
-            )
+            publish_user_notification(user.id, "deadline_reminder", report_data)
             
         return {"users_notified": len(users)}
         
@@ -0,0 +1,17 @@
+from celery import shared_task
+
+from app.core.database import SessionLocal
+from app.services.blob_references import collect_garbage
+
+
+@shared_task
+def collect_orphan_blobs():
+    """Supprimer les blobs qui ne sont plus référencés par aucun document"""
+    db = SessionLocal()
+    try:
+        return collect_garbage(db)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
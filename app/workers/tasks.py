@@ -237,7 +237,9 @@ def cleanup_old_notifications():
 
 @shared_task(name="app.workers.tasks.process_document")
 def process_document(document_id: int):
-    """Traiter un document avec l'IA (OCR, extraction de données)"""
-    # TODO: Implémenter le traitement IA des documents
-    logger.info(f"Traitement du document {document_id}")
-    return {"status": "pending", "document_id": document_id}
\ No newline at end of file
+    """Lancer le traitement d'un document (validation, aperçu, texte, rapprochement)"""
+    from app.tasks.documents import document_pipeline
+
+    result = document_pipeline(document_id).apply_async()
+    logger.info(f"Traitement du document {document_id} lancé")
+    return {"status": "queued", "document_id": document_id, "task_id": result.id}
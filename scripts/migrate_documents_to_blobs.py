@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Script pour ranger les fichiers des documents existants dans le blob store
+(stockage par contenu, voir app/core/blob_store.py).
+
+Chaque fichier local hors du blob store est copié sous son SHA-256 vers le
+backend configuré (STORAGE_BACKEND : disque local ou bucket S3), le document
+est mis à jour avec la clé du blob (commit par lot), puis l'ancien fichier est
+supprimé. Les doublons ne sont conservés qu'une fois. Peut être relancé sans
+risque.
+"""
+
+import sys
+import os
+import time
+
+# Ajouter le répertoire parent au PYTHONPATH
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.blob_store import blob_store
+from app.core.storage import storage_key
+from app.core.database import SessionLocal, configure_database
+from app.core.file_validator import FileValidator
+from app.models.document import Document
+from app.services import blob_references  # noqa: F401  (comptage des références aux blobs)
+
+
+def main(batch_size: int):
+    configure_database("script")
+    db = SessionLocal()
+
+    try:
+        debut = time.monotonic()
+        migres = absents = 0
+        dernier_id = 0
+        while True:
+            documents = (
+                db.query(Document)
+                .filter(Document.id > dernier_id)
+                .order_by(Document.id)
+                .limit(batch_size)
+                .all()
+            )
+            if not documents:
+                break
+            dernier_id = documents[-1].id
+
+            anciens_fichiers = set()
+            for document in documents:
+                ancien = document.chemin_fichier
+                if storage_key(ancien).startswith(f"{blob_store.prefix}/"):
+                    continue
+                if not os.path.exists(ancien):
+                    absents += 1
+                    continue
+
+                sha256 = FileValidator.calculate_file_hash(ancien)
+                temp_key = blob_store.new_temp_key()
+                writer = blob_store.backend.open_writer(temp_key)
+                try:
+                    with open(ancien, "rb") as f:
+                        for chunk in iter(lambda: f.read(FileValidator.CHUNK_SIZE), b""):
+                            writer.write(chunk)
+                    writer.commit()
+                except Exception:
+                    writer.abort()
+                    raise
+                document.chemin_fichier, _ = blob_store.ingest(temp_key, sha256)
+                document.hash_fichier = sha256
+                anciens_fichiers.add(ancien)
+
+            db.commit()
+            for ancien in anciens_fichiers:
+                if os.path.exists(ancien):
+                    os.remove(ancien)
+            migres += len(anciens_fichiers)
+            print(f"… {migres} fichier(s) migré(s) (jusqu'au document {dernier_id})")
+
+        print(
+            f"✅ {migres} fichier(s) rangé(s) dans le blob store en {time.monotonic() - debut:.1f}s"
+            f" ({absents} fichier(s) introuvable(s))"
+        )
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Erreur lors de la migration: {e}")
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Range les fichiers des documents dans le blob store")
+    parser.add_argument("--batch-size", type=int, default=200, help="Nombre de documents par lot")
+
+    args = parser.parse_args()
+    main(args.batch_size)
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Script pour recalculer entièrement la table d'avancement matérialisée
+(avancement_dossiers) à partir des échéances, saisies comptables et
+déclarations fiscales.
+
+Le recalcul se fait par lots de dossiers, avec un commit par lot. À lancer
+après la migration ou si la table est suspectée désynchronisée.
+"""
+
+import sys
+import os
+import time
+
+# Ajouter le répertoire parent au PYTHONPATH
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.database import SessionLocal, configure_database
+from app.services.avancement_service import rebuild_avancement
+
+
+def main(batch_size: int, cabinet_id: int = None):
+    configure_database("script")
+    db = SessionLocal()
+
+    try:
+        debut = time.monotonic()
+        traites = rebuild_avancement(db, batch_size=batch_size, cabinet_id=cabinet_id)
+        print(f"✅ Avancement recalculé pour {traites} dossier(s) en {time.monotonic() - debut:.1f}s")
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Erreur lors du recalcul: {e}")
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Recalcule la table d'avancement des dossiers")
+    parser.add_argument("--batch-size", type=int, default=500, help="Nombre de dossiers par lot")
+    parser.add_argument("--cabinet-id", type=int, default=None, help="Limiter à un cabinet")
+
+    args = parser.parse_args()
+    main(args.batch_size, args.cabinet_id)
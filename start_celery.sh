@@ -9,7 +9,8 @@ echo "Activation de l'environnement virtuel..."
 source venv/bin/activate
 
 echo "Démarrage de Celery Worker..."
-celery -A app.core.celery_config worker --loglevel=info &
+celery -A app.core.celery_config worker --loglevel=info \
+    --queues=celery,documents.validation,documents.preview,documents.extraction,documents.matching &
 
 echo "Démarrage de Celery Beat..."
 celery -A app.core.celery_config beat --loglevel=info &
@@ -3,18 +3,18 @@ Configuration pytest et fixtures partagées
 """
 import os
 import pytest
-from typing import Generator
+from typing import Generator, Optional
 
 # Forcer l'utilisation de l'environnement de test
 os.environ["ENV"] = "test"
 os.environ["ENVIRONMENT"] = "test"
 os.environ["DATABASE_URL"] = "sqlite:///:memory:"
 os.environ["SECRET_KEY"] = "test-secret-key-for-testing-only"
-os.environ["CORS_ORIGINS"] = "http://localhost:3000"
+os.environ["CORS_ORIGINS"] = '["http://localhost:3000"]'
 os.environ["REDIS_URL"] = "redis://localhost:6379/15"
 os.environ["CELERY_BROKER_URL"] = "redis://localhost:6379/15"
 os.environ["CELERY_RESULT_BACKEND"] = "redis://localhost:6379/15"
-os.environ["UPLOAD_ALLOWED_EXTENSIONS"] = ".pdf,.doc,.docx,.xls,.xlsx,.png,.jpg,.jpeg"
+os.environ["UPLOAD_ALLOWED_EXTENSIONS"] = '[".pdf", ".doc", ".docx", ".xls", ".xlsx", ".png", ".jpg", ".jpeg"]'
 os.environ["UPLOAD_MAX_SIZE_MB"] = "10"
 os.environ["UPLOAD_DIRECTORY"] = "/tmp/test_uploads"
 os.environ["LOG_LEVEL"] = "DEBUG"
@@ -26,12 +26,15 @@ os.environ["ENVIRONMENT"] = "test"
 
 # Maintenant importer les modules qui dépendent de la config
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.pool import StaticPool
 
 from app.core.database import Base, get_db
 from app.main import app
+from app.models.cabinet import Cabinet
+from app.models.dossier import Dossier, StatusDossier
+from app.models.user import User
 
 
 # Configuration de la base de données de test
@@ -79,6 +82,88 @@ def db_session(db_engine) -> Generator[Session, None, None]:
     connection.close()
 
 
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers", "foreign_keys: vérifie les clés étrangères dans la base du fixture db"
+    )
+
+
+@pytest.fixture
+def db(request) -> Generator[Session, None, None]:
+    """
+    Session sur une base SQLite en mémoire propre au test (tables créées puis
+    supprimées). Les clés étrangères ne sont vérifiées que pour les tests
+    marqués @pytest.mark.foreign_keys.
+    """
+    test_engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    if request.node.get_closest_marker("foreign_keys"):
+        @event.listens_for(test_engine, "connect")
+        def _foreign_keys(dbapi_connection, connection_record):
+            dbapi_connection.execute("PRAGMA foreign_keys=ON")
+
+    Base.metadata.create_all(bind=test_engine)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=test_engine)()
+    yield session
+    session.close()
+    Base.metadata.drop_all(bind=test_engine)
+    test_engine.dispose()
+
+
+class DossierFactory:
+    """Crée des dossiers d'un cabinet et d'un utilisateur de test (créés au premier appel)"""
+
+    def __init__(self, db: Session):
+        self.db = db
+        self._cabinet: Optional[Cabinet] = None
+        self._user: Optional[User] = None
+
+    @property
+    def cabinet(self) -> Cabinet:
+        if self._cabinet is None:
+            self._cabinet = Cabinet(nom="Cabinet", slug="cabinet")
+            self.db.add(self._cabinet)
+            self.db.flush()
+        return self._cabinet
+
+    @property
+    def user(self) -> User:
+        if self._user is None:
+            self._user = User(cabinet_id=self.cabinet.id, username="u", email="u@x.fr", hashed_password="x")
+            self.db.add(self._user)
+            self.db.flush()
+        return self._user
+
+    def build(self, reference: str = "COMPTA-2025-0001", **fields) -> Dossier:
+        """Dossier COMPTABILITE non persisté ; fields surcharge les valeurs par défaut"""
+        values = dict(
+            cabinet_id=self.cabinet.id,
+            user_id=self.user.id,
+            nom_client="Client",
+            type_dossier="COMPTABILITE",
+            services_list=[],
+            statut=StatusDossier.NOUVEAU,
+        )
+        values.update(fields)
+        return Dossier(reference=reference, **values)
+
+    def __call__(self, reference: str = "COMPTA-2025-0001", **fields) -> Dossier:
+        """Dossier ajouté à la session (flush, sans commit)"""
+        dossier = self.build(reference, **fields)
+        self.db.add(dossier)
+        self.db.flush()
+        return dossier
+
+
+@pytest.fixture
+def make_dossier(db) -> DossierFactory:
+    """Fabrique de dossiers sur la base du fixture db"""
+    return DossierFactory(db)
+
+
 @pytest.fixture(scope="function")
 def client(db_session) -> Generator[TestClient, None, None]:
     """Créer un client de test FastAPI"""
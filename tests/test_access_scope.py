@@ -0,0 +1,98 @@
+"""
+Tests pour le périmètre d'accès des collaborateurs
+"""
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core import database
+from app.core.database import Base
+
+from app.models.client import Client
+from app.models.dossier import Dossier
+from app.models.user import User
+from app.services.access_scope import get_access_scope, invalidate_access_scope, local_scope_cache
+
+
+@pytest.fixture(autouse=True)
+def vider_cache():
+    local_scope_cache.clear()
+
+
+@pytest.fixture
+def dossier_de(db, make_dossier):
+    def creer(nom_client: str) -> Dossier:
+        dossier = make_dossier(f"COMPTA-{nom_client}", nom_client=nom_client)
+        db.commit()
+        return dossier
+    return creer
+
+
+def make_client(db, nom: str, user_id: int) -> Client:
+    client = Client(cabinet_id=1, nom=nom, forme_juridique="SARL", user_id=user_id)
+    db.add(client)
+    db.commit()
+    return client
+
+
+class TestAccessScope:
+    """Tests du périmètre d'accès"""
+
+    def test_manager_non_restreint(self, db):
+        scope = get_access_scope(db, User(id=1, role="manager"))
+
+        assert not scope.restricted
+        assert scope.can_access(Dossier(nom_client="Quelconque"))
+
+    def test_collaborateur_filtre_sql(self, db, dossier_de):
+        collaborateur = User(id=2, role="collaborateur")
+        make_client(db, "Alpha", user_id=2)
+        make_client(db, "Beta", user_id=3)
+        dossier_de("Alpha")
+        dossier_de("Beta")
+
+        scope = get_access_scope(db, collaborateur)
+        dossiers = scope.filter_dossiers(db.query(Dossier)).all()
+
+        assert [d.nom_client for d in dossiers] == ["Alpha"]
+        with pytest.raises(HTTPException) as exc:
+            scope.check(Dossier(nom_client="Beta"))
+        assert exc.value.status_code == 403
+
+    def test_aucun_client_aucun_dossier(self, db, dossier_de):
+        dossier_de("Alpha")
+        scope = get_access_scope(db, User(id=2, role="collaborateur"))
+
+        assert scope.filter_dossiers(db.query(Dossier)).count() == 0
+
+    def test_cache_et_invalidation(self, db):
+        collaborateur = User(id=2, role="collaborateur")
+        make_client(db, "Alpha", user_id=2)
+        get_access_scope(db, collaborateur)
+
+        statements = []
+        event.listen(db.get_bind(), "before_cursor_execute",
+                     lambda conn, cursor, statement, *args: statements.append(statement))
+
+        # Deuxième appel servi par le cache local, sans requête
+        assert get_access_scope(db, collaborateur).client_names == {"Alpha"}
+        assert statements == []
+
+        make_client(db, "Gamma", user_id=2)
+        invalidate_access_scope(2)
+        assert get_access_scope(db, collaborateur).client_names == {"Alpha", "Gamma"}
+
+    def test_session_replique_relue_sur_le_primaire(self, db, monkeypatch):
+        collaborateur = User(id=2, role="collaborateur")
+        make_client(db, "Alpha", user_id=2)
+
+        # Réplique en retard : l'assignation n'y est pas encore visible
+        replica = create_engine("sqlite://")
+        Base.metadata.create_all(replica)
+        monkeypatch.setattr(database, "replica_engine", replica)
+        monkeypatch.setattr(database, "SessionLocal", sessionmaker(bind=db.get_bind()))
+
+        with Session(bind=replica) as read_db:
+            assert database.is_replica_session(read_db)
+            assert get_access_scope(read_db, collaborateur).client_names == {"Alpha"}
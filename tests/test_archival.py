@@ -0,0 +1,131 @@
+"""
+Tests de l'archivage des dossiers clos
+"""
+from datetime import date
+
+import pytest
+from fastapi import BackgroundTasks, HTTPException
+from sqlalchemy import func, select
+
+from app.api.dossiers import _build_daily_point, update_document_requis_applicable, update_saisie, upload_documents
+from app.models import (
+    DocumentRequis, DocumentRequisArchive, Dossier, Echeance, SaisieComptable, SaisieComptableArchive, StatusDossier,
+    User
+)
+from app.models.document import TypeDocument
+from app.services.archival import archive_closed_dossiers, archive_dossiers, restore_dossiers, saisie_model
+from app.services.dossier_deletion import delete_dossiers
+
+
+pytestmark = pytest.mark.foreign_keys
+
+
+@pytest.fixture
+def creer_dossier(db, make_dossier):
+    cabinet = make_dossier.cabinet
+
+    def creer(reference: str, annee: int, statut: StatusDossier) -> Dossier:
+        dossier = make_dossier(reference, statut=statut)
+        for mois in (11, 12):
+            echeance = Echeance(cabinet_id=cabinet.id, dossier_id=dossier.id, mois=mois, annee=annee,
+                                periode_label=f"{mois}/{annee}", date_echeance=date(annee, mois, 15))
+            db.add(echeance)
+            db.flush()
+            db.add_all([
+                SaisieComptable(cabinet_id=cabinet.id, dossier_id=dossier.id, echeance_id=echeance.id,
+                                type_journal="BANQUE", mois=mois, annee=annee, est_complete=True),
+                DocumentRequis(cabinet_id=cabinet.id, dossier_id=dossier.id, echeance_id=echeance.id,
+                               type_document=TypeDocument.RELEVE_BANCAIRE, mois=mois, annee=annee,
+                               est_fourni=True),
+            ])
+        db.commit()
+        return dossier
+
+    return creer
+
+
+def compter(db, model, dossier_id: int) -> int:
+    return db.scalar(select(func.count()).select_from(model).where(model.dossier_id == dossier_id))
+
+
+class TestArchival:
+    """Tests du déplacement vers le tier d'archive et retour"""
+
+    def test_archivage_et_restauration(self, db, creer_dossier):
+        dossier = creer_dossier("C-1", 2022, StatusDossier.COMPLETE)
+        saisie_ids = set(db.scalars(select(SaisieComptable.id).where(SaisieComptable.dossier_id == dossier.id)))
+
+        resultat = archive_dossiers(db, dossier.cabinet_id, [dossier.id])
+        db.commit()
+
+        assert resultat["rows"] == {"saisies_comptables": 2, "documents_requis": 2}
+        assert dossier.statut == StatusDossier.ARCHIVE and dossier.archived_at is not None
+        assert compter(db, SaisieComptable, dossier.id) == 0 and compter(db, DocumentRequis, dossier.id) == 0
+        # Lecture transparente : même saisies, lues dans l'archive
+        Saisie = saisie_model(dossier)
+        assert set(db.scalars(select(Saisie.id).where(Saisie.dossier_id == dossier.id))) == saisie_ids
+
+        restore_dossiers(db, dossier.cabinet_id, [dossier.id])
+        db.commit()
+
+        assert dossier.statut == StatusDossier.COMPLETE and dossier.archived_at is None
+        assert set(db.scalars(select(SaisieComptable.id).where(SaisieComptable.dossier_id == dossier.id))) == saisie_ids
+        assert compter(db, SaisieComptableArchive, dossier.id) == 0
+        assert compter(db, DocumentRequisArchive, dossier.id) == 0
+
+    def test_exercices_clos_seulement(self, db, creer_dossier):
+        ancien = creer_dossier("C-1", 2022, StatusDossier.COMPLETE)
+        recent = creer_dossier("C-2", 2024, StatusDossier.COMPLETE)
+        en_cours = creer_dossier("C-3", 2022, StatusDossier.EN_COURS)
+
+        assert archive_closed_dossiers(db, annee_limite=2024) == {"archived": 1}
+
+        assert [d.id for d in db.scalars(select(Dossier).where(Dossier.archived_at.is_not(None)))] == [ancien.id]
+        assert compter(db, SaisieComptable, recent.id) == 2 and compter(db, SaisieComptable, en_cours.id) == 2
+
+    def test_suppression_d_un_dossier_archive(self, db, creer_dossier):
+        dossier = creer_dossier("C-1", 2022, StatusDossier.COMPLETE)
+        dossier_id, cabinet_id = dossier.id, dossier.cabinet_id
+        archive_dossiers(db, cabinet_id, [dossier_id])
+        db.commit()
+
+        assert delete_dossiers(db, cabinet_id, [dossier_id])["deleted"] == [dossier_id]
+        db.commit()
+        assert compter(db, SaisieComptableArchive, dossier_id) == 0
+
+    def test_point_quotidien_sans_dossiers_archives(self, db, creer_dossier):
+        archive = creer_dossier("C-1", 2022, StatusDossier.COMPLETE)
+        actif = creer_dossier("C-2", 2022, StatusDossier.EN_COURS)
+        archive.date_echeance = actif.date_echeance = date(2023, 1, 15)
+        archive_dossiers(db, archive.cabinet_id, [archive.id])
+        db.commit()
+
+        point = _build_daily_point(db, date(2023, 1, 16))
+
+        assert [d.id for d in point.dossiers_retard] == [actif.id]
+        assert point.statistiques["total_actifs"] == 1
+
+    @pytest.mark.asyncio
+    async def test_dossier_archive_en_lecture_seule(self, db, creer_dossier):
+        dossier = creer_dossier("C-1", 2022, StatusDossier.COMPLETE)
+        saisie_id = db.scalar(select(SaisieComptable.id).where(SaisieComptable.dossier_id == dossier.id))
+        document_requis_id = db.scalar(select(DocumentRequis.id).where(DocumentRequis.dossier_id == dossier.id))
+        archive_dossiers(db, dossier.cabinet_id, [dossier.id])
+        db.commit()
+        manager = User(id=dossier.user_id, cabinet_id=dossier.cabinet_id, role="manager")
+
+        with pytest.raises(HTTPException) as exc:
+            await update_saisie(saisie_id, est_complete=False, current_user=manager, db=db)
+        assert exc.value.status_code == 409
+        with pytest.raises(HTTPException) as exc:
+            await update_document_requis_applicable(document_requis_id, est_applicable=False,
+                                                    current_user=manager, db=db)
+        assert exc.value.status_code == 409
+        with pytest.raises(HTTPException) as exc:
+            await upload_documents(dossier.id, BackgroundTasks(), files=[], type=None, echeance_id=None, mois=None,
+                                   annee=None, current_user=manager, cabinet_id=dossier.cabinet_id, db=db)
+        assert exc.value.status_code == 409
+        # Une ligne qui n'existe nulle part reste introuvable
+        with pytest.raises(HTTPException) as exc:
+            await update_saisie(saisie_id + 1000, est_complete=False, current_user=manager, db=db)
+        assert exc.value.status_code == 404
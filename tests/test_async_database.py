@@ -0,0 +1,71 @@
+"""
+Tests pour la session asynchrone et les endpoints migrés
+"""
+import pytest
+import pytest_asyncio
+from fastapi import Response
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from app.api.dossiers import get_dossier, get_dossier_echeances, list_dossiers
+from app.core.database import Base, async_database_url
+import app.models  # noqa: F401 - enregistre tous les modèles
+from app.models.dossier import Dossier, StatusDossier
+from app.models.user import User
+from app.services.dossier_scaffolding import DossierScaffoldingService
+
+
+@pytest_asyncio.fixture
+async def db():
+    """Session asynchrone sur une base SQLite en mémoire (aiosqlite)"""
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with async_sessionmaker(engine, expire_on_commit=False)() as session:
+        yield session
+    await engine.dispose()
+
+
+def make_dossier(sync_db):
+    scaffolding = DossierScaffoldingService(sync_db, cabinet_id=1, user_id=1)
+    scaffolding.add_dossier(Dossier(
+        cabinet_id=1,
+        user_id=1,
+        reference="COMPTABILITE-2025-0001",
+        nom_client="Client Test",
+        type_dossier="COMPTABILITE",
+        services_list=["COMPTABILITE"],
+        statut=StatusDossier.NOUVEAU
+    ), "COMPTABILITE", annee=2025, type_entreprise="SARL")
+    scaffolding.persist()
+    sync_db.commit()
+
+
+class TestAsyncDatabase:
+    """Tests du moteur asyncio"""
+
+    def test_url_asynchrone(self):
+        assert async_database_url("postgresql://u:p@h:5432/base") == "postgresql+asyncpg://u:p@h:5432/base"
+        assert async_database_url("postgresql+psycopg2://u@h/base") == "postgresql+asyncpg://u@h/base"
+        assert async_database_url("sqlite:///./test.db") == "sqlite+aiosqlite:///./test.db"
+
+    @pytest.mark.asyncio
+    async def test_endpoints_dossiers(self, db):
+        await db.run_sync(make_dossier)
+        user = User(id=1, cabinet_id=1, role="manager")
+
+        response = Response()
+        dossiers = await list_dossiers(
+            response=response, status=None, responsable_id=None, urgent=None,
+            limit=10, cursor=None, include_echeances=True, current_user=user, db=db
+        )
+        assert len(dossiers) == 1
+        assert dossiers[0].echeances_totales == len(dossiers[0].echeances) > 0
+
+        # La consultation fait passer le dossier en cours (écriture asynchrone)
+        dossier = await get_dossier(dossier_id=dossiers[0].id, current_user=user, cabinet_id=1, db=db)
+        assert dossier.statut == StatusDossier.EN_COURS
+
+        echeances = await get_dossier_echeances(dossier_id=dossier.id, current_user=user, cabinet_id=1, db=db)
+        assert [e["mois"] for e in echeances] == sorted(e["mois"] for e in echeances)
+        assert all(e["saisies"] for e in echeances)
@@ -0,0 +1,72 @@
+"""
+Tests de l'autocomplétion des clients et des références de dossiers
+"""
+import pytest
+from sqlalchemy import select, text
+from sqlalchemy.dialects import postgresql
+
+from app.models import Client
+from app.services import autocomplete as autocomplete_service
+from app.services.access_scope import AccessScope
+from app.services.autocomplete import autocomplete, normalize
+
+
+@pytest.fixture(autouse=True)
+def vider_cache():
+    autocomplete_service.local_prefix_caches.clear()
+
+
+@pytest.fixture
+def cabinet(db, make_dossier):
+    cabinet, user = make_dossier.cabinet, make_dossier.user
+    db.add_all([
+        Client(cabinet_id=cabinet.id, nom="Garage de la Gare", numero_client="CLI00001"),
+        Client(cabinet_id=cabinet.id, nom="Boulangerie Martin", numero_client="CLI00002", user_id=user.id),
+        Client(cabinet_id=cabinet.id, nom="Martin Transports", numero_client="CLI00003"),
+        Client(cabinet_id=cabinet.id, nom="Martin Ancien", numero_client="CLI00004", is_active=False),
+    ])
+    make_dossier("COMPTA-2025-0012", nom_client="Boulangerie Martin")
+    db.commit()
+    return cabinet, user
+
+
+class TestAutocomplete:
+    """Tests des suggestions et de leur cache"""
+
+    def test_debut_de_nom_en_premier(self, db, cabinet):
+        cabinet, user = cabinet
+        scope = AccessScope(user_id=user.id, restricted=False)
+
+        suggestions = autocomplete(db, cabinet.id, scope, "  MARTIN ")
+
+        assert [s["nom"] for s in suggestions] == ["Martin Transports", "Boulangerie Martin"]
+        assert autocomplete(db, cabinet.id, scope, "0012", kind="dossiers")[0]["reference"] == "COMPTA-2025-0012"
+
+    def test_perimetre_collaborateur(self, db, cabinet):
+        cabinet, user = cabinet
+        scope = AccessScope(user_id=user.id, restricted=True, client_ids=[2], client_names=["Boulangerie Martin"])
+
+        assert [s["nom"] for s in autocomplete(db, cabinet.id, scope, "martin")] == ["Boulangerie Martin"]
+        assert autocomplete(db, cabinet.id, AccessScope(user_id=99, restricted=True), "martin") == []
+
+    def test_cache_invalide_au_commit(self, db, cabinet):
+        cabinet, user = cabinet
+        scope = AccessScope(user_id=user.id, restricted=False)
+        assert len(autocomplete(db, cabinet.id, scope, "gar")) == 1
+
+        # Écriture hors ORM : la saisie suivante est servie par le cache
+        db.execute(text("UPDATE clients SET nom = 'Autre' WHERE numero_client = 'CLI00001'"))
+        db.commit()
+        assert len(autocomplete(db, cabinet.id, scope, "gar")) == 1
+
+        client = db.scalar(select(Client).where(Client.numero_client == "CLI00002"))
+        client.nom = "Garage Martin"
+        db.commit()
+        assert [s["nom"] for s in autocomplete(db, cabinet.id, scope, "gar")] == ["Garage Martin"]
+
+    def test_requete_postgresql(self):
+        condition, _ = autocomplete_service._match(Client.nom, normalize("Éric_"), postgresql=True)
+
+        compiled = condition.compile(dialect=postgresql.dialect())
+        assert "f_unaccent(lower(clients.nom))" in str(compiled) and "<%" in str(compiled)
+        assert sorted(compiled.params.values()) == ["%eric\\_%", "eric_"]
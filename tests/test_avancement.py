@@ -0,0 +1,104 @@
+"""
+Tests pour la table d'avancement matérialisée
+"""
+from datetime import date
+
+import pytest
+
+from app.models.avancement import AvancementDossier
+from app.models.echeance import Echeance
+from app.models.saisie import SaisieComptable
+from app.services.avancement_service import rebuild_avancement
+from app.services.dossier_scaffolding import DossierScaffoldingService
+
+
+def snapshot(db):
+    return sorted(
+        (a.dossier_id, a.date_limite, a.total_echeances, a.echeances_completes,
+         a.total_saisies, a.saisies_completes, a.total_declarations, a.declarations_completes)
+        for a in db.query(AvancementDossier).all()
+    )
+
+
+@pytest.fixture
+def make_dossiers(db, make_dossier):
+    def creer():
+        scaffolding = DossierScaffoldingService(db, cabinet_id=make_dossier.cabinet.id, user_id=make_dossier.user.id)
+        for service_type in ['COMPTABILITE', 'FISCALITE']:
+            scaffolding.add_dossier(make_dossier.build(
+                f"{service_type}-2025-0001",
+                nom_client="Client Test",
+                type_dossier=service_type,
+                services_list=[service_type]
+            ), service_type, annee=2025, type_entreprise='SARL')
+        scaffolding.persist()
+        db.commit()
+    return creer
+
+
+class TestAvancement:
+    """Tests de la maintenance incrémentale"""
+
+    def test_rempli_a_la_creation(self, db, make_dossiers):
+        make_dossiers()
+
+        lignes = db.query(AvancementDossier).all()
+        assert sum(a.total_echeances for a in lignes) == db.query(Echeance).count()
+        assert sum(a.total_declarations for a in lignes) > 0
+
+    def test_mise_a_jour_au_commit(self, db, make_dossiers):
+        make_dossiers()
+        echeance = db.query(Echeance).filter(Echeance.mois == 3).first()
+
+        echeance.statut = 'COMPLETE'
+        db.commit()
+
+        ligne = db.query(AvancementDossier).filter(
+            AvancementDossier.dossier_id == echeance.dossier_id,
+            AvancementDossier.date_limite == echeance.date_echeance
+        ).one()
+        assert ligne.echeances_completes == 1
+        assert ligne.annee == echeance.date_echeance.year
+
+    def test_saisie_completee(self, db, make_dossiers):
+        make_dossiers()
+        saisie = db.query(SaisieComptable).filter(SaisieComptable.mois == 4).first()
+        ligne = db.query(AvancementDossier).filter(
+            AvancementDossier.dossier_id == saisie.dossier_id,
+            AvancementDossier.date_limite == saisie.echeance.date_echeance
+        )
+        assert (ligne.one().total_saisies, ligne.one().saisies_completes) == (6, 0)
+
+        saisie.est_complete = True
+        db.commit()
+
+        assert ligne.one().saisies_completes == 1
+        assert ligne.one().echeances_completes == 0
+
+    def test_rollback_sans_effet(self, db, make_dossiers):
+        make_dossiers()
+        avant = snapshot(db)
+
+        db.query(Echeance).first().statut = 'COMPLETE'
+        db.flush()
+        db.rollback()
+        db.commit()
+
+        assert snapshot(db) == avant
+
+    def test_reconstruction_par_lots(self, db, make_dossiers):
+        make_dossiers()
+        db.query(Echeance).filter(Echeance.date_echeance < date(2025, 6, 1)).update({'statut': 'COMPLETE'})
+        db.commit()
+        db.query(AvancementDossier).delete()
+        db.commit()
+
+        assert rebuild_avancement(db, batch_size=1) == 2
+        attendu = snapshot(db)
+
+        # Même résultat quelle que soit la taille des lots
+        db.query(AvancementDossier).delete()
+        db.commit()
+        rebuild_avancement(db)
+        assert snapshot(db) == attendu
+        assert sum(a.echeances_completes for a in db.query(AvancementDossier).all()) > 0
@@ -0,0 +1,90 @@
+"""
+Tests pour le stockage par contenu et le comptage des références
+"""
+import hashlib
+
+import pytest
+
+from app.core.blob_store import BlobStore
+from app.core.storage import LocalStorage, MemoryStorage
+from app.models import Blob, Document
+from app.models.document import TypeDocument
+from app.services.blob_references import collect_garbage
+
+
+@pytest.fixture(params=["local", "memory"])
+def store(request, tmp_path):
+    if request.param == "local":
+        return BlobStore(LocalStorage(str(tmp_path)))
+    return BlobStore(MemoryStorage())
+
+
+def put(store: BlobStore, content: bytes):
+    sha256 = hashlib.sha256(content).hexdigest()
+    temp_key = store.new_temp_key()
+    writer = store.backend.open_writer(temp_key)
+    writer.write(content)
+    writer.commit()
+    key, created = store.ingest(temp_key, sha256)
+    return sha256, key, created
+
+
+class TestBlobStore:
+    """Tests du stockage de blobs"""
+
+    def test_deduplication(self, store):
+        sha256, key, created = put(store, b"releve")
+        _, meme_key, recree = put(store, b"releve")
+
+        assert created is True and recree is False
+        assert meme_key == key == f"blobs/{sha256[:2]}/{sha256[2:4]}/{sha256}"
+        assert list(store.backend.iter_objects("blobs/tmp")) == []
+        assert [h for h, _ in store.iter_blobs()] == [sha256]
+
+    def test_hash_invalide(self, store):
+        with pytest.raises(ValueError):
+            store.key_for("../../etc/passwd")
+
+
+class TestBlobReferences:
+    """Tests des compteurs de références et du ramasse-miettes"""
+
+    def _document(self, db, dossier, sha256, path):
+        return Document(
+            cabinet_id=dossier.cabinet_id, dossier_id=dossier.id, user_id=dossier.user_id,
+            nom="releve.pdf", nom_fichier_stockage="releve.pdf", type=TypeDocument.RELEVE_BANCAIRE,
+            chemin_fichier=path, hash_fichier=sha256, taille=6, mime_type="application/pdf",
+        )
+
+    def test_references_et_gc(self, db, store, make_dossier):
+        dossiers = [
+            make_dossier(ref, type_dossier=type_dossier)
+            for ref, type_dossier in (("C-1", "COMPTABILITE"), ("A-1", "AUDIT"))
+        ]
+        db.commit()
+
+        sha256, path, _ = put(store, b"releve")
+        documents = [self._document(db, dossier, sha256, path) for dossier in dossiers]
+        db.add_all(documents)
+        db.commit()
+        assert db.get(Blob, sha256).ref_count == 2
+
+        db.delete(documents[0])
+        db.commit()
+        db.expire_all()
+        assert db.get(Blob, sha256).ref_count == 1
+        assert collect_garbage(db, store, grace_seconds=0)["files_deleted"] == 0
+
+        db.delete(documents[1])
+        db.commit()
+        db.expire_all()
+        blob = db.get(Blob, sha256)
+        assert blob.ref_count == 0 and blob.orphaned_at is not None
+
+        # Fichier sans ligne (lot d'upload refusé) : supprimé aussi
+        orphelin, _, _ = put(store, b"lot refuse")
+        resultat = collect_garbage(db, store, grace_seconds=0)
+
+        assert resultat == {"rows_deleted": 1, "files_deleted": 2, "temp_deleted": 0}
+        assert db.get(Blob, sha256) is None
+        assert list(store.iter_blobs()) == []
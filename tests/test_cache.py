@@ -0,0 +1,171 @@
+"""
+Tests pour la sérialisation du cache et le décorateur cache_key_wrapper
+"""
+import asyncio
+import pickle
+import time
+from datetime import date, datetime
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pytest
+
+from app.core import cache
+from app.core.cache import cache_key_wrapper, deserialize, serialize
+from app.models.dossier import StatusDossier
+
+
+class TestSerialisation:
+    """Tests du format msgpack du cache"""
+
+    def test_aller_retour(self):
+        valeur = {
+            "total": 3,
+            "taux": 12.5,
+            "montant": Decimal("1500.20"),
+            "echeance": date(2025, 3, 15),
+            "maj": datetime(2025, 3, 1, 8, 30),
+            "statut": StatusDossier.NOUVEAU,
+            "ids": {1, 2},
+            "libelle": "Déclaration",
+            "vide": None,
+        }
+
+        resultat = deserialize(serialize(valeur))
+
+        assert resultat["montant"] == Decimal("1500.20")
+        assert resultat["echeance"] == date(2025, 3, 15)
+        assert resultat["maj"] == datetime(2025, 3, 1, 8, 30)
+        assert resultat["statut"] == StatusDossier.NOUVEAU.value
+        assert sorted(resultat["ids"]) == [1, 2]
+        assert resultat["libelle"] == "Déclaration"
+        assert resultat["vide"] is None
+
+    def test_ancien_format_refuse(self):
+        # Une valeur pickle n'est jamais désérialisée
+        with pytest.raises(ValueError):
+            deserialize(pickle.dumps({"a": 1}))
+
+    def test_objet_non_serialisable(self):
+        with pytest.raises(TypeError):
+            serialize(object())
+
+
+class MemoryCache:
+    """Cache en mémoire exposant l'interface de CacheManager utilisée par le décorateur"""
+
+    def __init__(self):
+        self.values = {}
+        self.locks = {}
+
+    def _make_key(self, prefix, *args):
+        return ":".join([prefix, *args])
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def set(self, key, value, ttl=None, tags=()):
+        self.values[key] = value
+        return True
+
+    def acquire_lock(self, key, timeout=10):
+        if key in self.locks:
+            return None
+        self.locks[key] = "jeton"
+        return "jeton"
+
+    def release_lock(self, key, token):
+        if self.locks.get(key) == token:
+            del self.locks[key]
+
+
+@pytest.fixture
+def memory_cache(monkeypatch):
+    memoire = MemoryCache()
+    monkeypatch.setattr(cache, "cache_manager", memoire)
+    monkeypatch.setattr(cache, "LOCK_POLL_INTERVAL", 0.01)
+    return memoire
+
+
+class TestCacheKeyWrapper:
+    """Tests des clés par cabinet, du recalcul unique et du service périmé"""
+
+    @pytest.mark.asyncio
+    async def test_un_seul_recalcul_par_cabinet(self, memory_cache):
+        appels = []
+
+        @cache_key_wrapper("stats", ttl=60, include_user=False)
+        async def stats(current_user=None, cabinet_id=None):
+            appels.append(cabinet_id)
+            await asyncio.sleep(0.05)
+            return {"cabinet": cabinet_id}
+
+        resultats = await asyncio.gather(*[
+            stats(current_user=SimpleNamespace(id=i, cabinet_id=1 + i % 2), cabinet_id=1 + i % 2)
+            for i in range(10)
+        ])
+
+        assert sorted(appels) == [1, 2]
+        assert {r["cabinet"] for r in resultats[0::2]} == {1}
+        assert {r["cabinet"] for r in resultats[1::2]} == {2}
+
+    def test_valeur_perimee_servie_pendant_le_recalcul(self, memory_cache):
+        compteur = iter(range(100))
+
+        @cache_key_wrapper("stats", ttl=60)
+        def stats(cabinet_id=None):
+            return next(compteur)
+
+        assert stats(cabinet_id=1) == 0
+        cle = next(iter(memory_cache.values))
+        memory_cache.values[cle]["t"] = time.time() - 1
+
+        # Un autre appelant détient le verrou : la valeur périmée est servie
+        memory_cache.locks[cle] = "autre"
+        assert stats(cabinet_id=1) == 0
+
+        # Verrou libre : le premier appelant recalcule
+        del memory_cache.locks[cle]
+        assert stats(cabinet_id=1) == 1
+        assert stats(cabinet_id=1) == 1
+
+
+class TestLocalCache:
+    """Tests du niveau local (LRU avec TTL)"""
+
+    def test_lru_borne_et_compteurs(self):
+        local = cache.LocalCache("test", max_entries=2)
+        local.set("a", 1)
+        local.set("b", 2)
+        assert local.get("a") == 1
+        local.set("c", 3)
+
+        # "b" est le moins récemment utilisé
+        assert local.get("b") is None
+        assert local.get("a") == 1
+        assert local.stats()["evictions"] == 1
+        assert local.stats()["hits"] == 2
+        assert local.stats()["misses"] == 1
+
+    def test_expiration(self, monkeypatch):
+        local = cache.LocalCache("test", ttl=10)
+        local.set("a", 1)
+        maintenant = time.monotonic()
+        monkeypatch.setattr(cache.time, "monotonic", lambda: maintenant + 11)
+        assert local.get("a") is None
+
+    def test_invalidation_diffusee(self, monkeypatch):
+        local = cache.local_cache("test_diffusion")
+        local.set(1, "x")
+        local.set(2, "y")
+        publies = []
+        monkeypatch.setattr(cache.redis_client, "publish", lambda canal, message: publies.append(message))
+
+        cache.invalidate_local("test_diffusion", 1)
+        assert local.get(1) is None
+        assert local.get(2) == "y"
+
+        # Réception du message par un autre processus
+        cache.local_invalidation_listener._handle({"data": publies[0]})
+        cache.local_invalidation_listener._handle({"data": '{"cache": "test_diffusion", "keys": []}'})
+        assert local.get(2) is None
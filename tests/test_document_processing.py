@@ -0,0 +1,151 @@
+"""
+Tests du traitement des documents après l'upload
+"""
+import hashlib
+import io
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+from PIL import Image
+from sqlalchemy.orm import sessionmaker
+
+from app.core.blob_store import BlobStore
+from app.core.celery_config import celery_app
+from app.core.storage import MemoryStorage
+from app.models import Document, DocumentRequis, Echeance, StatutTraitement
+from app.models.document import TypeDocument
+from app.services import document_processing
+from app.tasks import documents as document_tasks
+
+
+@pytest.fixture
+def store():
+    return BlobStore(MemoryStorage())
+
+
+@pytest.fixture
+def dossier(db, make_dossier):
+    dossier = make_dossier("C-1")
+    db.commit()
+    return dossier
+
+
+def deposer(db, store, dossier, nom: str, contenu: bytes, mime_type: str) -> Document:
+    sha256 = hashlib.sha256(contenu).hexdigest()
+    temp_key = store.new_temp_key()
+    writer = store.backend.open_writer(temp_key)
+    writer.write(contenu)
+    writer.commit()
+    key, _ = store.ingest(temp_key, sha256)
+
+    document = Document(
+        cabinet_id=dossier.cabinet_id, dossier_id=dossier.id, user_id=dossier.user_id,
+        nom=nom, nom_fichier_stockage=nom, type=TypeDocument.AUTRE, chemin_fichier=key,
+        hash_fichier=sha256, taille=len(contenu), mime_type=mime_type,
+    )
+    db.add(document)
+    db.commit()
+    return document
+
+
+def traiter(db, store, document_id: int) -> None:
+    document_processing.validate_document(db, document_id, store)
+    document_processing.build_preview(db, document_id, store)
+    document_processing.extract_text(db, document_id, store)
+    document_processing.match_document_requis(db, document_id)
+
+
+class TestDocumentProcessing:
+    """Tests des étapes du traitement"""
+
+    def test_rapprochement_document_requis(self, db, store, dossier):
+        echeance = Echeance(cabinet_id=dossier.cabinet_id, dossier_id=dossier.id, mois=3, annee=2024,
+                            periode_label="Mars 2024", date_echeance=date(2024, 4, 15))
+        db.add(echeance)
+        db.flush()
+        document_requis = DocumentRequis(cabinet_id=dossier.cabinet_id, dossier_id=dossier.id,
+                                         echeance_id=echeance.id, type_document=TypeDocument.RELEVE_BANCAIRE,
+                                         mois=3, annee=2024)
+        db.add(document_requis)
+        db.commit()
+
+        document = deposer(db, store, dossier, "export_2024-03.txt",
+                           "Extrait de compte n°12\nSolde au 31/03".encode(), "text/plain")
+        traiter(db, store, document.id)
+        # Relancer une étape ne change rien
+        traiter(db, store, document.id)
+
+        db.refresh(document)
+        db.refresh(document_requis)
+        assert document.statut_traitement == StatutTraitement.TRAITE
+        assert document.type == TypeDocument.RELEVE_BANCAIRE
+        assert (document.mois, document.annee, document.echeance_id) == (3, 2024, echeance.id)
+        assert "Extrait de compte" in document.texte_extrait
+        assert document_requis.est_fourni is True
+
+    def test_pdf_actif_rejete(self, db, store, dossier):
+        pdf = b"%PDF-1.4\n1 0 obj << /OpenAction << /S /JavaScript /JS (app.alert(1)) >> >>\n%%EOF"
+        document = deposer(db, store, dossier, "facture.pdf", pdf, "application/pdf")
+        traiter(db, store, document.id)
+
+        db.refresh(document)
+        assert document.statut_traitement == StatutTraitement.REJETE
+        assert "JavaScript" in document.erreur_traitement
+        assert document.texte_extrait is None
+
+    def test_apercu_image(self, db, store, dossier):
+        buffer = io.BytesIO()
+        Image.new("RGB", (1200, 800), "white").save(buffer, format="PNG")
+        document = deposer(db, store, dossier, "scan.png", buffer.getvalue(), "image/png")
+        traiter(db, store, document.id)
+
+        db.refresh(document)
+        assert document.cle_apercu == store.preview_key_for(document.hash_fichier)
+        apercu = Image.open(io.BytesIO(b"".join(store.backend.iter_chunks(document.cle_apercu))))
+        assert max(apercu.size) == 320
+
+    @pytest.mark.parametrize("nom, attendu", [
+        ("Relevé bancaire mars 2024.pdf", (TypeDocument.RELEVE_BANCAIRE, (3, 2024))),
+        ("bulletin_de_paie_02-2025.pdf", (TypeDocument.ETAT_PAIE, (2, 2025))),
+        ("photo.jpg", (None, None)),
+    ])
+    def test_type_et_periode(self, nom, attendu):
+        assert (document_processing.guess_type(nom), document_processing.guess_period(nom)) == attendu
+
+    def test_files_dediees(self):
+        files = {
+            celery_app.amqp.router.route({}, task.name)["queue"].name
+            for task in (document_tasks.validate_document, document_tasks.build_preview,
+                         document_tasks.extract_text, document_tasks.match_document_requis)
+        }
+        assert len(files) == 4
+
+    def test_reprise_sans_doubler_les_chaines_en_file(self, db, store, dossier, monkeypatch):
+        lances = []
+
+        class Chaine:
+            def __init__(self, document_id: int):
+                self.document_id = document_id
+
+            def apply_async(self):
+                lances.append(self.document_id)
+
+        monkeypatch.setattr(document_tasks, "SessionLocal", sessionmaker(bind=db.get_bind()))
+        monkeypatch.setattr(document_tasks, "document_pipeline", Chaine)
+
+        maintenant = datetime.now(timezone.utc)
+        ancien = maintenant - timedelta(hours=2)
+        jamais_lance, en_file, perdu = (deposer(db, store, dossier, f"{nom}.txt", nom.encode(), "text/plain")
+                                        for nom in ("jamais_lance", "en_file", "perdu"))
+        for document, lance_at in ((jamais_lance, None), (en_file, maintenant), (perdu, ancien)):
+            document.created_at = ancien
+            document.traitement_lance_at = lance_at
+        db.commit()
+
+        assert document_tasks.requeue_pending_documents() == {"requeued": 2}
+        assert sorted(lances) == sorted([jamais_lance.id, perdu.id])
+        db.expire_all()
+        assert jamais_lance.traitement_lance_at is not None
+
+        # Relancés à l'instant : pas de nouvel envoi au passage suivant
+        assert document_tasks.requeue_pending_documents() == {"requeued": 0}
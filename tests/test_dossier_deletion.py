@@ -0,0 +1,113 @@
+"""
+Tests de la suppression ensembliste des dossiers
+"""
+from datetime import date
+
+import pytest
+from sqlalchemy import func, select
+
+from app.models import (
+    Alerte, DeclarationFiscale, Document, DocumentRequis, Dossier, Echeance, HistoriqueDossier, Notification,
+    SaisieComptable
+)
+from app.models.alerte import TypeAlerte
+from app.models.avancement import AvancementDossier
+from app.models.blob import Blob
+from app.models.document import TypeDocument
+from app.services import blob_references  # noqa: F401  (comptage des références aux blobs)
+from app.services.dossier_deletion import delete_dossiers
+
+
+# Contraintes de clés étrangères vérifiées : l'ordre des DELETE compte
+pytestmark = pytest.mark.foreign_keys
+
+
+@pytest.fixture
+def dossiers(db, make_dossier):
+    cabinet, user = make_dossier.cabinet, make_dossier.user
+
+    def dossier(reference: str, sha256: str) -> Dossier:
+        d = make_dossier(reference)
+        for mois in (1, 2):
+            echeance = Echeance(cabinet_id=cabinet.id, dossier_id=d.id, mois=mois, annee=2024,
+                                periode_label=f"{mois}/2024", date_echeance=date(2024, mois, 15))
+            db.add(echeance)
+            db.flush()
+            db.add_all([
+                SaisieComptable(cabinet_id=cabinet.id, dossier_id=d.id, echeance_id=echeance.id,
+                                type_journal="BANQUE", mois=mois, annee=2024),
+                DocumentRequis(cabinet_id=cabinet.id, dossier_id=d.id, echeance_id=echeance.id,
+                               type_document=TypeDocument.RELEVE_BANCAIRE, mois=mois, annee=2024),
+                Document(cabinet_id=cabinet.id, dossier_id=d.id, echeance_id=echeance.id, user_id=user.id,
+                         nom=f"releve_{mois}.pdf", nom_fichier_stockage="x", type=TypeDocument.RELEVE_BANCAIRE,
+                         chemin_fichier=f"blobs/{sha256}", hash_fichier=sha256, taille=10),
+            ])
+        alerte = Alerte(cabinet_id=cabinet.id, dossier_id=d.id, type_alerte=TypeAlerte.RETARD, message="Retard")
+        db.add(alerte)
+        db.flush()
+        origine = DeclarationFiscale(cabinet_id=cabinet.id, dossier_id=d.id, type_declaration="TVA",
+                                     regime="MENSUEL", periode_debut=date(2024, 1, 1),
+                                     periode_fin=date(2024, 1, 31), date_limite=date(2024, 2, 15))
+        db.add(origine)
+        db.flush()
+        db.add_all([
+            Notification(cabinet_id=cabinet.id, user_id=user.id, alerte_id=alerte.id, title="t", message="m"),
+            HistoriqueDossier(cabinet_id=cabinet.id, dossier_id=d.id, user_id=user.id, action="creation"),
+            DeclarationFiscale(cabinet_id=cabinet.id, dossier_id=d.id, type_declaration="TVA", regime="MENSUEL",
+                               periode_debut=date(2024, 1, 1), periode_fin=date(2024, 1, 31),
+                               date_limite=date(2024, 2, 15), declaration_origine_id=origine.id),
+            AvancementDossier(cabinet_id=cabinet.id, dossier_id=d.id, date_limite=date(2024, 1, 15),
+                              annee=2024, mois=1),
+        ])
+        return d
+
+    supprime = dossier("C-1", "a" * 64)
+    conserve = dossier("C-2", "b" * 64)
+    # Même contenu qu'un document du dossier conservé
+    db.add(Document(cabinet_id=cabinet.id, dossier_id=supprime.id, user_id=supprime.user_id, nom="copie.pdf",
+                    nom_fichier_stockage="x", type=TypeDocument.AUTRE, chemin_fichier="blobs/b",
+                    hash_fichier="b" * 64, taille=10))
+    db.commit()
+    return cabinet, supprime, conserve
+
+
+def compter(db, model, dossier_id: int) -> int:
+    return db.scalar(select(func.count()).select_from(model).where(model.dossier_id == dossier_id))
+
+
+class TestDossierDeletion:
+    """Tests de la suppression en cascade"""
+
+    def test_suppression_complete(self, db, dossiers):
+        cabinet, supprime, conserve = dossiers
+        supprime_id = supprime.id
+
+        resultat = delete_dossiers(db, cabinet.id, [supprime_id])
+        db.commit()
+
+        assert resultat["deleted"] == [supprime_id]
+        assert resultat["rows"]["documents"] == 3 and resultat["rows"]["notifications"] == 1
+        for model in (Echeance, SaisieComptable, DocumentRequis, Document, Alerte, HistoriqueDossier,
+                      DeclarationFiscale, AvancementDossier):
+            assert compter(db, model, supprime_id) == 0
+            assert compter(db, model, conserve.id) > 0
+        assert db.scalar(select(func.count()).select_from(Notification)) == 1
+        assert db.get(Dossier, supprime_id) is None
+
+    def test_references_aux_blobs(self, db, dossiers):
+        cabinet, supprime, _ = dossiers
+
+        delete_dossiers(db, cabinet.id, [supprime.id])
+        db.commit()
+
+        ref_counts = dict(db.execute(select(Blob.sha256, Blob.ref_count)).all())
+        assert ref_counts == {"a" * 64: 0, "b" * 64: 2}
+        assert db.scalar(select(Blob.orphaned_at).where(Blob.sha256 == "a" * 64)) is not None
+
+    def test_autre_cabinet_ignore(self, db, dossiers):
+        _, supprime, _ = dossiers
+
+        resultat = delete_dossiers(db, supprime.cabinet_id + 1, [supprime.id, 999])
+
+        assert resultat["deleted"] == []
+        assert compter(db, Document, supprime.id) == 3
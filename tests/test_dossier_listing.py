@@ -0,0 +1,81 @@
+"""
+Tests pour le listing agrégé des dossiers
+"""
+from datetime import date, timedelta
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import event
+
+from app.models.alerte import Alerte, TypeAlerte
+from app.models.dossier import Dossier, StatusDossier
+from app.models.echeance import Echeance
+from app.services.dossier_listing import decode_cursor, encode_cursor, fetch_dossiers_page
+
+
+def numero_dossier(make_dossier, numero: int) -> Dossier:
+    return make_dossier(
+        f"COMPTA-2025-{numero:04d}", nom_client=f"Client {numero}", statut=StatusDossier.EN_COURS
+    )
+
+
+def add_echeance(db, dossier: Dossier, mois: int, jours: int, statut: str) -> None:
+    db.add(Echeance(
+        cabinet_id=1,
+        dossier_id=dossier.id,
+        mois=mois,
+        annee=2025,
+        periode_label=f"Mois {mois}",
+        date_echeance=date.today() + timedelta(days=jours),
+        statut=statut
+    ))
+
+
+class TestFetchDossiersPage:
+    """Tests de la projection agrégée"""
+
+    def test_compteurs(self, db, make_dossier):
+        dossier = numero_dossier(make_dossier, 1)
+        add_echeance(db, dossier, 1, -10, 'COMPLETE')
+        add_echeance(db, dossier, 2, -5, 'A_FAIRE')
+        add_echeance(db, dossier, 3, 20, 'A_FAIRE')
+        db.add(Alerte(cabinet_id=1, dossier_id=dossier.id, type_alerte=TypeAlerte.RETARD, message="x", active=True))
+        db.add(Alerte(cabinet_id=1, dossier_id=dossier.id, type_alerte=TypeAlerte.RETARD, message="y", active=False))
+        numero_dossier(make_dossier, 2)
+        db.commit()
+
+        page, next_cursor = fetch_dossiers_page(db, db.query(Dossier), limit=10)
+        compteurs = dict((d.id, c) for d, c in page)[dossier.id]
+
+        assert next_cursor is None
+        assert compteurs['alerts_count'] == 1
+        assert compteurs['echeances_totales'] == 3
+        assert compteurs['echeances_completees'] == 1
+        assert compteurs['has_overdue'] is True
+        assert compteurs['prochaine_echeance_date'] == date.today() + timedelta(days=20)
+
+    def test_une_seule_requete_et_curseur(self, db, make_dossier):
+        for numero in range(1, 6):
+            numero_dossier(make_dossier, numero)
+        db.commit()
+
+        statements = []
+        event.listen(db.get_bind(), "before_cursor_execute",
+                     lambda conn, cursor, statement, *args: statements.append(statement))
+
+        page, next_cursor = fetch_dossiers_page(db, db.query(Dossier), limit=2)
+        assert [d.id for d, _ in page] == [5, 4]
+        assert len(statements) == 1
+
+        page, next_cursor = fetch_dossiers_page(db, db.query(Dossier), limit=2, cursor=next_cursor)
+        assert [d.id for d, _ in page] == [3, 2]
+
+        page, next_cursor = fetch_dossiers_page(db, db.query(Dossier), limit=2, cursor=next_cursor)
+        assert [d.id for d, _ in page] == [1]
+        assert next_cursor is None
+
+    def test_curseur_invalide(self):
+        assert decode_cursor(encode_cursor(42)) == 42
+        with pytest.raises(HTTPException) as exc:
+            decode_cursor("pas-un-curseur")
+        assert exc.value.status_code == 400
@@ -0,0 +1,92 @@
+"""
+Tests pour la création en masse de l'arborescence des dossiers
+"""
+from sqlalchemy import event
+
+from app.models.dossier import Dossier
+from app.models.echeance import Echeance
+from app.models.saisie import SaisieComptable
+from app.models.document_requis import DocumentRequis
+from app.models.declaration_fiscale import DeclarationFiscale
+from app.models.historique import HistoriqueDossier
+from app.services.dossier_scaffolding import DossierScaffoldingService, build_echeances_mensuelles
+
+
+def nouveau_dossier(make_dossier, service_type: str) -> Dossier:
+    return make_dossier.build(
+        f"{service_type}-2025-0001",
+        nom_client="Client Test",
+        type_dossier=service_type,
+        services_list=[service_type]
+    )
+
+
+def scaffolding_service(db, make_dossier) -> DossierScaffoldingService:
+    return DossierScaffoldingService(db, cabinet_id=make_dossier.cabinet.id, user_id=make_dossier.user.id)
+
+
+class TestBuildEcheances:
+    """Tests de la construction en mémoire"""
+
+    def test_comptabilite_douze_mois(self):
+        echeances = build_echeances_mensuelles('COMPTABILITE', 2025)
+
+        assert len(echeances) == 12
+        assert [e['mois'] for e in echeances] == list(range(1, 13))
+        assert all(len(e['saisies']) == 6 for e in echeances)
+        assert all(len(e['documents_requis']) == 3 for e in echeances)
+
+    def test_paie_journaux(self):
+        echeances = build_echeances_mensuelles('PAIE', 2025)
+
+        journaux = {s['type_journal'] for s in echeances[0]['saisies']}
+        assert journaux == {'DSN', 'BULLETINS', 'DUCS', 'DECLARATION_SOCIALE', 'CHARGES_SOCIALES'}
+
+
+class TestPersist:
+    """Tests de la persistance groupée"""
+
+    def test_multi_services(self, db, make_dossier):
+        scaffolding = scaffolding_service(db, make_dossier)
+        for service_type in ['COMPTABILITE', 'PAIE', 'FISCALITE']:
+            scaffolding.add_dossier(nouveau_dossier(make_dossier, service_type), service_type, annee=2025, type_entreprise='SARL')
+
+        counts = scaffolding.persist()
+        db.commit()
+
+        assert counts['dossiers'] == 3
+        assert counts['saisies'] == 12 * 6 + 12 * 5
+        assert counts['documents_requis'] == 12 * 3 + 12 * 2
+        assert counts['declarations'] == db.query(DeclarationFiscale).count() > 0
+        # Une échéance par mois (COMPTA + PAIE), aucune pour les déclarations fiscales
+        assert counts['echeances'] == 24
+        assert db.query(Echeance).count() == counts['echeances']
+        assert db.query(HistoriqueDossier).count() == 3
+
+    def test_saisies_rattachees_aux_bonnes_echeances(self, db, make_dossier):
+        scaffolding = scaffolding_service(db, make_dossier)
+        scaffolding.add_dossier(nouveau_dossier(make_dossier, 'COMPTABILITE'), 'COMPTABILITE', annee=2025)
+        scaffolding.persist()
+        db.commit()
+
+        for saisie in db.query(SaisieComptable).all():
+            echeance = db.get(Echeance, saisie.echeance_id)
+            assert echeance.mois == saisie.mois
+            assert echeance.dossier_id == saisie.dossier_id
+        for doc in db.query(DocumentRequis).all():
+            assert db.get(Echeance, doc.echeance_id).mois == doc.mois
+
+    def test_nombre_de_requetes_borne(self, db, make_dossier):
+        scaffolding = scaffolding_service(db, make_dossier)
+        statements = []
+        event.listen(db.get_bind(), "before_cursor_execute",
+                     lambda conn, cursor, statement, *args: statements.append(statement))
+
+        for service_type in ['COMPTABILITE', 'PAIE', 'FISCALITE']:
+            scaffolding.add_dossier(nouveau_dossier(make_dossier, service_type), service_type, annee=2025)
+        scaffolding.persist()
+
+        # Indépendant du nombre de lignes : une instruction par table
+        # (plus un INSERT par dossier, que SQLite ne regroupe pas)
+        assert len([s for s in statements if s.startswith("INSERT INTO echeances")]) == 1
+        assert len(statements) <= 3 + 5
@@ -0,0 +1,128 @@
+"""
+Tests de l'envoi des fichiers stockés (Range, ETag, X-Accel-Redirect)
+"""
+import hashlib
+
+import pytest
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.testclient import TestClient
+
+from app.api.dossiers import create_download_token, download_signed_document
+from app.core import downloads
+from app.core.downloads import serve_stored_file
+from app.core.storage import LocalStorage, MemoryStorage
+from app.models import Document, StatutTraitement
+from app.models.document import TypeDocument
+
+CONTENU = bytes(range(256)) * 40
+SHA256 = hashlib.sha256(CONTENU).hexdigest()
+
+
+@pytest.fixture(params=["local", "memory"])
+def client(request, tmp_path):
+    backend = LocalStorage(str(tmp_path)) if request.param == "local" else MemoryStorage()
+    writer = backend.open_writer("blobs/releve")
+    writer.write(CONTENU)
+    writer.commit()
+
+    app = FastAPI()
+
+    @app.get("/fichier")
+    def fichier(request: Request):
+        return serve_stored_file(request, "blobs/releve", "relevé.pdf", "application/pdf", SHA256, backend=backend)
+
+    return TestClient(app)
+
+
+class TestServeStoredFile:
+    """Tests des réponses de téléchargement"""
+
+    def test_fichier_complet(self, client):
+        response = client.get("/fichier")
+
+        assert response.status_code == 200
+        assert response.content == CONTENU
+        assert response.headers["etag"] == f'"{SHA256}"'
+        assert response.headers["accept-ranges"] == "bytes"
+
+    def test_if_none_match(self, client):
+        response = client.get("/fichier", headers={"If-None-Match": f'W/"autre", "{SHA256}"'})
+
+        assert response.status_code == 304
+        assert response.content == b""
+
+    @pytest.mark.parametrize("plage, debut, fin", [
+        ("bytes=100-199", 100, 199),
+        ("bytes=10000-", 10000, len(CONTENU) - 1),
+        ("bytes=-50", len(CONTENU) - 50, len(CONTENU) - 1),
+    ])
+    def test_range(self, client, plage, debut, fin):
+        response = client.get("/fichier", headers={"Range": plage})
+
+        assert response.status_code == 206
+        assert response.content == CONTENU[debut:fin + 1]
+        assert response.headers["content-range"] == f"bytes {debut}-{fin}/{len(CONTENU)}"
+
+    def test_range_hors_fichier(self, client):
+        response = client.get("/fichier", headers={"Range": f"bytes={len(CONTENU)}-"})
+
+        assert response.status_code == 416
+
+    def test_x_accel_redirect(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(downloads.settings, "STORAGE_ACCEL_REDIRECT_PREFIX", "/_documents")
+        backend = LocalStorage(str(tmp_path))
+        writer = backend.open_writer("blobs/releve")
+        writer.write(CONTENU)
+        writer.commit()
+
+        app = FastAPI()
+
+        @app.get("/fichier")
+        def fichier(request: Request):
+            return serve_stored_file(request, "blobs/releve", "releve.pdf", "application/pdf", SHA256, backend=backend)
+
+        response = TestClient(app).get("/fichier")
+
+        assert response.status_code == 200
+        assert response.headers["x-accel-redirect"] == "/_documents/blobs/releve"
+        assert response.content == b""
+
+
+class TestLienSigne:
+    """Le lien signé revérifie le document à chaque téléchargement"""
+
+    @pytest.fixture
+    def document(self, db, make_dossier):
+        dossier = make_dossier("C-1")
+        document = Document(
+            cabinet_id=dossier.cabinet_id, dossier_id=dossier.id, user_id=dossier.user_id, nom="releve.pdf",
+            nom_fichier_stockage="releve.pdf", type=TypeDocument.RELEVE_BANCAIRE, chemin_fichier="blobs/releve",
+            hash_fichier=SHA256, taille=len(CONTENU), mime_type="application/pdf",
+        )
+        db.add(document)
+        db.commit()
+        return document
+
+    async def telecharger(self, db, token: str) -> int:
+        with pytest.raises(HTTPException) as exc:
+            await download_signed_document(token, request=None, db=db)
+        return exc.value.status_code
+
+    @pytest.mark.asyncio
+    async def test_document_rejete_apres_emission(self, db, document):
+        token = create_download_token(document)
+        document.statut_traitement = StatutTraitement.REJETE
+        db.commit()
+
+        assert await self.telecharger(db, token) == 403
+
+    @pytest.mark.asyncio
+    async def test_contenu_remplace_ou_document_supprime(self, db, document):
+        token = create_download_token(document)
+        document.hash_fichier = "0" * 64
+        db.commit()
+        assert await self.telecharger(db, token) == 403
+
+        db.delete(document)
+        db.commit()
+        assert await self.telecharger(db, token) == 404
@@ -0,0 +1,71 @@
+"""
+Tests pour les statistiques agrégées des échéances
+"""
+from datetime import date, timedelta
+
+from sqlalchemy import event
+
+from app.models.declaration_fiscale import DeclarationFiscale
+from app.models.dossier import Dossier, StatusDossier
+from app.models.echeance import Echeance
+from app.services.echeance_stats import compute_echeances_stats
+
+
+def add_echeance(db, dossier: Dossier, jours: int, statut: str) -> None:
+    db.add(Echeance(
+        cabinet_id=dossier.cabinet_id,
+        dossier_id=dossier.id,
+        mois=1,
+        annee=2025,
+        periode_label="Janvier 2025",
+        date_echeance=date.today() + timedelta(days=jours),
+        statut=statut
+    ))
+
+
+def add_declaration(db, dossier: Dossier, jours: int, statut: str) -> None:
+    limite = date.today() + timedelta(days=jours)
+    db.add(DeclarationFiscale(
+        cabinet_id=dossier.cabinet_id,
+        dossier_id=dossier.id,
+        type_declaration="TVA_CA3",
+        regime="REEL_NORMAL",
+        periode_debut=limite,
+        periode_fin=limite,
+        date_limite=limite,
+        statut=statut
+    ))
+
+
+class TestComputeEcheancesStats:
+    """Tests des tranches calculées en SQL"""
+
+    def test_tranches(self, db, make_dossier):
+        dossier = make_dossier("COMPTA-1", statut=StatusDossier.EN_COURS)
+        add_echeance(db, dossier, -5, 'A_FAIRE')      # en retard, critique
+        add_echeance(db, dossier, 2, 'A_FAIRE')       # critique, urgente, à faire
+        add_echeance(db, dossier, 30, 'A_FAIRE')      # à faire
+        add_echeance(db, dossier, -30, 'COMPLETE')
+        add_declaration(db, dossier, 5, 'A_FAIRE')     # urgente, à faire
+        add_declaration(db, dossier, -1, 'TELEDECLAREE')
+        # Un autre cabinet ne doit pas être compté
+        autre = make_dossier("COMPTA-2", cabinet_id=dossier.cabinet_id + 1, statut=StatusDossier.EN_COURS)
+        add_echeance(db, autre, -5, 'A_FAIRE')
+        db.commit()
+        cabinet_id = make_dossier.cabinet.id
+
+        statements = []
+        event.listen(db.get_bind(), "before_cursor_execute",
+                     lambda conn, cursor, statement, *args: statements.append(statement))
+
+        stats = compute_echeances_stats(db, db.query(Dossier).filter(Dossier.cabinet_id == cabinet_id))
+
+        assert stats == {
+            "en_retard": 1,
+            "critiques": 2,
+            "urgentes": 2,
+            "a_faire": 3,
+            "completes": 2,
+            "total": 6
+        }
+        assert len(statements) == 1
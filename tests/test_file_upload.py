@@ -127,4 +127,62 @@ class TestFileValidator:
                 assert hash1 == hash2
                 assert len(hash1) == 64  # SHA256 = 64 caractères hex
             finally:
-                os.unlink(tmp.name)
\ No newline at end of file
+                os.unlink(tmp.name)
+
+class TestStoreFile:
+    """Tests de l'enregistrement en un seul passage"""
+    
+    @pytest.mark.asyncio
+    async def test_enregistrement_et_hash(self, tmp_path):
+        """Le fichier est écrit sous son nom final avec le SHA-256 du contenu"""
+        import hashlib
+        validator = FileValidator(max_size_mb=1)
+        validator.CHUNK_SIZE = 1024
+        content = b"%PDF-1.4\n" + b"0" * 5000
+        file = UploadFile(filename="rapport.pdf", file=BytesIO(content))
+        
+        stored = await validator.store_file(file, str(tmp_path))
+        
+        assert stored.mime_type == "application/pdf"
+        assert stored.size == len(content)
+        assert stored.sha256 == hashlib.sha256(content).hexdigest()
+        assert open(stored.path, "rb").read() == content
+        assert os.listdir(tmp_path) == [stored.safe_filename]
+    
+    @pytest.mark.asyncio
+    async def test_echec_ne_laisse_aucun_fichier(self, tmp_path):
+        """Dépassement de taille : ni fichier final ni fichier temporaire"""
+        validator = FileValidator(max_size_mb=1)
+        file = UploadFile(filename="gros.pdf", file=BytesIO(b"%PDF-1.4\n" + b"0" * (2 * 1024 * 1024)))
+        
+        with pytest.raises(HTTPException) as exc_info:
+            await validator.store_file(file, str(tmp_path))
+        
+        assert exc_info.value.status_code == 413
+        assert os.listdir(tmp_path) == []
+    
+    @pytest.mark.asyncio
+    async def test_lot_refuse_en_bloc(self, tmp_path):
+        """Un fichier refusé annule les fichiers du lot déjà enregistrés"""
+        import hashlib
+        validator = FileValidator(max_size_mb=1)
+        contents = [b"%PDF-1.4\n" + bytes([i]) * 100 for i in range(5)]
+        
+        def lot():
+            return [
+                UploadFile(filename=f"releve_{i}.pdf", file=BytesIO(content))
+                for i, content in enumerate(contents)
+            ]
+        
+        with pytest.raises(HTTPException) as exc_info:
+            await validator.store_files(
+                lot() + [UploadFile(filename="script.pdf", file=BytesIO(b"#!/bin/sh\n"))],
+                str(tmp_path), concurrency=2
+            )
+        
+        assert "dangereux" in exc_info.value.detail
+        assert os.listdir(tmp_path) == []
+        
+        # Résultats dans l'ordre des fichiers envoyés
+        stored = await validator.store_files(lot(), str(tmp_path), concurrency=2)
+        assert [s.sha256 for s in stored] == [hashlib.sha256(c).hexdigest() for c in contents]
@@ -0,0 +1,75 @@
+"""
+Tests des index composites et partiels sur les filtres fréquents (EXPLAIN)
+"""
+from datetime import date
+
+import pytest
+from sqlalchemy import select
+
+from app.models.document import TypeDocument
+from app.models.document_requis import DocumentRequis
+from app.models.dossier import Dossier, StatusDossier
+from app.models.echeance import Echeance
+from app.models.notification import Notification
+
+
+@pytest.fixture
+def engine(db):
+    return db.get_bind()
+
+
+def plan(engine, query) -> str:
+    """Plan d'exécution SQLite d'une requête ORM"""
+    compiled = query.compile(engine)
+    params = tuple(compiled.params[name] for name in compiled.positiontup)
+    with engine.connect() as conn:
+        rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", params).all()
+    return "\n".join(row[-1] for row in rows)
+
+
+class TestIndexesFiltres:
+    """Le planificateur utilise les index des chemins d'accès fréquents"""
+
+    def test_dossiers_par_cabinet_statut_echeance(self, engine):
+        query = select(Dossier.id).where(
+            Dossier.cabinet_id == 1,
+            Dossier.statut == StatusDossier.EN_COURS,
+            Dossier.date_echeance < date.today(),
+        )
+        assert "ix_dossiers_cabinet_statut_echeance" in plan(engine, query)
+
+    def test_dossiers_actifs_index_partiel(self, engine):
+        query = select(Dossier.id).where(
+            Dossier.cabinet_id == 1,
+            Dossier.statut != StatusDossier.COMPLETE,
+            Dossier.statut != StatusDossier.ARCHIVE,
+            Dossier.date_echeance < date.today(),
+        )
+        assert "ix_dossiers_actifs_cabinet_echeance" in plan(engine, query)
+
+    def test_echeances(self, engine):
+        par_dossier = select(Echeance.id).where(Echeance.dossier_id == 1, Echeance.statut == "COMPLETE")
+        a_faire = select(Echeance.dossier_id).where(
+            Echeance.date_echeance < date.today(), Echeance.statut != "COMPLETE"
+        )
+        assert "ix_echeances_dossier_statut" in plan(engine, par_dossier)
+        assert "ix_echeances_a_faire_date" in plan(engine, a_faire)
+
+    def test_documents_requis_et_notifications(self, engine):
+        documents = select(DocumentRequis.id).where(
+            DocumentRequis.echeance_id == 1,
+            DocumentRequis.type_document == list(TypeDocument)[0],
+            DocumentRequis.mois == 1,
+            DocumentRequis.annee == 2025,
+        )
+        non_lues = (
+            select(Notification.id)
+            .where(Notification.user_id == 1, Notification.is_read == False)  # noqa: E712
+            .order_by(Notification.sent_at.desc())
+            .limit(50)
+        )
+        assert "ix_documents_requis_echeance_type_periode" in plan(engine, documents)
+        plan_notifications = plan(engine, non_lues)
+        assert "ix_notifications_user_is_read_sent_at" in plan_notifications
+        # Tri servi par l'index, sans tri temporaire
+        assert "TEMP B-TREE" not in plan_notifications
@@ -0,0 +1,54 @@
+"""
+Tests pour le cache de l'utilisateur authentifié
+"""
+import pytest
+from sqlalchemy import event
+
+from app.models.user import User
+from app.services.principal_cache import load_principal, local_principal_cache
+
+
+@pytest.fixture(autouse=True)
+def alice(db):
+    local_principal_cache.clear()
+    db.add(User(
+        id=1, cabinet_id=1, username="alice", email="alice@example.com",
+        hashed_password="hash", role="collaborateur"
+    ))
+    db.commit()
+
+
+def count_statements(db):
+    statements = []
+    event.listen(db.get_bind(), "before_cursor_execute",
+                 lambda conn, cursor, statement, *args: statements.append(statement))
+    return statements
+
+
+class TestPrincipalCache:
+    """Tests du chemin chaud de l'authentification"""
+
+    def test_aucune_requete_une_fois_en_cache(self, db):
+        load_principal(db, "alice")
+        db.expunge_all()
+        statements = count_statements(db)
+
+        user = load_principal(db, "alice")
+
+        assert (user.id, user.cabinet_id, user.role) == (1, 1, "collaborateur")
+        assert statements == []
+        # Les colonnes non mises en cache sont chargées à la demande
+        assert user.hashed_password == "hash"
+
+    def test_invalidation_au_commit(self, db):
+        user = load_principal(db, "alice")
+        user.role = "manager"
+        user.is_active = False
+        db.commit()
+        db.expunge_all()
+
+        user = load_principal(db, "alice")
+        assert (user.role, user.is_active) == ("manager", False)
+
+    def test_utilisateur_inconnu(self, db):
+        assert load_principal(db, "inconnu") is None
@@ -0,0 +1,81 @@
+"""
+Tests de la recherche dans les dossiers et les documents
+"""
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.models import Cabinet, Document, StatutTraitement
+from app.models.document import TypeDocument
+from app.services.access_scope import AccessScope
+from app.services.search import _tsquery, search
+
+
+@pytest.fixture
+def cabinets(db, make_dossier):
+    user = make_dossier.user
+    autre = Cabinet(nom="Autre", slug="autre")
+    db.add(autre)
+    db.flush()
+
+    martin = make_dossier("COMPTA-2025-0001", nom_client="Boulangerie Martin")
+    dupont = make_dossier("COMPTA-2025-0002", nom_client="Garage Dupont", notes="Client de la boulangerie voisine")
+    make_dossier("COMPTA-2025-0001", nom_client="Boulangerie Martin", cabinet_id=autre.id)
+
+    for d, nom, texte, statut in (
+        (martin, "releve_mars.pdf", "Relevé de compte Boulangerie Martin, loyer", StatutTraitement.TRAITE),
+        (dupont, "facture_pneus.pdf", "Facture pneus et loyer du garage", StatutTraitement.TRAITE),
+        (dupont, "loyer.pdf", "Loyer", StatutTraitement.REJETE),
+    ):
+        db.add(Document(cabinet_id=d.cabinet_id, dossier_id=d.id, user_id=user.id, nom=nom,
+                        nom_fichier_stockage=nom, type=TypeDocument.AUTRE, chemin_fichier="blobs/x",
+                        texte_extrait=texte, statut_traitement=statut))
+    db.commit()
+    return (make_dossier.cabinet, autre), user
+
+
+class TestSearch:
+    """Tests du classement et du périmètre des résultats"""
+
+    def test_classement_et_cabinet(self, db, cabinets):
+        (cabinet, _), user = cabinets
+        scope = AccessScope(user_id=user.id, restricted=False)
+
+        resultat = search(db, cabinet.id, scope, "boulangerie")
+
+        # Nom du client avant une mention dans les notes ; pas l'autre cabinet
+        assert [d["nom_client"] for d in resultat["dossiers"]["items"]] == ["Boulangerie Martin", "Garage Dupont"]
+        assert [d["nom"] for d in resultat["documents"]["items"]] == ["releve_mars.pdf"]
+
+    def test_perimetre_collaborateur_et_rejets(self, db, cabinets):
+        (cabinet, _), user = cabinets
+        scope = AccessScope(user_id=user.id, restricted=True, client_names=["Garage Dupont"])
+
+        resultat = search(db, cabinet.id, scope, "loyer", kind="documents")
+
+        assert "dossiers" not in resultat
+        assert [d["nom"] for d in resultat["documents"]["items"]] == ["facture_pneus.pdf"]
+
+    def test_pagination(self, db, cabinets):
+        (cabinet, _), user = cabinets
+        scope = AccessScope(user_id=user.id, restricted=False)
+
+        premiere = search(db, cabinet.id, scope, "compta", kind="dossiers", limit=1)
+        suivante = search(db, cabinet.id, scope, "compta", kind="dossiers", limit=1, offset=1)
+
+        assert premiere["dossiers"]["has_more"] is True
+        assert suivante["dossiers"]["has_more"] is False
+        assert premiere["dossiers"]["items"][0]["id"] != suivante["dossiers"]["items"][0]["id"]
+
+    def test_jokers_like_echappes(self, db, cabinets):
+        (cabinet, _), user = cabinets
+        scope = AccessScope(user_id=user.id, restricted=False)
+
+        assert search(db, cabinet.id, scope, "%")["dossiers"]["items"] == []
+        assert search(db, cabinet.id, scope, "compta_2025")["dossiers"]["items"] == []
+        assert len(search(db, cabinet.id, scope, "compta-2025")["dossiers"]["items"]) == 2
+
+    def test_requete_postgresql(self):
+        compiled = _tsquery("loyer -garage").compile(dialect=postgresql.dialect())
+
+        assert str(compiled).count("websearch_to_tsquery(") == 2 and " || " in str(compiled)
+        assert sorted(v for v in compiled.params.values() if v != "loyer -garage") == ["french", "simple"]
@@ -0,0 +1,101 @@
+"""
+Tests des backends de stockage (même contrat pour chaque backend)
+"""
+import pytest
+
+from app.core import storage as storage_module
+from app.core.storage import LocalStorage, MemoryStorage, S3Storage, storage_key
+
+
+@pytest.fixture
+def s3_backend(monkeypatch):
+    """Bucket S3 émulé en mémoire (moto), à la place d'un MinIO"""
+    moto = pytest.importorskip("moto")
+    boto3 = pytest.importorskip("boto3")
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "test")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "test")
+    with moto.mock_aws():
+        client = boto3.client("s3", region_name="us-east-1")
+        client.create_bucket(Bucket="documents")
+        yield S3Storage("documents", client=client)
+
+
+@pytest.fixture(params=["local", "memory", "s3"])
+def backend(request, tmp_path):
+    if request.param == "local":
+        return LocalStorage(str(tmp_path))
+    if request.param == "memory":
+        return MemoryStorage()
+    return request.getfixturevalue("s3_backend")
+
+
+def write(backend, key: str, *chunks: bytes):
+    writer = backend.open_writer(key)
+    for chunk in chunks:
+        writer.write(chunk)
+    writer.commit()
+
+
+class TestStorageBackends:
+    """Contrat commun des backends"""
+
+    def test_ecriture_lecture(self, backend):
+        write(backend, "blobs/ab/releve", b"debut-", b"fin")
+
+        assert backend.stat("blobs/ab/releve").size == 9
+        assert b"".join(backend.iter_chunks("blobs/ab/releve")) == b"debut-fin"
+        assert b"".join(backend.iter_chunks("blobs/ab/releve", start=2, length=4)) == b"but-"
+        assert [obj.key for obj in backend.iter_objects("blobs")] == ["blobs/ab/releve"]
+        assert backend.stat("blobs/absent") is None
+
+    def test_deplacement_et_suppression(self, backend):
+        write(backend, "tmp/upload.part", b"contenu")
+        backend.move("tmp/upload.part", "blobs/final")
+
+        assert not backend.exists("tmp/upload.part")
+        assert backend.exists("blobs/final")
+        assert backend.delete("blobs/final") is True
+        assert list(backend.iter_objects("blobs")) == []
+
+    def test_abort(self, backend):
+        writer = backend.open_writer("tmp/interrompu")
+        writer.write(b"partiel")
+        writer.abort()
+
+        assert not backend.exists("tmp/interrompu")
+
+
+class TestS3Storage:
+    """Spécificités du backend S3"""
+
+    def test_multipart(self, s3_backend, monkeypatch):
+        monkeypatch.setattr(storage_module, "S3_PART_SIZE", 5 * 1024 * 1024)
+        partie = b"x" * (5 * 1024 * 1024)
+        writer = s3_backend.open_writer("blobs/gros")
+        writer.write(partie)
+        writer.write(b"fin")
+        writer.commit()
+
+        assert len(writer.parts) == 2
+        assert s3_backend.stat("blobs/gros").size == len(partie) + 3
+
+    def test_url_presignee(self, s3_backend):
+        write(s3_backend, "blobs/releve", b"contenu")
+        url = s3_backend.presigned_url("blobs/releve", 300, filename="relevé.pdf")
+
+        assert "/blobs/releve?" in url and "response-content-disposition=attachment" in url
+        assert LocalStorage("/tmp").presigned_url("blobs/releve", 300) is None
+
+
+class TestLocalStorage:
+    """Spécificités du backend disque"""
+
+    def test_cle_hors_racine_refusee(self, tmp_path):
+        with pytest.raises(ValueError):
+            LocalStorage(str(tmp_path)).open_writer("../evasion")
+
+    def test_chemin_historique(self, monkeypatch):
+        monkeypatch.setattr(storage_module.settings, "UPLOAD_PATH", "/srv/uploads")
+
+        assert storage_key("/srv/uploads/blobs/ab/cd/abcd") == "blobs/ab/cd/abcd"
+        assert storage_key("blobs/ab/cd/abcd") == "blobs/ab/cd/abcd"
@@ -0,0 +1,129 @@
+"""
+Tests pour le gestionnaire de connexions WebSocket (livraison locale)
+"""
+import asyncio
+import json
+
+import pytest
+
+from app.core import websocket as ws
+from app.core.websocket import ConnectionManager, parse_topics
+
+
+class FakeWebSocket:
+    """WebSocket minimale qui enregistre les messages envoyés"""
+
+    def __init__(self, delay: float = 0):
+        self.sent = []
+        self.delay = delay
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, message: str):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.sent.append(message)
+
+
+async def drain():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+class TestConnectionManager:
+    """Tests de la distribution aux sockets locales"""
+
+    @pytest.mark.asyncio
+    async def test_message_personnel(self):
+        manager = ConnectionManager()
+        alice, bob = FakeWebSocket(), FakeWebSocket()
+        await manager.connect(alice, user_id=1)
+        await manager.connect(bob, user_id=2)
+
+        manager.deliver_local(ws.build_notification("new_alert", {"id": 7}), user_id=1)
+        await drain()
+
+        assert [json.loads(m)["data"] for m in alice.sent] == [{"id": 7}]
+        assert bob.sent == []
+        await manager.stop()
+
+    @pytest.mark.asyncio
+    async def test_client_lent_ne_bloque_pas(self, monkeypatch):
+        monkeypatch.setattr(ws, "QUEUE_MAXSIZE", 3)
+        manager = ConnectionManager()
+        lent, rapide = FakeWebSocket(delay=10), FakeWebSocket()
+        lent_id = await manager.connect(lent, user_id=1)
+        await manager.connect(rapide, user_id=2)
+
+        for i in range(10):
+            manager.deliver_local(str(i))
+            await drain()
+
+        # Le client rapide a tout reçu, la file du client lent est bornée
+        assert rapide.sent == [str(i) for i in range(10)]
+        assert manager.active_connections[lent_id].queue.qsize() <= 3
+        assert manager.active_connections[lent_id].dropped > 0
+        await manager.stop()
+
+    @pytest.mark.asyncio
+    async def test_abonnements_filtrent(self):
+        manager = ConnectionManager()
+        alertes, tout = FakeWebSocket(), FakeWebSocket()
+        alertes_id = await manager.connect(alertes, user_id=1)
+        await manager.connect(tout, user_id=1)
+
+        assert manager.subscribe(alertes_id, ["new_alert"]) == {"new_alert"}
+        manager.deliver_local("rappel", user_id=1, topic="deadline_reminder")
+        manager.deliver_local("alerte", topic="new_alert")
+        await drain()
+
+        assert alertes.sent == ["alerte"]
+        assert tout.sent == ["rappel", "alerte"]
+
+        # Sans abonnement restant, la connexion reçoit de nouveau tout
+        assert manager.unsubscribe(alertes_id, ["new_alert"]) == {"all"}
+        await manager.stop()
+
+    @pytest.mark.asyncio
+    async def test_sujets_valides_et_bornes(self, monkeypatch):
+        assert parse_topics({"channel": "new_alert"}) == ["new_alert"]
+        assert parse_topics({}) == ["all"]
+        # Une chaîne n'est pas une liste de sujets (pas d'abonnement caractère par caractère)
+        for invalide in ({"channels": "new_alert"}, {"channels": [["x"]]}, {"channels": []}, {"channel": 3}):
+            with pytest.raises(ValueError):
+                parse_topics(invalide)
+
+        monkeypatch.setattr(ws, "MAX_TOPICS_PER_CONNECTION", 2)
+        manager = ConnectionManager()
+        connection_id = await manager.connect(FakeWebSocket(), user_id=1)
+        manager.subscribe(connection_id, ["a", "b"])
+        with pytest.raises(ValueError):
+            manager.subscribe(connection_id, ["c"])
+        assert manager.active_connections[connection_id].topics == {"a", "b"}
+        await manager.stop()
+
+    @pytest.mark.asyncio
+    async def test_deconnexion_nettoie_les_index(self):
+        manager = ConnectionManager()
+        connection_id = await manager.connect(FakeWebSocket(), user_id=3)
+        manager.subscribe(connection_id, ["new_alert"])
+
+        manager.disconnect(connection_id)
+
+        assert manager.active_connections == {}
+        assert manager.user_connections == {}
+        assert manager.topic_connections == {}
+        await manager.stop()
+
+    @pytest.mark.asyncio
+    async def test_envoi_bloque_ferme_la_connexion(self, monkeypatch):
+        monkeypatch.setattr(ws, "SEND_TIMEOUT", 0.01)
+        manager = ConnectionManager()
+        connection_id = await manager.connect(FakeWebSocket(delay=10), user_id=1)
+
+        manager.send_to_connection(connection_id, "x")
+        await asyncio.sleep(0.05)
+
+        assert connection_id not in manager.active_connections
+        await manager.stop()